@@ -8,11 +8,15 @@ import os
 # Redis connection URL (Celery broker ve result backend için)
 REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
 
+# ✅ EAGER MOD: CELERY_EAGER=1 ile Redis olmadan yerel/test çalıştırma
+# Görevler çağıran süreçte hemen çalışır, sonuçlar süreç içi bellekte saklanır
+CELERY_EAGER = os.getenv("CELERY_EAGER", "0").lower() in ("1", "true", "yes")
+
 # Celery app oluştur
 celery_app = Celery(
     "osym_rehberi",
-    broker=REDIS_URL,
-    backend=REDIS_URL,
+    broker="memory://" if CELERY_EAGER else REDIS_URL,
+    backend="cache+memory://" if CELERY_EAGER else REDIS_URL,
     include=["tasks.recommendation_tasks"]  # Task modüllerini dahil et
 )
 
@@ -30,3 +34,9 @@ celery_app.conf.update(
     worker_max_tasks_per_child=50,  # Her worker 50 task sonrası restart
 )
 
+if CELERY_EAGER:
+    celery_app.conf.update(
+        task_always_eager=True,
+        task_eager_propagates=False,
+        task_store_eager_result=True,  # /recommendations/jobs/{job_id} eager sonuçları da okuyabilsin
+    )
@@ -1,74 +1,644 @@
-"""Basit in-memory cache için yardımcı modül"""
-from typing import Any, Optional, Dict
-from datetime import datetime, timedelta
+"""
+İki katmanlı cache alt sistemi
+
+1. katman: süreç içi, boyutu sınırlı LRU + TTL cache (her uvicorn worker'ında).
+2. katman (isteğe bağlı): worker'lar arasında paylaşılan cache. Yalnızca
+   yapılandırıldığında açılır: CACHE_REDIS_URL tanımlıysa Redis; açıkça
+   CACHE_SHARED_BACKEND=sqlite verilirse uygulamaya ait bir klasörde (0700)
+   yalnızca süreç sahibinin okuyabildiği (0600) bir SQLite dosyası. Değerler
+   pickle ile saklandığından başka kullanıcıya ait ya da grup/herkes tarafından
+   yazılabilen dosya/klasör reddedilir. Paylaşılan anahtarlar CACHE_VERSION
+   (yoksa şema kaynaklarından türetilen build sürümü) ile öneklenir; böylece
+   deploy sonrası eski sürümün DTO'ları okunmaz.
+
+Yerel katmanda bulunmayan anahtar paylaşılan katmandan okunur ve yerel katmana
+kalan ömrüyle alınır. `get_or_set` ve `@cached` aynı anahtar için eşzamanlı
+hesaplamaları tekilleştirir (single-flight): ilk çağrı hesaplar, diğerleri
+onun sonucunu bekler. İsabet/ıskalama/tahliye sayaçları `cache_stats()` ile
+okunur.
+
+Eski `get_cache` / `set_cache` / `clear_cache` / `clear_expired` fonksiyonları
+varsayılan cache üzerinde aynen çalışır.
+"""
+import asyncio
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sqlite3
+import stat
+import struct
 import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
+from core.logging_config import api_logger
+
+TTL = Union[timedelta, float, int, None]
 
-# ✅ Thread-safe basit cache implementasyonu
-_cache: Dict[str, tuple[Any, datetime]] = {}
-_cache_lock = threading.Lock()
 _default_ttl = timedelta(minutes=5)  # 5 dakika default TTL
+_SHARED_PURGE_EVERY = 256  # Paylaşılan katmanda her N yazımda bir süresi dolanları sil
+_MISSING = object()
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_DEFAULT_SQLITE_PATH = os.path.join(_BACKEND_DIR, ".cache", "shared_cache.sqlite3")
+_REDIS_HEADER = struct.Struct("!d")  # expires_at (Unix saniye)
+
+
+def _ttl_seconds(ttl: TTL) -> float:
+    if ttl is None:
+        ttl = _default_ttl
+    if isinstance(ttl, timedelta):
+        return ttl.total_seconds()
+    return float(ttl)
+
+
+class CacheStats:
+    """Thread-safe cache sayaçları"""
+
+    FIELDS = (
+        "hits", "misses", "shared_hits", "sets", "evictions",
+        "expirations", "stampede_waits", "shared_errors",
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def incr(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[field] += amount
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = dict.fromkeys(self.FIELDS, 0)
+
+
+class LocalLRUCache:
+    """Boyutu sınırlı, süreç içi LRU + TTL cache (monotonic saat ile)"""
+
+    def __init__(self, max_entries: int = 1024, stats: Optional[CacheStats] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, max_entries)
+        self.stats = stats or CacheStats()
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expiry = entry
+            if self._clock() >= expiry:
+                del self._entries[key]
+                self.stats.incr("expirations")
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, self._clock() + ttl_seconds)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if key.startswith(prefix)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._purge_expired()
+
+    def _purge_expired(self) -> int:
+        now = self._clock()
+        expired = [key for key, (_, expiry) in self._entries.items() if now >= expiry]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self.stats.incr("expirations", len(expired))
+        return len(expired)
+
+    def _evict(self) -> None:
+        # Önce süresi dolanları at, hâlâ doluysa en az kullanılanları tahliye et
+        self._purge_expired()
+        overflow = len(self._entries) - self.max_entries
+        for _ in range(max(0, overflow)):
+            self._entries.popitem(last=False)
+        if overflow > 0:
+            self.stats.incr("evictions", overflow)
+
+
+def _check_owned(path: str, st: os.stat_result) -> None:
+    if hasattr(os, "getuid") and st.st_uid != os.getuid():
+        raise PermissionError(f"{path} başka bir kullanıcıya ait")
+    if st.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        raise PermissionError(f"{path} grup/herkes tarafından yazılabilir")
+
+
+def _secure_sqlite_file(path: str) -> None:
+    """SQLite dosyasını 0600 izinle oluştur; başkasına ait dosya/klasörü reddet
+
+    Paylaşılan katmandaki değerler pickle ile açıldığından dosyaya yazabilen
+    herkes bu süreçte kod çalıştırabilir. WAL/SHM dosyaları SQLite tarafından
+    veritabanı dosyasının izinleriyle oluşturulur.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    _check_owned(directory, os.stat(directory))
+    fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, "O_NOFOLLOW", 0), 0o600)
+    try:
+        _check_owned(path, os.fstat(fd))
+    finally:
+        os.close(fd)
+    os.chmod(path, 0o600)
+
+
+class SQLiteSharedBackend:
+    """Redis yokken aynı makinedeki worker'ların paylaştığı SQLite cache katmanı"""
+
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+        _secure_sqlite_file(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= time.time():
+            self.delete(key)
+            return None
+        return row[0], row[1]
+
+    def set(self, key: str, payload: bytes, expires_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(payload), expires_at),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def delete_prefix(self, prefix: str) -> int:
+        # LIKE yerine aralık karşılaştırması: öneki kaçış karakterlerinden bağımsız, indeksi kullanır
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM cache_entries WHERE key >= ? AND key < ?", (prefix, prefix + "\U0010ffff")
+            ).rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+
+class RedisSharedBackend:
+    """Redis üzerinde paylaşılan cache katmanı (anahtarlar önekli, TTL Redis'te)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "osym:cache:"):
+        import redis
+
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def get(self, key: str) -> Optional[Tuple[bytes, float]]:
+        raw = self._client.get(self.prefix + key)
+        if raw is None:
+            return None
+        (expires_at,) = _REDIS_HEADER.unpack_from(raw)
+        return raw[_REDIS_HEADER.size:], expires_at
+
+    def set(self, key: str, payload: bytes, expires_at: float) -> None:
+        ttl_ms = max(1, int((expires_at - time.time()) * 1000))
+        self._client.set(self.prefix + key, _REDIS_HEADER.pack(expires_at) + payload, px=ttl_ms)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self.prefix + key)
+
+    def delete_prefix(self, prefix: str) -> int:
+        pattern = self.prefix + "".join("\\" + c if c in "*?[]\\" else c for c in prefix) + "*"
+        keys = list(self._client.scan_iter(match=pattern, count=500))
+        if keys:
+            self._client.delete(*keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        keys = list(self._client.scan_iter(match=self.prefix + "*", count=500))
+        if keys:
+            self._client.delete(*keys)
+
+    def purge_expired(self) -> int:
+        return 0  # Redis süresi dolan anahtarları kendisi siler
+
+
+class _Flight:
+    """Devam eden tek bir hesaplama (single-flight)"""
+
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
 
 
+class TwoTierCache:
+    """Yerel LRU katmanı + isteğe bağlı paylaşılan katman"""
+
+    def __init__(self, max_entries: int = 1024, shared=None, stats: Optional[CacheStats] = None, namespace: str = ""):
+        self.stats = stats or CacheStats()
+        self.local = LocalLRUCache(max_entries, self.stats)
+        self.shared = shared
+        # Paylaşılan katmandaki anahtar öneki: farklı build'ler birbirinin değerini okumaz
+        self.namespace = f"{namespace}:" if namespace else ""
+        self._flights: Dict[str, _Flight] = {}
+        self._flights_lock = threading.Lock()
+        self._async_flights: Dict[Tuple[int, str], "asyncio.Future"] = {}
+        self._shared_writes = 0
+
+    # --- Temel işlemler ---
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value: Any, ttl: TTL = None) -> None:
+        seconds = _ttl_seconds(ttl)
+        self.stats.incr("sets")
+        self.local.set(key, value, seconds)
+        if self.shared is not None:
+            try:
+                self.shared.set(
+                    self.namespace + key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), time.time() + seconds
+                )
+                self._shared_writes += 1
+                if self._shared_writes % _SHARED_PURGE_EVERY == 0:
+                    self.stats.incr("expirations", self.shared.purge_expired())
+            except Exception as e:
+                self._shared_failed("set", key, e)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            try:
+                self.shared.delete(self.namespace + key)
+            except Exception as e:
+                self._shared_failed("delete", key, e)
+
+    def delete_prefix(self, prefix: str) -> int:
+        """Öneki eşleşen tüm anahtarları iki katmandan da sil (ör. bir @cached fonksiyonun tüm sonuçları)"""
+        deleted = self.local.delete_prefix(prefix)
+        if self.shared is not None:
+            try:
+                deleted += self.shared.delete_prefix(self.namespace + prefix)
+            except Exception as e:
+                self._shared_failed("delete_prefix", prefix, e)
+        return deleted
+
+    def clear(self) -> None:
+        self.local.clear()
+        if self.shared is not None:
+            try:
+                if self.namespace:
+                    self.shared.delete_prefix(self.namespace)
+                else:
+                    self.shared.clear()
+            except Exception as e:
+                self._shared_failed("clear", "*", e)
+
+    def purge_expired(self) -> int:
+        purged = self.local.purge_expired()
+        if self.shared is not None:
+            try:
+                purged += self.shared.purge_expired()
+            except Exception as e:
+                self._shared_failed("purge", "*", e)
+        return purged
+
+    # --- Single-flight ---
+
+    def get_or_set(self, key: str, loader: Callable[[], Any], ttl: TTL = None) -> Any:
+        """Anahtar yoksa `loader` ile hesapla; eşzamanlı çağrılar tek hesaplamayı bekler"""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            self.stats.incr("stampede_waits")
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = self._lookup(key, count=False)
+            if value is _MISSING:
+                value = loader()
+                self.set(key, value, ttl)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    async def aget_or_set(self, key: str, loader: Callable[[], Any], ttl: TTL = None) -> Any:
+        """`get_or_set`'in coroutine sürümü (aynı event loop içinde tekilleştirir)"""
+        value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        pending = self._async_flights.get(flight_key)
+        if pending is not None:
+            self.stats.incr("stampede_waits")
+            return await asyncio.shield(pending)
+
+        future = loop.create_future()
+        self._async_flights[flight_key] = future
+        try:
+            value = await loader()
+            self.set(key, value, ttl)
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # bekleyen yoksa "never retrieved" uyarısını bastır
+            raise
+        finally:
+            self._async_flights.pop(flight_key, None)
+
+    # --- İç yardımcılar ---
+
+    def _lookup(self, key: str, count: bool = True) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            if count:
+                self.stats.incr("hits")
+            return value
+
+        if self.shared is not None:
+            try:
+                found = self.shared.get(self.namespace + key)
+            except Exception as e:
+                self._shared_failed("get", key, e)
+                found = None
+            if found is not None:
+                payload, expires_at = found
+                value = pickle.loads(payload)
+                self.local.set(key, value, max(0.0, expires_at - time.time()))
+                if count:
+                    self.stats.incr("hits")
+                    self.stats.incr("shared_hits")
+                return value
+
+        if count:
+            self.stats.incr("misses")
+        return _MISSING
+
+    def _shared_failed(self, operation: str, key: str, error: Exception) -> None:
+        # Paylaşılan katman hatası isteği bozmamalı; yerel katmanla devam edilir
+        self.stats.incr("shared_errors")
+        api_logger.warning(
+            "Shared cache operation failed",
+            operation=operation,
+            key=key,
+            backend=getattr(self.shared, "name", None),
+            error=str(error)
+        )
+
+
+def cache_version() -> str:
+    """Paylaşılan anahtarların sürüm öneki: CACHE_VERSION veya şema kaynaklarının özeti
+
+    Cache'lenen DTO/şema sınıfları değiştiğinde önek de değişir; açıkça
+    CACHE_VERSION verilmezse deploy'lar arasında eski pickle'lar okunmaz.
+    """
+    configured = os.getenv("CACHE_VERSION")
+    if configured:
+        return configured
+    digest = hashlib.sha1()
+    schemas_dir = os.path.join(_BACKEND_DIR, "schemas")
+    sources = [os.path.abspath(__file__)]
+    if os.path.isdir(schemas_dir):
+        sources += sorted(
+            os.path.join(schemas_dir, name) for name in os.listdir(schemas_dir) if name.endswith(".py")
+        )
+    for source in sources:
+        with open(source, "rb") as f:
+            digest.update(f.read())
+    return "b" + digest.hexdigest()[:12]
+
+
+def _build_shared_backend():
+    """CACHE_SHARED_BACKEND (auto/redis/sqlite/none) ayarına göre paylaşılan katmanı oluştur
+
+    auto: CACHE_REDIS_URL varsa Redis, yoksa paylaşılan katman kapalı. SQLite
+    yalnızca açıkça istenirse açılır (CACHE_SQLITE_PATH veya backend/.cache/).
+    """
+    kind = os.getenv("CACHE_SHARED_BACKEND", "auto").lower()
+    redis_url = os.getenv("CACHE_REDIS_URL")
+    if kind == "auto":
+        kind = "redis" if redis_url else "none"
+    try:
+        if kind == "redis" and redis_url:
+            return RedisSharedBackend(redis_url)
+        if kind == "sqlite":
+            return SQLiteSharedBackend(os.getenv("CACHE_SQLITE_PATH") or _DEFAULT_SQLITE_PATH)
+    except Exception as e:
+        api_logger.warning("Shared cache backend unavailable, using local cache only", backend=kind, error=str(e))
+    return None
+
+
+_default_cache: Optional[TwoTierCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> TwoTierCache:
+    """Süreç genelindeki varsayılan cache (ilk kullanımda oluşturulur)"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = TwoTierCache(
+                    max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024")),
+                    shared=_build_shared_backend(),
+                    namespace=cache_version(),
+                )
+    return _default_cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Varsayılan cache'in sayaçları ve katman bilgisi"""
+    cache = get_default_cache()
+    stats = cache.stats.snapshot()
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    stats["local_entries"] = len(cache.local)
+    stats["local_max_entries"] = cache.local.max_entries
+    stats["shared_backend"] = getattr(cache.shared, "name", None)
+    stats["namespace"] = cache.namespace.rstrip(":")
+    return stats
+
+
+def _make_key(prefix: str, bound: inspect.BoundArguments, skip: Iterable[str]) -> str:
+    parts = [
+        f"{name}={value!r}"
+        for name, value in bound.arguments.items()
+        if name not in skip
+    ]
+    return f"{prefix}({', '.join(parts)})"
+
+
+def cached(ttl: TTL = None, key: Optional[str] = None, skip: Iterable[str] = ("db", "request", "current_user")):
+    """Router/servis fonksiyonları için cache dekoratörü
+
+    Args:
+        ttl: Yaşam süresi (timedelta veya saniye; None -> 5 dakika)
+        key: Sabit anahtar önekleri için isim (None -> modül.fonksiyon adı)
+        skip: Anahtara katılmayacak argümanlar (DB session, request vb.)
+
+    Anahtar, `skip` dışındaki argümanların repr'inden oluşturulur. Sync ve
+    async fonksiyonlarda aynı anahtar için eşzamanlı çağrılar tek hesaplamaya
+    indirilir. `functools.wraps` sayesinde FastAPI imzayı ve Depends
+    parametrelerini görmeye devam eder. Sarılan fonksiyonun `cache_clear()`
+    metodu tüm sonuçlarını (her iki katmandan) siler.
+    """
+    skip = frozenset(skip)
+
+    def decorator(func):
+        prefix = key or f"{func.__module__}.{func.__qualname__}"
+        signature = inspect.signature(func)
+
+        def build_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            return _make_key(prefix, bound, skip)
+
+        def cache_clear() -> int:
+            """Bu fonksiyonun tüm argüman kombinasyonları için cache'lenmiş sonuçlarını sil"""
+            return get_default_cache().delete_prefix(prefix + "(")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await get_default_cache().aget_or_set(
+                    build_key(args, kwargs), lambda: func(*args, **kwargs), ttl
+                )
+            async_wrapper.cache_key = build_key
+            async_wrapper.cache_clear = cache_clear
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return get_default_cache().get_or_set(
+                build_key(args, kwargs), lambda: func(*args, **kwargs), ttl
+            )
+        wrapper.cache_key = build_key
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
+
+
+# --- Geriye dönük uyumlu fonksiyonel API ---
+
 def get_cache(key: str, ttl: Optional[timedelta] = None) -> Optional[Any]:
     """
     Cache'den değer getir.
-    
+
     Args:
         key: Cache anahtarı
-        ttl: Time-to-live (None ise default kullanılır)
-    
+        ttl: Kullanılmaz (süre set_cache'te belirlenir; geriye dönük uyumluluk için)
+
     Returns:
         Cache'deki değer veya None (expired/not found)
     """
-    with _cache_lock:
-        if key not in _cache:
-            return None
-        
-        value, expiry = _cache[key]
-        
-        # Expiry kontrolü
-        if datetime.now() > expiry:
-            del _cache[key]
-            return None
-        
-        return value
+    return get_default_cache().get(key)
 
 
 def set_cache(key: str, value: Any, ttl: Optional[timedelta] = None) -> None:
     """
     Cache'e değer kaydet.
-    
+
     Args:
         key: Cache anahtarı
         value: Kaydedilecek değer
         ttl: Time-to-live (None ise default kullanılır)
     """
-    with _cache_lock:
-        if ttl is None:
-            ttl = _default_ttl
-        expiry = datetime.now() + ttl
-        _cache[key] = (value, expiry)
+    get_default_cache().set(key, value, ttl)
 
 
 def clear_cache(key: Optional[str] = None) -> None:
     """
     Cache'i temizle.
-    
+
     Args:
         key: Belirli bir key temizlemek için, None ise tüm cache temizlenir
     """
-    with _cache_lock:
-        if key is None:
-            _cache.clear()
-        elif key in _cache:
-            del _cache[key]
+    if key is None:
+        get_default_cache().clear()
+    else:
+        get_default_cache().delete(key)
 
 
 def clear_expired() -> None:
     """Expired cache entry'lerini temizle"""
-    with _cache_lock:
-        now = datetime.now()
-        expired_keys = [key for key, (_, expiry) in _cache.items() if now > expiry]
-        for key in expired_keys:
-            del _cache[key]
-
+    get_default_cache().purge_expired()
@@ -1,96 +1,324 @@
+"""
+Structured logging configuration for ÖSYM Rehberi
+
+Request thread'leri diske yazmaz: her `StructuredLogger` yalnızca bir
+`QueueHandler` taşır, konsol ve dönen dosya handler'ları tek bir arka plan
+`QueueListener` thread'inde çalışır (ilk kayıtta başlar, fork sonrası çocukta
+yeniden başlar). Kuyruk sınırlıdır (`LOG_QUEUE_SIZE`); doluysa kayıt düşürülüp
+sayılır. Dosyalara JSON satırları yazılır (`logs/app.log`, `logs/error.log`).
+
+Yüksek hacimli DEBUG olayları logger başına örneklenir (`LOG_DEBUG_SAMPLE_RATE`
+veya `set_sample_rate`), seviyeler worker yeniden başlatılmadan
+`set_log_level` ile değiştirilebilir.
+"""
+import atexit
+import copy
+import json
 import logging
 import logging.handlers
+import math
 import os
-from datetime import datetime
-from typing import Optional
+import queue
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
 
 
-class StructuredLogger:
-    """Structured logging configuration for ÖSYM Rehberi"""
-    
-    def __init__(self, name: str, log_level: str = "INFO"):
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(getattr(logging, log_level.upper()))
-        
-        # Create logs directory if it doesn't exist
-        os.makedirs("logs", exist_ok=True)
-        
-        # Clear existing handlers
-        self.logger.handlers.clear()
-        
+LOG_DIR = os.getenv("LOG_DIR", "logs")
+DEFAULT_LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+DEFAULT_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+# Kuyruk sınırı: dinleyici yetişemezse yeni kayıtlar düşürülür (bellek büyümez)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+_TEXT_FORMAT = '%(asctime)s — %(name)s — %(levelname)s — %(message)s'
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """Her kaydı tek satırlık JSON olarak biçimlendirir (bağlam alanları dahil)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            # Bağlam alanları ayrıca yazıldığı için mesajın sade hali kullanılır
+            "message": getattr(record, "event", None) or record.getMessage(),
+        }
+        context = getattr(record, "context", None)
+        if context:
+            payload.update(context)
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            # Kuyruktan gelen kayıt: traceback QueueHandler'da metne çevrildi
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    DEBUG kayıtlarını logger başına deterministik olarak örnekler
+
+    Oran 0.1 ise her 10 DEBUG kaydından biri geçer. INFO ve üstü hiçbir zaman
+    örneklenmez. Oranlar çalışma anında `set_rate` ile değiştirilebilir.
+    """
+
+    def __init__(self, default_rate: float = 1.0):
+        super().__init__()
+        self.default_rate = default_rate
+        self._rates: Dict[str, float] = {}
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, logger_name: str, rate: Optional[float]) -> None:
+        with self._lock:
+            if rate is None:
+                self._rates.pop(logger_name, None)
+            else:
+                self._rates[logger_name] = min(1.0, max(0.0, rate))
+            self._counters.pop(logger_name, None)
+
+    def rate_for(self, logger_name: str) -> float:
+        return self._rates.get(logger_name, self.default_rate)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG:
+            return True
+        rate = self.rate_for(record.name)
+        if rate >= 1.0:
+            return True
+        if rate <= 0.0:
+            return False
+        with self._lock:
+            count = self._counters.get(record.name, 0) + 1
+            self._counters[record.name] = count
+        # count*rate bir tam sayı sınırını geçtiğinde kayıt tutulur (1/N örnekleme)
+        return math.floor(count * rate) > math.floor((count - 1) * rate)
+
+
+class _PipelineQueueHandler(logging.handlers.QueueHandler):
+    """Kaydı paylaşılan kuyruğa bırakır; dinleyiciyi ilk kayıtta başlatır, kuyruk doluysa kaydı düşürür"""
+
+    def __init__(self, pipeline: "_LoggingPipeline"):
+        super().__init__(pipeline.queue)
+        self.pipeline = pipeline
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Kaydı kuyruk için kopyalar; traceback `exc_text` alanında metin olarak korunur
+
+        Standart `prepare` exc_info'yu silip traceback'i mesaja gömer; JSON
+        formatter'ın `exc_info` alanını doldurabilmesi için ayrı tutulur.
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        pipeline = self.pipeline
+        pipeline.ensure_started()
+        try:
+            # Fork sonrası kuyruk yenilenir; her zaman güncel kuyruğu kullan
+            pipeline.queue.put_nowait(record)
+        except queue.Full:
+            pipeline.record_dropped()
+
+
+class _LoggingPipeline:
+    """Tüm logger'ların paylaştığı sınırlı kuyruk + dinleyici (süreç başına bir tane)
+
+    Dinleyici thread'i ilk kayıtta başlar. Fork edilen çocuk süreçte (ör. Celery
+    prefork worker) thread yoktur: `os.register_at_fork` ile kuyruk ve kilit
+    yenilenir, dinleyici çocuğun ilk kaydında yeniden başlatılır.
+    """
+
+    def __init__(self, maxsize: int = LOG_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self.queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize)
+        self.sampler = SamplingFilter(DEFAULT_DEBUG_SAMPLE_RATE)
+        self.dropped = 0
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self._lock = threading.Lock()
+
+    def _build_handlers(self):
+        os.makedirs(LOG_DIR, exist_ok=True)
+
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_formatter = logging.Formatter(
-            '%(asctime)s — %(name)s — %(levelname)s — %(message)s'
-        )
-        console_handler.setFormatter(console_formatter)
-        self.logger.addHandler(console_handler)
-        
+        console_handler.setFormatter(logging.Formatter(_TEXT_FORMAT))
+
+        json_formatter = JsonFormatter()
+
         # File handler with rotation
         file_handler = logging.handlers.RotatingFileHandler(
-            'logs/app.log',
+            os.path.join(LOG_DIR, 'app.log'),
             maxBytes=10*1024*1024,  # 10MB
-            backupCount=5
+            backupCount=5,
+            encoding="utf-8"
         )
         file_handler.setLevel(logging.DEBUG)
-        file_formatter = logging.Formatter(
-            '%(asctime)s — %(name)s — %(levelname)s — %(message)s'
-        )
-        file_handler.setFormatter(file_formatter)
-        self.logger.addHandler(file_handler)
-        
+        file_handler.setFormatter(json_formatter)
+
         # Error file handler
         error_handler = logging.handlers.RotatingFileHandler(
-            'logs/error.log',
+            os.path.join(LOG_DIR, 'error.log'),
             maxBytes=5*1024*1024,  # 5MB
-            backupCount=3
+            backupCount=3,
+            encoding="utf-8"
         )
         error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(file_formatter)
-        self.logger.addHandler(error_handler)
-    
+        error_handler.setFormatter(json_formatter)
+
+        return console_handler, file_handler, error_handler
+
+    def start(self) -> None:
+        with self._lock:
+            if self._listener is not None:
+                return
+            self._listener = logging.handlers.QueueListener(
+                self.queue, *self._build_handlers(), respect_handler_level=True
+            )
+            self._listener.start()
+
+    def ensure_started(self) -> None:
+        if self._listener is None:
+            self.start()
+
+    def stop(self) -> None:
+        """Kuyruktaki kayıtları boşaltır ve dinleyiciyi durdurur"""
+        with self._lock:
+            listener, self._listener = self._listener, None
+        if listener is not None:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    def record_dropped(self) -> None:
+        with self._lock:
+            self.dropped += 1
+
+    def after_fork_in_child(self) -> None:
+        """Fork sonrası çocuk süreç: ebeveynin thread'i ve kilitleri kopyalanmaz, yenileri kurulur
+
+        Ebeveynde kuyrukta bekleyen kayıtları ebeveynin dinleyicisi yazar.
+        """
+        self._lock = threading.Lock()
+        self.queue = queue.Queue(self.maxsize)
+        self._listener = None
+        self.dropped = 0
+
+    def make_handler(self) -> logging.Handler:
+        handler = _PipelineQueueHandler(self)
+        handler.addFilter(self.sampler)
+        return handler
+
+
+_pipeline = _LoggingPipeline()
+atexit.register(_pipeline.stop)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_pipeline.after_fork_in_child)
+
+
+class StructuredLogger:
+    """Structured logging configuration for ÖSYM Rehberi"""
+
+    def __init__(self, name: str, log_level: Optional[str] = None):
+        self.logger = logging.getLogger(name)
+        self.logger.setLevel(getattr(logging, (log_level or DEFAULT_LOG_LEVEL).upper()))
+
+        # Clear existing handlers
+        self.logger.handlers.clear()
+
+        # ✅ Tek handler: kayıt kuyruğa bırakılır, disk I/O arka plan thread'inde yapılır
+        self.logger.addHandler(_pipeline.make_handler())
+        # Alt logger'lar (api.recommendation vb.) kendi handler'ına sahip, üst logger'a tekrar yazmasın
+        self.logger.propagate = False
+
+    def _log(self, level: int, message: str, user_id: Optional[int], kwargs: Dict[str, Any]):
+        # ✅ Seviye kapalıysa mesaj/bağlam hiç oluşturulmaz
+        if not self.logger.isEnabledFor(level):
+            return
+        exc_info = kwargs.pop("exc_info", None)
+        context: Dict[str, Any] = {}
+        if user_id:
+            context["user_id"] = user_id
+        context.update(kwargs)
+
+        if context:
+            context_text = " ".join(f"{k}={v}" for k, v in context.items())
+            full_message = f"{message} — {context_text}"
+        else:
+            full_message = message
+        # JSON formatter bağlamı ayrı alanlar olarak yazar, konsol düz metni kullanır
+        self.logger.log(level, full_message, exc_info=exc_info, extra={"event": message, "context": context})
+
     def info(self, message: str, user_id: Optional[int] = None, **kwargs):
         """Log info message with optional user context"""
-        context = f"user_id={user_id}" if user_id else ""
-        if kwargs:
-            context += " " + " ".join([f"{k}={v}" for k, v in kwargs.items()])
-        
-        full_message = f"{message} — {context}" if context else message
-        self.logger.info(full_message)
-    
+        self._log(logging.INFO, message, user_id, kwargs)
+
     def error(self, message: str, user_id: Optional[int] = None, **kwargs):
         """Log error message with optional user context"""
-        context = f"user_id={user_id}" if user_id else ""
-        if kwargs:
-            context += " " + " ".join([f"{k}={v}" for k, v in kwargs.items()])
-        
-        full_message = f"{message} — {context}" if context else message
-        self.logger.error(full_message)
-    
+        self._log(logging.ERROR, message, user_id, kwargs)
+
     def warning(self, message: str, user_id: Optional[int] = None, **kwargs):
         """Log warning message with optional user context"""
-        context = f"user_id={user_id}" if user_id else ""
-        if kwargs:
-            context += " " + " ".join([f"{k}={v}" for k, v in kwargs.items()])
-        
-        full_message = f"{message} — {context}" if context else message
-        self.logger.warning(full_message)
-    
+        self._log(logging.WARNING, message, user_id, kwargs)
+
     def debug(self, message: str, user_id: Optional[int] = None, **kwargs):
         """Log debug message with optional user context"""
-        context = f"user_id={user_id}" if user_id else ""
-        if kwargs:
-            context += " " + " ".join([f"{k}={v}" for k, v in kwargs.items()])
-        
-        full_message = f"{message} — {context}" if context else message
-        self.logger.debug(full_message)
+        self._log(logging.DEBUG, message, user_id, kwargs)
 
 
 # Module-specific loggers
+_loggers: Dict[str, StructuredLogger] = {}
+
+
 def get_logger(module_name: str) -> StructuredLogger:
     """Get structured logger for specific module"""
-    return StructuredLogger(module_name)
+    logger = _loggers.get(module_name)
+    if logger is None:
+        logger = StructuredLogger(module_name)
+        _loggers[module_name] = logger
+    return logger
+
+
+def set_log_level(logger_name: str, level: str) -> None:
+    """Logger seviyesini çalışma anında değiştirir (yeniden başlatma gerekmez)"""
+    numeric = logging.getLevelName(level.upper())
+    if not isinstance(numeric, int):
+        raise ValueError(f"Geçersiz log seviyesi: {level}")
+    logging.getLogger(logger_name).setLevel(numeric)
+
+
+def set_sample_rate(logger_name: str, rate: Optional[float]) -> None:
+    """Logger için DEBUG örnekleme oranı (0.0-1.0); None varsayılana döner"""
+    _pipeline.sampler.set_rate(logger_name, rate)
+
+
+def get_log_config() -> Dict[str, Any]:
+    """Kayıtlı logger'ların seviyelerini ve örnekleme oranlarını döner"""
+    return {
+        "levels": {
+            name: logging.getLevelName(logger.logger.level)
+            for name, logger in sorted(_loggers.items())
+        },
+        "debug_sample_rates": {
+            name: _pipeline.sampler.rate_for(name) for name in sorted(_loggers)
+        },
+        # Kuyruk dolu olduğu için yazılamayan kayıt sayısı (bu süreçte)
+        "dropped_records": _pipeline.dropped,
+    }
+
+
+def shutdown_logging() -> None:
+    """Kuyruğu boşaltıp dinleyici thread'ini durdurur (uygulama kapanışında)"""
+    _pipeline.stop()
 
 
 # Global loggers for different modules
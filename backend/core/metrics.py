@@ -0,0 +1,290 @@
+"""
+İstek seviyesinde performans ölçümü ve Prometheus formatında /metrics çıktısı
+
+- `MetricsMiddleware` (ASGI): route şablonu başına gecikme, yanıt boyutu,
+  istek başına DB sorgu sayısı ve DB süresi histogramları
+- `instrument_engine`: SQLAlchemy `before_cursor_execute` / `after_cursor_execute`
+  olaylarıyla sorguları o anki isteğe (contextvar) yazar; senkron ve async
+  engine'lerin ikisi de desteklenir
+- Tek istekte `METRICS_N_PLUS_ONE_THRESHOLD` üzerinde sorgu atılırsa olası N+1
+  olarak loglanır ve sayaçta tutulur
+
+Harici bağımlılık yoktur; çıktı Prometheus text exposition (0.0.4) formatındadır.
+"""
+import contextvars
+import os
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from core.logging_config import api_logger
+
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("METRICS_N_PLUS_ONE_THRESHOLD", "25"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+DB_TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class RequestDbStats:
+    """Tek bir isteğin DB kullanımı (contextvar üzerinden biriktirilir)"""
+    query_count: int = 0
+    db_time: float = 0.0
+
+
+_current_request: contextvars.ContextVar[Optional[RequestDbStats]] = contextvars.ContextVar(
+    "metrics_current_request", default=None
+)
+
+
+def current_request_stats() -> Optional[RequestDbStats]:
+    return _current_request.get()
+
+
+class Histogram:
+    """Kümülatif kovalı histogram (etiket kombinasyonu başına)"""
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float], label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.label_names = label_names
+        # labels -> [kova sayaçları..., +Inf], toplam
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = ([0] * (len(self.buckets) + 1), [0.0])
+            self._series[labels] = series
+        counts, total = series
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            base = _format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_with_le(base, _format_number(bound))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_with_le(base, '+Inf')} {cumulative}")
+            lines.append(f"{self.name}_sum{base} {_format_number(total[0])}")
+            lines.append(f"{self.name}_count{base} {cumulative}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...]) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_number(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Uygulama metriklerinin süreç içi kaydı (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        route_labels = ("method", "route")
+        self.requests = Counter(
+            "osym_http_requests_total", "HTTP istek sayısı", ("method", "route", "status")
+        )
+        self.latency = Histogram(
+            "osym_http_request_duration_seconds", "İstek gecikmesi (saniye)", LATENCY_BUCKETS, route_labels
+        )
+        self.response_size = Histogram(
+            "osym_http_response_size_bytes", "Yanıt gövdesi boyutu (byte)", SIZE_BUCKETS, route_labels
+        )
+        self.db_queries = Histogram(
+            "osym_db_queries_per_request", "İstek başına DB sorgu sayısı", DB_QUERY_BUCKETS, route_labels
+        )
+        self.db_time = Histogram(
+            "osym_db_time_per_request_seconds", "İstek başına toplam DB süresi (saniye)", DB_TIME_BUCKETS, route_labels
+        )
+        self.n_plus_one = Counter(
+            "osym_db_n_plus_one_suspected_total",
+            f"{N_PLUS_ONE_THRESHOLD} üzerinde sorgu atan istek sayısı (olası N+1)",
+            route_labels,
+        )
+
+    def record_request(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        duration: float,
+        response_size: int,
+        db_stats: RequestDbStats,
+        n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD,
+    ) -> bool:
+        """İsteği kaydeder; olası N+1 ise True döner"""
+        labels = (method, route)
+        suspected = db_stats.query_count > n_plus_one_threshold
+        with self._lock:
+            self.requests.inc((method, route, str(status)))
+            self.latency.observe(labels, duration)
+            self.response_size.observe(labels, response_size)
+            self.db_queries.observe(labels, db_stats.query_count)
+            self.db_time.observe(labels, db_stats.db_time)
+            if suspected:
+                self.n_plus_one.inc(labels)
+        return suspected
+
+    def render(self) -> str:
+        with self._lock:
+            lines: List[str] = []
+            for metric in (self.requests, self.latency, self.response_size,
+                           self.db_queries, self.db_time, self.n_plus_one):
+                lines.extend(metric.render())
+        lines.extend(_render_cache_metrics())
+        return "\n".join(lines) + "\n"
+
+
+def _render_cache_metrics() -> List[str]:
+    """core.cache sayaçlarını da aynı çıktıya ekle"""
+    try:
+        from core.cache import cache_stats
+        stats = cache_stats()
+    except Exception:
+        return []
+    lines = []
+    for field in ("hits", "misses", "shared_hits", "evictions", "expirations", "stampede_waits", "shared_errors"):
+        name = f"osym_cache_{field}_total"
+        lines += [f"# TYPE {name} counter", f"{name} {stats.get(field, 0)}"]
+    lines += ["# TYPE osym_cache_local_entries gauge", f"osym_cache_local_entries {stats.get('local_entries', 0)}"]
+    return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _with_le(base: str, le: str) -> str:
+    if base:
+        return base[:-1] + f',le="{le}"}}'
+    return f'{{le="{le}"}}'
+
+
+def _format_number(value: float) -> str:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+metrics_registry = MetricsRegistry()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current_request.get()
+    if stats is not None:
+        stats.query_count += 1
+        stats.db_time += elapsed
+
+
+def instrument_engine(engine) -> None:
+    """Engine'e sorgu sayacı/zamanlayıcı olaylarını bağlar (async engine için sync_engine kullanılır)"""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    Saf ASGI middleware: gecikme, yanıt boyutu ve DB kullanımını route şablonu başına kaydeder
+
+    Route etiketi `/api/students/{student_id}` gibi şablondur (ham path değil),
+    eşleşmeyen istekler `unmatched` altında toplanır. Yanıta `Server-Timing`
+    başlığı eklenir.
+    """
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry, exclude_paths: Iterable[str] = ("/metrics",)):
+        self.app = app
+        self.registry = registry
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _current_request.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        response_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                app_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_time * 1000:.1f};desc="{stats.query_count} queries", app;dur={app_ms:.1f}'.encode("latin-1"),
+                ))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_request.reset(token)
+            duration = time.perf_counter() - start
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            suspected = self.registry.record_request(
+                method, route_path, status_code, duration, response_size, stats
+            )
+            if suspected:
+                api_logger.warning(
+                    "Possible N+1 query pattern",
+                    route=route_path,
+                    method=method,
+                    queries=stats.query_count,
+                    db_time_ms=round(stats.db_time * 1000, 1),
+                )
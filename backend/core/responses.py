@@ -0,0 +1,54 @@
+"""
+Hızlı JSON yanıtları
+
+`FastJSONResponse`, `schemas.dto` nesnelerini (slotted dataclass) ve
+datetime değerlerini doğrudan orjson ile serileştirir; FastAPI'nin
+`jsonable_encoder` + response_model doğrulaması atlanır. orjson kurulu değilse
+standart `json` modülüne düşülür (aynı çıktı, daha yavaş).
+
+Datetime biçimi Pydantic v2 ile aynıdır (UTC için `Z` soneki).
+"""
+import json
+from dataclasses import fields, is_dataclass
+from datetime import date, datetime
+from typing import Any
+
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson requirements.txt'te
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """json modülü için: dataclass ve datetime desteği (orjson yoksa)"""
+    if is_dataclass(obj):
+        return {f.name: getattr(obj, f.name) for f in fields(obj)}
+    if isinstance(obj, datetime):
+        text = obj.isoformat()
+        if obj.utcoffset() is not None and obj.utcoffset().total_seconds() == 0:
+            text = text[:-6] + "Z"
+        return text
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(content: Any) -> bytes:
+        """İçeriği JSON byte'larına çevir (DTO, datetime, numpy skalerleri dahil)"""
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+else:  # pragma: no cover
+    def dumps(content: Any) -> bytes:
+        """İçeriği JSON byte'larına çevir (DTO, datetime dahil)"""
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """DTO listelerini doğrulamasız, orjson ile serileştiren JSON yanıtı"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
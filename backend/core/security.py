@@ -1,6 +1,10 @@
 """
-Security utilities - Şifre hash ve doğrulama
+Security utilities - Şifre hash ve doğrulama, yönetim endpoint anahtarı
 """
+import os
+import secrets
+
+from fastapi import Header, HTTPException
 from passlib.context import CryptContext
 from typing import Optional
 
@@ -20,3 +24,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Yönetim endpoint'leri için FastAPI bağımlılığı
+
+    ADMIN_API_TOKEN ayarlı değilse endpoint kapalıdır; ayarlıysa `X-Admin-Token`
+    başlığı eşleşmelidir.
+    """
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Yönetim endpoint'leri kapalı (ADMIN_API_TOKEN ayarlı değil)")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, expected):
+        raise HTTPException(status_code=403, detail="Geçersiz yönetici anahtarı")
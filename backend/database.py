@@ -4,6 +4,8 @@ from sqlalchemy.orm import sessionmaker
 import os
 import logging
 
+from core.metrics import instrument_engine
+
 # Logger setup
 api_logger = logging.getLogger("api")
 
@@ -28,8 +30,8 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST") or os.getenv("POSTGRES_SERVER") or os
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
 # ✅ PostgreSQL connection string - psycopg2 driver (senkron)
-# NOT: asyncpg kullanmıyoruz, senkron psycopg2 kullanıyoruz
-# Eğer async kullanmak istersen: postgresql+asyncpg://...
+# NOT: Senkron engine psycopg2 kullanır; async router'lar için aşağıda
+# aynı veritabanına asyncpg ile bağlanan ayrı bir async engine oluşturulur
 # ✅ CRITICAL: Environment variable'dan al, yoksa varsayılan değerleri kullan
 DATABASE_URL = os.getenv(
     "DATABASE_URL",
@@ -106,9 +108,56 @@ else:
         api_logger.error(f"❌ DATABASE_URL: {DATABASE_URL[:50]}...")  # Şifreyi gösterme
         raise
 
+# ✅ Sorgu sayısı/süresi isteğe göre ölçülür (/metrics ve N+1 tespiti için)
+instrument_engine(engine)
+
 # Create session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def to_async_database_url(url: str) -> str:
+    """Senkron DATABASE_URL'i async sürücülü karşılığına çevir (psycopg2 -> asyncpg, sqlite -> aiosqlite)"""
+    if url.startswith("postgresql+psycopg2://"):
+        return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+    if url.startswith("postgresql://"):
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+    if url.startswith("sqlite://") and not url.startswith("sqlite+aiosqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+# ✅ ASYNC ENGINE: async router'lar event loop'u bloklamadan sorgu çalıştırır
+# Senkron engine (script'ler, Celery, arka plan görevleri) olduğu gibi kalır
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_database_url(DATABASE_URL)
+async_engine = None
+AsyncSessionLocal = None
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    if ASYNC_DATABASE_URL.startswith("sqlite"):
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True)
+    else:
+        async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=10,
+            max_overflow=20,
+            pool_pre_ping=True,
+            pool_recycle=1800,
+            pool_timeout=30,
+            connect_args={
+                "timeout": 20,
+                "server_settings": {
+                    "application_name": "osym_rehberi_api_async",
+                    "statement_timeout": "300000",
+                },
+            },
+        )
+    # expire_on_commit=False: commit sonrası nesnelere erişim tembel yükleme (await) gerektirmesin
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    instrument_engine(async_engine)
+except ImportError as e:
+    api_logger.error(f"❌ Async database driver not available (asyncpg/aiosqlite): {e}")
+
 # Create base class for models
 Base = declarative_base()
 
@@ -121,8 +170,8 @@ try:
     # ✅ models paketinden import et (relative import kullanıyor)
     from models import (  # noqa: F401
         User, Student, ExamAttempt,
-        University, Department, DepartmentYearlyStats, Recommendation,
-        Preference, Swipe,
+        University, Department, DepartmentYearlyStats, DepartmentTrend, CatalogueFacet, DepartmentSimilarity, Recommendation, RecommendationVersion,
+        Preference, Swipe, LogSetting, RefreshLock,
         ForumPost, ForumComment,
         YokUniversity, YokProgram, YokCity, ScoreCalculation
     )
@@ -152,6 +201,14 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency to get async database session"""
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database engine is not configured (asyncpg/aiosqlite eksik)")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def create_tables(max_retries: int = 3, retry_delay: int = 2):
     """
     Create all tables in the database (Auto-Migration) with retry logic
@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import asyncio
 import os
@@ -9,9 +10,10 @@ import contextlib
 # ✅ CRITICAL: Import database first to ensure all models are registered
 # database.py içinde tüm modeller zaten import ediliyor (Base.metadata'ya kayıt için)
 from database import create_tables, get_db, Base
-from core.logging_config import api_logger
+from core.metrics import CONTENT_TYPE_LATEST, MetricsMiddleware, metrics_registry
+from core.logging_config import api_logger, shutdown_logging
 
-from routers import students, universities, recommendations, ml_recommendations, auth, exam_attempts, coach_chat, preferences, discovery, chatbot, profile, forum, stats, agenda, study, targets, settings
+from routers import students, universities, recommendations, ml_recommendations, auth, exam_attempts, coach_chat, preferences, discovery, chatbot, profile, forum, stats, agenda, study, targets, settings, logging_settings
 
 
 async def _periodic_ml_training_task():
@@ -23,19 +25,14 @@ async def _periodic_ml_training_task():
     except Exception:
         interval_seconds = 86400
 
-    # Eğitim fonksiyonunu içe aktar
-    from routers.ml_recommendations import train_models_background
+    # Eğitim zamanlayıcısını içe aktar (tetikleri birleştirir, veri değişmediyse atlar)
+    from services.ml_training_scheduler import ml_training_scheduler
 
     while True:
         try:
             await asyncio.sleep(interval_seconds)
             api_logger.info("Periodic ML training tick started")
-            # DB session oluştur ve eğitimi çağır
-            db = next(get_db())
-            try:
-                await train_models_background(db)
-            finally:
-                db.close()
+            ml_training_scheduler.request_retrain(reason="periodic")
             api_logger.info("Periodic ML training tick completed")
         except asyncio.CancelledError:
             api_logger.info("Periodic ML training task cancelled")
@@ -44,6 +41,129 @@ async def _periodic_ml_training_task():
             api_logger.error("Periodic ML training failed", error=str(e))
 
 
+def _load_catalogue(refresh: bool = False) -> bool:
+    """Bölüm kataloğunu yükle/yenile (thread içinde çalışır)"""
+    from services.catalogue import department_catalogue
+
+    db = next(get_db())
+    try:
+        if refresh:
+            reloaded = department_catalogue.refresh(db)
+            if reloaded:
+                # Import script'i facet ve trend tablolarını da yeniden yazdı
+                _load_materialized(db)
+            return reloaded
+        department_catalogue.load(db)
+        return True
+    finally:
+        db.close()
+
+
+def _load_materialized(db=None) -> None:
+    """Materyalize facet/trend tablolarını ve olasılık modelini belleğe al (thread içinde çalışır)"""
+    from services.admission import admission_store
+    from services.facets import facet_store
+    from services.trends import trend_store
+
+    def load(session):
+        facet_store.load(session)
+        trend_store.load(session)
+        # Puan→sıralama tabloları ve bölüm dağılımları güncel trendlerden kurulur
+        admission_store.load(session)
+
+    if db is not None:
+        load(db)
+        return
+    db = next(get_db())
+    try:
+        load(db)
+    finally:
+        db.close()
+
+
+async def _periodic_catalogue_refresh_task():
+    """Katalog sürüm parmak izini periyodik olarak kontrol eder, değiştiyse yeniden yükler."""
+    interval_seconds_str = os.getenv("CATALOGUE_REFRESH_SECONDS", "60")
+    try:
+        interval_seconds = max(5, int(interval_seconds_str))  # En az 5 saniye
+    except Exception:
+        interval_seconds = 60
+
+    while True:
+        try:
+            await asyncio.sleep(interval_seconds)
+            if await asyncio.to_thread(_load_catalogue, True):
+                api_logger.info("Department catalogue reloaded")
+        except asyncio.CancelledError:
+            api_logger.info("Catalogue refresh task cancelled")
+            break
+        except Exception as e:
+            api_logger.error("Catalogue refresh failed", error=str(e))
+
+
+def _refresh_collaborative() -> bool:
+    """Bölüm benzerliklerini etkileşim verisi değiştiyse yeniden hesapla (thread içinde çalışır)"""
+    from services.collaborative import collaborative_store
+
+    db = next(get_db())
+    try:
+        return collaborative_store.refresh(db)
+    finally:
+        db.close()
+
+
+async def _periodic_collaborative_refresh_task():
+    """Swipe/tercih verisi değiştiyse "senin gibi öğrenciler" benzerliklerini yeniler (ilk tur hemen)."""
+    interval_seconds_str = os.getenv("COLLABORATIVE_REFRESH_SECONDS", "900")
+    try:
+        interval_seconds = max(60, int(interval_seconds_str))  # En az 1 dakika
+    except Exception:
+        interval_seconds = 900
+
+    delay = 0
+    while True:
+        try:
+            await asyncio.sleep(delay)
+            delay = interval_seconds
+            if await asyncio.to_thread(_refresh_collaborative):
+                api_logger.info("Collaborative similarities refreshed")
+        except asyncio.CancelledError:
+            api_logger.info("Collaborative refresh task cancelled")
+            break
+        except Exception as e:
+            api_logger.error("Collaborative refresh failed", error=str(e))
+
+
+def _sync_log_settings() -> int:
+    """Paylaşılan log ayarlarını bu worker'a uygula (thread içinde çalışır)"""
+    from services.log_settings import log_settings_sync
+
+    db = next(get_db())
+    try:
+        return log_settings_sync.sync(db)
+    finally:
+        db.close()
+
+
+async def _periodic_log_settings_task():
+    """PUT /api/logging ile yazılan ayarları periyodik okur (tüm worker'lar aynı ayarı kullanır)."""
+    from services.log_settings import poll_seconds
+
+    delay = 0
+    while True:
+        try:
+            await asyncio.sleep(delay)
+            delay = poll_seconds()
+            changed = await asyncio.to_thread(_sync_log_settings)
+            if changed:
+                api_logger.info("Shared logging settings applied", loggers=changed)
+        except asyncio.CancelledError:
+            api_logger.info("Log settings task cancelled")
+            break
+        except Exception as e:
+            api_logger.error("Log settings sync failed", error=str(e))
+
+
 async def _wait_for_database(max_retries: int = 10, retry_delay: int = 5):
     """
     Veritabanı bağlantısını kontrol et ve hazır olana kadar bekle (Retry Logic - While Loop)
@@ -111,23 +231,24 @@ async def lifespan(app: FastAPI):
     
     # ✅ CRITICAL: Tüm startup hatalarını yakala - uygulama çökmesin
     try:
-        # ✅ 0. VERİTABANI BAĞLANTISINI BEKLE (Retry Logic - While Loop)
-        api_logger.info("📋 Step 0: Waiting for database connection...")
-        db_ready = await _wait_for_database(max_retries=10, retry_delay=5)  # 10 deneme, 5 saniye aralık
+        try:
+            # ✅ 0. VERİTABANI BAĞLANTISINI BEKLE (Retry Logic - While Loop)
+            api_logger.info("📋 Step 0: Waiting for database connection...")
+            db_ready = await _wait_for_database(max_retries=10, retry_delay=5)  # 10 deneme, 5 saniye aralık
         
-        if not db_ready:
-            api_logger.error("❌ CRITICAL: Veritabanı bağlantısı kurulamadı!")
-            api_logger.error("❌ Tüm denemeler başarısız oldu. Lütfen veritabanı servisini kontrol edin.")
-            api_logger.warning("⚠️ Uygulama devam ediyor (logları kontrol edin). Bazı özellikler çalışmayabilir.")
-            # ✅ Uygulamayı kapatma, sadece log bas (Konteyner çöküp durmasın)
-            # raise RuntimeError("Database connection failed after multiple retries")  # Kaldırıldı
-    except Exception as startup_error:
-        # ✅ CRITICAL: Startup sırasında herhangi bir hata olsa bile uygulama çökmesin
-        api_logger.error(f"🔥 STARTUP HATASI (Yakalandı - Uygulama devam ediyor): {str(startup_error)}")
-        import traceback
-        api_logger.error(f"🔥 Traceback: {traceback.format_exc()}")
-        api_logger.warning("⚠️ Uygulama hata ile devam ediyor. Bazı özellikler çalışmayabilir.")
-        db_ready = False
+            if not db_ready:
+                api_logger.error("❌ CRITICAL: Veritabanı bağlantısı kurulamadı!")
+                api_logger.error("❌ Tüm denemeler başarısız oldu. Lütfen veritabanı servisini kontrol edin.")
+                api_logger.warning("⚠️ Uygulama devam ediyor (logları kontrol edin). Bazı özellikler çalışmayabilir.")
+                # ✅ Uygulamayı kapatma, sadece log bas (Konteyner çöküp durmasın)
+                # raise RuntimeError("Database connection failed after multiple retries")  # Kaldırıldı
+        except Exception as startup_error:
+            # ✅ CRITICAL: Startup sırasında herhangi bir hata olsa bile uygulama çökmesin
+            api_logger.error(f"🔥 STARTUP HATASI (Yakalandı - Uygulama devam ediyor): {str(startup_error)}")
+            import traceback
+            api_logger.error(f"🔥 Traceback: {traceback.format_exc()}")
+            api_logger.warning("⚠️ Uygulama hata ile devam ediyor. Bazı özellikler çalışmayabilir.")
+            db_ready = False
     
         # ✅ 1. VERİTABANI TABLOLARINI OLUŞTUR (Auto-Migration) - Sadece bağlantı başarılıysa
         if db_ready:
@@ -147,34 +268,49 @@ async def lifespan(app: FastAPI):
         else:
             api_logger.warning("⚠️ Veritabanı bağlantısı olmadığı için tablo oluşturma atlandı.")
     
-        # ✅ 2. Cache'i startup'ta yükle - statik veriler için (Sadece bağlantı başarılıysa)
+        # ✅ 2. Materyalize filtre boyutlarını (şehir, alan türü, ...) ve bölüm trendlerini belleğe yükle
         if db_ready:
-            api_logger.info("📋 Step 2: Loading cache for static data...")
+            api_logger.info("📋 Step 2: Loading catalogue facets and trends...")
             try:
-                db = next(get_db())
-                try:
-                    # Cities cache
-                    from sqlalchemy import distinct
-                    from models import University, Department
-                    cities_result = db.query(distinct(University.city)).filter(University.city.isnot(None)).all()
-                    cities = [city[0] for city in cities_result if city[0]]
-                    from core.cache import set_cache
-                    from datetime import timedelta
-                    set_cache("cities", cities, ttl=timedelta(hours=24))  # 24 saat cache
-                    api_logger.info(f"✅ Cached {len(cities)} cities")
-                    
-                    # Field types cache
-                    field_types_result = db.query(distinct(Department.field_type)).filter(Department.field_type.isnot(None)).all()
-                    field_types = [ft[0] for ft in field_types_result if ft[0]]
-                    set_cache("field_types", field_types, ttl=timedelta(hours=24))  # 24 saat cache
-                    api_logger.info(f"✅ Cached {len(field_types)} field types")
-                finally:
-                    db.close()
+                await asyncio.to_thread(_load_materialized)
             except Exception as e:
-                # ✅ CRITICAL: Cache yükleme hatası uygulamayı çökertmesin
-                api_logger.warning(f"⚠️ Cache loading failed (non-critical): {str(e)}")
+                # ✅ CRITICAL: Facet/trend yükleme hatası uygulamayı çökertmesin (endpoint'ler ilk istekte yükler)
+                api_logger.warning(f"⚠️ Facet/trend loading failed (non-critical): {str(e)}")
         else:
-            api_logger.warning("⚠️ Veritabanı bağlantısı olmadığı için cache yükleme atlandı.")
+            api_logger.warning("⚠️ Veritabanı bağlantısı olmadığı için facet yükleme atlandı.")
+        
+        # ✅ 2b. Bölüm kataloğunu belleğe yükle (okuma endpoint'leri buradan beslenir)
+        if db_ready:
+            api_logger.info("📋 Step 2b: Loading department catalogue into memory...")
+            try:
+                await asyncio.to_thread(_load_catalogue)
+            except Exception as e:
+                # ✅ CRITICAL: Katalog yüklenemezse endpoint'ler DB'ye düşer
+                api_logger.warning(f"⚠️ Catalogue loading failed (non-critical): {str(e)}")
+        try:
+            app.state.catalogue_refresh_task = asyncio.create_task(_periodic_catalogue_refresh_task())
+        except Exception as e:
+            api_logger.error(f"⚠️ Catalogue refresh task başlatılamadı (non-critical): {str(e)}")
+        
+        # ✅ İşbirlikçi filtreleme benzerliklerini arka planda hesapla/yükle (istekler beklemez)
+        try:
+            app.state.collaborative_refresh_task = asyncio.create_task(_periodic_collaborative_refresh_task())
+        except Exception as e:
+            api_logger.error(f"⚠️ Collaborative refresh task başlatılamadı (non-critical): {str(e)}")
+        
+        # ✅ Paylaşılan log ayarlarını (log_settings tablosu) periyodik uygula
+        try:
+            app.state.log_settings_task = asyncio.create_task(_periodic_log_settings_task())
+        except Exception as e:
+            api_logger.error(f"⚠️ Log settings task başlatılamadı (non-critical): {str(e)}")
+        
+        # ✅ 2c. ML modellerini süreç geneli kayıt defterine yükle (istekler paylaşır)
+        try:
+            from services.ml_model_registry import model_registry
+            await asyncio.to_thread(model_registry.get)
+        except Exception as e:
+            # ✅ CRITICAL: Model yüklenemezse ilk ML isteği tekrar dener / kural tabanlıya düşer
+            api_logger.warning(f"⚠️ ML model loading failed (non-critical): {str(e)}")
         
         # ✅ 3. Periodik ML eğitim görevini başlat
         api_logger.info("📋 Step 3: Starting periodic ML training task...")
@@ -215,7 +351,9 @@ async def lifespan(app: FastAPI):
                 expected_tables = [
                     "users", "students", "exam_attempts", "universities", "departments",
                     "agenda_items", "study_sessions", "forum_posts", "forum_comments",
-                    "preferences", "swipes", "chat_messages", "recommendations"
+                    "preferences", "swipes", "chat_messages", "recommendations",
+                    "catalogue_facets", "department_trends", "department_similarities", "log_settings",
+                    "refresh_locks", "recommendation_versions"
                 ]
                 missing_tables = [tbl for tbl in expected_tables if tbl not in existing_tables]
                 if missing_tables:
@@ -249,12 +387,19 @@ async def lifespan(app: FastAPI):
     # Shutdown
     api_logger.info("Shutting down application...")
     # Periodik görev iptali
-    task = getattr(app.state, "ml_training_task", None)
-    if task:
-        task.cancel()
-        with contextlib.suppress(Exception):
-            await task
+    for task_name in ("ml_training_task", "catalogue_refresh_task", "collaborative_refresh_task", "log_settings_task"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
+            with contextlib.suppress(Exception):
+                await task
+    # Planlanmış ML eğitimini iptal et
+    with contextlib.suppress(Exception):
+        from services.ml_training_scheduler import ml_training_scheduler
+        ml_training_scheduler.shutdown()
     api_logger.info("Application shutdown complete")
+    # ✅ Kuyruktaki log kayıtlarını diske yaz ve dinleyici thread'ini durdur
+    shutdown_logging()
 
 
 app = FastAPI(
@@ -310,6 +455,9 @@ app.add_middleware(
 # ✅ Response compression middleware (büyük JSON response'lar için)
 app.add_middleware(GZipMiddleware, minimum_size=1000)  # 1KB'dan büyük response'ları sıkıştır
 
+# ✅ İstek metrikleri (en dışta: gecikme tüm middleware'leri, boyut sıkıştırılmış yanıtı kapsar)
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(students.router, prefix="/api/students", tags=["students"])
@@ -328,6 +476,7 @@ app.include_router(agenda.router, prefix="/api/agenda", tags=["agenda"])
 app.include_router(study.router, prefix="/api/study", tags=["study"])
 app.include_router(targets.router, prefix="/api/targets", tags=["targets"])
 app.include_router(settings.router, prefix="/api/settings", tags=["settings"])
+app.include_router(logging_settings.router, prefix="/api/logging", tags=["logging"])
 
 
 # ✅ Tüm API route'larını logla (router'lar eklendikten sonra - startup'ta)
@@ -357,6 +506,12 @@ async def health_check():
     return {"status": "healthy", "service": "osym-rehberi-api"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus formatında istek/DB/cache metrikleri"""
+    return PlainTextResponse(metrics_registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/api/health/db")
 async def health_check_database_simple():
     """
@@ -4,9 +4,11 @@
 from .user import User
 from .student import Student
 from .exam_attempt import ExamAttempt
-from .university import University, Department, DepartmentYearlyStats, Recommendation
+from .university import University, Department, DepartmentYearlyStats, DepartmentTrend, CatalogueFacet, DepartmentSimilarity, Recommendation, RecommendationVersion
 from .preference import Preference
 from .swipe import Swipe
+from .log_setting import LogSetting
+from .refresh_lock import RefreshLock
 from .forum import ForumPost, ForumComment
 from .yok_data import YokUniversity, YokProgram, YokCity, ScoreCalculation
 
@@ -49,9 +51,15 @@ __all__ = [
     "University",
     "Department",
     "DepartmentYearlyStats",
+    "DepartmentTrend",
+    "CatalogueFacet",
+    "DepartmentSimilarity",
     "Recommendation",
+    "RecommendationVersion",
     "Preference",
     "Swipe",
+    "LogSetting",
+    "RefreshLock",
     "ForumPost",
     "ForumComment",
     "YokUniversity",
@@ -25,6 +25,7 @@ class ForumPost(Base):
     # Indexes
     __table_args__ = (
         Index('ix_forum_posts_category_created', 'category', 'created_at'),
+        Index('ix_forum_posts_created_id', 'created_at', 'id'),  # Keyset sayfalama (kategorisiz liste)
     )
     
     def __repr__(self):
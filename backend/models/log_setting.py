@@ -0,0 +1,22 @@
+from sqlalchemy import Column, String, Float, DateTime
+from sqlalchemy.sql import func
+from database import Base
+
+
+class LogSetting(Base):
+    """✅ Çalışma anında değiştirilen log seviyesi / DEBUG örnekleme oranı
+
+    PUT /api/logging/{logger_name} ile yazılır; API ve Celery worker'ları tabloyu
+    periyodik okuyup kendi süreçlerine uygular (services/log_settings.py).
+    """
+    __tablename__ = "log_settings"
+
+    logger_name = Column(String(100), primary_key=True)
+    level = Column(String(10), nullable=True)  # DEBUG, INFO, ... (None = değiştirilmedi)
+    sample_rate = Column(Float, nullable=True)  # 0.0-1.0 (None = varsayılan)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<LogSetting(logger_name={self.logger_name}, level={self.level}, sample_rate={self.sample_rate})>"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, String, Float
+from database import Base
+
+
+class RefreshLock(Base):
+    """✅ Süreçler arası yeniden hesaplama kilidi (tek satır = tutulan kilit)
+
+    Pahalı materyalizasyonları (ör. department_similarities) aynı anda yalnızca
+    bir sürecin yapmasını sağlar; diğerleri hazır tabloyu okur
+    (services/refresh_lock.py). Süresi dolan kilit, çöken süreçten devralınır.
+    """
+    __tablename__ = "refresh_locks"
+
+    name = Column(String(64), primary_key=True)
+    owner = Column(String(64), nullable=False)  # Kilidi tutan sürecin rastgele token'ı
+    expires_at = Column(Float, nullable=False)  # Unix saniye
+
+    def __repr__(self):
+        return f"<RefreshLock(name={self.name}, owner={self.owner}, expires_at={self.expires_at})>"
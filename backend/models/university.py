@@ -126,6 +126,80 @@ class DepartmentYearlyStats(Base):
         return f"<DepartmentYearlyStats(id={self.id}, department_id={self.department_id}, year={self.year}, min_score={self.min_score})>"
 
 
+class DepartmentTrend(Base):
+    """✅ Bölüm başına önceden hesaplanmış yıllık seri ve trend metrikleri
+    
+    DepartmentYearlyStats'tan import sonrası yeniden hesaplanır (services/trends.refresh_trends);
+    öneri ve koç yanıtları çok yıllı sorgu yerine tek satır okur.
+    """
+    __tablename__ = "department_trends"
+    
+    department_id = Column(Integer, ForeignKey("departments.id"), primary_key=True)
+    first_year = Column(Integer, nullable=False)
+    last_year = Column(Integer, nullable=False)
+    year_count = Column(Integer, nullable=False)
+    series = Column(Text, nullable=False)  # JSON: {"year": [...], "min_score": [...], "min_rank": [...], ...}
+    
+    # Türetilmiş metrikler (yetersiz veri varsa None)
+    min_score_slope = Column(Float, nullable=True)  # Yıllık taban puan değişimi (en küçük kareler)
+    min_rank_slope = Column(Float, nullable=True)  # Yıllık taban sıralama değişimi
+    min_score_volatility = Column(Float, nullable=True)  # Yıllık taban puan değişimlerinin standart sapması
+    projected_min_score = Column(Float, nullable=True)  # Gelecek yıl için tahmini taban puan
+    projected_min_rank = Column(Integer, nullable=True)  # Gelecek yıl için tahmini taban sıralama
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<DepartmentTrend(department_id={self.department_id}, years={self.first_year}-{self.last_year}, projected_min_score={self.projected_min_score})>"
+
+
+class CatalogueFacet(Base):
+    """✅ Materyalize katalog filtre boyutları (şehir, üniversite türü, alan türü, derece türü, dil) ve sayımları
+    
+    Import script'leri tarafından yeniden hesaplanır (services/facets.refresh_facets);
+    API süreçleri tabloyu belleğe alıp oradan sunar.
+    """
+    __tablename__ = "catalogue_facets"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    facet = Column(String(30), nullable=False, index=True)  # city, university_type, field_type, ...
+    value = Column(String(200), nullable=False)
+    position = Column(Integer, nullable=False, default=0)  # Facet içindeki görüntüleme sırası
+    department_count = Column(Integer, nullable=False, default=0)
+    university_count = Column(Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (UniqueConstraint('facet', 'value', name='uq_catalogue_facet_value'),)
+    
+    def __repr__(self):
+        return f"<CatalogueFacet(facet={self.facet}, value={self.value}, department_count={self.department_count})>"
+
+
+class DepartmentSimilarity(Base):
+    """✅ Swipe beğenileri ve tercihlerden hesaplanan bölüm-bölüm benzerlikleri (bölüm başına en iyi N)
+
+    Arka plan görevi tarafından yeniden hesaplanır (services/collaborative.refresh_similarities);
+    "bunu beğenenler şunları da beğendi" skorları tablodan belleğe alınıp oradan okunur.
+    """
+    __tablename__ = "department_similarities"
+    
+    department_id = Column(Integer, ForeignKey("departments.id"), primary_key=True)
+    rank = Column(Integer, primary_key=True)  # Benzerlik sırası (0 = en benzer)
+    similar_department_id = Column(Integer, ForeignKey("departments.id"), nullable=False)
+    score = Column(Float, nullable=False)  # Küçültülmüş kosinüs benzerliği (0-1)
+    co_likes = Column(Integer, nullable=False)  # İki bölümü birlikte beğenen öğrenci sayısı
+    source_version = Column(String(64), nullable=False)  # Hesaplandığı etkileşim verisinin parmak izi
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<DepartmentSimilarity(department_id={self.department_id}, rank={self.rank}, similar_department_id={self.similar_department_id}, score={self.score})>"
+
+
 class Recommendation(Base):
     __tablename__ = "recommendations"
 
@@ -150,3 +224,23 @@ class Recommendation(Base):
     
     def __repr__(self):
         return f"<Recommendation(id={self.id}, student_id={self.student_id}, department_id={self.department_id})>"
+
+
+class RecommendationVersion(Base):
+    """Öğrencinin saklı önerilerinin hesaplandığı model sürümleri (öğrenci başına tek satır)
+
+    Her yazımdan sonra öğrencinin tüm öneri satırları aynı sürümlerle
+    hesaplanmış olur; sürüm değişince ilgili bileşen yeniden hesaplanır
+    (bkz. services.recommendation_materializer).
+    """
+    __tablename__ = "recommendation_versions"
+
+    student_id = Column(Integer, primary_key=True)
+    admission_version = Column(String(32), nullable=True)  # success_probability (services.admission)
+    collaborative_version = Column(String(32), nullable=True)  # preference_score (services.collaborative)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<RecommendationVersion(student_id={self.student_id}, admission_version={self.admission_version}, collaborative_version={self.collaborative_version})>"
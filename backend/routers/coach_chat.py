@@ -261,65 +261,61 @@ async def coach_chat(payload: ChatRequest, db: Session = Depends(get_db)):
         # ✅ Tarihsel veri context injection - Bölüm isimlerini mesajdan çıkar ve trend analizi yap
         historical_context = ""
         try:
-            from models import Department, DepartmentYearlyStats
-            import json
-            
-            # Kullanıcı mesajından bölüm isimlerini çıkarmaya çalış (basit keyword matching)
-            user_message_lower = payload.message.lower()
-            department_keywords = []
-            
-            # Önerilerden bölüm isimlerini al
+            from services.trends import trend_store
+
+            # ✅ Trendler import sırasında materyalize edilir; bölüm başına sorgu atılmaz
+            trends = trend_store.get() or trend_store.load(db)
+
+            # Önerilerden bölümleri al (isim başına bir bölüm)
+            department_keywords = {}
             for rec in recs[:10]:  # İlk 10 öneri
                 try:
                     dept = rec.get('department') if isinstance(rec, dict) else getattr(rec, 'department', None)
                     if dept:
                         dept_name = getattr(dept, 'normalized_name', None) or getattr(dept, 'name', '')
-                        if dept_name and dept_name.lower() not in [k.lower() for k in department_keywords]:
-                            department_keywords.append(dept_name)
+                        if dept_name and dept_name.lower() not in department_keywords:
+                            department_keywords[dept_name.lower()] = (dept_name, dept.id)
                 except:
                     continue
-            
-            # Her bölüm için yıllara göre trend analizi yap
-            if department_keywords:
-                historical_data = []
-                for dept_name in department_keywords[:5]:  # İlk 5 bölüm
-                    # Normalize edilmiş isme göre bölümleri bul
-                    depts = db.query(Department).filter(
-                        Department.normalized_name == dept_name
-                    ).limit(1).all()
-                    
-                    if depts:
-                        dept = depts[0]
-                        # Yıllık istatistikleri getir
-                        yearly_stats = db.query(DepartmentYearlyStats).filter(
-                            DepartmentYearlyStats.department_id == dept.id
-                        ).order_by(DepartmentYearlyStats.year).all()
-                        
-                        if yearly_stats:
-                            stats_summary = []
-                            for stat in yearly_stats:
-                                stats_summary.append(
-                                    f"{stat.year}: min_score={stat.min_score or 'N/A'}, "
-                                    f"min_rank={stat.min_rank or 'N/A'}, quota={stat.quota or 'N/A'}"
-                                )
-                            
-                            # Trend analizi
-                            scores = [s.min_score for s in yearly_stats if s.min_score]
-                            if len(scores) >= 2:
-                                trend = "artış" if scores[-1] > scores[0] else "azalış" if scores[-1] < scores[0] else "stabil"
-                                trend_pct = abs((scores[-1] - scores[0]) / scores[0] * 100) if scores[0] > 0 else 0
-                                historical_data.append(
-                                    f"Bölüm: {dept_name}\n"
-                                    f"Yıllık Veriler: {' | '.join(stats_summary)}\n"
-                                    f"Trend: {trend} (%{trend_pct:.1f} değişim)\n"
-                                )
-                
-                if historical_data:
-                    historical_context = (
-                        f"\n\n📊 TARİHSEL VERİ ANALİZİ (2022-2025):\n"
-                        f"{''.join(historical_data)}\n"
-                        f"Bu verileri kullanarak trend analizi yap ve öğrenciye stratejik tavsiyeler ver.\n"
+
+            # Her bölüm için yıllara göre trend analizi
+            historical_data = []
+            for dept_name, dept_id in list(department_keywords.values())[:5]:  # İlk 5 bölüm
+                trend = trends.get(dept_id)
+                if trend is None:
+                    continue
+                series = trend.series
+                stats_summary = [
+                    f"{year}: min_score={score or 'N/A'}, min_rank={rank or 'N/A'}, quota={quota or 'N/A'}"
+                    for year, score, rank, quota in zip(
+                        series["year"], series["min_score"], series["min_rank"], series["quota"]
+                    )
+                ]
+                scores = [score for score in series["min_score"] if score]
+                if len(scores) >= 2:
+                    direction = "artış" if scores[-1] > scores[0] else "azalış" if scores[-1] < scores[0] else "stabil"
+                    trend_pct = abs((scores[-1] - scores[0]) / scores[0] * 100) if scores[0] > 0 else 0
+                    projection = ""
+                    if trend.min_score_slope is not None and trend.projected_min_score is not None:
+                        projection = (
+                            f"Eğim: {trend.min_score_slope:+.2f} puan/yıl | "
+                            f"{trend.last_year + 1} tahmini taban: {trend.projected_min_score:.2f}"
+                            + (f" (sıralama ~{trend.projected_min_rank})" if trend.projected_min_rank else "")
+                            + "\n"
+                        )
+                    historical_data.append(
+                        f"Bölüm: {dept_name}\n"
+                        f"Yıllık Veriler: {' | '.join(stats_summary)}\n"
+                        f"Trend: {direction} (%{trend_pct:.1f} değişim)\n"
+                        f"{projection}"
                     )
+
+            if historical_data:
+                historical_context = (
+                    f"\n\n📊 TARİHSEL VERİ ANALİZİ (2022-2025):\n"
+                    f"{''.join(historical_data)}\n"
+                    f"Bu verileri kullanarak trend analizi yap ve öğrenciye stratejik tavsiyeler ver.\n"
+                )
         except Exception as e:
             api_logger.warning(f"Historical context extraction failed: {str(e)[:100]}", user_id=payload.student_id)
             historical_context = ""
@@ -1,16 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
 from typing import List, Optional
 import random
+import numpy as np
 from pydantic import BaseModel, Field
 
-from database import get_db
+from database import get_async_db
 from models import University, Department, Swipe, Preference, Student
-from schemas.university import DepartmentWithUniversityResponse, UniversityResponse
+from schemas.dto import department_dtos
+from schemas.university import DepartmentWithUniversityResponse
 from core.logging_config import api_logger
 from core.exceptions import StudentNotFoundError
-from routers.universities import get_university_logo_url
+from core.responses import FastJSONResponse
+from services.catalogue import department_catalogue
+from services.collaborative import Affinity, collaborative_store
 
 router = APIRouter()
 
@@ -28,6 +32,15 @@ class SwipeResponse(BaseModel):
     added_to_preferences: bool = False
 
 
+async def _student_affinity(db: AsyncSession, student_id: int) -> Optional[Affinity]:
+    """Öğrencinin "senin gibi öğrenciler şunları da beğendi" skorları (benzerlik yoksa None)"""
+    try:
+        return await db.run_sync(lambda session: collaborative_store.affinity(session, student_id))
+    except Exception as e:
+        api_logger.warning(f"Collaborative scores unavailable: {str(e)[:100]}", user_id=student_id)
+        return None
+
+
 @router.get("/departments", response_model=List[DepartmentWithUniversityResponse])
 async def get_discovery_departments(
     city: Optional[List[str]] = Query(None, description="Şehir listesi (örn: ['İstanbul', 'Ankara'])"),
@@ -35,7 +48,8 @@ async def get_discovery_departments(
     min_score: Optional[float] = Query(None),
     max_score: Optional[float] = Query(None),
     random: bool = Query(False, description="Rastgele 10 bölüm getir (Keşfet modu için)"),
-    db: Session = Depends(get_db)
+    student_id: Optional[int] = Query(None, description="Benzer öğrencilerin beğendiği bölümleri önce getir"),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Gelişmiş filtreleme ile bölümleri getir (Keşfet modülü için)
@@ -44,36 +58,61 @@ async def get_discovery_departments(
     - Şehir listesi ile filtreleme (birden fazla şehir)
     - Alan türü, puan aralığı filtreleme
     - random=true parametresi ile rastgele 10 bölüm getirme
+    - student_id verilirse (random=false) "senin gibi öğrenciler şunları da beğendi" skoruna göre sıralama
     """
     try:
+        affinity = await _student_affinity(db, student_id) if student_id and not random else None
+        
+        # ✅ Bellekteki katalogdan getir (DB'ye gitmeden)
+        snapshot = department_catalogue.get()
+        if snapshot is not None:
+            rows = snapshot.filter_departments(
+                field_type=field_type,
+                cities=city,
+                min_score=min_score,
+                max_score=max_score,
+            )
+            if random:
+                import random as random_module
+                rows = random_module.sample(rows, min(10, len(rows)))
+            else:
+                if affinity is not None:
+                    # Kararlı sıralama: eşit skorlarda katalog sırası korunur
+                    rows.sort(key=lambda row: -affinity.get(row[0].id))
+                rows = rows[:100]
+            result = snapshot.department_dtos(rows)
+            api_logger.info(f"Discovery: Retrieved {len(result)} departments from catalogue (random={random})")
+            return FastJSONResponse(result)
+        
         from sqlalchemy.orm import selectinload
         
-        # Base query
-        query = db.query(Department).options(
-            selectinload(Department.university)
-        )
+        # Base query (University bilgisi bölümlerle birlikte selectinload ile çekilir)
+        query = select(Department)
+        load_university = selectinload(Department.university)
         
         # Şehir filtresi (birden fazla şehir desteklenir)
         if city:
             query = query.join(University, Department.university_id == University.id)
             # Şehir listesindeki herhangi bir şehirle eşleşen bölümleri getir
             city_filters = [University.city.ilike(f"%{c}%") for c in city]
-            query = query.filter(or_(*city_filters))
+            query = query.where(or_(*city_filters))
         
         # Alan türü filtresi
         if field_type:
-            query = query.filter(Department.field_type == field_type)
+            query = query.where(Department.field_type == field_type)
         
         # Puan aralığı filtreleme
         if min_score:
-            query = query.filter(Department.min_score.isnot(None), Department.min_score >= min_score)
+            query = query.where(Department.min_score.isnot(None), Department.min_score >= min_score)
         if max_score:
-            query = query.filter(Department.min_score.isnot(None), Department.min_score <= max_score)
+            query = query.where(Department.min_score.isnot(None), Department.min_score <= max_score)
         
         # Rastgele mod: 10 bölüm getir
         if random:
             # Toplam sayıyı al
-            total_count = query.count()
+            total_count = await db.scalar(
+                select(func.count()).select_from(query.with_only_columns(Department.id).subquery())
+            )
             if total_count == 0:
                 return []
             
@@ -81,16 +120,18 @@ async def get_discovery_departments(
             limit = min(10, total_count)
             
             # PostgreSQL için RANDOM() kullan, SQLite için random() kullan
-            from database import engine
-            if engine.url.drivername == 'postgresql':
-                departments = query.order_by(func.random()).limit(limit).all()
+            if db.bind.dialect.name == 'postgresql':
+                departments = (await db.execute(query.options(load_university).order_by(func.random()).limit(limit))).scalars().all()
             else:
                 # SQLite için: Tüm ID'leri al, rastgele seç, sonra sorgula
-                all_ids = [row[0] for row in query.with_entities(Department.id).all()]
+                all_ids = (await db.execute(query.with_only_columns(Department.id))).scalars().all()
                 if not all_ids:
                     return []
-                selected_ids = random.sample(all_ids, min(limit, len(all_ids)))
-                departments = query.filter(Department.id.in_(selected_ids)).all()
+                import random as random_module
+                selected_ids = random_module.sample(all_ids, min(limit, len(all_ids)))
+                departments = (await db.execute(
+                    query.options(load_university).where(Department.id.in_(selected_ids))
+                )).scalars().all()
         else:
             # Normal mod: Sıralı getir
             from sqlalchemy import case
@@ -98,79 +139,69 @@ async def get_discovery_departments(
                 case((Department.min_score.is_(None), 1), else_=0),
                 Department.name
             )
-            departments = query.limit(100).all()  # Varsayılan limit
+            if affinity is not None:
+                # Katalog yolu gibi: filtrelenmiş kümenin tamamı skora göre sıralanır, sonra 100 ile kesilir
+                # (kararlı sıralama: eşit skorlarda isim sırası korunur)
+                ids = np.array((await db.execute(query.with_only_columns(Department.id))).scalars().all(), dtype=np.int64)
+                top_ids = ids[np.argsort(-affinity.lookup(ids), kind="stable")[:100]].tolist()
+                by_id = {dept.id: dept for dept in (await db.execute(
+                    select(Department).options(load_university).where(Department.id.in_(top_ids))
+                )).scalars()}
+                departments = [by_id[dept_id] for dept_id in top_ids if dept_id in by_id]
+            else:
+                departments = (await db.execute(query.options(load_university).limit(100))).scalars().all()  # Varsayılan limit
         
-        # Response oluştur
-        result = []
-        for dept in departments:
-            uni = dept.university
-            if not uni:
-                continue
-            
-            # University response
-            university_response = UniversityResponse(
-                id=uni.id,
-                name=uni.name,
-                city=uni.city,
-                university_type=uni.university_type,
-                website=uni.website,
-                established_year=uni.established_year,
-                latitude=uni.latitude,
-                longitude=uni.longitude,
-                created_at=uni.created_at,
-                updated_at=uni.updated_at,
-                logo_url=get_university_logo_url(uni)
-            )
-            
-            # Department response
-            import json
-            attributes = []
-            if dept.attributes:
-                try:
-                    attributes = json.loads(dept.attributes)
-                except:
-                    attributes = []
-            
-            dept_response = DepartmentWithUniversityResponse(
-                id=dept.id,
-                university_id=dept.university_id,
-                name=dept.name,
-                normalized_name=dept.normalized_name,
-                attributes=attributes,
-                field_type=dept.field_type,
-                language=dept.language,
-                faculty=dept.faculty,
-                duration=dept.duration,
-                degree_type=dept.degree_type,
-                min_score=dept.min_score,
-                min_rank=dept.min_rank,
-                quota=dept.quota,
-                scholarship_quota=dept.scholarship_quota,
-                tuition_fee=dept.tuition_fee,
-                has_scholarship=dept.has_scholarship,
-                last_year_min_score=dept.last_year_min_score,
-                last_year_min_rank=dept.last_year_min_rank,
-                last_year_quota=dept.last_year_quota,
-                description=dept.description,
-                requirements=dept.requirements,
-                created_at=dept.created_at,
-                updated_at=dept.updated_at,
-                university=university_response
-            )
-            result.append(dept_response)
+        # Response oluştur (üniversitesi olmayanlar atlanır)
+        result = department_dtos((dept, dept.university) for dept in departments if dept.university)
         
         api_logger.info(f"Discovery: Retrieved {len(result)} departments (random={random})")
-        return result
+        return FastJSONResponse(result)
         
     except Exception as e:
         api_logger.error(f"Error in discovery departments: {str(e)}", error=str(e))
         raise HTTPException(status_code=500, detail=f"Bölümler getirilemedi: {str(e)}")
 
 
+@router.get("/departments/{department_id}/similar", response_model=List[DepartmentWithUniversityResponse])
+async def get_similar_departments(
+    department_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Bu bölümü beğenen öğrencilerin beğendiği diğer bölümler (en benzer önce)
+    
+    Benzerlikler arka planda swipe beğenileri ve tercih listelerinden hesaplanır;
+    henüz yeterli etkileşim yoksa boş liste döner.
+    """
+    try:
+        snapshot = collaborative_store.get() or await db.run_sync(collaborative_store.load)
+        similar_ids = snapshot.similar(department_id, limit)[0].tolist()
+        
+        catalogue = department_catalogue.get()
+        if catalogue is not None:
+            rows = [catalogue.department_with_university(dept_id) for dept_id in similar_ids]
+            result = catalogue.department_dtos(row for row in rows if row[0] is not None and row[1] is not None)
+        else:
+            from sqlalchemy.orm import selectinload
+            departments = (await db.execute(
+                select(Department).options(selectinload(Department.university)).where(Department.id.in_(similar_ids))
+            )).scalars().all()
+            by_id = {dept.id: dept for dept in departments if dept.university}
+            result = department_dtos((by_id[dept_id], by_id[dept_id].university) for dept_id in similar_ids if dept_id in by_id)
+        
+        api_logger.info(f"Discovery: Retrieved {len(result)} similar departments for department_id={department_id}")
+        return FastJSONResponse(result)
+        
+    except Exception as e:
+        api_logger.error(f"Error in similar departments: {str(e)}", error=str(e))
+        raise HTTPException(status_code=500, detail=f"Benzer bölümler getirilemedi: {str(e)}")
+
+
 @router.post("/swipe", response_model=SwipeResponse)
 async def swipe_department(
     swipe_request: SwipeRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Sağa/Sola kaydırma işlemini kaydet (Tinder usulü)
@@ -183,25 +214,25 @@ async def swipe_department(
             raise HTTPException(status_code=400, detail="action 'like' veya 'dislike' olmalı")
         
         # Öğrenci kontrolü
-        student = db.query(Student).filter(Student.id == swipe_request.student_id).first()
+        student = await db.get(Student, swipe_request.student_id)
         if not student:
             raise StudentNotFoundError(f"Öğrenci bulunamadı: {swipe_request.student_id}")
         
         # Bölüm kontrolü
-        department = db.query(Department).filter(Department.id == swipe_request.department_id).first()
+        department = await db.get(Department, swipe_request.department_id)
         if not department:
             raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
         
         # Mevcut swipe kontrolü
-        existing_swipe = db.query(Swipe).filter(
+        existing_swipe = (await db.execute(select(Swipe).where(
             Swipe.student_id == swipe_request.student_id,
             Swipe.department_id == swipe_request.department_id
-        ).first()
+        ).limit(1))).scalars().first()
         
         if existing_swipe:
             # Mevcut swipe'ı güncelle
             existing_swipe.action = swipe_request.action
-            db.commit()
+            await db.commit()
             api_logger.info(
                 f"Swipe updated: student_id={swipe_request.student_id}, department_id={swipe_request.department_id}, action={swipe_request.action}",
                 user_id=swipe_request.student_id
@@ -214,7 +245,7 @@ async def swipe_department(
                 action=swipe_request.action
             )
             db.add(db_swipe)
-            db.commit()
+            await db.commit()
             api_logger.info(
                 f"Swipe created: student_id={swipe_request.student_id}, department_id={swipe_request.department_id}, action={swipe_request.action}",
                 user_id=swipe_request.student_id
@@ -224,17 +255,17 @@ async def swipe_department(
         added_to_preferences = False
         if swipe_request.action == 'like':
             # Mevcut preference kontrolü
-            existing_preference = db.query(Preference).filter(
+            existing_preference = (await db.execute(select(Preference).where(
                 Preference.student_id == swipe_request.student_id,
                 Preference.department_id == swipe_request.department_id
-            ).first()
+            ).limit(1))).scalars().first()
             
             if not existing_preference:
                 # Yeni preference oluştur
                 # Order'ı mevcut tercih sayısına göre belirle
-                max_order = db.query(Preference).filter(
+                max_order = await db.scalar(select(func.count(Preference.id)).where(
                     Preference.student_id == swipe_request.student_id
-                ).count()
+                ))
                 
                 db_preference = Preference(
                     student_id=swipe_request.student_id,
@@ -242,7 +273,7 @@ async def swipe_department(
                     order=max_order + 1
                 )
                 db.add(db_preference)
-                db.commit()
+                await db.commit()
                 added_to_preferences = True
                 api_logger.info(
                     f"Department added to preferences via swipe: student_id={swipe_request.student_id}, department_id={swipe_request.department_id}",
@@ -262,7 +293,7 @@ async def swipe_department(
     except (HTTPException, StudentNotFoundError):
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         api_logger.error(
             f"Error in swipe: {str(e)}",
             error=str(e),
@@ -11,8 +11,9 @@ from schemas.exam_attempt import (
     ExamAttemptListResponse
 )
 from services.score_calculator import ScoreCalculator
-from services.recommendation_engine import RecommendationEngine
-from routers.ml_recommendations import train_models_background
+from services.recommendation_engine import refresh_student_recommendations
+from services.recommendation_materializer import SCORE_FIELDS
+from services.ml_training_scheduler import ml_training_scheduler
 from core.logging_config import api_logger
 
 router = APIRouter()
@@ -124,21 +125,9 @@ async def create_exam_attempt(
         try:
             student_id = attempt.student_id
 
-            def _regenerate_recommendations_task(student_id_inner: int):
-                # Yeni DB session oluştur (background task için)
-                from database import SessionLocal
-                bg_db = SessionLocal()
-                try:
-                    engine = RecommendationEngine(bg_db)
-                    try:
-                        engine.generate_recommendations(student_id_inner, limit=50)
-                    except Exception as e:
-                        api_logger.error("Recommendation regen failed", user_id=student_id_inner, error=str(e))
-                finally:
-                    bg_db.close()
-
-            background_tasks.add_task(_regenerate_recommendations_task, student_id)
-            background_tasks.add_task(train_models_background, db)
+            # ✅ Yalnızca puana bağlı bileşenler (uyumluluk, başarı olasılığı) yeniden hesaplanır
+            background_tasks.add_task(refresh_student_recommendations, student_id, SCORE_FIELDS)
+            ml_training_scheduler.request_retrain(reason="exam_attempt_created")
         except Exception as bt_err:
             api_logger.warning("Background tasks scheduling failed", error=str(bt_err))
             # Background task hatası kritik değil, response'u gönderebiliriz
@@ -327,15 +316,8 @@ async def update_exam_attempt(
     try:
         student_id = attempt.student_id
 
-        def _regenerate_recommendations_task(student_id_inner: int):
-            engine = RecommendationEngine(db)
-            try:
-                engine.generate_recommendations(student_id_inner, limit=50)
-            except Exception as e:
-                api_logger.error("Recommendation regen failed", user_id=student_id_inner, error=str(e))
-
-        background_tasks.add_task(_regenerate_recommendations_task, student_id)
-        background_tasks.add_task(train_models_background, db)
+        background_tasks.add_task(refresh_student_recommendations, student_id, SCORE_FIELDS)
+        ml_training_scheduler.request_retrain(reason="exam_attempt_updated")
     except Exception as bt_err:
         api_logger.warning("Background tasks scheduling failed", error=str(bt_err))
     
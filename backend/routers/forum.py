@@ -1,8 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
+from sqlalchemy import and_, func, desc, or_, select
 from typing import List, Optional
+from datetime import timedelta
+import base64
+import json
 
+from core.cache import get_default_cache
 from database import get_db
 from models import ForumPost, ForumComment, Student
 from schemas.forum import (
@@ -15,44 +19,110 @@ from core.exceptions import StudentNotFoundError
 router = APIRouter()
 
 
+# ✅ Toplam gönderi sayısı kategori başına kısa süre cache'lenir (her sayfada COUNT(*) yok);
+# yeni gönderi oluşturulunca bu önekteki anahtarlar silinir
+FORUM_TOTAL_CACHE_PREFIX = "forum.total:"
+FORUM_TOTAL_TTL = timedelta(minutes=5)
+
+
+def encode_post_cursor(post_id: int) -> str:
+    """Keyset cursor: `(created_at, id)` azalan sıralamasındaki son gönderinin id'si"""
+    return base64.urlsafe_b64encode(json.dumps([post_id]).encode('utf-8')).decode('ascii')
+
+
+def decode_post_cursor(cursor: str) -> int:
+    """Cursor'ı çöz (geçersizse 400)"""
+    try:
+        (post_id,) = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(post_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+
+
+def _require_cursor_post(db: Session, post_id: int) -> None:
+    """Cursor gönderisi silindiyse keyset alt sorgusu NULL olur ve sayfa sessizce boş döner: 400 ver"""
+    if db.query(ForumPost.id).filter(ForumPost.id == post_id).first() is None:
+        raise HTTPException(status_code=400, detail="Cursor gönderisi bulunamadı, ilk sayfadan yeniden başlayın")
+
+
+def _before_post(query, post_id: int):
+    """Keyset: `(created_at, id) < cursor gönderisi` (OFFSET taraması yok)
+
+    Cursor gönderisinin created_at değeri alt sorgu ile okunur; karşılaştırma
+    veritabanının kendi saklama biçiminde yapılır (SQLite metin tarihleri dahil).
+    """
+    anchor_created_at = (
+        select(ForumPost.created_at).where(ForumPost.id == post_id).scalar_subquery()
+    )
+    return query.filter(or_(
+        ForumPost.created_at < anchor_created_at,
+        and_(ForumPost.created_at == anchor_created_at, ForumPost.id < post_id),
+    ))
+
+
+def invalidate_forum_totals() -> None:
+    get_default_cache().delete_prefix(FORUM_TOTAL_CACHE_PREFIX)
+
+
+def _forum_post_total(db: Session, category: Optional[str]) -> int:
+    """Kategori için toplam gönderi sayısı (cache'li, eşzamanlı ilk istekler tek COUNT'u bekler)"""
+    def count() -> int:
+        query = db.query(func.count(ForumPost.id))
+        if category:
+            query = query.filter(ForumPost.category == category)
+        return query.scalar() or 0
+
+    return get_default_cache().get_or_set(
+        f"{FORUM_TOTAL_CACHE_PREFIX}{category or '*'}", count, ttl=FORUM_TOTAL_TTL
+    )
+
+
 @router.get("/posts", response_model=ForumPostListResponse)
 async def get_forum_posts(
     page: int = Query(1, ge=1, description="Sayfa numarası"),
     size: int = Query(20, ge=1, le=100, description="Sayfa başına kayıt sayısı"),
     category: Optional[str] = Query(None, description="Kategori filtresi: TYT, AYT, Rehberlik"),
+    cursor: Optional[str] = Query(None, description="✅ Keyset cursor (önceki yanıtın next_cursor alanı)"),
     db: Session = Depends(get_db)
 ):
     """
     Tüm forum gönderilerini listele (Sayfalama ile)
     
     Parametreler:
-    - page: Sayfa numarası (varsayılan: 1)
+    - page: Sayfa numarası (varsayılan: 1); cursor verilirse kullanılmaz
     - size: Sayfa başına kayıt sayısı (varsayılan: 20, maksimum: 100)
     - category: Kategori filtresi (opsiyonel)
+    - cursor: Keyset cursor; derin sayfalar OFFSET taraması olmadan gelir
+    
+    Sayfa dolduysa sonraki sayfanın cursor'ı `next_cursor` alanında döner.
+    `total` en fazla birkaç dakika eski olabilir.
     """
+    cursor_post_id = decode_post_cursor(cursor) if cursor else None
+    if cursor_post_id is not None:
+        _require_cursor_post(db, cursor_post_id)
     try:
-        # Base query
-        query = db.query(ForumPost)
+        # ✅ Yorum sayısı aynı sorguda, ilişkili alt sorgu ile (gönderi başına ayrı COUNT yok)
+        comment_count = (
+            select(func.count(ForumComment.id))
+            .where(ForumComment.post_id == ForumPost.id)
+            .correlate(ForumPost)
+            .scalar_subquery()
+        )
+        query = db.query(ForumPost, comment_count)
         
         # Kategori filtresi
         if category:
             query = query.filter(ForumPost.category == category)
         
-        # Toplam sayı
-        total = query.count()
-        
-        # Sayfalama
-        skip = (page - 1) * size
-        posts = query.order_by(desc(ForumPost.created_at)).offset(skip).limit(size).all()
-        
-        # Yorum sayılarını hesapla
-        result_posts = []
-        for post in posts:
-            comment_count = db.query(func.count(ForumComment.id)).filter(
-                ForumComment.post_id == post.id
-            ).scalar()
-            
-            result_posts.append(ForumPostResponse(
+        query = query.order_by(desc(ForumPost.created_at), desc(ForumPost.id))
+        if cursor_post_id is not None:
+            query = _before_post(query, cursor_post_id)
+        else:
+            query = query.offset((page - 1) * size)
+        rows = query.limit(size).all()
+        
+        result_posts = [
+            ForumPostResponse(
                 id=post.id,
                 student_id=post.student_id,
                 title=post.title,
@@ -60,16 +130,21 @@ async def get_forum_posts(
                 category=post.category,
                 created_at=post.created_at,
                 updated_at=post.updated_at,
-                comment_count=comment_count or 0
-            ))
+                comment_count=count or 0
+            )
+            for post, count in rows
+        ]
+        
+        next_cursor = encode_post_cursor(rows[-1][0].id) if len(rows) == size else None
         
-        api_logger.info(f"Retrieved {len(result_posts)} forum posts (page={page}, size={size})")
+        api_logger.info(f"Retrieved {len(result_posts)} forum posts (page={page}, size={size}, cursor={cursor is not None})")
         
         return ForumPostListResponse(
             posts=result_posts,
-            total=total,
+            total=_forum_post_total(db, category),
             page=page,
-            size=size
+            size=size,
+            next_cursor=next_cursor
         )
         
     except Exception as e:
@@ -99,6 +174,7 @@ async def create_forum_post(
         db.add(db_post)
         db.commit()
         db.refresh(db_post)
+        invalidate_forum_totals()
         
         api_logger.info(
             f"Forum post created: id={db_post.id}, student_id={post.student_id}",
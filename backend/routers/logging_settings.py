@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from database import get_db
+from core.logging_config import api_logger, get_log_config, set_log_level
+from core.security import require_admin_token
+from services.log_settings import log_settings_sync, save_log_setting
+
+router = APIRouter()
+
+
+@router.get("")
+async def get_logging_config():
+    """Bu worker'daki logger seviyeleri, DEBUG örnekleme oranları ve düşürülen kayıt sayısı"""
+    return get_log_config()
+
+
+@router.put("/{logger_name}", dependencies=[Depends(require_admin_token)])
+def update_logging_config(
+    logger_name: str,
+    level: Optional[str] = None,
+    sample_rate: Optional[float] = Query(None, ge=0.0, le=1.0),
+    db: Session = Depends(get_db)
+):
+    """
+    Logger seviyesini / DEBUG örnekleme oranını çalışma anında değiştir (yönetici anahtarı gerekir)
+
+    Ayar `log_settings` tablosuna yazılır ve bu worker'a hemen uygulanır; diğer API
+    ve Celery worker'ları `LOG_SETTINGS_POLL_SECONDS` içinde uygular, yeniden
+    başlatma gerekmez (ör. `PUT /api/logging/api.recommendation?level=DEBUG&sample_rate=0.01`).
+    """
+    if level is not None:
+        try:
+            # Geçersiz seviye kaydedilmeden reddedilir
+            set_log_level(logger_name, level)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    save_log_setting(db, logger_name, level, sample_rate)
+    log_settings_sync.sync(db)
+    api_logger.info("Logging config updated", logger=logger_name, level=level, sample_rate=sample_rate)
+    return get_log_config()
@@ -5,7 +5,11 @@ import asyncio
 
 from database import get_db
 from services.ml_recommendation_engine import MLRecommendationEngine
-from schemas.ml_recommendations import MLRecommendationResponse, MLModelStatusResponse, MLTrainingResponse
+from services.ml_model_registry import model_registry
+from services.ml_training_scheduler import ml_training_scheduler
+from schemas.ml_recommendations import (
+    MLRecommendationResponse, MLModelStatusResponse, MLTrainingResponse, MLRetrainingStatus, MLModelArtifactsStatus
+)
 from schemas.university import DepartmentWithUniversityResponse
 from models import University
 from core.logging_config import api_logger
@@ -19,8 +23,8 @@ async def train_ml_models(background_tasks: BackgroundTasks, db: Session = Depen
     try:
         api_logger.info("ML model training requested")
         
-        # Arka planda eğitimi başlat
-        background_tasks.add_task(train_models_background, db)
+        # Zamanlayıcıya hemen çalıştırılacak zorunlu eğitim iste (ayrı süreçte çalışır)
+        ml_training_scheduler.request_retrain(reason="manual", force=True, delay=0)
         
         return MLTrainingResponse(
             message="ML model eğitimi başlatıldı. Eğitim tamamlandığında bildirim alacaksınız.",
@@ -106,34 +110,26 @@ async def get_ml_recommendations(
         raise HTTPException(status_code=500, detail=f"Öneriler oluşturulamadı: {str(e)}")
 
 @router.get("/model-status", response_model=MLModelStatusResponse)
-async def get_model_status(db: Session = Depends(get_db)):
-    """ML model durumunu kontrol et"""
+async def get_model_status():
+    """ML model durumunu kontrol et (yüklü sürüm, yükleme süresi, artefakt boyutu)"""
     try:
-        ml_engine = MLRecommendationEngine(db)
+        # ✅ Kayıt defterindeki paylaşılan paket (manifest değiştiyse yeni sürüm yüklenir)
+        bundle = await asyncio.to_thread(model_registry.get)
         
         return MLModelStatusResponse(
-            is_trained=ml_engine.is_trained,
-            models_available=list(ml_engine.models.keys()),
-            message="Modeller eğitilmiş" if ml_engine.is_trained else "Modeller henüz eğitilmemiş"
+            is_trained=bundle.is_trained,
+            models_available=list(bundle.models.keys()),
+            message="Modeller eğitilmiş" if bundle.is_trained else "Modeller henüz eğitilmemiş",
+            retraining=MLRetrainingStatus(**ml_training_scheduler.status()),
+            artifacts=MLModelArtifactsStatus(**model_registry.status())
         )
     except Exception as e:
         api_logger.error("Model status check failed", error=str(e))
         raise HTTPException(status_code=500, detail=f"Model durumu kontrol edilemedi: {str(e)}")
 
 async def train_models_background(db: Session):
-    """Arka planda model eğitimi"""
+    """Yeniden eğitim iste (zamanlayıcı pencere içindeki tetikleri tek eğitimde birleştirir)"""
     try:
-        api_logger.info("Background ML training started")
-        
-        # Eğitim verisi oluştur
-        from scripts.train_ml_models import generate_training_data
-        training_data = generate_training_data()
-        
-        # ML engine oluştur ve eğit
-        ml_engine = MLRecommendationEngine(db)
-        ml_engine.train_models(training_data)
-        
-        api_logger.info("Background ML training completed successfully")
-        
+        ml_training_scheduler.request_retrain(reason="background")
     except Exception as e:
-        api_logger.error("Background ML training failed", error=str(e))
+        api_logger.error("ML retrain request failed", error=str(e))
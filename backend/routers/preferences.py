@@ -1,13 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from typing import List, Optional, Tuple
+import numpy as np
 
-from database import get_db
+from database import get_async_db
 from models import Preference, Student, Department, University
 from schemas.preference import PreferenceCreate, PreferenceResponse, PreferenceWithDepartmentResponse
-from schemas.university import DepartmentWithUniversityResponse, UniversityResponse
 from core.logging_config import api_logger
 from core.exceptions import StudentNotFoundError
+from core.responses import FastJSONResponse
+from schemas.dto import PreferenceDTO, department_dto, university_dto
+from services.admission import admission_store
+from services.catalogue import department_catalogue
+from services.vectorized_scoring import DepartmentArrays
 
 
 router = APIRouter()
@@ -42,6 +49,33 @@ def calculate_probability(student_score: float, department_min_score: Optional[f
         return probability, "Orta"
 
 
+def probability_label(probability: float) -> str:
+    """Olasılık etiketi (calculate_probability aralıklarıyla aynı)"""
+    if probability >= 70.0:
+        return "Yüksek"
+    if probability <= 30.0:
+        return "Düşük"
+    return "Orta"
+
+
+async def _admission_probabilities(db: AsyncSession, student: Student, departments: List) -> List[Optional[float]]:
+    """Tercih edilen bölümler için sıralama tabanlı olasılıklar (tek vektörel çağrı); hesaplanamayanlar None"""
+    model = admission_store.get()
+    if model is None:
+        try:
+            model = await db.run_sync(admission_store.load)
+        except Exception as e:
+            await db.rollback()
+            api_logger.warning(f"Admission model unavailable: {str(e)[:100]}", user_id=student.id)
+            return [None] * len(departments)
+    arrays = DepartmentArrays.from_rows([
+        (d.id, d.university_id, d.name, d.field_type, d.min_score, d.min_rank, None, False, None, None)
+        for d in departments
+    ])
+    probabilities = model.probabilities(student, arrays, np.arange(len(departments)))
+    return [None if np.isnan(p) else float(p) for p in probabilities]
+
+
 def get_university_logo_url(university: University) -> Optional[str]:
     """Üniversite logosu URL'i oluştur"""
     if university.website:
@@ -53,7 +87,7 @@ def get_university_logo_url(university: University) -> Optional[str]:
 @router.get("/", response_model=List[PreferenceWithDepartmentResponse])
 async def get_preferences(
     student_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Öğrencinin tercih listesini getir
@@ -64,104 +98,77 @@ async def get_preferences(
     """
     try:
         # Öğrenciyi kontrol et
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise StudentNotFoundError(f"Öğrenci bulunamadı: {student_id}")
         
+        # ✅ Katalog yüklüyse bölüm/üniversite bilgisi bellekten alınır (eager loading gerekmez)
+        snapshot = department_catalogue.get()
+        
         # Tercihleri getir (eager loading ile)
-        preferences = db.query(Preference).filter(
+        query = select(Preference).where(
             Preference.student_id == student_id
-        ).options(
-            selectinload(Preference.department).selectinload(Department.university)
-        ).order_by(
+        )
+        if snapshot is None:
+            query = query.options(
+                selectinload(Preference.department).selectinload(Department.university)
+            )
+        preferences = (await db.execute(query.order_by(
             Preference.order.asc().nullslast(),
             Preference.created_at.asc()
-        ).all()
+        ))).scalars().all()
         
         if not preferences:
             return []
         
-        # Response oluştur
-        result = []
+        # Response oluştur (DTO: satır başına Pydantic doğrulaması yok)
+        rows = []
+        university_dtos = {}
         for pref in preferences:
-            dept = pref.department
-            if not dept:
-                continue
-            
-            uni = dept.university
-            if not uni:
+            if snapshot is not None:
+                dept, uni = snapshot.department_with_university(pref.department_id)
+            else:
+                dept = pref.department
+                uni = dept.university if dept else None
+            if not dept or not uni:
                 continue
             
-            # University response
-            university_response = UniversityResponse(
-                id=uni.id,
-                name=uni.name,
-                city=uni.city,
-                university_type=uni.university_type,
-                website=uni.website,
-                established_year=uni.established_year,
-                latitude=uni.latitude,
-                longitude=uni.longitude,
-                created_at=uni.created_at,
-                updated_at=uni.updated_at,
-                logo_url=get_university_logo_url(uni)
-            )
-            
-            # Department response
-            import json
-            attributes = []
-            if dept.attributes:
-                try:
-                    attributes = json.loads(dept.attributes)
-                except:
-                    attributes = []
-            
-            department_response = DepartmentWithUniversityResponse(
-                id=dept.id,
-                university_id=dept.university_id,
-                name=dept.name,
-                normalized_name=dept.normalized_name,
-                attributes=attributes,
-                field_type=dept.field_type,
-                language=dept.language,
-                faculty=dept.faculty,
-                duration=dept.duration,
-                degree_type=dept.degree_type,
-                min_score=dept.min_score,
-                min_rank=dept.min_rank,
-                quota=dept.quota,
-                scholarship_quota=dept.scholarship_quota,
-                tuition_fee=dept.tuition_fee,
-                has_scholarship=dept.has_scholarship,
-                last_year_min_score=dept.last_year_min_score,
-                last_year_min_rank=dept.last_year_min_rank,
-                last_year_quota=dept.last_year_quota,
-                description=dept.description,
-                requirements=dept.requirements,
-                created_at=dept.created_at,
-                updated_at=dept.updated_at,
-                university=university_response
-            )
-            
-            # Kazanma ihtimalini hesapla
-            probability, label = calculate_probability(
-                student.total_score or 0.0,
-                dept.min_score
-            )
+            if snapshot is not None:
+                department = snapshot.department_dto(dept, uni)
+            else:
+                # Aynı üniversite için DTO tekrar kullanılır
+                university = university_dtos.get(uni.id)
+                if university is None:
+                    university = university_dtos[uni.id] = university_dto(uni)
+                department = department_dto(dept, university)
+            rows.append((pref, dept, department))
+        
+        # ✅ Kazanma ihtimali: öğrenci sıralaması vs bölümün tarihsel taban sıralaması (tüm tercihler tek seferde);
+        # sıralama bilgisi yoksa puan farkı kuralı
+        rank_probabilities = await _admission_probabilities(db, student, [dept for _, dept, _ in rows])
+        result = []
+        for (pref, dept, department), rank_probability in zip(rows, rank_probabilities):
+            if rank_probability is not None:
+                probability, label = rank_probability, probability_label(rank_probability)
+            else:
+                probability, label = calculate_probability(
+                    student.total_score or 0.0,
+                    dept.min_score
+                )
             
-            result.append(PreferenceWithDepartmentResponse(
+            result.append(PreferenceDTO(
                 id=pref.id,
                 student_id=pref.student_id,
                 department_id=pref.department_id,
                 order=pref.order,
                 created_at=pref.created_at,
-                department=department_response,
+                department=department,
                 probability=probability,
                 probability_label=label
             ))
         
         api_logger.info(f"Retrieved {len(result)} preferences for student {student_id}")
-        return result
+        return FastJSONResponse(result)
         
     except StudentNotFoundError:
         raise
@@ -173,25 +180,25 @@ async def get_preferences(
 @router.post("", response_model=PreferenceResponse)
 async def create_preference(
     preference: PreferenceCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Listeye yeni bölüm ekle"""
     try:
         # Öğrenciyi kontrol et
-        student = db.query(Student).filter(Student.id == preference.student_id).first()
+        student = await db.get(Student, preference.student_id)
         if not student:
             raise StudentNotFoundError(f"Öğrenci bulunamadı: {preference.student_id}")
         
         # Bölümü kontrol et
-        department = db.query(Department).filter(Department.id == preference.department_id).first()
+        department = await db.get(Department, preference.department_id)
         if not department:
             raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
         
         # Aynı bölüm zaten eklenmiş mi kontrol et
-        existing = db.query(Preference).filter(
+        existing = (await db.execute(select(Preference).where(
             Preference.student_id == preference.student_id,
             Preference.department_id == preference.department_id
-        ).first()
+        ).limit(1))).scalars().first()
         
         if existing:
             raise HTTPException(
@@ -201,9 +208,9 @@ async def create_preference(
         
         # Order belirtilmemişse, mevcut tercih sayısına göre otomatik atama
         if preference.order is None:
-            max_order = db.query(Preference).filter(
+            max_order = await db.scalar(select(func.count(Preference.id)).where(
                 Preference.student_id == preference.student_id
-            ).count()
+            ))
             preference.order = max_order + 1
         
         # Yeni tercih oluştur
@@ -213,8 +220,8 @@ async def create_preference(
             order=preference.order
         )
         db.add(db_preference)
-        db.commit()
-        db.refresh(db_preference)
+        await db.commit()
+        await db.refresh(db_preference)
         
         api_logger.info(
             f"Preference created: student_id={preference.student_id}, department_id={preference.department_id}",
@@ -226,7 +233,7 @@ async def create_preference(
     except (StudentNotFoundError, HTTPException):
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         api_logger.error(f"Error creating preference: {str(e)}", error=str(e), user_id=preference.student_id)
         raise HTTPException(status_code=500, detail=f"Tercih eklenemedi: {str(e)}")
 
@@ -234,17 +241,17 @@ async def create_preference(
 @router.delete("/{preference_id}")
 async def delete_preference(
     preference_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Listeden tercih çıkar"""
     try:
-        preference = db.query(Preference).filter(Preference.id == preference_id).first()
+        preference = await db.get(Preference, preference_id)
         if not preference:
             raise HTTPException(status_code=404, detail="Tercih bulunamadı")
         
         student_id = preference.student_id
-        db.delete(preference)
-        db.commit()
+        await db.delete(preference)
+        await db.commit()
         
         api_logger.info(f"Preference deleted: id={preference_id}", user_id=student_id)
         
@@ -253,7 +260,7 @@ async def delete_preference(
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         api_logger.error(f"Error deleting preference: {str(e)}", error=str(e))
         raise HTTPException(status_code=500, detail=f"Tercih silinemedi: {str(e)}")
 
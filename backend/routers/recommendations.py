@@ -1,18 +1,109 @@
 # -*- coding: utf-8 -*-
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.responses import JSONResponse
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional, Tuple
 
-from database import get_db
-from models import Student, Recommendation
-from schemas.university import RecommendationResponse
+from database import SessionLocal, get_async_db
+from models import Student, Recommendation, RecommendationVersion
+from schemas.university import RecommendationResponse, RecommendationJobResponse, RecommendationJobStatus
 from services.recommendation_engine import RecommendationEngine
 from services.score_calculator import ScoreCalculator
 from core.logging_config import api_logger
+from core.responses import FastJSONResponse
+from services.catalogue import UniversityRecord, department_catalogue
 
 router = APIRouter()
 
 
+async def _load_universities(db: AsyncSession, university_ids):
+    """Üniversiteleri id -> nesne sözlüğü olarak tek sorguda getir"""
+    from models import University
+    
+    if not university_ids:
+        return {}
+    result = await db.execute(select(University).where(University.id.in_(university_ids)))
+    return {uni.id: uni for uni in result.scalars()}
+
+
+async def _load_departments_with_universities(db: AsyncSession, department_ids):
+    """Bölüm ve üniversiteleri tek seferde getir (katalog yüklüyse bellekten)"""
+    from models import Department
+    
+    snapshot = department_catalogue.get()
+    if snapshot is not None:
+        departments_dict = {
+            dept_id: snapshot.departments[dept_id]
+            for dept_id in department_ids
+            if dept_id in snapshot.departments
+        }
+        return departments_dict, snapshot.universities
+    
+    result = await db.execute(select(Department).where(Department.id.in_(department_ids)))
+    departments_dict = {dept.id: dept for dept in result.scalars()}
+    universities_dict = await _load_universities(db, {dept.university_id for dept in departments_dict.values()})
+    return departments_dict, universities_dict
+
+
+async def _load_popular_departments(db: AsyncSession, field_type: Optional[str] = None, limit: int = 20):
+    """En yüksek puanlı (sonra kontenjanı yüksek) bölümleri getir; alan türünde yoksa tümünden"""
+    from models import Department
+    
+    # ✅ min_score None olan bölümleri filtreleme dışında bırak
+    query = select(Department).where(
+        Department.min_score.isnot(None),
+        Department.min_score > 0
+    ).order_by(
+        Department.min_score.desc(),
+        Department.quota.desc().nullslast()
+    ).limit(limit)
+    
+    departments = []
+    if field_type:
+        departments = (await db.execute(query.where(Department.field_type == field_type))).scalars().all()
+    if not departments:
+        departments = (await db.execute(query)).scalars().all()
+    
+    universities_dict = await _load_universities(db, {dept.university_id for dept in departments})
+    return departments, universities_dict
+
+
+def _generate_in_thread(student_id: int, limit: int, weights: Tuple[float, float, float]):
+    """Skorlama CPU-yoğun ve senkron ORM kullanır: thread pool'da kendi session'ı ile çalıştır"""
+    db = SessionLocal()
+    try:
+        return RecommendationEngine(db).generate_recommendations(student_id, limit, weights)
+    finally:
+        db.close()
+
+
+def _enqueue_in_thread(student_id: int, limit: int, weights: Tuple[float, float, float]):
+    """İşi kuyruğa al ve durumunu oku: broker çağrıları bloklayıcıdır, eager modda motor da burada çalışır"""
+    from tasks.recommendation_tasks import enqueue_recommendation_job, get_recommendation_job
+
+    job_id = enqueue_recommendation_job(student_id, limit, weights)
+    # Eager modda iş burada zaten bitmiş olur; gerçek durumu bildir
+    return job_id, get_recommendation_job(job_id)["status"]
+
+
+def _department_response(department, university):
+    """ORM nesnesi veya katalog kaydından DepartmentWithUniversityResponse oluştur"""
+    from schemas.university import DepartmentWithUniversityResponse
+    from routers.universities import build_university_response
+    
+    if isinstance(university, UniversityRecord):
+        return DepartmentWithUniversityResponse(
+            **department._asdict(),
+            university=build_university_response(university)
+        )
+    return DepartmentWithUniversityResponse(
+        **department.__dict__,
+        university=university
+    )
+
+
 @router.post("/generate/{student_id}", response_model=List[RecommendationResponse])
 async def generate_recommendations(
     student_id: int,
@@ -21,39 +112,52 @@ async def generate_recommendations(
     w_s: float = Query(0.4, ge=0.0, le=1.0, description="Weight for success probability"),
     w_p: float = Query(0.2, ge=0.0, le=1.0, description="Weight for preference"),
     force_regenerate: bool = Query(False, description="Force regeneration even if recommendations exist"),
-    db: Session = Depends(get_db)
+    async_mode: bool = Query(False, alias="async", description="Run generation as a background job and return its id"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Öğrenci için tercih önerileri oluştur"""
+    """Öğrenci için tercih önerileri oluştur
+
+    `?async=true` ile hesaplama Celery işi olarak kuyruğa alınır ve 202 ile
+    job id döner; ilerleme `GET /recommendations/jobs/{job_id}` ile izlenir.
+    """
     try:
         api_logger.info("Starting recommendation generation", user_id=student_id, limit=limit)
         
         # Öğrenci var mı kontrol et
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
         
+        # ✅ ASENKRON MOD: Uzun hesaplamayı istek içinde yapma, işi kuyruğa al
+        if async_mode:
+            try:
+                job_id, status = await run_in_threadpool(_enqueue_in_thread, student_id, limit, (w_c, w_s, w_p))
+            except Exception as e:
+                # Broker/sonuç deposu erişilemiyorsa popüler bölümlere düşme: istemci tekrar denemeli
+                api_logger.error("Could not enqueue recommendation job", user_id=student_id, error=str(e))
+                raise HTTPException(status_code=503, detail="Öneri işi kuyruğa alınamadı")
+            api_logger.info("Recommendation job enqueued", user_id=student_id, job_id=job_id)
+            job = RecommendationJobResponse(
+                job_id=job_id,
+                student_id=student_id,
+                status=status,
+                status_url=f"/api/recommendations/jobs/{job_id}"
+            )
+            return JSONResponse(status_code=202, content=job.model_dump())
+        
         # ✅ Cache kontrolü: Eğer öneriler varsa ve force_regenerate=False ise, mevcut önerileri döndür
         if not force_regenerate:
-            existing_recs = db.query(Recommendation).filter(
-                Recommendation.student_id == student_id
-            ).order_by(Recommendation.final_score.desc()).limit(limit).all()
+            existing_recs = (await db.execute(
+                select(Recommendation).where(
+                    Recommendation.student_id == student_id
+                ).order_by(Recommendation.final_score.desc()).limit(limit)
+            )).scalars().all()
             
             if existing_recs and len(existing_recs) > 0:
                 api_logger.info("Returning cached recommendations", user_id=student_id, count=len(existing_recs))
                 # Mevcut önerileri formatla ve döndür
-                from models import Department, University
-                from schemas.university import DepartmentWithUniversityResponse
-                
                 department_ids = {rec.department_id for rec in existing_recs}
-                departments_dict = {
-                    dept.id: dept
-                    for dept in db.query(Department).filter(Department.id.in_(department_ids)).all()
-                }
-                university_ids = {dept.university_id for dept in departments_dict.values()}
-                universities_dict = {
-                    uni.id: uni
-                    for uni in db.query(University).filter(University.id.in_(university_ids)).all()
-                }
+                departments_dict, universities_dict = await _load_departments_with_universities(db, department_ids)
                 
                 result = []
                 for rec in existing_recs:
@@ -73,10 +177,7 @@ async def generate_recommendations(
                     university = universities_dict.get(department.university_id)
                     if not university:
                         continue
-                    department_response = DepartmentWithUniversityResponse(
-                        **department.__dict__,
-                        university=university
-                    )
+                    department_response = _department_response(department, university)
                     result.append(RecommendationResponse(
                         **rec.__dict__,
                         department=department_response
@@ -86,17 +187,16 @@ async def generate_recommendations(
                 if result:
                     return result
         
-        # ✅ Önce eski önerileri temizle (yeniden hesaplama için)
-        db.query(Recommendation).filter(Recommendation.student_id == student_id).delete()
-        db.commit()
+        # ✅ Yeniden hesaplama: motor saklı önerileri delta olarak günceller
+        # (yalnızca skoru değişen satırlar yazılır, delete-all + insert-all yok)
         
         # Öneri motorunu çalıştır (try-except ile güvenli hale getir)
+        # ✅ Skorlama CPU-yoğun: event loop'u bloklamamak için thread pool'da çalışır
         try:
-            recommendation_engine = RecommendationEngine(db)
             # normalize weights (total>0 ise)
             total_w = max(1e-9, (w_c + w_s + w_p))
             weights = (w_c / total_w, w_s / total_w, w_p / total_w)
-            recommendations = recommendation_engine.generate_recommendations(student_id, limit, weights)
+            recommendations = await run_in_threadpool(_generate_in_thread, student_id, limit, weights)
             
             # ✅ NULL PUAN KORUMASI: min_score None olan bölümleri filtrele
             filtered_recommendations = []
@@ -129,45 +229,15 @@ async def generate_recommendations(
         # ✅ Eğer öneri bulunduysa döndür
         if recommendations and len(recommendations) > 0:
             api_logger.info("Recommendations generated successfully", user_id=student_id, count=len(recommendations))
-            return recommendations
+            # ✅ Motor DTO döndürür: response_model doğrulaması olmadan doğrudan serileştir
+            return FastJSONResponse(recommendations)
         
         # ✅ FALLBACK: Eğer öneri bulunamazsa, en yüksek puanlı veya en çok kontenjanlı 20 bölümü "Popüler Bölümler" olarak döndür
         api_logger.info("No recommendations found, returning popular departments", user_id=student_id)
-        from models import Department, University
         from schemas.university import DepartmentWithUniversityResponse
         
-        # ✅ min_score None olan bölümleri filtreleme dışında bırak
-        popular_query = db.query(Department).filter(
-            Department.min_score.isnot(None),
-            Department.min_score > 0
-        )
-        
-        # Öğrencinin alan türüne uygun popüler bölümleri getir
-        if student.field_type:
-            popular_query = popular_query.filter(Department.field_type == student.field_type)
-        
-        # Önce en yüksek puanlıları getir, sonra kontenjanı yüksek olanları
-        popular_departments = popular_query.order_by(
-            Department.min_score.desc(),
-            Department.quota.desc().nullslast()
-        ).limit(20).all()  # En yüksek puanlı 20 bölüm
-        
-        # Eğer alan türüne uygun yoksa, tüm popüler bölümleri getir
-        if not popular_departments:
-            popular_departments = db.query(Department).filter(
-                Department.min_score.isnot(None),
-                Department.min_score > 0
-            ).order_by(
-                Department.min_score.desc(),
-                Department.quota.desc().nullslast()
-            ).limit(20).all()
-        
-        # University'leri çek
-        university_ids = {dept.university_id for dept in popular_departments}
-        universities_dict = {
-            uni.id: uni
-            for uni in db.query(University).filter(University.id.in_(university_ids)).all()
-        }
+        # Öğrencinin alan türüne uygun en yüksek puanlı 20 bölüm (yoksa tüm alanlardan)
+        popular_departments, universities_dict = await _load_popular_departments(db, student.field_type)
         
         # Response formatına çevir (Popüler Bölümler olarak)
         fallback_result = []
@@ -207,43 +277,16 @@ async def generate_recommendations(
         api_logger.error(f"Error generating recommendations: {str(e)}", user_id=student_id, error=str(e))
         
         try:
-            student = db.query(Student).filter(Student.id == student_id).first()
-            if not student:
-                # Öğrenci yoksa bile popüler bölümleri döndür
-                student = None
+            await db.rollback()
+            # Öğrenci yoksa bile popüler bölümleri döndür
+            student = await db.get(Student, student_id)
             
-            from models import Department, University
             from schemas.university import DepartmentWithUniversityResponse
             
-            # ✅ min_score None olan bölümleri filtreleme dışında bırak
-            popular_query = db.query(Department).filter(
-                Department.min_score.isnot(None),
-                Department.min_score > 0
+            popular_departments, universities_dict = await _load_popular_departments(
+                db, student.field_type if student else None
             )
             
-            if student and student.field_type:
-                popular_query = popular_query.filter(Department.field_type == student.field_type)
-            
-            popular_departments = popular_query.order_by(
-                Department.min_score.desc(),
-                Department.quota.desc().nullslast()
-            ).limit(20).all()
-            
-            if not popular_departments:
-                popular_departments = db.query(Department).filter(
-                    Department.min_score.isnot(None),
-                    Department.min_score > 0
-                ).order_by(
-                    Department.min_score.desc(),
-                    Department.quota.desc().nullslast()
-                ).limit(20).all()
-            
-            university_ids = {dept.university_id for dept in popular_departments}
-            universities_dict = {
-                uni.id: uni
-                for uni in db.query(University).filter(University.id.in_(university_ids)).all()
-            }
-            
             fallback_result = []
             for dept in popular_departments:
                 university = universities_dict.get(dept.university_id)
@@ -277,24 +320,36 @@ async def generate_recommendations(
             return []
 
 
+@router.get("/jobs/{job_id}", response_model=RecommendationJobStatus)
+async def get_recommendation_job_status(job_id: str):
+    """Asenkron öneri işinin durumunu ve ilerlemesini döndür"""
+    from tasks.recommendation_tasks import get_recommendation_job
+    try:
+        # ✅ Sonuç backend'i (Redis/DB) okuması bloklayıcıdır: event loop yerine thread pool'da
+        return await run_in_threadpool(get_recommendation_job, job_id)
+    except Exception as e:
+        api_logger.error("Could not read recommendation job status", job_id=job_id, error=str(e))
+        raise HTTPException(status_code=503, detail="İş durumu okunamadı")
+
+
 @router.get("/student/{student_id}", response_model=List[RecommendationResponse])
 async def get_student_recommendations(
     student_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=200),
     recommendation_type: Optional[str] = Query(None, description="safe, dream, realistic"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Öğrencinin mevcut önerilerini getir - Direkt List döndürür (Flutter uyumlu)
     ✅ BULLETPROOF: Herhangi bir hata durumunda fallback mekanizması devreye girer
     """
-    from models import Department, University
+    from models import Department
     from schemas.university import DepartmentWithUniversityResponse
     
     try:
         # Öğrenci var mı kontrol et
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             # Öğrenci yoksa bile fallback ile devam et (404 verme)
             api_logger.warning(f"Student {student_id} not found, using fallback", user_id=student_id)
@@ -302,33 +357,24 @@ async def get_student_recommendations(
         
         # Öğrenci varsa normal akışı dene
         if student:
-            query = db.query(Recommendation).filter(Recommendation.student_id == student_id)
+            query = select(Recommendation).where(Recommendation.student_id == student_id)
             
             # Öneri türüne göre filtrele
             if recommendation_type == "safe":
-                query = query.filter(Recommendation.is_safe_choice == True)
+                query = query.where(Recommendation.is_safe_choice == True)
             elif recommendation_type == "dream":
-                query = query.filter(Recommendation.is_dream_choice == True)
+                query = query.where(Recommendation.is_dream_choice == True)
             elif recommendation_type == "realistic":
-                query = query.filter(Recommendation.is_realistic_choice == True)
+                query = query.where(Recommendation.is_realistic_choice == True)
             
             # Final skora göre sırala
             query = query.order_by(Recommendation.final_score.desc())
             
-            recommendations = query.offset(skip).limit(limit).all()
+            recommendations = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
             
             # ✅ N+1 problemini çöz: Tüm department ve university'leri tek seferde çek
             department_ids = {rec.department_id for rec in recommendations}
-            departments_dict = {
-                dept.id: dept
-                for dept in db.query(Department).filter(Department.id.in_(department_ids)).all()
-            }
-            
-            university_ids = {dept.university_id for dept in departments_dict.values()}
-            universities_dict = {
-                uni.id: uni
-                for uni in db.query(University).filter(University.id.in_(university_ids)).all()
-            }
+            departments_dict, universities_dict = await _load_departments_with_universities(db, department_ids)
             
             # Response formatına çevir
             result = []
@@ -342,10 +388,7 @@ async def get_student_recommendations(
                     if not university:
                         continue
                     
-                    department_response = DepartmentWithUniversityResponse(
-                        **department.__dict__,
-                        university=university
-                    )
+                    department_response = _department_response(department, university)
                     
                     result.append(RecommendationResponse(
                         **rec.__dict__,
@@ -363,38 +406,11 @@ async def get_student_recommendations(
         # ✅ FALLBACK: Eğer öneri yoksa veya hata varsa popüler bölümleri döndür
         api_logger.info("Using fallback: returning popular departments", user_id=student_id)
         
-        # ✅ min_score None olan bölümleri filtreleme dışında bırak
-        popular_query = db.query(Department).filter(
-            Department.min_score.isnot(None),
-            Department.min_score > 0
+        # Öğrencinin alan türüne uygun en yüksek puanlı 20 bölüm (yoksa tüm alanlardan)
+        popular_departments, universities_dict = await _load_popular_departments(
+            db, student.field_type if student else None
         )
         
-        # Öğrencinin alan türüne uygun popüler bölümleri getir
-        if student and student.field_type:
-            popular_query = popular_query.filter(Department.field_type == student.field_type)
-        
-        popular_departments = popular_query.order_by(
-            Department.min_score.desc(),  # En yüksek puanlılar önce
-            Department.quota.desc().nullslast()  # Sonra kontenjanı yüksek olanlar
-        ).limit(20).all()  # Maksimum 20 bölüm
-        
-        if not popular_departments:
-            # Eğer alan türüne uygun yoksa, tüm popüler bölümleri getir
-            popular_departments = db.query(Department).filter(
-                Department.min_score.isnot(None),
-                Department.min_score > 0
-            ).order_by(
-                Department.min_score.desc(),
-                Department.quota.desc().nullslast()
-            ).limit(20).all()
-        
-        # University'leri çek
-        university_ids = {dept.university_id for dept in popular_departments}
-        universities_dict = {
-            uni.id: uni
-            for uni in db.query(University).filter(University.id.in_(university_ids)).all()
-        }
-        
         # Response formatına çevir (dummy RecommendationResponse oluştur)
         result = []
         for dept in popular_departments:
@@ -439,28 +455,18 @@ async def get_student_recommendations(
         
         try:
             # ACİL DURUM PLANI: Veritabanından en popüler 20 bölümü çek
-            fallback_deps = db.query(Department).filter(
-                Department.min_score.isnot(None),
-                Department.min_score > 0
-            ).order_by(
-                Department.min_score.desc()
-            ).limit(20).all()
+            await db.rollback()
+            fallback_deps, universities_dict = await _load_popular_departments(db)
             
             if not fallback_deps:
                 # Eğer min_score olan yoksa, herhangi bir bölümü al
-                fallback_deps = db.query(Department).limit(20).all()
+                fallback_deps = (await db.execute(select(Department).limit(20))).scalars().all()
+                universities_dict = await _load_universities(db, {dept.university_id for dept in fallback_deps})
             
             if not fallback_deps:
                 # En kötü durum: Boş liste döndür (ama 500 hatası verme)
                 return []
             
-            # University'leri çek
-            university_ids = {dept.university_id for dept in fallback_deps}
-            universities_dict = {
-                uni.id: uni
-                for uni in db.query(University).filter(University.id.in_(university_ids)).all()
-            }
-            
             # Department objelerini Recommendation formatına çevirip döndür
             result = []
             for dep in fallback_deps:
@@ -501,9 +507,9 @@ async def get_student_recommendations(
 
 
 @router.get("/{recommendation_id}", response_model=RecommendationResponse)
-async def get_recommendation(recommendation_id: int, db: Session = Depends(get_db)):
+async def get_recommendation(recommendation_id: int, db: AsyncSession = Depends(get_async_db)):
     """Belirli bir öneriyi getir"""
-    recommendation = db.query(Recommendation).filter(Recommendation.id == recommendation_id).first()
+    recommendation = await db.get(Recommendation, recommendation_id)
     if not recommendation:
         raise HTTPException(status_code=404, detail="Öneri bulunamadı")
     
@@ -511,8 +517,8 @@ async def get_recommendation(recommendation_id: int, db: Session = Depends(get_d
     from models import Department, University
     from schemas.university import DepartmentWithUniversityResponse
     
-    department = db.query(Department).filter(Department.id == recommendation.department_id).first()
-    university = db.query(University).filter(University.id == department.university_id).first()
+    department = await db.get(Department, recommendation.department_id)
+    university = await db.get(University, department.university_id)
     
     department_response = DepartmentWithUniversityResponse(
         **department.__dict__,
@@ -529,18 +535,18 @@ async def get_recommendation(recommendation_id: int, db: Session = Depends(get_d
 async def get_goal_proximity(
     student_id: int,
     department_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Öğrencinin seçilen bölüme hedef yakınlığını döndürür.
     TYT/AYT hedefleri yoksa toplam puan vs bölüm min_score üzerinden yaklaşık yakınlık verir.
     """
     from models import Department
 
-    student = db.query(Student).filter(Student.id == student_id).first()
+    student = await db.get(Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
 
-    department = db.query(Department).filter(Department.id == department_id).first()
+    department = await db.get(Department, department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
 
@@ -584,79 +590,64 @@ async def get_goal_proximity(
 
 
 @router.delete("/student/{student_id}")
-async def clear_student_recommendations(student_id: int, db: Session = Depends(get_db)):
+async def clear_student_recommendations(student_id: int, db: AsyncSession = Depends(get_async_db)):
     """Öğrencinin tüm önerilerini temizle"""
     # Öğrenci var mı kontrol et
-    student = db.query(Student).filter(Student.id == student_id).first()
+    student = await db.get(Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
     
     # Önerileri sil
-    db.query(Recommendation).filter(Recommendation.student_id == student_id).delete()
-    db.commit()
+    await db.execute(delete(Recommendation).where(Recommendation.student_id == student_id))
+    await db.execute(delete(RecommendationVersion).where(RecommendationVersion.student_id == student_id))
+    await db.commit()
     
     return {"message": "Öğrencinin tüm önerileri temizlendi"}
 
 
 @router.delete("/{recommendation_id}")
-async def delete_recommendation(recommendation_id: int, db: Session = Depends(get_db)):
+async def delete_recommendation(recommendation_id: int, db: AsyncSession = Depends(get_async_db)):
     """Belirli bir öneriyi sil"""
-    recommendation = db.query(Recommendation).filter(Recommendation.id == recommendation_id).first()
+    recommendation = await db.get(Recommendation, recommendation_id)
     if not recommendation:
         raise HTTPException(status_code=404, detail="Öneri bulunamadı")
     
-    db.delete(recommendation)
-    db.commit()
+    await db.delete(recommendation)
+    await db.commit()
     
     return {"message": "Öneri başarıyla silindi"}
 
 
 @router.get("/stats/{student_id}")
-async def get_recommendation_stats(student_id: int, db: Session = Depends(get_db)):
+async def get_recommendation_stats(student_id: int, db: AsyncSession = Depends(get_async_db)):
     """Öğrencinin öneri istatistiklerini getir"""
     # Öğrenci var mı kontrol et
-    student = db.query(Student).filter(Student.id == student_id).first()
+    student = await db.get(Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Öğrenci bulunamadı")
     
-    # İstatistikleri hesapla
-    total_recommendations = db.query(Recommendation).filter(Recommendation.student_id == student_id).count()
-    safe_choices = db.query(Recommendation).filter(
-        Recommendation.student_id == student_id,
-        Recommendation.is_safe_choice == True
-    ).count()
-    dream_choices = db.query(Recommendation).filter(
-        Recommendation.student_id == student_id,
-        Recommendation.is_dream_choice == True
-    ).count()
-    realistic_choices = db.query(Recommendation).filter(
-        Recommendation.student_id == student_id,
-        Recommendation.is_realistic_choice == True
-    ).count()
-    
-    # Ortalama skorları hesapla
-    avg_compatibility = db.query(Recommendation).filter(Recommendation.student_id == student_id).with_entities(
-        db.func.avg(Recommendation.compatibility_score)
-    ).scalar() or 0
-    
-    avg_success = db.query(Recommendation).filter(Recommendation.student_id == student_id).with_entities(
-        db.func.avg(Recommendation.success_probability)
-    ).scalar() or 0
-    
-    avg_preference = db.query(Recommendation).filter(Recommendation.student_id == student_id).with_entities(
-        db.func.avg(Recommendation.preference_score)
-    ).scalar() or 0
+    # ✅ İstatistikleri ve ortalama skorları tek aggregate sorguda hesapla
+    stats = (await db.execute(
+        select(
+            func.count(Recommendation.id).label("total"),
+            func.sum(case((Recommendation.is_safe_choice == True, 1), else_=0)).label("safe"),
+            func.sum(case((Recommendation.is_dream_choice == True, 1), else_=0)).label("dream"),
+            func.sum(case((Recommendation.is_realistic_choice == True, 1), else_=0)).label("realistic"),
+            func.avg(Recommendation.compatibility_score).label("avg_compatibility"),
+            func.avg(Recommendation.success_probability).label("avg_success"),
+            func.avg(Recommendation.preference_score).label("avg_preference"),
+        ).where(Recommendation.student_id == student_id)
+    )).one()
     
     return {
         "student_id": student_id,
-        "total_recommendations": total_recommendations,
-        "safe_choices": safe_choices,
-        "dream_choices": dream_choices,
-        "realistic_choices": realistic_choices,
+        "total_recommendations": stats.total,
+        "safe_choices": stats.safe or 0,
+        "dream_choices": stats.dream or 0,
+        "realistic_choices": stats.realistic or 0,
         "average_scores": {
-            "compatibility": round(avg_compatibility, 2),
-            "success_probability": round(avg_success, 2),
-            "preference": round(avg_preference, 2)
+            "compatibility": round(stats.avg_compatibility or 0, 2),
+            "success_probability": round(stats.avg_success or 0, 2),
+            "preference": round(stats.avg_preference or 0, 2)
         }
     }
-
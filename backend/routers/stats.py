@@ -1,10 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, select
 from typing import List, Dict, Any
 from datetime import datetime
 
-from database import get_db
+from database import get_async_db
 from models import Student, ExamAttempt
 from core.logging_config import api_logger
 from core.exceptions import StudentNotFoundError
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.get("/progress")
 async def get_student_progress(
     student_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Öğrencinin son 10 denemesindeki net değişimini getir
@@ -39,14 +39,16 @@ async def get_student_progress(
     """
     try:
         # Öğrenci kontrolü
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise StudentNotFoundError(f"Öğrenci bulunamadı: {student_id}")
         
         # Son 10 denemeyi getir
-        attempts = db.query(ExamAttempt).filter(
-            ExamAttempt.student_id == student_id
-        ).order_by(desc(ExamAttempt.created_at)).limit(10).all()
+        attempts = (await db.execute(
+            select(ExamAttempt).where(
+                ExamAttempt.student_id == student_id
+            ).order_by(desc(ExamAttempt.created_at)).limit(10)
+        )).scalars().all()
         
         if not attempts:
             return {
@@ -143,7 +145,7 @@ async def get_student_progress(
 @router.get("/summary")
 async def get_student_summary(
     student_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Öğrencinin en iyi ve en kötü derslerini analiz et
@@ -159,14 +161,16 @@ async def get_student_summary(
     """
     try:
         # Öğrenci kontrolü
-        student = db.query(Student).filter(Student.id == student_id).first()
+        student = await db.get(Student, student_id)
         if not student:
             raise StudentNotFoundError(f"Öğrenci bulunamadı: {student_id}")
         
         # Son 5 denemeyi getir (trend analizi için)
-        attempts = db.query(ExamAttempt).filter(
-            ExamAttempt.student_id == student_id
-        ).order_by(desc(ExamAttempt.created_at)).limit(5).all()
+        attempts = (await db.execute(
+            select(ExamAttempt).where(
+                ExamAttempt.student_id == student_id
+            ).order_by(desc(ExamAttempt.created_at)).limit(5)
+        )).scalars().all()
         
         if len(attempts) < 2:
             return {
@@ -9,8 +9,9 @@ from schemas.student import StudentCreate, StudentUpdate, StudentResponse, Stude
 from schemas.university import DepartmentWithUniversityResponse
 from services.score_calculator import ScoreCalculator
 from core.logging_config import api_logger
-from services.recommendation_engine import RecommendationEngine
-from routers.ml_recommendations import train_models_background
+from services.recommendation_engine import refresh_student_recommendations
+from services.catalogue import department_catalogue
+from services.ml_training_scheduler import ml_training_scheduler
 from core.exceptions import StudentNotFoundError, InvalidScoreError
 
 router = APIRouter()
@@ -186,17 +187,10 @@ async def update_student(
     db.commit()
     db.refresh(student)
 
-    # Tercihler değiştiğinde önerileri ve ML eğitimini arka planda tetikle
+    # Tercihler değiştiğinde önerileri (yalnızca etkilenen skor bileşenleri) ve ML eğitimini arka planda tetikle
     try:
-        def _regenerate_recommendations_task(student_id_inner: int):
-            engine = RecommendationEngine(db)
-            try:
-                engine.generate_recommendations(student_id_inner, limit=50)
-            except Exception as e:
-                api_logger.error("Recommendation regen failed", user_id=student_id_inner, error=str(e))
-
-        background_tasks.add_task(_regenerate_recommendations_task, student.id)
-        background_tasks.add_task(train_models_background, db)
+        background_tasks.add_task(refresh_student_recommendations, student.id, list(update_data))
+        ml_training_scheduler.request_retrain(reason="student_updated")
     except Exception as bt_err:
         api_logger.warning("Background tasks scheduling failed", error=str(bt_err))
     
@@ -281,22 +275,31 @@ async def get_student_targets(
         
         # Bölüm isimlerine göre Department objelerini bul
         # normalized_name veya name'e göre eşleştir
+        # ✅ Katalog yüklüyse isim başına sorgu atmadan bellekteki indeksten bulunur
+        snapshot = department_catalogue.get()
         departments = []
         for dept_name in preferred_departments:
             if not dept_name:
                 continue
             
+            if snapshot is not None:
+                dept = snapshot.find_by_name(dept_name)
+                university = snapshot.get_university(dept.university_id) if dept else None
+                if dept and university:
+                    departments.append((dept, university))
+                continue
+            
             # Önce normalized_name'e göre ara, bulamazsan name'e göre ara
             dept = db.query(Department).options(selectinload(Department.university)).filter(
                 (Department.normalized_name == dept_name) | (Department.name == dept_name)
             ).first()
             
             if dept:
-                departments.append(dept)
+                departments.append((dept, dept.university))
         
         # DepartmentWithUniversityResponse formatına çevir
         result = []
-        for dept in departments:
+        for dept, university in departments:
             # Attributes JSON string'den parse et
             attributes = []
             if dept.attributes:
@@ -320,7 +323,6 @@ async def get_student_targets(
                     requirements = None
             
             # University bilgilerini hazırla
-            university = dept.university
             university_response = {
                 "id": university.id,
                 "name": university.name,
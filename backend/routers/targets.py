@@ -11,9 +11,11 @@ from models import Preference, Student, Department, University
 from schemas.preference import (
     PreferenceCreate, PreferenceResponse, PreferenceWithDepartmentResponse
 )
-from schemas.university import DepartmentWithUniversityResponse
+from schemas.dto import PreferenceDTO, department_dto, university_dto
 from core.logging_config import api_logger
+from core.responses import FastJSONResponse
 from core.exceptions import StudentNotFoundError
+from services.catalogue import department_catalogue
 
 router = APIRouter()
 
@@ -32,18 +34,30 @@ async def get_targets(
         if not student:
             raise StudentNotFoundError(f"Öğrenci bulunamadı: {student_id}")
 
+        # ✅ Katalog yüklüyse bölüm/üniversite bilgisi bellekten alınır (eager loading gerekmez)
+        snapshot = department_catalogue.get()
+
         # Tercihleri getir (eager loading ile)
-        preferences = db.query(Preference).filter(
+        query = db.query(Preference).filter(
             Preference.student_id == student_id
-        ).options(
-            selectinload(Preference.department).selectinload(Department.university)
-        ).order_by(Preference.order, Preference.created_at).all()
+        )
+        if snapshot is None:
+            query = query.options(
+                selectinload(Preference.department).selectinload(Department.university)
+            )
+        preferences = query.order_by(Preference.order, Preference.created_at).all()
 
         result = []
+        university_dtos = {}
         for pref in preferences:
-            dept = pref.department
-            uni = dept.university if dept else None
-
+            if snapshot is not None:
+                dept, uni = snapshot.department_with_university(pref.department_id)
+            else:
+                dept = pref.department
+                uni = dept.university if dept else None
+            # Bölümü/üniversitesi silinmiş tercihler listelenmez
+            if not dept or not uni:
+                continue
 
             # Kazanma ihtimali hesapla (detaylı)
             probability_value = 50.0
@@ -62,55 +76,16 @@ async def get_targets(
                 probability = "Belirsiz"
                 probability_value = 50.0
 
-            # DepartmentWithUniversityResponse oluştur
-            from schemas.university import UniversityResponse
-            
-            dept_response = None
-            if dept:
-                uni_response = None
-                if uni:
-                    uni_response = UniversityResponse(
-                        id=uni.id,
-                        name=uni.name,
-                        city=uni.city,
-                        university_type=uni.university_type,
-                        website=uni.website,
-                        established_year=uni.established_year,
-                        latitude=uni.latitude,
-                        longitude=uni.longitude,
-                        created_at=uni.created_at,
-                        updated_at=uni.updated_at,
-                        logo_url=None
-                    )
-                
-                dept_response = DepartmentWithUniversityResponse(
-                    id=dept.id,
-                    university_id=dept.university_id,
-                    name=dept.name,
-                    normalized_name=dept.normalized_name,
-                    attributes=dept.attributes,
-                    field_type=dept.field_type,
-                    language=dept.language,
-                    faculty=dept.faculty,
-                    duration=dept.duration,
-                    degree_type=dept.degree_type,
-                    min_score=dept.min_score,
-                    min_rank=dept.min_rank,
-                    quota=dept.quota,
-                    scholarship_quota=dept.scholarship_quota,
-                    tuition_fee=dept.tuition_fee,
-                    has_scholarship=dept.has_scholarship,
-                    last_year_min_score=dept.last_year_min_score,
-                    last_year_min_rank=dept.last_year_min_rank,
-                    last_year_quota=dept.last_year_quota,
-                    description=dept.description,
-                    requirements=dept.requirements,
-                    created_at=dept.created_at,
-                    updated_at=dept.updated_at,
-                    university=uni_response
-                )
-
-            result.append(PreferenceWithDepartmentResponse(
+            # Bölüm DTO'su (katalogdaysa snapshot'ta önbelleklenmiş nesne kullanılır)
+            if snapshot is not None:
+                dept_response = snapshot.department_dto(dept, uni)
+            else:
+                university = university_dtos.get(uni.id)
+                if university is None:
+                    university = university_dtos[uni.id] = university_dto(uni)
+                dept_response = department_dto(dept, university)
+
+            result.append(PreferenceDTO(
                 id=pref.id,
                 student_id=pref.student_id,
                 department_id=pref.department_id,
@@ -121,7 +96,7 @@ async def get_targets(
                 probability_label=probability
             ))
 
-        return result
+        return FastJSONResponse(result)
     except StudentNotFoundError:
         raise
     except Exception as e:
@@ -1,148 +1,105 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-
-from database import get_db
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import case, func, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+from bisect import bisect_right
+from datetime import timedelta
+import base64
+import json
+
+from core.cache import cached
+from core.responses import FastJSONResponse, dumps
+from database import get_async_db
 from models import University, Department
 from schemas.university import (
     UniversityCreate, UniversityUpdate, UniversityResponse,
-    DepartmentCreate, DepartmentUpdate, DepartmentResponse, DepartmentWithUniversityResponse
+    DepartmentCreate, DepartmentUpdate, DepartmentResponse, DepartmentWithUniversityResponse,
+    DepartmentTrendResponse,
 )
+from schemas.dto import department_dtos, department_dtos_from_tuples, department_rows_query
+from services.catalogue import department_catalogue
+from services.facets import ASSOCIATE_DEGREE_TYPES, BACHELOR_DEGREE_TYPES, facet_store
+from services.trends import trend_store
 
 router = APIRouter()
 
+# ✅ NDJSON akışında sunucu taraflı cursor'dan tek seferde çekilen satır sayısı
+NDJSON_BATCH_SIZE = 1000
+
 
 # ⚠️ ÖNEMLİ: FastAPI'da spesifik route'lar önce, genel pattern'ler sonda olmalı!
 # Yoksa /{university_id} tüm istekleri yakalar
 
 # Spesifik endpoints (önce bunlar)
+async def _facet_snapshot(db: AsyncSession):
+    """Facet snapshot'ı; startup'ta yüklenmemişse materyalize tablodan bir kez yüklenir"""
+    snapshot = facet_store.get()
+    if snapshot is None:
+        snapshot = await db.run_sync(facet_store.load)
+    return snapshot
+
+
+def _facet_response(body_and_etag: Tuple[bytes, str], if_none_match: Optional[str]) -> Response:
+    """Önceden serileştirilmiş facet gövdesi; istemcideki ETag güncelse 304"""
+    body, etag = body_and_etag
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/facets/")
+async def get_facets(
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Tüm filtre boyutları (şehir, üniversite türü, alan türü, derece türü, dil) ve bölüm/üniversite sayıları"""
+    snapshot = await _facet_snapshot(db)
+    return _facet_response(snapshot.body(), if_none_match)
+
+
+@router.get("/facets/{facet}")
+async def get_facet(
+    facet: str,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Tek bir filtre boyutunun değerleri ve sayıları"""
+    snapshot = await _facet_snapshot(db)
+    body_and_etag = snapshot.body(facet)
+    if body_and_etag is None:
+        raise HTTPException(status_code=404, detail=f"Bilinmeyen facet: {facet}")
+    return _facet_response(body_and_etag, if_none_match)
+
+
 @router.get("/cities/", response_model=List[str])
-async def get_cities(db: Session = Depends(get_db)):
-    """81 il + KKTC şehirlerini getir (81 il öncelikli) - OPTIMIZED with CACHE"""
-    # ✅ Cache'den kontrol et (ama her zaman 81 il + KKTC döndürmeli)
-    from core.cache import get_cache, set_cache
-    from datetime import timedelta
-    # ✅ Cache'i kullan ama her zaman 81 il listesini ekle
-    # cached_cities = get_cache("cities", ttl=timedelta(hours=24))
-    # if cached_cities is not None:
-    #     return cached_cities
-    
-    # 81 il listesi (seed_yok_data.py'den)
-    TURKISH_81_CITIES = [
-        "Adana", "Adıyaman", "Afyonkarahisar", "Ağrı", "Aksaray", "Amasya", "Ankara", "Antalya",
-        "Ardahan", "Artvin", "Aydın", "Balıkesir", "Bartın", "Batman", "Bayburt", "Bilecik",
-        "Bingöl", "Bitlis", "Bolu", "Burdur", "Bursa", "Çanakkale", "Çankırı", "Çorum",
-        "Denizli", "Diyarbakır", "Düzce", "Edirne", "Elazığ", "Erzincan", "Erzurum", "Eskişehir",
-        "Gaziantep", "Giresun", "Gümüşhane", "Hakkari", "Hatay", "Iğdır", "Isparta", "İstanbul",
-        "İzmir", "Kahramanmaraş", "Karabük", "Karaman", "Kars", "Kastamonu", "Kayseri", "Kırıkkale",
-        "Kırklareli", "Kırşehir", "Kilis", "Kocaeli", "Konya", "Kütahya", "Malatya", "Manisa",
-        "Mardin", "Mersin", "Muğla", "Muş", "Nevşehir", "Niğde", "Ordu", "Osmaniye",
-        "Rize", "Sakarya", "Samsun", "Siirt", "Sinop", "Sivas", "Şanlıurfa", "Şırnak",
-        "Tekirdağ", "Tokat", "Trabzon", "Tunceli", "Uşak", "Van", "Yalova", "Yozgat", "Zonguldak"
-    ]
-    
-    # ✅ OPTIMIZED: Sadece distinct city değerlerini çek (tüm kayıtları değil)
-    from sqlalchemy import distinct
-    cities_result = db.query(distinct(University.city)).filter(University.city.isnot(None)).all()
-    db_cities = [city[0] for city in cities_result if city[0]]
-    
-    # KKTC şehirlerini bul
-    kktc_cities = [city for city in db_cities if 'kktc' in city.lower()]
-    
-    # Yabancı ülkeleri filtrele
-    foreign_cities = [city for city in db_cities if any(keyword in city.lower() for keyword in [
-        'azerbaycan', 'kırgızistan', 'bosna', 'arnavutluk', 
-        'makedonya', 'kazakistan', 'moldova', 'bakü', 'bişkek',
-        'saraybosna', 'tiran', 'üsküp', 'türkistan', 'komrat'
-    ])]
-    
-    # "Bilinmiyor" şehirleri
-    unknown_cities = [city for city in db_cities if 'bilinmiyor' in city.lower()]
-    
-    # Sıralama: 81 il + KKTC + diğerleri
-    result = []
-    
-    # Türkçe karakterler için özel sıralama ve normalize fonksiyonu
-    def normalize_city_name(text):
-        """Şehir adını normalize et (Türkçe karakterleri İngilizce karşılıklarına çevir)"""
-        replacements = {
-            'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u',
-            'Ç': 'c', 'Ğ': 'g', 'İ': 'i', 'Ö': 'o', 'Ş': 's', 'Ü': 'u'
-        }
-        result = text.lower().strip()
-        for tr, en in replacements.items():
-            result = result.replace(tr, en)
-        return result
-    
-    def turkish_sort_key(text):
-        """Sıralama için normalize edilmiş key"""
-        return normalize_city_name(text)
-    
-    # ✅ 81 il listesini normalize et (karşılaştırma için)
-    normalized_81_cities = {normalize_city_name(city): city for city in TURKISH_81_CITIES}
-    normalized_kktc_cities = {normalize_city_name(city): city for city in kktc_cities}
-    
-    # ✅ Sadece 81 il + KKTC şehirlerini döndür (DB'deki yanlış yazılmış şehirleri ekleme)
-    # 1. 81 il (Türkçe alfabetik sıralı)
-    result.extend(sorted(TURKISH_81_CITIES, key=turkish_sort_key))
-    
-    # 2. KKTC şehirleri (Türkçe alfabetik sıralı)
-    result.extend(sorted(kktc_cities, key=turkish_sort_key))
-    
-    # ✅ DB'deki diğer şehirleri EKLEME (yanlış yazılmış versiyonlar olabilir)
-    # Sadece 81 il + KKTC = 86 şehir döndür
-    
-    # ✅ Duplicate temizleme - normalize edilmiş karşılaştırma ile
-    seen = set()
-    unique_result = []
-    for city in result:
-        city_normalized = normalize_city_name(city)
-        
-        # Eğer normalize edilmiş versiyonu daha önce görülmüşse, ekleme
-        if city_normalized not in seen:
-            seen.add(city_normalized)
-            unique_result.append(city)
-    
-    # ✅ Cache'e kaydet
-    set_cache("cities", unique_result, ttl=timedelta(hours=24))
-    
-    # ✅ Debug: Kaç şehir döndürüldü?
-    from core.logging_config import api_logger
-    api_logger.info(f"Cities endpoint: {len(unique_result)} unique cities returned (81 il + KKTC + others)")
-    
-    return unique_result
+async def get_cities(db: AsyncSession = Depends(get_async_db)):
+    """81 il + KKTC şehirlerini getir (81 il öncelikli)"""
+    # ✅ Materyalize city facet'inden (81 il Türkçe alfabetik, ardından KKTC şehirleri)
+    snapshot = await _facet_snapshot(db)
+    return snapshot.values("city")
 
 
 @router.get("/field-types/", response_model=List[str])
-async def get_field_types(db: Session = Depends(get_db)):
-    """Tüm alan türlerini getir (cached) - OPTIMIZED with CACHE"""
-    from core.cache import get_cache, set_cache
-    from datetime import timedelta
-    
-    # ✅ Cache'den kontrol et (startup'ta yüklenen cache)
-    cached = get_cache("field_types", ttl=timedelta(hours=24))
-    if cached is not None:
-        return cached
-    
-    # ✅ OPTIMIZED: Sadece distinct field_type değerlerini çek
-    from sqlalchemy import distinct
-    field_types_result = db.query(distinct(Department.field_type)).filter(Department.field_type.isnot(None)).all()
-    result = [field_type[0] for field_type in field_types_result if field_type[0]]
-    
-    # ✅ Cache'e kaydet (startup cache key ile uyumlu)
-    set_cache("field_types", result, ttl=timedelta(hours=24))
-    return result
+async def get_field_types(db: AsyncSession = Depends(get_async_db)):
+    """Tüm alan türlerini getir"""
+    # ✅ Materyalize field_type facet'inden (DISTINCT sorgusu yok)
+    snapshot = await _facet_snapshot(db)
+    return snapshot.values("field_type")
 
 
 # University endpoints
 @router.post("", response_model=UniversityResponse)
-async def create_university(university: UniversityCreate, db: Session = Depends(get_db)):
+async def create_university(university: UniversityCreate, db: AsyncSession = Depends(get_async_db)):
     """Yeni üniversite oluştur"""
     db_university = University(**university.dict())
     db.add(db_university)
-    db.commit()
-    db.refresh(db_university)
+    await db.commit()
+    await db.refresh(db_university)
+    department_catalogue.invalidate()
     return db_university
 
 
@@ -155,26 +112,96 @@ def get_university_logo_url(university: University) -> Optional[str]:
     return None
 
 
+def build_university_response(university) -> UniversityResponse:
+    """ORM nesnesi veya katalog kaydından UniversityResponse oluştur"""
+    logo_url = getattr(university, 'logo_url', None) or get_university_logo_url(university)
+    return UniversityResponse(
+        id=university.id,
+        name=university.name,
+        city=university.city,
+        university_type=university.university_type,
+        website=university.website,
+        established_year=university.established_year,
+        latitude=university.latitude,
+        longitude=university.longitude,
+        created_at=university.created_at,
+        updated_at=university.updated_at,
+        logo_url=logo_url
+    )
+
+
+def build_department_response(department, university_response: UniversityResponse) -> DepartmentWithUniversityResponse:
+    """ORM nesnesi veya katalog kaydından DepartmentWithUniversityResponse oluştur"""
+    return DepartmentWithUniversityResponse(
+        id=department.id,
+        university_id=department.university_id,
+        name=department.name,
+        normalized_name=department.normalized_name,
+        attributes=department.attributes,  # JSON string ise şema doğrulayıcısı çözer
+        field_type=department.field_type,
+        language=department.language,
+        faculty=department.faculty,
+        duration=department.duration,
+        degree_type=department.degree_type,
+        min_score=department.min_score,
+        min_rank=department.min_rank,
+        quota=department.quota,
+        scholarship_quota=department.scholarship_quota,
+        tuition_fee=department.tuition_fee,
+        has_scholarship=department.has_scholarship,
+        last_year_min_score=department.last_year_min_score,
+        last_year_min_rank=department.last_year_min_rank,
+        last_year_quota=department.last_year_quota,
+        description=department.description,
+        requirements=department.requirements,
+        created_at=department.created_at,
+        updated_at=department.updated_at,
+        university=university_response
+    )
+
+
+def allowed_degree_types(field_type: Optional[str], degree_type: Optional[str]) -> Optional[set]:
+    """get_departments derece filtresinin izin verdiği değerler (None = filtre yok)"""
+    allowed = None
+    if field_type and field_type.upper() == 'TYT':
+        allowed = set(ASSOCIATE_DEGREE_TYPES)
+    if degree_type:
+        if degree_type == 'Associate':
+            values = set(ASSOCIATE_DEGREE_TYPES)
+        elif degree_type == 'Bachelor':
+            values = set(BACHELOR_DEGREE_TYPES)
+        else:
+            values = {degree_type}
+        allowed = values if allowed is None else allowed & values
+    return allowed
+
+
 @router.get("", response_model=List[UniversityResponse])
 async def get_universities(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
     city: Optional[str] = Query(None),
     university_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Üniversite listesini getir"""
-    query = db.query(University)
+    # ✅ Bellekteki katalogdan getir (DB'ye gitmeden)
+    snapshot = department_catalogue.get()
+    if snapshot is not None:
+        universities = snapshot.filter_universities(city=city, university_type=university_type)
+        return [build_university_response(uni) for uni in universities[skip:skip + limit]]
+    
+    query = select(University)
     
     if city:
-        query = query.filter(University.city.ilike(f"%{city}%"))
+        query = query.where(University.city.ilike(f"%{city}%"))
     if university_type:
-        query = query.filter(University.university_type == university_type)
+        query = query.where(University.university_type == university_type)
     
     # ✅ Üniversite adına göre alfabetik sıralama
     query = query.order_by(University.name)
     
-    universities = query.offset(skip).limit(limit).all()
+    universities = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
     
     # Logo URL'lerini ekle ve response oluştur
     result = []
@@ -200,9 +227,16 @@ async def get_universities(
 
 # Genel pattern'ler (SON SIRA - yoksa her şeyi yakalar!)
 @router.get("/{university_id}", response_model=UniversityResponse)
-async def get_university(university_id: int, db: Session = Depends(get_db)):
+async def get_university(university_id: int, db: AsyncSession = Depends(get_async_db)):
     """Belirli bir üniversiteyi getir"""
-    university = db.query(University).filter(University.id == university_id).first()
+    snapshot = department_catalogue.get()
+    if snapshot is not None:
+        university = snapshot.get_university(university_id)
+        if not university:
+            raise HTTPException(status_code=404, detail="Üniversite bulunamadı")
+        return build_university_response(university)
+    
+    university = await db.get(University, university_id)
     if not university:
         raise HTTPException(status_code=404, detail="Üniversite bulunamadı")
     
@@ -226,10 +260,10 @@ async def get_university(university_id: int, db: Session = Depends(get_db)):
 async def update_university(
     university_id: int,
     university_update: UniversityUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Üniversite bilgilerini güncelle"""
-    university = db.query(University).filter(University.id == university_id).first()
+    university = await db.get(University, university_id)
     if not university:
         raise HTTPException(status_code=404, detail="Üniversite bulunamadı")
     
@@ -237,44 +271,48 @@ async def update_university(
     for field, value in update_data.items():
         setattr(university, field, value)
     
-    db.commit()
-    db.refresh(university)
+    await db.commit()
+    await db.refresh(university)
+    department_catalogue.invalidate()
     return university
 
 
 @router.delete("/{university_id}")
-async def delete_university(university_id: int, db: Session = Depends(get_db)):
+async def delete_university(university_id: int, db: AsyncSession = Depends(get_async_db)):
     """Üniversiteyi sil"""
-    university = db.query(University).filter(University.id == university_id).first()
+    university = await db.get(University, university_id)
     if not university:
         raise HTTPException(status_code=404, detail="Üniversite bulunamadı")
     
-    db.delete(university)
-    db.commit()
+    await db.delete(university)
+    await db.commit()
+    department_catalogue.invalidate()
     return {"message": "Üniversite başarıyla silindi"}
 
 
 # Department endpoints
 @router.post("/departments", response_model=DepartmentResponse)
-async def create_department(department: DepartmentCreate, db: Session = Depends(get_db)):
+async def create_department(department: DepartmentCreate, db: AsyncSession = Depends(get_async_db)):
     """Yeni bölüm oluştur"""
     # Üniversite var mı kontrol et
-    university = db.query(University).filter(University.id == department.university_id).first()
+    university = await db.get(University, department.university_id)
     if not university:
         raise HTTPException(status_code=404, detail="Üniversite bulunamadı")
     
     db_department = Department(**department.dict())
     db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
+    await db.commit()
+    await db.refresh(db_department)
+    department_catalogue.invalidate()
     return db_department
 
 
 @router.get("/departments/unique/", response_model=List[dict])
+@cached(ttl=timedelta(hours=6), key="catalogue.unique_departments")
 async def get_unique_departments(
     university_type: Optional[str] = Query(None, description="Üniversite türü: devlet, vakif"),
     field_type: Optional[str] = Query(None, description="Alan türü: SAY, EA, SÖZ, DİL"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ✅ Normalize edilmiş bölüm isimlerini TEKİL olarak listele
@@ -284,49 +322,50 @@ async def get_unique_departments(
     2. Bu endpoint çağrılır -> unique bölüm isimleri döner
     3. Kullanıcı bir bölüm seçer (örn: "Psikoloji")
     4. /departments/ endpoint'i normalized_name filtresi ile çağrılır -> tüm varyasyonları döner
-    """
-    from sqlalchemy import distinct, func
-    from sqlalchemy.orm import selectinload
     
-    # ✅ Normalize edilmiş isimlere göre unique bölümleri getir
-    query = db.query(
+    ✅ TEK SORGU: gruplama ve temsilci bölümün (en küçük id) attributes'u aynı sorguda
+    join ile gelir (grup başına ek sorgu yok). Sonuç `(university_type, field_type)`
+    başına cache'lenir, katalog değişince (import / bölüm yazma) silinir.
+    """
+    # ✅ Normalize edilmiş isimlere göre unique bölümler + temsilci bölüm id'si
+    groups = select(
         Department.normalized_name,
         func.count(Department.id).label('variation_count'),
         func.min(Department.id).label('representative_id')
-    ).filter(
+    ).where(
         Department.normalized_name.isnot(None)
     )
     
     # Üniversite türü filtresi için join
     if university_type:
-        query = query.join(University, Department.university_id == University.id)
-        query = query.filter(University.university_type == university_type)
+        groups = groups.join(University, Department.university_id == University.id)
+        groups = groups.where(University.university_type == university_type)
     
     # Alan türü filtresi
     if field_type:
-        query = query.filter(Department.field_type == field_type)
+        groups = groups.where(Department.field_type == field_type)
     
-    # Grupla ve sırala
-    query = query.group_by(Department.normalized_name)
-    query = query.order_by(Department.normalized_name)
+    groups = groups.group_by(Department.normalized_name).subquery()
     
-    results = query.all()
+    # Temsilci bölümün attributes'u join ile (attributes örnekleri için)
+    query = select(
+        groups.c.normalized_name,
+        groups.c.variation_count,
+        Department.attributes
+    ).join(
+        Department, Department.id == groups.c.representative_id
+    ).order_by(groups.c.normalized_name)
+    
+    results = (await db.execute(query)).all()
     
     # Response formatı
     unique_departments = []
-    for result in results:
-        normalized_name = result.normalized_name
-        variation_count = result.variation_count
-        representative_id = result.representative_id
-        
-        # Representative department'ı al (attributes için)
-        rep_dept = db.query(Department).filter(Department.id == representative_id).first()
+    for normalized_name, variation_count, raw_attributes in results:
         attributes = []
-        if rep_dept and rep_dept.attributes:
-            import json
+        if raw_attributes:
             try:
-                attributes = json.loads(rep_dept.attributes)
-            except:
+                attributes = json.loads(raw_attributes)
+            except ValueError:
                 attributes = []
         
         unique_departments.append({
@@ -338,6 +377,128 @@ async def get_unique_departments(
     return unique_departments
 
 
+def encode_department_cursor(department) -> str:
+    """Keyset cursor: `(min_score IS NULL, name, id)` sıralamasındaki son satırın anahtarı"""
+    key = [1 if department.min_score is None else 0, department.name, department.id]
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode('utf-8')).decode('ascii')
+
+
+def decode_department_cursor(cursor: str) -> Tuple[int, str, int]:
+    """Cursor'ı çöz (geçersizse 400)"""
+    try:
+        missing_score, name, department_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return int(missing_score), str(name), int(department_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Geçersiz cursor")
+
+
+def _department_page_response(page, limit: int) -> FastJSONResponse:
+    """DTO sayfası; sayfa dolduysa sonraki sayfanın cursor'ı `X-Next-Cursor` header'ında"""
+    headers = {"X-Next-Cursor": encode_department_cursor(page[-1])} if len(page) == limit else None
+    return FastJSONResponse(page, headers=headers)
+
+
+def _department_sort_key(department) -> Tuple[int, str, int]:
+    return (1 if department.min_score is None else 0, department.name, department.id)
+
+
+def filter_departments_query(
+    query,
+    field_type: Optional[str] = None,
+    degree_type: Optional[str] = None,
+    university_id: Optional[int] = None,
+    city: Optional[str] = None,
+    university_type: Optional[str] = None,
+    normalized_name: Optional[str] = None,
+    min_score: Optional[float] = None,
+    max_score: Optional[float] = None,
+    has_scholarship: Optional[bool] = None,
+    joined_university: bool = False,
+):
+    """get_departments filtrelerini bir Department sorgusuna uygula"""
+    # Filtreleme - city veya university_type için join gerekli
+    if (city or university_type) and not joined_university:
+        query = query.join(University, Department.university_id == University.id)
+    
+    # ✅ PERMISSIVE FILTERING: Only apply filters if they are provided (not None)
+    # ✅ ÖNEMLİ: field_type 'TYT' ise degree_type otomatik olarak 'Associate' kabul edilir;
+    # degree_type "Associate"/"Bachelor" veritabanındaki "Önlisans"/"Lisans" yazımlarıyla da eşleşir
+    if field_type:
+        query = query.filter(Department.field_type == field_type)
+    allowed = allowed_degree_types(field_type, degree_type)
+    if allowed is not None:
+        query = query.filter(Department.degree_type.in_(sorted(allowed)))
+    if university_id:
+        query = query.filter(Department.university_id == university_id)
+    if city:
+        query = query.filter(University.city.ilike(f"%{city}%"))
+    if university_type:
+        # ✅ Frontend 'foundation' veya 'state' gönderiyorsa, backend'de aynı değerleri kullan
+        # Mapping: 'foundation' -> 'foundation', 'state' -> 'state', 'devlet' -> 'state', 'vakif' -> 'foundation'
+        query = query.filter(University.university_type == map_university_type(university_type))
+    if normalized_name:  # ✅ Normalize edilmiş isme göre filtrele (tüm varyasyonları getir)
+        query = query.filter(Department.normalized_name == normalized_name)
+    if min_score:
+        # ✅ min_score None olan bölümleri filtreleme dışında bırak (None kontrolü)
+        query = query.filter(Department.min_score.isnot(None), Department.min_score >= min_score)
+    if max_score:
+        # ✅ min_score None olan bölümleri filtreleme dışında bırak (None kontrolü)
+        query = query.filter(Department.min_score.isnot(None), Department.min_score <= max_score)
+    if has_scholarship is not None:
+        query = query.filter(Department.has_scholarship == has_scholarship)
+    return query
+
+
+def map_university_type(university_type: str) -> str:
+    """'devlet'/'vakıf' yazımlarını veritabanı değerlerine çevir"""
+    if university_type.lower() == 'devlet':
+        return 'state'
+    if university_type.lower() in ('vakif', 'vakıf'):
+        return 'foundation'
+    return university_type
+
+
+def _department_order(query):
+    """✅ min_score None olanlar sona, sonra alfabetik; id ile tekil (keyset için kararlı) sıralama"""
+    return query.order_by(
+        case((Department.min_score.is_(None), 1), else_=0),
+        Department.name,
+        Department.id
+    )
+
+
+def _after_cursor(query, cursor_key: Tuple[int, str, int]):
+    """Keyset: `(min_score IS NULL, name, id) > cursor` (OFFSET taraması yok)"""
+    return query.filter(
+        tuple_(case((Department.min_score.is_(None), 1), else_=0), Department.name, Department.id)
+        > tuple_(*cursor_key)
+    )
+
+
+async def _stream_departments_ndjson(bind, filters: dict, cursor_key, skip: int, limit: int) -> AsyncIterator[bytes]:
+    """Bölümleri sunucu taraflı cursor'dan (yield_per) NDJSON satırları olarak üret.
+    
+    Kendi async session'ını açar; yanıt akarken istek session'ı kapanmış olabilir.
+    Bellekte yalnızca bir parti satır ve üniversite DTO'ları tutulur.
+    """
+    async with AsyncSession(bind=bind) as db:
+        query = filter_departments_query(department_rows_query(), joined_university=True, **filters)
+        if cursor_key is not None:
+            query = _after_cursor(query, cursor_key)
+        query = _department_order(query).offset(skip).limit(limit).execution_options(yield_per=NDJSON_BATCH_SIZE)
+        
+        universities = {}
+        result = await db.stream(query)
+        async for partition in result.partitions(NDJSON_BATCH_SIZE):
+            yield b"".join(_iter_ndjson(department_dtos_from_tuples(partition, universities)))
+
+
+def _iter_ndjson(dtos) -> Iterator[bytes]:
+    """DTO'ları NDJSON satırları olarak üret"""
+    for dto in dtos:
+        yield dumps(dto) + b"\n"
+
+
 @router.get("/departments/", response_model=List[DepartmentWithUniversityResponse])
 async def get_departments(
     skip: int = Query(0, ge=0),
@@ -351,161 +512,72 @@ async def get_departments(
     min_score: Optional[float] = Query(None),
     max_score: Optional[float] = Query(None),
     has_scholarship: Optional[bool] = Query(None),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="✅ Keyset cursor (önceki yanıtın X-Next-Cursor header'ı)"),
+    format: Optional[str] = Query(None, description="✅ 'ndjson': satır satır akış (application/x-ndjson)"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Bölüm listesini getir - OPTIMIZED with eager loading and selectinload"""
+    """Bölüm listesini getir - keyset (cursor) sayfalama ve NDJSON akış desteğiyle
+    
+    Sayfa dolduysa sonraki sayfanın cursor'ı `X-Next-Cursor` header'ında döner.
+    `format=ndjson` ile her bölüm ayrı bir JSON satırı olarak akıtılır.
+    """
+    cursor_key = decode_department_cursor(cursor) if cursor else None
+    stream = (format or '').lower() == 'ndjson'
+    filters = dict(
+        field_type=field_type,
+        degree_type=degree_type,
+        university_id=university_id,
+        city=city,
+        university_type=university_type,
+        normalized_name=normalized_name,
+        min_score=min_score,
+        max_score=max_score,
+        has_scholarship=has_scholarship,
+    )
     try:
-        # ✅ OPTIMIZED: selectinload ile N+1 problemini tamamen önle
-        from sqlalchemy.orm import selectinload
-        from sqlalchemy import case
-        
-        # ✅ OPTIMIZED: Sadece city veya university_type filtresi varsa join yap
-        query = db.query(Department)
-        
-        # ✅ OPTIMIZED: selectinload ile University bilgilerini tek sorguda çek (N+1 problemini önler)
-        query = query.options(selectinload(Department.university))
-        
-        # Filtreleme - city veya university_type için join gerekli
-        if city or university_type:
-            query = query.join(University, Department.university_id == University.id)
-        
-        # ✅ PERMISSIVE FILTERING: Only apply filters if they are provided (not None)
-        if field_type:
-            query = query.filter(Department.field_type == field_type)
-            # ✅ ÖNEMLİ: Eğer field_type 'TYT' ise, degree_type'ı otomatik olarak 'Associate' olarak kabul et
-            if field_type.upper() == 'TYT':
-                # ✅ Veritabanında "Associate" veya "Önlisans" değerlerini kabul et
-                from sqlalchemy import or_
-                query = query.filter(
-                    or_(
-                        Department.degree_type == 'Associate',
-                        Department.degree_type == 'Önlisans',
-                        Department.degree_type == 'onlisans',
-                        Department.degree_type == 'önlisans'
-                    )
-                )
-        # ✅ If field_type is None, don't filter by field_type (return all field types)
-        
-        if degree_type:
-            # ✅ degree_type mapping: Frontend'den gelen "Associate"/"Bachelor" değerlerini
-            # veritabanındaki "Associate"/"Bachelor" veya "Önlisans"/"Lisans" değerleriyle eşleştir
-            from sqlalchemy import or_
-            if degree_type == 'Associate':
-                # Frontend "Associate" gönderiyor -> veritabanında "Associate", "Önlisans", "onlisans" olabilir
-                query = query.filter(
-                    or_(
-                        Department.degree_type == 'Associate',
-                        Department.degree_type == 'Önlisans',
-                        Department.degree_type == 'onlisans',
-                        Department.degree_type == 'önlisans'
-                    )
-                )
-            elif degree_type == 'Bachelor':
-                # Frontend "Bachelor" gönderiyor -> veritabanında "Bachelor", "Lisans", "lisans" olabilir
-                query = query.filter(
-                    or_(
-                        Department.degree_type == 'Bachelor',
-                        Department.degree_type == 'Lisans',
-                        Department.degree_type == 'lisans'
-                    )
-                )
-            else:
-                # Diğer durumlarda direkt eşleştir
-                query = query.filter(Department.degree_type == degree_type)
-        # ✅ If degree_type is None, don't filter by degree_type (return all degree types)
-        if university_id:
-            query = query.filter(Department.university_id == university_id)
-        if city:
-            query = query.filter(University.city.ilike(f"%{city}%"))
-        if university_type:
-            # ✅ Frontend 'foundation' veya 'state' gönderiyorsa, backend'de aynı değerleri kullan
-            # Mapping: 'foundation' -> 'foundation', 'state' -> 'state', 'devlet' -> 'state', 'vakif' -> 'foundation'
-            if university_type.lower() == 'devlet':
-                university_type = 'state'
-            elif university_type.lower() == 'vakif' or university_type.lower() == 'vakıf':
-                university_type = 'foundation'
-            query = query.filter(University.university_type == university_type)
-        if normalized_name:  # ✅ Normalize edilmiş isme göre filtrele (tüm varyasyonları getir)
-            query = query.filter(Department.normalized_name == normalized_name)
-        if min_score:
-            # ✅ min_score None olan bölümleri filtreleme dışında bırak (None kontrolü)
-            query = query.filter(Department.min_score.isnot(None), Department.min_score >= min_score)
-        if max_score:
-            # ✅ min_score None olan bölümleri filtreleme dışında bırak (None kontrolü)
-            query = query.filter(Department.min_score.isnot(None), Department.min_score <= max_score)
-        if has_scholarship is not None:
-            query = query.filter(Department.has_scholarship == has_scholarship)
-        
-        # ✅ Bölüm adına göre alfabetik sıralama
-        # ✅ min_score None olan bölümleri listenin sonuna taşı
-        query = query.order_by(
-            case((Department.min_score.is_(None), 1), else_=0),  # None olanlar sona
-            Department.name  # Sonra alfabetik
-        )
-        
-        # ✅ OPTIMIZED: Tek sorguda tüm verileri çek (selectinload ile University bilgileri de dahil)
-        departments = query.offset(skip).limit(limit).all()
-        
-        # ✅ N+1 problemi çözüldü: selectinload sayesinde University bilgileri zaten yüklendi
-        result = []
-        for dept in departments:
-            university = dept.university  # ✅ Artık ek sorgu yok, zaten yüklü
-            if not university:
-                continue  # Üniversite bulunamazsa skip et
-            
-            # University response'unu logo URL ile oluştur
-            university_response = UniversityResponse(
-                id=university.id,
-                name=university.name,
-                city=university.city,
-                university_type=university.university_type,
-                website=university.website,
-                established_year=university.established_year,
-                latitude=university.latitude,
-                longitude=university.longitude,
-                created_at=university.created_at,
-                updated_at=university.updated_at,
-                logo_url=get_university_logo_url(university)
+        # ✅ Bellekteki katalogdan getir (DB'ye gitmeden)
+        snapshot = department_catalogue.get()
+        if snapshot is not None:
+            rows = snapshot.filter_departments(
+                field_type=field_type,
+                degree_types=allowed_degree_types(field_type, degree_type),
+                university_id=university_id,
+                cities=[city] if city else None,
+                university_type=map_university_type(university_type) if university_type else None,
+                normalized_name=normalized_name,
+                min_score=min_score,
+                max_score=max_score,
+                has_scholarship=has_scholarship,
             )
-            
-            # ✅ Attributes'ı parse et
-            import json
-            attributes = []
-            if dept.attributes:
-                try:
-                    attributes = json.loads(dept.attributes)
-                except:
-                    attributes = []
-            
-            dept_response = DepartmentWithUniversityResponse(
-                id=dept.id,
-                university_id=dept.university_id,
-                name=dept.name,  # Orijinal isim
-                normalized_name=dept.normalized_name,  # ✅ Normalize edilmiş isim
-                attributes=attributes,  # ✅ Attributes listesi
-                field_type=dept.field_type,
-                language=dept.language,
-                faculty=dept.faculty,
-                duration=dept.duration,
-                degree_type=dept.degree_type,
-                min_score=dept.min_score,
-                min_rank=dept.min_rank,
-                quota=dept.quota,
-                scholarship_quota=dept.scholarship_quota,
-                tuition_fee=dept.tuition_fee,
-                has_scholarship=dept.has_scholarship,
-                last_year_min_score=dept.last_year_min_score,
-                last_year_min_rank=dept.last_year_min_rank,
-                last_year_quota=dept.last_year_quota,
-                description=dept.description,
-                requirements=dept.requirements,
-                created_at=dept.created_at,
-                updated_at=dept.updated_at,
-                university=university_response
+            if cursor_key is not None:
+                # Satırlar zaten görüntüleme (DB sıralaması) sırasında: cursor'dan sonraki ilk konumu bul.
+                # Cursor bölümü silinmişse anahtar karşılaştırmasına düşülür.
+                cursor_position = snapshot.positions.get(cursor_key[2])
+                if cursor_position is not None:
+                    start = bisect_right(rows, cursor_position, key=lambda row: snapshot.positions[row[0].id])
+                else:
+                    start = bisect_right(rows, cursor_key, key=lambda row: _department_sort_key(row[0]))
+                rows = rows[start:]
+            # ✅ Snapshot başına önbelleklenmiş DTO'lar: satır başına Pydantic modeli/doğrulaması yok
+            page = snapshot.department_dtos(rows[skip:skip + limit])
+            if stream:
+                return StreamingResponse(_iter_ndjson(page), media_type="application/x-ndjson")
+            return _department_page_response(page, limit)
+        
+        # ✅ NDJSON: sunucu taraflı cursor ile akış (tüm sonuç belleğe alınmaz)
+        if stream:
+            return StreamingResponse(
+                _stream_departments_ndjson(db.bind, filters, cursor_key, skip, limit),
+                media_type="application/x-ndjson"
             )
-            result.append(dept_response)
         
-        return result
+        # ✅ Satır projeksiyonu: bölüm + üniversite kolonları tek join sorgusunda tuple olarak
+        # (ORM nesnesi yok); üniversitesi bulunamayan bölümler join ile zaten dışarıda kalır
+        query = filter_departments_query(department_rows_query(), joined_university=True, **filters)
+        if cursor_key is not None:
+            query = _after_cursor(query, cursor_key)
+        rows = (await db.execute(_department_order(query).offset(skip).limit(limit))).all()
+        return _department_page_response(department_dtos_from_tuples(rows), limit)
     except Exception as e:
         # ✅ FALLBACK: Hata durumunda en popüler bölümleri döndür (500 hatası verme)
         from core.logging_config import api_logger
@@ -513,10 +585,10 @@ async def get_departments(
         
         try:
             # En popüler bölümleri getir (min_score'a göre sıralı, None olanlar sona)
-            from sqlalchemy import case
-            fallback_query = db.query(Department).options(selectinload(Department.university))
+            await db.rollback()
+            fallback_query = select(Department).options(selectinload(Department.university))
             if field_type:
-                fallback_query = fallback_query.filter(Department.field_type == field_type)
+                fallback_query = fallback_query.where(Department.field_type == field_type)
             
             fallback_query = fallback_query.order_by(
                 case((Department.min_score.is_(None), 1), else_=0),
@@ -524,81 +596,56 @@ async def get_departments(
                 Department.name
             ).limit(min(limit, 50))  # Maksimum 50 bölüm döndür
             
-            fallback_departments = fallback_query.all()
+            fallback_departments = (await db.execute(fallback_query)).scalars().all()
             
-            # Response formatına çevir
-            fallback_result = []
-            for dept in fallback_departments:
-                university = dept.university
-                if not university:
-                    continue
-                
-                university_response = UniversityResponse(
-                    id=university.id,
-                    name=university.name,
-                    city=university.city,
-                    university_type=university.university_type,
-                    website=university.website,
-                    established_year=university.established_year,
-                    latitude=university.latitude,
-                    longitude=university.longitude,
-                    created_at=university.created_at,
-                    updated_at=university.updated_at,
-                    logo_url=get_university_logo_url(university)
-                )
-                
-                import json
-                attributes = []
-                if dept.attributes:
-                    try:
-                        attributes = json.loads(dept.attributes)
-                    except:
-                        attributes = []
-                
-                dept_response = DepartmentWithUniversityResponse(
-                    id=dept.id,
-                    university_id=dept.university_id,
-                    name=dept.name,
-                    normalized_name=dept.normalized_name,
-                    attributes=attributes,
-                    field_type=dept.field_type,
-                    language=dept.language,
-                    faculty=dept.faculty,
-                    duration=dept.duration,
-                    degree_type=dept.degree_type,
-                    min_score=dept.min_score,
-                    min_rank=dept.min_rank,
-                    quota=dept.quota,
-                    scholarship_quota=dept.scholarship_quota,
-                    tuition_fee=dept.tuition_fee,
-                    has_scholarship=dept.has_scholarship,
-                    last_year_min_score=dept.last_year_min_score,
-                    last_year_min_rank=dept.last_year_min_rank,
-                    last_year_quota=dept.last_year_quota,
-                    description=dept.description,
-                    requirements=dept.requirements,
-                    created_at=dept.created_at,
-                    updated_at=dept.updated_at,
-                    university=university_response
-                )
-                fallback_result.append(dept_response)
+            # Response formatına çevir (üniversitesi olmayanlar atlanır)
+            fallback_result = department_dtos(
+                (dept, dept.university) for dept in fallback_departments if dept.university
+            )
             
             api_logger.info(f"Fallback: Returning {len(fallback_result)} popular departments")
-            return fallback_result
+            return FastJSONResponse(fallback_result)
         except Exception as fallback_error:
             # Fallback de başarısız olursa boş liste döndür (500 hatası verme)
             api_logger.error(f"Fallback also failed: {str(fallback_error)}", error=str(fallback_error))
             return []
 
 
+@router.get("/departments/{department_id}/trend", response_model=DepartmentTrendResponse)
+async def get_department_trend(department_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Bölümün yıllık taban puan/sıralama serisi, eğimleri ve gelecek yıl tahmini"""
+    # ✅ Materyalize trend tablosundan (import sırasında hesaplanır)
+    snapshot = trend_store.get()
+    if snapshot is None:
+        snapshot = await db.run_sync(trend_store.load)
+    trend = snapshot.get(department_id)
+    if trend is None:
+        raise HTTPException(status_code=404, detail="Bölüm için yıllık veri bulunamadı")
+    series = trend.series
+    return DepartmentTrendResponse(
+        **trend._asdict() | {
+            "series": [dict(zip(series, values)) for values in zip(*series.values())],
+        }
+    )
+
+
 @router.get("/departments/{department_id}", response_model=DepartmentWithUniversityResponse)
-async def get_department(department_id: int, db: Session = Depends(get_db)):
+async def get_department(department_id: int, db: AsyncSession = Depends(get_async_db)):
     """Belirli bir bölümü getir"""
-    department = db.query(Department).filter(Department.id == department_id).first()
+    snapshot = department_catalogue.get()
+    if snapshot is not None:
+        department, university = snapshot.department_with_university(department_id)
+        if not department:
+            raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
+        if not university:
+            raise HTTPException(status_code=404, detail="Üniversite bulunamadı")
+        return build_department_response(department, build_university_response(university))
+    
+    department = await db.get(Department, department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
     
-    university = db.query(University).filter(University.id == department.university_id).first()
+    university = await db.get(University, department.university_id)
     
     # University response'unu logo URL ile oluştur
     university_response = UniversityResponse(
@@ -645,10 +692,10 @@ async def get_department(department_id: int, db: Session = Depends(get_db)):
 async def update_department(
     department_id: int,
     department_update: DepartmentUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Bölüm bilgilerini güncelle"""
-    department = db.query(Department).filter(Department.id == department_id).first()
+    department = await db.get(Department, department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
     
@@ -656,20 +703,22 @@ async def update_department(
     for field, value in update_data.items():
         setattr(department, field, value)
     
-    db.commit()
-    db.refresh(department)
+    await db.commit()
+    await db.refresh(department)
+    department_catalogue.invalidate()
     return department
 
 
 @router.delete("/departments/{department_id}")
-async def delete_department(department_id: int, db: Session = Depends(get_db)):
+async def delete_department(department_id: int, db: AsyncSession = Depends(get_async_db)):
     """Bölümü sil"""
-    department = db.query(Department).filter(Department.id == department_id).first()
+    department = await db.get(Department, department_id)
     if not department:
         raise HTTPException(status_code=404, detail="Bölüm bulunamadı")
     
-    db.delete(department)
-    db.commit()
+    await db.delete(department)
+    await db.commit()
+    department_catalogue.invalidate()
     return {"message": "Bölüm başarıyla silindi"}
 
 
@@ -680,7 +729,7 @@ async def delete_department(department_id: int, db: Session = Depends(get_db)):
 @router.get("/debug/check-department/{name}")
 async def check_department_data(
     name: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ✅ GEÇİCİ DEBUG ENDPOINT: Bölüm verilerini kontrol et
@@ -691,15 +740,15 @@ async def check_department_data(
     Returns:
         JSON: Bölümün ham verileri (duration, field_type, degree_type, vb.)
     """
-    from sqlalchemy import or_
-    
     # Bölüm adında (normalize edilmiş veya orijinal) arama yap
-    departments = db.query(Department).filter(
-        or_(
-            Department.name.ilike(f"%{name}%"),
-            Department.normalized_name.ilike(f"%{name}%")
-        )
-    ).limit(20).all()
+    departments = (await db.execute(
+        select(Department).where(
+            or_(
+                Department.name.ilike(f"%{name}%"),
+                Department.normalized_name.ilike(f"%{name}%")
+            )
+        ).limit(20)
+    )).scalars().all()
     
     if not departments:
         return {
@@ -711,7 +760,7 @@ async def check_department_data(
     results = []
     for dept in departments:
         # Üniversite bilgisini al
-        university = db.query(University).filter(University.id == dept.university_id).first()
+        university = await db.get(University, dept.university_id)
         
         results.append({
             "id": dept.id,
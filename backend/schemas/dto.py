@@ -0,0 +1,247 @@
+"""
+Yüksek hacimli liste yanıtları için hafif (slotted) veri nesneleri
+
+`DepartmentWithUniversityResponse` / `RecommendationResponse` /
+`PreferenceWithDepartmentResponse` ile aynı JSON'u üretirler, ancak satır başına
+Pydantic doğrulaması yapılmaz: değerler zaten veritabanından/katalogdan
+doğrulanmış olarak gelir. `core.responses.FastJSONResponse` bu nesneleri
+doğrudan (orjson ile) serileştirir. Alan sırası Pydantic şemalarındaki sırayla
+aynıdır, böylece JSON çıktısı birebir eşleşir. Şemanın davranışı da aynen
+uygulanır: `attributes` NULL/geçersiz JSON ise None, NULL kolonlarda şema
+varsayılanları (language "Turkish", duration 4 ...) ve field_type /
+university_type doğrulaması (aynı ValueError mesajıyla).
+
+Nesneler paylaşılabilir (katalog snapshot'ı önbellekler); salt okunur kullanılmalıdır.
+"""
+import json
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from models import Department, University
+from schemas.university import DEPARTMENT_FIELD_TYPES, UNIVERSITY_TYPES
+
+
+@dataclass(slots=True)
+class UniversityDTO:
+    name: str
+    city: str
+    university_type: str
+    website: Optional[str]
+    established_year: Optional[int]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    logo_url: Optional[str]
+
+
+@dataclass(slots=True)
+class DepartmentDTO:
+    university_id: int
+    name: str
+    normalized_name: Optional[str]
+    attributes: Optional[List[str]]
+    field_type: str
+    language: str
+    faculty: Optional[str]
+    duration: int
+    degree_type: str
+    min_score: Optional[float]
+    min_rank: Optional[int]
+    quota: Optional[int]
+    scholarship_quota: int
+    tuition_fee: Optional[float]
+    has_scholarship: bool
+    last_year_min_score: Optional[float]
+    last_year_min_rank: Optional[int]
+    last_year_quota: Optional[int]
+    description: Optional[str]
+    requirements: Optional[Dict[str, Any]]
+    id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    university: UniversityDTO
+
+
+@dataclass(slots=True)
+class RecommendationDTO:
+    student_id: int
+    department_id: int
+    compatibility_score: float
+    success_probability: float
+    preference_score: float
+    final_score: float
+    recommendation_reason: Optional[str]
+    is_safe_choice: bool
+    is_dream_choice: bool
+    is_realistic_choice: bool
+    id: int
+    created_at: Optional[datetime]
+    department: DepartmentDTO
+
+
+@dataclass(slots=True)
+class PreferenceDTO:
+    id: int
+    student_id: int
+    department_id: int
+    order: Optional[int]
+    created_at: Optional[datetime]
+    department: DepartmentDTO
+    probability: float
+    probability_label: str
+
+
+# ✅ Satır projeksiyonu: ORM nesnesi yerine yalnızca gereken kolonlar tuple olarak seçilir
+UNIVERSITY_COLUMNS = (
+    University.id, University.name, University.city, University.university_type,
+    University.website, University.established_year, University.latitude,
+    University.longitude, University.created_at, University.updated_at,
+)
+DEPARTMENT_COLUMNS = (
+    Department.id, Department.university_id, Department.name, Department.normalized_name,
+    Department.attributes, Department.field_type, Department.language, Department.faculty,
+    Department.duration, Department.degree_type, Department.min_score, Department.min_rank,
+    Department.quota, Department.scholarship_quota, Department.tuition_fee,
+    Department.has_scholarship, Department.last_year_min_score, Department.last_year_min_rank,
+    Department.last_year_quota, Department.description, Department.requirements,
+    Department.created_at, Department.updated_at,
+)
+
+
+def department_rows_query():
+    """(bölüm kolonları..., üniversite kolonları...) satırlarını seçen sorgu (join dahil)"""
+    return select(*DEPARTMENT_COLUMNS, *UNIVERSITY_COLUMNS).join(
+        University, Department.university_id == University.id
+    )
+
+
+def logo_url(website: Optional[str]) -> Optional[str]:
+    """Üniversite logosu URL'i (Google Favicon API)"""
+    if website:
+        domain = website.replace('http://', '').replace('https://', '').replace('www.', '').split('/')[0]
+        return f"https://www.google.com/s2/favicons?domain={domain}&sz=256"
+    return None
+
+
+def _parse_json(value, default):
+    """Veritabanındaki JSON string kolonları (attributes, requirements) çöz"""
+    if not isinstance(value, str):
+        return value if value is not None else default
+    try:
+        return json.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return default
+
+
+def _or_default(value, default):
+    """NULL kolon -> Pydantic şemasındaki varsayılan değer"""
+    return default if value is None else value
+
+
+def _field_type(value: str) -> str:
+    """DepartmentBase.validate_field_type karşılığı"""
+    if value not in DEPARTMENT_FIELD_TYPES:
+        raise ValueError(f'field_type must be one of {DEPARTMENT_FIELD_TYPES}')
+    return value
+
+
+def _university_type(value: str) -> str:
+    """UniversityBase.validate_university_type karşılığı"""
+    if value not in UNIVERSITY_TYPES:
+        raise ValueError(f'university_type must be one of {UNIVERSITY_TYPES}')
+    return value
+
+
+def university_dto(university) -> UniversityDTO:
+    """ORM nesnesi veya katalog kaydından UniversityDTO oluştur"""
+    return UniversityDTO(
+        university.name, university.city, _university_type(university.university_type), university.website,
+        university.established_year, university.latitude, university.longitude,
+        university.id, university.created_at, university.updated_at,
+        getattr(university, 'logo_url', None) or logo_url(university.website),
+    )
+
+
+def department_dto(department, university: UniversityDTO) -> DepartmentDTO:
+    """ORM nesnesi veya katalog kaydından DepartmentDTO oluştur"""
+    d = department
+    return DepartmentDTO(
+        d.university_id, d.name, d.normalized_name, _parse_json(d.attributes, None),
+        _field_type(d.field_type), _or_default(d.language, "Turkish"), d.faculty,
+        _or_default(d.duration, 4), _or_default(d.degree_type, "Bachelor"), d.min_score,
+        d.min_rank, d.quota, _or_default(d.scholarship_quota, 0), d.tuition_fee,
+        _or_default(d.has_scholarship, False), d.last_year_min_score, d.last_year_min_rank,
+        d.last_year_quota, d.description,
+        _parse_json(d.requirements, None), d.id, d.created_at, d.updated_at, university,
+    )
+
+
+def department_dtos(rows: Iterable[Tuple[Any, Any]]) -> List[DepartmentDTO]:
+    """(bölüm, üniversite) çiftlerinden DTO listesi - üniversite DTO'ları tekrar kullanılır"""
+    universities: Dict[int, UniversityDTO] = {}
+    result = []
+    for department, university in rows:
+        university_dto_ = universities.get(university.id)
+        if university_dto_ is None:
+            university_dto_ = universities[university.id] = university_dto(university)
+        result.append(department_dto(department, university_dto_))
+    return result
+
+
+_DEPARTMENT_WIDTH = len(DEPARTMENT_COLUMNS)
+
+
+def department_dtos_from_tuples(
+    rows: Iterable[tuple], universities: Optional[Dict[int, UniversityDTO]] = None
+) -> List[DepartmentDTO]:
+    """`department_rows_query()` satırlarından DTO listesi (ORM nesnesi oluşturulmaz)
+
+    `universities` verilirse parti parti işlenen akışlarda üniversite DTO'ları partiler arası paylaşılır.
+    """
+    if universities is None:
+        universities = {}
+    result = []
+    for row in rows:
+        (dept_id, university_id, name, normalized_name, attributes, field_type, language,
+         faculty, duration, degree_type, min_score, min_rank, quota, scholarship_quota,
+         tuition_fee, has_scholarship, last_year_min_score, last_year_min_rank,
+         last_year_quota, description, requirements, created_at, updated_at) = row[:_DEPARTMENT_WIDTH]
+        university = universities.get(university_id)
+        if university is None:
+            (uni_id, uni_name, city, university_type, website, established_year,
+             latitude, longitude, uni_created_at, uni_updated_at) = row[_DEPARTMENT_WIDTH:]
+            university = universities[university_id] = UniversityDTO(
+                uni_name, city, _university_type(university_type), website, established_year, latitude,
+                longitude, uni_id, uni_created_at, uni_updated_at, logo_url(website),
+            )
+        result.append(DepartmentDTO(
+            university_id, name, normalized_name, _parse_json(attributes, None),
+            _field_type(field_type), _or_default(language, "Turkish"), faculty,
+            _or_default(duration, 4), _or_default(degree_type, "Bachelor"), min_score, min_rank,
+            quota, _or_default(scholarship_quota, 0), tuition_fee,
+            _or_default(has_scholarship, False), last_year_min_score, last_year_min_rank,
+            last_year_quota, description, _parse_json(requirements, None),
+            dept_id, created_at, updated_at, university,
+        ))
+    return result
+
+
+def recommendation_dto(rec, department: DepartmentDTO) -> RecommendationDTO:
+    """Recommendation ORM nesnesinden RecommendationDTO oluştur"""
+    return RecommendationDTO(
+        rec.student_id, rec.department_id, rec.compatibility_score, rec.success_probability,
+        rec.preference_score, rec.final_score, rec.recommendation_reason,
+        _or_default(rec.is_safe_choice, False), _or_default(rec.is_dream_choice, False),
+        _or_default(rec.is_realistic_choice, False),
+        rec.id, rec.created_at, department,
+    )
+
+
+def to_dict(dto) -> Dict[str, Any]:
+    """DTO'yu (iç içe) sözlüğe çevir - Pydantic `model_dump()` karşılığı"""
+    return asdict(dto)
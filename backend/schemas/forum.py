@@ -67,4 +67,5 @@ class ForumPostListResponse(BaseModel):
     total: int
     page: int
     size: int
+    next_cursor: Optional[str] = None  # Keyset sayfalama: sonraki sayfa için cursor
 
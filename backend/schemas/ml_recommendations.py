@@ -1,5 +1,6 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Any, List, Optional, Dict
+from datetime import datetime
 from schemas.university import DepartmentWithUniversityResponse
 
 class MLRecommendationResponse(BaseModel):
@@ -19,10 +20,41 @@ class MLRecommendationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class MLRetrainingStatus(BaseModel):
+    state: str  # idle, scheduled, training
+    window_seconds: float
+    pending_triggers: int
+    scheduled_for: Optional[datetime] = None
+    total_triggers: int
+    coalesced_triggers: int
+    runs: int
+    skipped_runs: int
+    failed_runs: int
+    last_trigger_at: Optional[datetime] = None
+    last_started_at: Optional[datetime] = None
+    last_finished_at: Optional[datetime] = None
+    last_duration_seconds: Optional[float] = None
+    last_result: Optional[str] = None  # trained, skipped, failed
+    last_error: Optional[str] = None
+    last_data_hash: Optional[str] = None
+
+class MLModelArtifactsStatus(BaseModel):
+    version: Optional[str] = None  # manifest sürümü
+    backend: Optional[str] = None  # native (pickle) veya compiled (saf NumPy ağaçlar)
+    loaded_at: Optional[datetime] = None
+    load_seconds: Optional[float] = None
+    artifact_bytes: int = 0
+    artifacts: Dict[str, int] = {}  # model adı -> yüklenen artefakt boyutu
+    training_report: Optional[Dict[str, Any]] = None  # süreler, worker sayısı, model metrikleri
+    swaps: int = 0  # yeniden başlatmadan değiştirilen sürüm sayısı
+    last_error: Optional[str] = None
+
 class MLModelStatusResponse(BaseModel):
     is_trained: bool
     models_available: List[str]
     message: str
+    retraining: Optional[MLRetrainingStatus] = None
+    artifacts: Optional[MLModelArtifactsStatus] = None
 
 class MLTrainingResponse(BaseModel):
     message: str
@@ -2,6 +2,10 @@ from pydantic import BaseModel, validator
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
+# Doğrulayıcıların izin verdiği değerler (schemas.dto aynı kuralları uygular)
+UNIVERSITY_TYPES = ['devlet', 'vakif']
+DEPARTMENT_FIELD_TYPES = ['EA', 'SAY', 'SÖZ', 'DİL', 'TYT']  # ✅ TYT eklendi - Önlisans için
+
 
 class UniversityBase(BaseModel):
     name: str
@@ -14,9 +18,8 @@ class UniversityBase(BaseModel):
 
     @validator('university_type')
     def validate_university_type(cls, v):
-        allowed_types = ['devlet', 'vakif']
-        if v not in allowed_types:
-            raise ValueError(f'university_type must be one of {allowed_types}')
+        if v not in UNIVERSITY_TYPES:
+            raise ValueError(f'university_type must be one of {UNIVERSITY_TYPES}')
         return v
 
 
@@ -68,9 +71,8 @@ class DepartmentBase(BaseModel):
 
     @validator('field_type')
     def validate_field_type(cls, v):
-        allowed_types = ['EA', 'SAY', 'SÖZ', 'DİL', 'TYT']  # ✅ TYT eklendi - Önlisans için
-        if v not in allowed_types:
-            raise ValueError(f'field_type must be one of {allowed_types}')
+        if v not in DEPARTMENT_FIELD_TYPES:
+            raise ValueError(f'field_type must be one of {DEPARTMENT_FIELD_TYPES}')
         return v
 
 
@@ -127,6 +129,28 @@ class DepartmentWithUniversityResponse(DepartmentResponse):
     university: UniversityResponse
 
 
+class DepartmentYearPoint(BaseModel):
+    year: int
+    min_score: Optional[float] = None
+    max_score: Optional[float] = None
+    min_rank: Optional[int] = None
+    quota: Optional[int] = None
+    placed_students: Optional[int] = None
+
+
+class DepartmentTrendResponse(BaseModel):
+    department_id: int
+    first_year: int
+    last_year: int
+    year_count: int
+    series: List[DepartmentYearPoint]
+    min_score_slope: Optional[float] = None  # puan/yıl
+    min_rank_slope: Optional[float] = None  # sıra/yıl
+    min_score_volatility: Optional[float] = None
+    projected_min_score: Optional[float] = None  # last_year + 1 tahmini
+    projected_min_rank: Optional[int] = None
+
+
 class RecommendationBase(BaseModel):
     student_id: int
     department_id: int
@@ -158,3 +182,19 @@ class RecommendationListResponse(BaseModel):
     total: int
     page: int
     size: int
+
+
+class RecommendationJobResponse(BaseModel):
+    job_id: str
+    student_id: int
+    status: str  # queued, running, retrying, completed, failed
+    status_url: str
+
+
+class RecommendationJobStatus(BaseModel):
+    job_id: str
+    status: str
+    stage: Optional[str] = None  # started, loading, scoring, writing, done, failed
+    progress: int = 0
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
@@ -3,6 +3,7 @@ sys.path.append('/app')
 
 from database import SessionLocal
 from models.university import University, Department
+from services.catalogue import refresh_derived_data
 
 db = SessionLocal()
 
@@ -38,6 +39,8 @@ try:
         db.add(dept)
     
     db.commit()
+    # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+    refresh_derived_data(db)
     print(f"✅ {len(universities)} üniversite ve {len(departments)} bölüm eklendi!")
     
 except Exception as e:
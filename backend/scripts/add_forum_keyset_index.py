@@ -0,0 +1,40 @@
+"""
+Migration Script: forum_posts tablosuna keyset sayfalama index'ini ekle
+
+create_all mevcut tabloları atladığı için `ForumPost.__table_args__` içindeki
+ix_forum_posts_created_id index'i yalnızca yeni veritabanlarında oluşur. Mevcut
+veritabanlarında cursor'lı liste sorgusu (created_at, id) sıralaması için bu
+index'i kullanır.
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from database import engine
+
+
+def add_forum_keyset_index():
+    print("=" * 60)
+    print("📋 'ix_forum_posts_created_id' INDEX'İ EKLENİYOR...")
+    print("=" * 60)
+
+    with engine.connect() as connection:
+        try:
+            connection.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_forum_posts_created_id
+                ON forum_posts (created_at, id);
+            """))
+            connection.commit()
+            print("✅ 'ix_forum_posts_created_id' index'i eklendi (veya zaten mevcut)!")
+        except Exception as e:
+            connection.rollback()
+            print(f"❌ HATA: Index eklenirken hata oluştu: {e}")
+            import traceback
+            traceback.print_exc()
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    add_forum_keyset_index()
+    print("\nMigration script tamamlandı.")
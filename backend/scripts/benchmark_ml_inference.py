@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+ML çıkarım benchmark'ı: bölüm başına tahmin vs toplu tahmin
+Bellekteki SQLite veritabanında tek alan türünden oluşan sentetik bir katalog
+kurar, modelleri simüle edilmiş veriyle eğitir ve iki yolu karşılaştırır.
+
+Kullanım:
+    python scripts/benchmark_ml_inference.py --departments 3000
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import json
+import random
+import tempfile
+import time
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Student, University, Department
+from services.ml_recommendation_engine import MLRecommendationEngine
+from scripts.train_ml_models import generate_training_data
+
+CITIES = ["İstanbul", "Ankara", "İzmir", "Bursa", "Eskişehir", "Konya", "Trabzon"]
+UNIVERSITY_TYPES = ["Devlet", "Vakıf"]
+
+
+def build_catalogue(db, n_departments: int, field_type: str = "SAY", seed: int = 42):
+    """Sentetik üniversite/bölüm kataloğu oluştur"""
+    rng = random.Random(seed)
+    universities = [
+        University(name=f"Üniversite {i}", city=rng.choice(CITIES), university_type=rng.choice(UNIVERSITY_TYPES))
+        for i in range(max(1, n_departments // 25))
+    ]
+    db.add_all(universities)
+    db.flush()
+
+    db.bulk_insert_mappings(Department, [
+        {
+            "university_id": rng.choice(universities).id,
+            "name": f"Bölüm {i}",
+            "field_type": field_type,
+            "min_score": round(rng.uniform(200, 560), 2),
+            "min_rank": rng.randint(100, 300000),
+            "quota": rng.randint(20, 200),
+            "tuition_fee": rng.choice([0.0, 60000.0, 90000.0]),
+            "has_scholarship": rng.random() < 0.3,
+        }
+        for i in range(n_departments)
+    ])
+    student = Student(
+        name="Benchmark", class_level="12", exam_type="TYT+AYT", field_type=field_type,
+        total_score=430.0, tyt_total_score=260.0, ayt_total_score=170.0, rank=25000, percentile=75.0,
+        preferred_cities=json.dumps(["İstanbul", "Ankara"]),
+        preferred_university_types=json.dumps(["Devlet"]),
+        scholarship_preference=True,
+    )
+    db.add(student)
+    db.commit()
+    return student
+
+
+def per_department_scores(engine: MLRecommendationEngine, student, departments):
+    """Eski yol: bölüm başına özellik satırı ve üç ayrı predict çağrısı"""
+    scores = []
+    for department in departments:
+        features = engine._prepare_combined_features(student, department).reshape(1, -1)
+        scores.append((
+            engine._predict_compatibility(features),
+            engine._predict_success_probability(features),
+            engine._predict_preference(features),
+        ))
+    return np.array(scores, dtype=float)
+
+
+def batched_scores(engine: MLRecommendationEngine, student, departments):
+    """Yeni yol: tek matris, model başına tek predict"""
+    universities = engine._load_universities(departments)
+    features = engine._prepare_feature_matrix(student, departments, universities)
+    return np.column_stack([
+        engine._predict_batch("compatibility", features),
+        engine._predict_batch("success", features),
+        engine._predict_batch("preference", features),
+    ])
+
+
+def timed(fn, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ML çıkarım benchmark'ı")
+    parser.add_argument("--departments", type=int, default=3000, help="Alan türündeki bölüm sayısı")
+    parser.add_argument("--repeat", type=int, default=3, help="Toplu yol için tekrar sayısı (en iyisi raporlanır)")
+    args = parser.parse_args()
+
+    engine_sql = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine_sql)
+    db = sessionmaker(bind=engine_sql)()
+
+    print(f"Katalog oluşturuluyor ({args.departments} bölüm)...")
+    student = build_catalogue(db, args.departments)
+    departments = db.query(Department).filter(Department.field_type == student.field_type).all()
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        os.environ["ML_MODELS_PATH"] = model_dir + os.sep
+        engine = MLRecommendationEngine(db)
+        engine.model_path = model_dir + os.sep
+        engine.train_models(generate_training_data())
+
+        print("Bölüm başına tahmin ölçülüyor...")
+        per_row_time, per_row = timed(lambda: per_department_scores(engine, student, departments), 1)
+        print("Toplu tahmin ölçülüyor...")
+        batched_time, batched = timed(lambda: batched_scores(engine, student, departments), args.repeat)
+
+    max_diff = float(np.max(np.abs(per_row - batched))) if len(departments) else 0.0
+    print("=" * 60)
+    print(f"Bölüm sayısı        : {len(departments)}")
+    print(f"Bölüm başına tahmin : {per_row_time * 1000:10.1f} ms")
+    print(f"Toplu tahmin        : {batched_time * 1000:10.1f} ms")
+    print(f"Hızlanma            : {per_row_time / max(batched_time, 1e-9):10.1f}x")
+    print(f"Maks. skor farkı    : {max_diff:.2e}")
+    print("=" * 60)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,611 @@
+#!/usr/bin/env python3
+"""
+Süreç içi benchmark paketi: sıcak endpoint'ler ve öneri/puan motorları
+
+Geçici bir SQLite veritabanında sentetik bir katalog (varsayılan 20.000 bölüm,
+çok yıllı DepartmentYearlyStats, binlerce öğrenci) kurar; ağ veya çalışan bir
+sunucu gerekmez. Endpoint'ler `TestClient` ile, motorlar doğrudan çağrılır.
+Her benchmark için p50/p95/p99 (ms) ve tracemalloc ile ölçülen tepe bellek
+raporlanır.
+
+Sonuçlar `scripts/benchmark_baselines/baseline.json` ile karşılaştırılır; p95
+veya tepe bellek toleransı aşan benchmark'lar gerileme olarak işaretlenir ve
+script 1 koduyla çıkar. Baseline yalnızca aynı boyut ayarlarıyla alınmışsa
+karşılaştırılır.
+
+Süreler makineye ve anlık yüke bağlı olduğundan her çalıştırma sabit bir
+kalibrasyon döngüsünü (Python + numpy + SQLite karışık iş yükü) de ölçer ve
+rapora `calibration_ms` olarak yazar. p95 karşılaştırması bu değere oranlanarak
+yapılır: baseline'dan iki kat yavaş bir makinede p95'in iki katı beklenir, böylece
+`--tolerance` makineler arasında da anlamlıdır. Tepe bellek makineden bağımsızdır
+ve doğrudan karşılaştırılır.
+
+Kullanım:
+    python scripts/benchmark_suite.py                       # baseline ile karşılaştır
+    python scripts/benchmark_suite.py --save-baseline       # baseline'ı güncelle
+    python scripts/benchmark_suite.py --only recommendation_engine,unique_departments
+    python scripts/benchmark_suite.py --departments 2000 --students 200 --iterations 5
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import argparse
+import contextlib
+import csv
+import gc
+import io
+import json
+import platform
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmark_baselines" / "baseline.json"
+
+CITIES = ["İstanbul", "Ankara", "İzmir", "Bursa", "Eskişehir", "Konya", "Trabzon", "Antalya", "Samsun", "Kayseri"]
+UNIVERSITY_TYPES = ["devlet", "vakif"]
+FIELD_TYPES = ["SAY", "SAY", "EA", "EA", "SÖZ", "DİL", "TYT"]
+PROGRAMS = [
+    "Bilgisayar Mühendisliği", "Tıp", "Hukuk", "Makine Mühendisliği", "İşletme", "Psikoloji",
+    "Mimarlık", "Elektrik-Elektronik Mühendisliği", "İktisat", "Türk Dili ve Edebiyatı",
+    "İngilizce Öğretmenliği", "Hemşirelik", "Diş Hekimliği", "Endüstri Mühendisliği", "Adalet",
+]
+PROGRAM_VARIANTS = ["", " (İngilizce)", " (Burslu)", " (%50 İndirimli)", " (Ücretli)"]
+YEARS = (2021, 2022, 2023, 2024)
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    peak_memory_kib: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "iterations": self.iterations,
+            "p50_ms": round(self.p50_ms, 3),
+            "p95_ms": round(self.p95_ms, 3),
+            "p99_ms": round(self.p99_ms, 3),
+            "mean_ms": round(self.mean_ms, 3),
+            "peak_memory_kib": round(self.peak_memory_kib, 1),
+            **self.extra,
+        }
+
+
+def measure(
+    name: str,
+    fn: Callable[[int], Any],
+    iterations: int,
+    warmup: int = 1,
+    setup: Optional[Callable[[int], Any]] = None,
+) -> BenchmarkResult:
+    """
+    `fn(i)` fonksiyonunu `iterations` kez ölçer
+
+    Zamanlama tracemalloc kapalıyken yapılır (izleme maliyeti süreleri
+    bozmasın); tepe bellek ayrı bir ek çalıştırmada ölçülür. `setup(i)` ölçüm
+    dışında her çalıştırmadan önce çağrılır.
+    """
+    for i in range(warmup):
+        if setup:
+            setup(-1 - i)
+        fn(-1 - i)
+
+    timings = []
+    for i in range(iterations):
+        if setup:
+            setup(i)
+        gc.collect()
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    if setup:
+        setup(iterations)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn(iterations)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    values = np.asarray(timings)
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        p50_ms=float(np.percentile(values, 50)),
+        p95_ms=float(np.percentile(values, 95)),
+        p99_ms=float(np.percentile(values, 99)),
+        mean_ms=float(values.mean()),
+        peak_memory_kib=peak / 1024,
+    )
+
+
+def _calibration_workload() -> None:
+    """Benchmark'ların iş yükü karışımını temsil eden sabit iş: Python döngüsü, numpy ve SQLite"""
+    rng = random.Random(0)
+    rows = [(i, rng.choice(CITIES), rng.uniform(180, 560)) for i in range(20000)]
+    by_city: Dict[str, float] = {}
+    for _, city, score in rows:
+        by_city[city] = max(by_city.get(city, 0.0), score)
+    sorted(rows, key=lambda row: (-row[2], row[0]))
+
+    values = np.random.default_rng(0).random(200000)
+    np.argsort(-values, kind="stable")
+    np.where(values > 0.5, values * 0.4, values * 0.6).sum()
+
+    connection = sqlite3.connect(":memory:")
+    try:
+        connection.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, city TEXT, score REAL)")
+        connection.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+        connection.execute("SELECT city, COUNT(*), MAX(score) FROM t GROUP BY city ORDER BY city").fetchall()
+        connection.execute("SELECT id FROM t WHERE score > 400 ORDER BY score DESC LIMIT 100").fetchall()
+    finally:
+        connection.close()
+
+
+def calibrate(rounds: int = 9) -> float:
+    """Kalibrasyon döngüsünün medyan süresi (ms); p95 değerleri bu süreye oranlanarak karşılaştırılır"""
+    _calibration_workload()
+    timings = []
+    for _ in range(rounds):
+        gc.collect()
+        start = time.perf_counter()
+        _calibration_workload()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+# ---------------------------------------------------------------------------
+# Sentetik veri
+# ---------------------------------------------------------------------------
+
+def build_synthetic_database(db, n_departments: int, n_students: int, seed: int = 42) -> Dict[str, int]:
+    """Sentetik üniversite/bölüm/yıllık istatistik/öğrenci verisi oluştur"""
+    from models import Student, University, Department, DepartmentYearlyStats
+
+    rng = random.Random(seed)
+    n_universities = max(1, n_departments // 100)
+    db.bulk_insert_mappings(University, [
+        {
+            "name": f"ÜNİVERSİTE {i}",
+            "city": rng.choice(CITIES),
+            "university_type": rng.choice(UNIVERSITY_TYPES),
+            "website": f"https://www.uni{i}.edu.tr",
+        }
+        for i in range(n_universities)
+    ])
+    university_ids = [row[0] for row in db.query(University.id).all()]
+
+    departments = []
+    for i in range(n_departments):
+        program = rng.choice(PROGRAMS)
+        variant = rng.choice(PROGRAM_VARIANTS)
+        min_score = rng.choice([None] + [round(rng.uniform(180, 560), 2)] * 9)
+        departments.append({
+            "university_id": rng.choice(university_ids),
+            "name": program + variant,
+            "normalized_name": program,
+            "attributes": json.dumps([variant.strip(" ()")] if variant else [], ensure_ascii=False),
+            "field_type": rng.choice(FIELD_TYPES),
+            "language": "English" if "İngilizce" in variant else "Turkish",
+            "duration": 2 if program == "Adalet" else 4,
+            "degree_type": "Associate" if program == "Adalet" else "Bachelor",
+            "min_score": min_score,
+            "min_rank": rng.randint(100, 600000) if min_score else None,
+            "quota": rng.randint(10, 200),
+            "tuition_fee": rng.choice([0.0, 0.0, 60000.0, 120000.0]),
+            "has_scholarship": rng.random() < 0.25,
+        })
+    db.bulk_insert_mappings(Department, departments)
+    department_rows = db.query(Department.id, Department.min_score, Department.min_rank).all()
+
+    stats = []
+    for department_id, min_score, min_rank in department_rows:
+        for offset, year in enumerate(reversed(YEARS)):
+            if min_score is None:
+                continue
+            drift = rng.uniform(-12, 12) * offset
+            stats.append({
+                "department_id": department_id,
+                "year": year,
+                "min_score": round(min_score - drift, 2),
+                "max_score": round(min_score - drift + rng.uniform(5, 60), 2),
+                "min_rank": max(1, int((min_rank or 1) * (1 + drift / 500))),
+                "quota": rng.randint(10, 200),
+                "placed_students": rng.randint(5, 200),
+            })
+    db.bulk_insert_mappings(DepartmentYearlyStats, stats)
+
+    students = []
+    for i in range(n_students):
+        field_type = rng.choice(["SAY", "EA", "SÖZ", "DİL"])
+        total = round(rng.uniform(220, 540), 2)
+        students.append({
+            "name": f"Öğrenci {i}",
+            "class_level": rng.choice(["12", "mezun"]),
+            "exam_type": "TYT+AYT",
+            "field_type": field_type,
+            "total_score": total,
+            "tyt_total_score": round(total * 0.6, 2),
+            "ayt_total_score": round(total * 0.4, 2),
+            "rank": rng.randint(1000, 500000),
+            "percentile": round(rng.uniform(1, 99), 2),
+            "preferred_cities": json.dumps(rng.sample(CITIES, 2), ensure_ascii=False),
+            "preferred_university_types": json.dumps([rng.choice(UNIVERSITY_TYPES)]),
+            "scholarship_preference": rng.random() < 0.4,
+            "interest_areas": json.dumps(["mühendis"] if field_type == "SAY" else ["hukuk"], ensure_ascii=False),
+        })
+    db.bulk_insert_mappings(Student, students)
+    db.commit()
+
+    return {
+        "universities": n_universities,
+        "departments": n_departments,
+        "yearly_stats": len(stats),
+        "students": n_students,
+    }
+
+
+def write_placement_csv(path: Path, n_rows: int, seed: int = 7) -> None:
+    """ÖSYM yerleştirme tablosu formatında CSV (ilk iki satır başlık, 3. satır kolon isimleri)"""
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ÖSYM Yerleştirme Sonuçları"])
+        writer.writerow(["Sentetik benchmark verisi"])
+        writer.writerow(["Üniversite Türü", "Üniversite Adı", "Program Adı", "Puan Türü",
+                         "Kontenjan", "Yerleşen", "En Küçük Puan", "En Büyük Puan"])
+        for _ in range(n_rows):
+            city = rng.choice(CITIES)
+            min_score = round(rng.uniform(180, 540), 3)
+            writer.writerow([
+                rng.choice(["DEVLET", "VAKIF"]),
+                f"ÜNİVERSİTE {rng.randint(0, n_rows // 100)} ({city.upper()})",
+                rng.choice(PROGRAMS) + rng.choice(PROGRAM_VARIANTS),
+                rng.choice(["SAY", "EA", "SÖZ", "DİL"]),
+                rng.randint(10, 200),
+                rng.randint(5, 200),
+                min_score,
+                round(min_score + rng.uniform(5, 60), 3),
+            ])
+
+
+# ---------------------------------------------------------------------------
+# Benchmark'lar
+# ---------------------------------------------------------------------------
+
+def bench_score_calculator(ctx, iterations: int) -> BenchmarkResult:
+    from services.score_calculator import ScoreCalculator
+
+    rng = random.Random(1)
+    attempts = [
+        {
+            "field_type": rng.choice(["SAY", "EA", "SÖZ", "DİL"]),
+            "tyt_turkish_net": rng.uniform(0, 40), "tyt_math_net": rng.uniform(0, 40),
+            "tyt_social_net": rng.uniform(0, 20), "tyt_science_net": rng.uniform(0, 20),
+            "ayt_math_net": rng.uniform(0, 40), "ayt_physics_net": rng.uniform(0, 14),
+            "ayt_chemistry_net": rng.uniform(0, 13), "ayt_biology_net": rng.uniform(0, 13),
+            "ayt_literature_net": rng.uniform(0, 24), "ayt_history1_net": rng.uniform(0, 10),
+            "ayt_geography1_net": rng.uniform(0, 6), "ayt_foreign_language_net": rng.uniform(0, 80),
+            "obp_score": rng.uniform(50, 100) * 0.6,
+        }
+        for _ in range(1000)
+    ]
+    # Tek çağrı mikrosaniyeler sürdüğü için her ölçüm 1000 denemelik bir partidir
+    result = measure("score_calculator", lambda i: [ScoreCalculator.calculate_all_scores(a) for a in attempts], iterations)
+    result.extra["calls_per_iteration"] = len(attempts)
+    return result
+
+
+def bench_recommendation_engine(ctx, iterations: int) -> BenchmarkResult:
+    from services.recommendation_engine import RecommendationEngine
+
+    student_ids = ctx["student_ids"]
+
+    def run(i):
+        db = ctx["SessionLocal"]()
+        try:
+            RecommendationEngine(db).generate_recommendations(student_ids[i % len(student_ids)], limit=50)
+        finally:
+            db.close()
+
+    return measure("recommendation_engine", run, iterations)
+
+
+def bench_ml_recommendation_engine(ctx, iterations: int) -> BenchmarkResult:
+    from services.ml_recommendation_engine import MLRecommendationEngine
+    from scripts.train_ml_models import generate_training_data
+
+    student_ids = ctx["student_ids"]
+    db = ctx["SessionLocal"]()
+    engine = MLRecommendationEngine(db)
+    engine.model_path = ctx["model_dir"] + os.sep
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.train_models(generate_training_data())
+
+    try:
+        return measure(
+            "ml_recommendation_engine",
+            lambda i: engine.generate_recommendations(student_ids[i % len(student_ids)], limit=50),
+            iterations,
+        )
+    finally:
+        db.close()
+
+
+def bench_get_departments(ctx, iterations: int) -> BenchmarkResult:
+    client = ctx["client"]
+    field_types = ["SAY", "EA", "SÖZ", "DİL"]
+
+    def run(i):
+        response = client.get("/api/universities/departments/", params={
+            "field_type": field_types[i % len(field_types)], "limit": 1000,
+        })
+        response.raise_for_status()
+
+    return measure("get_departments", run, iterations)
+
+
+def bench_get_departments_full(ctx, iterations: int) -> BenchmarkResult:
+    client = ctx["client"]
+
+    def run(i):
+        client.get("/api/universities/departments/").raise_for_status()
+
+    return measure("get_departments_full", run, iterations)
+
+
+def bench_get_unique_departments(ctx, iterations: int) -> BenchmarkResult:
+    client = ctx["client"]
+    params = [{"university_type": "devlet"}, {"university_type": "vakif", "field_type": "SAY"}, {}]
+
+    def run(i):
+        client.get("/api/universities/departments/unique/", params=params[i % len(params)]).raise_for_status()
+
+    return measure("unique_departments", run, iterations)
+
+
+def bench_excel_import(ctx, iterations: int) -> BenchmarkResult:
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from database import Base
+    from scripts.import_osym_excel import import_excel_file
+
+    csv_path = Path(ctx["tmp_dir"]) / "2024.csv"
+    write_placement_csv(csv_path, ctx["import_rows"])
+    state = {}
+
+    def setup(i):
+        # Her ölçüm boş (bellek içi) bir veritabanına tam import'tur; kurulum süreye dahil değil
+        if "session" in state:
+            state["session"].close()
+            state["engine"].dispose()
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        state["engine"] = engine
+        state["session"] = sessionmaker(bind=engine)()
+
+    def run(i):
+        with contextlib.redirect_stdout(io.StringIO()):
+            import_excel_file(csv_path, 2024, state["session"])
+
+    try:
+        result = measure("excel_import", run, iterations, setup=setup)
+    finally:
+        if "session" in state:
+            state["session"].close()
+            state["engine"].dispose()
+    result.extra["rows"] = ctx["import_rows"]
+    return result
+
+
+BENCHMARKS = {
+    "score_calculator": (bench_score_calculator, 1.0),
+    "recommendation_engine": (bench_recommendation_engine, 1.0),
+    "ml_recommendation_engine": (bench_ml_recommendation_engine, 1.0),
+    "get_departments": (bench_get_departments, 1.0),
+    "get_departments_full": (bench_get_departments_full, 0.25),
+    "unique_departments": (bench_get_unique_departments, 1.0),
+    "excel_import": (bench_excel_import, 0.25),
+}
+
+
+# ---------------------------------------------------------------------------
+# Baseline
+# ---------------------------------------------------------------------------
+
+def compare_with_baseline(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Any],
+    config: Dict[str, Any],
+    tolerance: float,
+    calibration_ms: Optional[float] = None,
+) -> List[str]:
+    """
+    Toleransı aşan p95 / tepe bellek artışlarını döner
+
+    İki tarafta da kalibrasyon süresi varsa baseline p95'i makine hız oranıyla
+    ölçeklenir; yoksa süreler ham haliyle (aynı makine varsayımıyla) karşılaştırılır.
+    Baseline'daki her sonuç kendi `calibration_ms` değerini taşıyabilir (kısmi güncellemeler).
+    """
+    if baseline.get("config") != config:
+        print("⚠️  Baseline farklı boyut ayarlarıyla alınmış, karşılaştırma atlandı")
+        return []
+
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        speed_ratio = 1.0
+        baseline_calibration = previous.get("calibration_ms", baseline.get("calibration_ms"))
+        if calibration_ms and baseline_calibration:
+            speed_ratio = calibration_ms / baseline_calibration
+        for metric, scale in (("p95_ms", speed_ratio), ("peak_memory_kib", 1.0)):
+            old, new = previous.get(metric), current.get(metric)
+            if not (old and new):
+                continue
+            expected = old * scale
+            if new > expected * (1 + tolerance):
+                regressions.append(f"{name}.{metric}: {expected:.1f} -> {new} (+{(new / expected - 1) * 100:.0f}%)")
+    return regressions
+
+
+def print_report(results: Dict[str, Dict[str, Any]]) -> None:
+    print("=" * 86)
+    print(f"{'Benchmark':28} {'n':>5} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'tepe bellek KiB':>17}")
+    print("-" * 86)
+    for name, r in results.items():
+        print(f"{name:28} {r['iterations']:>5} {r['p50_ms']:>10.2f} {r['p95_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['peak_memory_kib']:>17.1f}")
+    print("=" * 86)
+
+
+def run_suite(args) -> Dict[str, Any]:
+    """Geçici veritabanını kurar ve seçilen benchmark'ları çalıştırır"""
+    selected = [name.strip() for name in args.only.split(",")] if args.only else list(BENCHMARKS)
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        raise SystemExit(f"Bilinmeyen benchmark: {', '.join(sorted(unknown))}")
+
+    calibration = [calibrate()]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # ✅ Uygulama modülleri import edilmeden önce: global engine'ler geçici veritabanını kullansın
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp_dir) / 'benchmark.db'}"
+        os.environ.pop("ASYNC_DATABASE_URL", None)
+        os.environ["ML_MODELS_PATH"] = tmp_dir + os.sep
+        os.environ.setdefault("CACHE_SHARED_BACKEND", "none")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        os.environ.setdefault("LOG_DIR", tmp_dir)
+
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from database import Base, SessionLocal, engine
+        from models import Student
+        from routers import universities
+        from services.catalogue import department_catalogue
+
+        Base.metadata.create_all(bind=engine)
+        db = SessionLocal()
+        started = time.perf_counter()
+        dataset = build_synthetic_database(db, args.departments, args.students, seed=args.seed)
+        student_ids = [row[0] for row in db.query(Student.id).order_by(Student.id).all()]
+        if args.catalogue:
+            department_catalogue.load(db)
+        db.close()
+        print(f"Sentetik veri hazır ({time.perf_counter() - started:.1f}s): {dataset}")
+
+        app = FastAPI()
+        app.include_router(universities.router, prefix="/api/universities")
+        with TestClient(app) as client:
+            ctx = {
+                "SessionLocal": SessionLocal,
+                "client": client,
+                "student_ids": student_ids,
+                "tmp_dir": tmp_dir,
+                "model_dir": tmp_dir,
+                "import_rows": args.import_rows,
+            }
+            results = {}
+            for name in selected:
+                bench, scale = BENCHMARKS[name]
+                iterations = max(3, int(args.iterations * scale))
+                print(f"⏱️  {name} ({iterations} tekrar)...")
+                results[name] = bench(ctx, iterations).as_dict()
+
+    # ✅ Makine yükü çalıştırma boyunca değişebilir: başta ve sonda ölçülen kalibrasyonun ortalaması
+    calibration.append(calibrate())
+    calibration_ms = round(float(np.mean(calibration)), 3)
+    print(f"Kalibrasyon döngüsü: {calibration_ms:.1f} ms")
+
+    return {
+        "config": {
+            "departments": args.departments,
+            "students": args.students,
+            "import_rows": args.import_rows,
+            "iterations": args.iterations,
+            "catalogue": args.catalogue,
+            "seed": args.seed,
+        },
+        "dataset": dataset,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "calibration_ms": calibration_ms,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sıcak endpoint ve motorlar için süreç içi benchmark paketi")
+    parser.add_argument("--departments", type=int, default=20000, help="Sentetik bölüm sayısı")
+    parser.add_argument("--students", type=int, default=2000, help="Sentetik öğrenci sayısı")
+    parser.add_argument("--import-rows", type=int, default=5000, help="Import benchmark'ındaki CSV satır sayısı")
+    parser.add_argument("--iterations", type=int, default=20, help="Benchmark başına ölçüm sayısı")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", type=str, default=None, help="Virgülle ayrılmış benchmark isimleri")
+    parser.add_argument("--no-catalogue", dest="catalogue", action="store_false",
+                        help="Bellek içi katalog yüklenmeden (DB yolu) ölç")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE, help="Baseline JSON dosyası")
+    parser.add_argument("--save-baseline", action="store_true", help="Sonuçları baseline olarak kaydet")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="İzin verilen p95/bellek artışı (0.25 = %%25)")
+    parser.add_argument("--output", type=Path, default=None, help="Sonuçları ayrıca bu dosyaya yaz")
+    args = parser.parse_args()
+
+    report = run_suite(args)
+    print_report(report["results"])
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+    if args.save_baseline:
+        # Kısmi güncellemede sonuçlar farklı kalibrasyonlarla alınmış olabilir: her sonuç kendi değerini taşır
+        for result in report["results"].values():
+            result["calibration_ms"] = report["calibration_ms"]
+        if args.only and args.baseline.exists():
+            # Kısmi çalıştırma: yalnızca ölçülen benchmark'lar güncellenir
+            baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+            if baseline.get("config") == report["config"]:
+                baseline["results"].update(report["results"])
+                report = {**report, "results": baseline["results"]}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"💾 Baseline kaydedildi: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"ℹ️  Baseline bulunamadı ({args.baseline}); --save-baseline ile oluşturun")
+        return 0
+
+    regressions = compare_with_baseline(
+        report["results"], json.loads(args.baseline.read_text(encoding="utf-8")), report["config"], args.tolerance,
+        calibration_ms=report["calibration_ms"],
+    )
+    if regressions:
+        print("❌ Performans gerilemesi:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    print("✅ Baseline ile karşılaştırma: gerileme yok")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,7 @@ sys.path.append('/app')
 
 from database import SessionLocal
 from models.university import University, Department, Recommendation
+from services.catalogue import refresh_derived_data
 
 db = SessionLocal()
 
@@ -18,6 +19,8 @@ try:
     uni_count = db.query(University).delete()
     
     db.commit()
+    # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+    refresh_derived_data(db)
     
     print(f"✅ Silindi: {uni_count} üniversite, {dept_count} bölüm, {rec_count} öneri")
     print("\n✅ Database temiz! Şimdi import_osym_excel.py çalıştırabilirsiniz.")
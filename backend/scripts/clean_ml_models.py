@@ -9,6 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import glob
+import shutil
 
 def clean_old_models():
     """Eski model dosyalarını sil"""
@@ -35,6 +36,11 @@ def clean_old_models():
         "success_scaler.pkl",
         "preference_model.pkl",
         "preference_scaler.pkl",
+        "compatibility_compiled.npz",
+        "success_compiled.npz",
+        "preference_compiled.npz",
+        "manifest.json",
+        "training_report.json",
     ]
     
     deleted_count = 0
@@ -53,6 +59,14 @@ def clean_old_models():
                 except Exception as e:
                     print(f"  ⚠️  Silinemedi: {file_path} - {e}")
     
+    # Sürüm dizinleri (versions/<sürüm>/)
+    for model_path in model_paths:
+        versions_dir = os.path.join(model_path, "versions")
+        if os.path.isdir(versions_dir):
+            shutil.rmtree(versions_dir, ignore_errors=True)
+            print(f"  ✅ Silindi: {versions_dir}")
+            deleted_count += 1
+    
     # Wildcard ile de kontrol et
     for pattern in ["**/*_model.pkl", "**/*_scaler.pkl"]:
         for file_path in glob.glob(pattern, recursive=True):
@@ -32,6 +32,9 @@ from pathlib import Path
 # ---------------------------------------------------------
 script_dir = os.path.dirname(os.path.abspath(__file__))
 backend_dir = os.path.dirname(script_dir)
+sys.path.append(backend_dir)
+
+from utils.raw_data_cache import read_excel_cached  # ✅ Excel bir kez ayrıştırılır, sonra önbellekten
 
 possible_paths = [
     '/app/data/programs',
@@ -207,9 +210,9 @@ def process_file_hardcoded(filepath: str, filename: str) -> List[Dict]:
             # CSV için: sep=None, engine='python', dtype=str
             df = pd.read_csv(filepath, sep=None, engine='python', dtype=str, header=None)
         elif filename.endswith('.xlsx'):
-            df = pd.read_excel(filepath, header=None, dtype=str, engine='openpyxl')
+            df = read_excel_cached(filepath, header=None, dtype=str, engine='openpyxl')
         else:
-            df = pd.read_excel(filepath, header=None, dtype=str, engine='xlrd')
+            df = read_excel_cached(filepath, header=None, dtype=str, engine='xlrd')
     except Exception as e:
         logger.error(f"Error reading file {filename}: {e}")
         return []
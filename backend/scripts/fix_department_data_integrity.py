@@ -22,6 +22,7 @@ sys.path.append('/app')
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models.university import Department, University
+from services.catalogue import refresh_derived_data
 
 def detect_and_fix_issues(db: Session, dry_run: bool = True, fix_all: bool = False, delete_invalid: bool = False):
     """Hatalı bölüm verilerini tespit et ve düzelt"""
@@ -228,6 +229,8 @@ def detect_and_fix_issues(db: Session, dry_run: bool = True, fix_all: bool = Fal
     if not dry_run and fix_all:
         try:
             db.commit()
+            # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+            refresh_derived_data(db)
             print("✅ Değişiklikler veritabanına kaydedildi!")
         except Exception as e:
             db.rollback()
@@ -17,6 +17,7 @@ sys.path.append('/app' if os.path.exists('/app') else os.path.dirname(os.path.di
 
 from database import SessionLocal
 from models import University, Department
+from services.catalogue import refresh_derived_data
 
 # ✅ Renkli terminal çıktısı için ANSI kodları
 class Colors:
@@ -137,6 +138,8 @@ def main():
         
         # ✅ Commit
         db.commit()
+        # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+        refresh_derived_data(db)
         
         print_success(f"\n✅ {fixed_unis} üniversite düzeltildi")
         print_success(f"✅ {fixed_depts} bölüm düzeltildi")
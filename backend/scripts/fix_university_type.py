@@ -3,6 +3,7 @@ sys.path.append('/app')
 
 from database import SessionLocal
 from models.university import University
+from services.catalogue import refresh_derived_data
 
 db = SessionLocal()
 
@@ -18,6 +19,8 @@ try:
             print(f"✅ {uni.name}: Vakıf -> vakif")
     
     db.commit()
+    # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+    refresh_derived_data(db)
     print(f"\n🎉 {len(universities)} üniversite güncellendi!")
     
 except Exception as e:
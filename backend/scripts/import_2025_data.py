@@ -31,6 +31,8 @@ from sqlalchemy.exc import IntegrityError, DataError
 from sqlalchemy import text
 from database import SessionLocal
 from models import University, Department, DepartmentYearlyStats
+from utils.raw_data_cache import read_excel_cached
+from services.catalogue import refresh_derived_data
 from utils.postgresql_helpers import (
     safe_to_int, safe_to_float,
     truncate_string_for_postgres, validate_enum_value
@@ -372,18 +374,17 @@ def import_data_file(file_path: Path, db: Session, degree_type: str) -> Tuple[in
         if file_ext in ['.xlsx', '.xls']:
             # Excel dosyası
             try:
-                df = pd.read_excel(
+                # ✅ Kolonsal önbellek: dosya bir kez ayrıştırılır, sonraki çalıştırmalar önbellekten okur
+                df = read_excel_cached(
                     file_path,
-                    sheet_name=0,
                     header=None,  # Başlık satırı yok, tüm satırları oku
                     engine='openpyxl' if file_ext == '.xlsx' else None
                 )
             except Exception as e1:
                 print_warning(f"Excel okuma hatası (openpyxl): {e1}")
                 try:
-                    df = pd.read_excel(
+                    df = read_excel_cached(
                         file_path,
-                        sheet_name=0,
                         header=None,
                         engine=None  # Varsayılan engine
                     )
@@ -706,6 +707,11 @@ def main():
             total_universities += unis
             total_departments += depts
         
+        # ✅ Bölüm trendleri (2025 yıllık istatistikleri dahil), filtre boyutları ve katalog
+        # cache'leri tüm dosyalardan sonra bir kez yenilenir
+        print_info("🔄 Bölüm trendleri ve filtre boyutları yenileniyor...")
+        refresh_derived_data(db)
+        
         # ✅ Özet rapor
         print_section("📋 ÖZET RAPOR")
         
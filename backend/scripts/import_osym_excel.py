@@ -11,23 +11,26 @@ NOT: ÖSYM Excel formatı yıllara göre değişebilir, bu yüzden
 kolonları kontrol edip gerekirse ayarla.
 """
 import sys
-import os
 import re
 import json
 sys.path.append('/app')
 
+import time
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from sqlalchemy import case, func, insert, update
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError
 from database import SessionLocal
 from models import University, Department, DepartmentYearlyStats
 # ✅ PostgreSQL uyumlu veri temizleme fonksiyonları
 from utils.postgresql_helpers import (
-    safe_to_int, safe_to_float, safe_to_string,
     clean_excel_numeric, truncate_string_for_postgres,
-    validate_enum_value, is_na_value
+    validate_enum_value
 )
+from utils.raw_data_cache import load_raw_table
+from services.catalogue import refresh_derived_data
 
 # ✅ Veri dosyalarının bulunduğu klasörler (hem /app/data hem de /app/data/raw_files)
 DATA_DIRS = [
@@ -50,6 +53,18 @@ COLUMN_MAPPING = {
 }
 
 
+# ✅ Toplu yazma parti boyutu (çok satırlı INSERT/UPDATE başına satır)
+BATCH_SIZE = 1000
+
+FIELD_TYPES = ['SAY', 'EA', 'SÖZ', 'DİL', 'TYT']
+
+# Önlisans/lisans ayrımı için program adı anahtar kelimeleri
+ONLISANS_KEYWORDS = ['ÖNLİSANS', 'ÖN LİSANS', '2 YILLIK', '2 YIL', 'MYO',
+                     'MESLEK YÜKSEKOKULU', 'MESLEK YÜKSEK OKULU', 'AÖF', 'AÇIKÖĞRETİM']
+LISANS_KEYWORDS = ['TIP', 'MÜHENDİSLİK', 'HUKUK', 'MİMARLIK', 'DİŞ HEKİMLİĞİ',
+                   'ECZACILIK', 'VETERİNER', 'ZİRAAT', 'ORMAN']
+
+
 def normalize_department_name(dept_name: str) -> tuple[str, list[str]]:
     """
     ✅ Bölüm ismini normalize et ve parantez içi detayları ayır
@@ -203,18 +218,11 @@ def read_data_file(file_path: Path):
     
     if file_ext in ['.xlsx', '.xls']:
         # Excel dosyası - ÖSYM formatında ilk 2 satır başlık, 3. satır kolon isimleri
-        try:
-            df = pd.read_excel(file_path, sheet_name=0, header=2)
-            return df
-        except Exception as e:
-            print(f"   ⚠️  Excel okuma hatası (header=2): {e}")
-            # Alternatif: header=0 ile dene
-            try:
-                df = pd.read_excel(file_path, sheet_name=0, header=0)
-                return df
-            except Exception as e2:
-                print(f"   ❌ Excel okuma hatası (header=0): {e2}")
-                raise
+        # ✅ Kolonsal önbellek: dosya bir kez ayrıştırılır, header satırı tespit edilip saklanır
+        table = load_raw_table(file_path, header='auto', default_header=2, column_mapping=COLUMN_MAPPING)
+        source = "önbellek" if table.from_cache else "Excel"
+        print(f"   📦 Kaynak: {source} (header={table.header_row}, {len(table.column_mapping)} kolon eşleşti)")
+        return table.frame
     
     elif file_ext == '.csv':
         # CSV dosyası - ÖSYM formatında delimiter ve encoding kontrolü
@@ -269,8 +277,396 @@ def read_data_file(file_path: Path):
         raise ValueError(f"Desteklenmeyen dosya formatı: {file_ext}")
 
 
+def _map_unique(series: pd.Series, fn) -> pd.Series:
+    """Fonksiyonu yalnızca tekil değerlere uygula ve sonucu satırlara yay (factorize)"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    mapped = [fn(value) for value in uniques]
+    result = np.empty(len(mapped), dtype=object)
+    result[:] = mapped
+    return pd.Series(result[codes], index=series.index)
+
+
+def _text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Kolonu `str(value).strip()` karşılığı string serisine çevir (eksik kolon -> 'nan')"""
+    if column not in df.columns:
+        return pd.Series('nan', index=df.index, dtype=object)
+    return df[column].astype(str).str.strip()
+
+
+def _numeric_column(df: pd.DataFrame, column: str, integer: bool) -> pd.Series:
+    """
+    ✅ Sayısal kolonu vektörel temizle (safe_to_int / safe_to_float karşılığı)
+    
+    "Dolmadı", "--", "..." gibi değerler NaN olur. Tam sayılarda binlik ayracı
+    virgül silinir ve negatif değerler NaN olur; ondalıklarda virgül noktaya çevrilir.
+    """
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index, dtype=float)
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        values = series.astype(float)
+    else:
+        text = series.astype(str).str.strip()
+        text = text.str.replace(',', '' if integer else '.', regex=False).str.replace(' ', '', regex=False)
+        values = pd.to_numeric(text, errors='coerce').astype(float)
+    values = values.where(np.isfinite(values))
+    if integer:
+        values = np.trunc(values).where(values >= 0)
+    return values
+
+
+def _program_info(dept_name_raw: str) -> tuple:
+    """
+    Program adından türetilen bilgiler (tekil program adı başına bir kez hesaplanır)
+    
+    Returns:
+        (name, normalized_name, attributes, language, onlisans_keyword, lisans_keyword, bachelor_duration)
+    """
+    normalized_name, attributes = normalize_department_name(dept_name_raw)
+    if not normalized_name:
+        return (None, None, [], None, False, False, 4)
+    
+    # ✅ PostgreSQL uyumlu: String uzunluk kontrolü
+    name = truncate_string_for_postgres(dept_name_raw, max_length=200, field_name="department.name")
+    normalized_name = truncate_string_for_postgres(normalized_name, max_length=200, field_name="department.normalized_name")
+    
+    # Dil bilgisini program adından çıkar (İngilizce, %30 İngilizce vs.)
+    language = 'English' if ('İngilizce' in name or 'English' in name) else 'Turkish'
+    
+    # ✅ Önlisans/lisans ayrımı için anahtar kelimeler ("Önlisans", "2 Yıllık", "MYO" / "Tıp", "Hukuk"...)
+    name_upper = name.upper()
+    onlisans_keyword = any(keyword in name_upper for keyword in ONLISANS_KEYWORDS)
+    lisans_keyword = any(keyword in name_upper for keyword in LISANS_KEYWORDS)
+    
+    # Lisans bölümleri: genelde 4 yıl, Tıp: 6 yıl, Diş Hekimliği/Veteriner/Mimarlık: 5 yıl
+    if 'TIP' in name_upper:
+        duration = 6
+    elif 'DİŞ HEKİMLİĞİ' in name_upper or 'DİŞHEKİMLİĞİ' in name_upper:
+        duration = 5
+    elif 'VETERİNER' in name_upper:
+        duration = 5
+    elif 'MİMARLIK' in name_upper:
+        duration = 5
+    else:
+        duration = 4
+    return (name, normalized_name, attributes, language, onlisans_keyword, lisans_keyword, duration)
+
+
+def _university_info(uni_name_raw: str) -> tuple:
+    """Üniversite adından (isim, şehir) çıkar - tekil üniversite adı başına bir kez"""
+    if not uni_name_raw or uni_name_raw == 'nan':
+        return (None, None)
+    city = extract_city_from_university(uni_name_raw)
+    # Üniversite adından şehir kısmını temizle
+    if '(' in uni_name_raw:
+        uni_name = uni_name_raw[:uni_name_raw.rfind('(')].strip()
+    else:
+        uni_name = uni_name_raw
+    # ✅ PostgreSQL uyumlu: String uzunluk kontrolü
+    uni_name = truncate_string_for_postgres(uni_name, max_length=200, field_name="university.name")
+    return (uni_name or None, city)
+
+
+def clean_placement_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    ✅ VEKTÖREL TEMİZLEME: Ham ÖSYM tablosunu modele hazır kolonlara çevir
+    
+    Metin türetmeleri (şehir, normalize isim, dil, süre) tekil değerler üzerinden
+    bir kez hesaplanır; sayısal kolonlar pandas ile toplu temizlenir.
+    Üniversite adı geçersiz satırlar atılır; program adı geçersiz satırlar
+    `normalized_name` = None ile kalır (üniversite yine de oluşturulur).
+    """
+    uni_info = _map_unique(_text_column(df, 'Üniversite Adı'), _university_info)
+    uni_type_raw = df['Üniversite Türü'] if 'Üniversite Türü' in df.columns else pd.Series('devlet', index=df.index)
+    
+    frame = pd.DataFrame({
+        'university_name': uni_info.str[0],
+        'city': uni_info.str[1],
+        # ✅ Kapsamlı eşleştirme ile normalize (devlet/vakif/kktc)
+        'university_type': _map_unique(uni_type_raw, normalize_university_type),
+    }, index=df.index)
+    
+    dept_name_raw = _text_column(df, 'Program Adı')
+    program = _map_unique(dept_name_raw.where((dept_name_raw != '') & (dept_name_raw != 'nan')), 
+                          lambda value: _program_info(value) if isinstance(value, str) else (None, None, [], None, False, False, 4))
+    frame['name'] = program.str[0]
+    frame['normalized_name'] = program.str[1]
+    frame['attributes'] = program.str[2]
+    frame['language'] = program.str[3]
+    onlisans_keyword = program.str[4].astype(bool)
+    lisans_keyword = program.str[5].astype(bool)
+    
+    # ✅ PostgreSQL uyumlu: Enum doğrulama (geçersiz değerler SAY olur)
+    field_type_raw = df['Puan Türü'] if 'Puan Türü' in df.columns else pd.Series('SAY', index=df.index)
+    field_type = _map_unique(
+        field_type_raw,
+        lambda value: validate_enum_value(value, FIELD_TYPES, default='SAY', silent=True)
+    )
+    # ✅ CRITICAL FIX: TYT veya önlisans anahtar kelimesi = Önlisans; lisans anahtar kelimesi = Lisans
+    is_onlisans = ((field_type == 'TYT') | onlisans_keyword) & ~lisans_keyword
+    field_type = field_type.mask(onlisans_keyword, 'TYT')
+    field_type = field_type.mask(lisans_keyword & (field_type == 'TYT'), 'SAY')
+    frame['field_type'] = field_type
+    frame['degree_type'] = np.where(is_onlisans, 'Associate', 'Bachelor')
+    frame['duration'] = np.where(is_onlisans, 2, program.str[6].astype(int))
+    
+    # ✅ PostgreSQL uyumlu: Sayısal değerleri temizle ("Dolmadı", "...", vb. -> NULL)
+    frame['quota'] = _numeric_column(df, 'Kontenjan', integer=True).fillna(0)
+    frame['placed_students'] = _numeric_column(df, 'Yerleşen', integer=True).fillna(0)
+    frame['min_score'] = _numeric_column(df, 'En Küçük Puan', integer=False)
+    frame['max_score'] = _numeric_column(df, 'En Büyük Puan', integer=False)
+    frame['min_rank'] = _numeric_column(df, 'En Küçük Sıralama', integer=True)
+    frame['max_rank'] = _numeric_column(df, 'En Büyük Sıralama', integer=True)
+    
+    return frame[frame['university_name'].notna()].reset_index(drop=True)
+
+
+def _positive(series: pd.Series) -> pd.Series:
+    """Pozitif olmayan değerleri NaN yap (NULL olarak yazılır)"""
+    return series.where(series > 0)
+
+
+def _records(frame: pd.DataFrame) -> list:
+    """DataFrame satırlarını NaN/NA -> None ve NumPy skalerleri -> Python tipleri olarak sözlüklere çevir"""
+    columns = list(frame.columns)
+    values = frame.astype(object).where(frame.notna(), None).to_numpy()
+    return [
+        {column: value.item() if isinstance(value, np.generic) else value for column, value in zip(columns, row)}
+        for row in values
+    ]
+
+
+def _batches(rows: list, size: int = BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _insert_returning(db: Session, model, rows: list, *returning) -> list:
+    """Toplu INSERT ... RETURNING (çok satırlı VALUES ile, BATCH_SIZE'lık partiler)"""
+    result = []
+    for batch in _batches(rows):
+        result.extend(db.execute(insert(model).returning(*returning), batch).all())
+    return result
+
+
+def _bulk_update(db: Session, model, rows: list) -> None:
+    """Birincil anahtara göre toplu UPDATE"""
+    for batch in _batches(rows):
+        db.execute(update(model), batch)
+
+
+def _upsert_yearly_stats(db: Session, rows: list) -> None:
+    """
+    ✅ INSERT ... ON CONFLICT (department_id, year) DO UPDATE
+    
+    Çakışmada taban puan/sıralama için en düşük, tavan için en yüksek değer korunur;
+    kontenjan ve yerleşen yeni değer varsa güncellenir (satır satır import ile aynı kural).
+    PostgreSQL ve SQLite aynı ifadeyi kullanır.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise ValueError(f"Desteklenmeyen veritabanı: {dialect}")
+    
+    table = DepartmentYearlyStats.__table__
+    stmt = dialect_insert(table)
+    excluded = stmt.excluded
+    
+    def keep(column, lower: bool):
+        new, current = excluded[column], table.c[column]
+        better = new < current if lower else new > current
+        return case(
+            (new.is_(None), current),
+            (current.is_(None), new),
+            (better, new),
+            else_=current
+        )
+    
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.department_id, table.c.year],
+        set_={
+            'min_score': keep('min_score', lower=True),
+            'max_score': keep('max_score', lower=False),
+            'min_rank': keep('min_rank', lower=True),
+            'max_rank': keep('max_rank', lower=False),
+            'quota': func.coalesce(excluded.quota, table.c.quota),
+            'placed_students': func.coalesce(excluded.placed_students, table.c.placed_students),
+            'updated_at': func.now(),
+        }
+    )
+    for batch in _batches(rows):
+        db.execute(stmt, batch)
+
+
+def _resolve_universities(frame: pd.DataFrame, db: Session) -> tuple[dict, int, int]:
+    """
+    Üniversite adlarını id'lere çöz (tek sorgu + toplu insert/update)
+    
+    Yeni üniversitenin şehri ilk satırdan, türü (satır satır import'taki gibi) son satırdan alınır.
+    
+    Returns:
+        (isim -> id sözlüğü, yeni üniversite sayısı, türü güncellenen üniversite sayısı)
+    """
+    existing = {
+        name: (uni_id, uni_type)
+        for uni_id, name, uni_type in db.query(University.id, University.name, University.university_type)
+    }
+    grouped = frame.groupby('university_name', sort=False).agg(
+        city=('city', 'first'), university_type=('university_type', 'last')
+    )
+    
+    new_rows, type_updates = [], []
+    for uni_name, row in grouped.iterrows():
+        if uni_name in existing:
+            uni_id, current_type = existing[uni_name]
+            if current_type != row.university_type:
+                print(f"   🔧 Üniversite türü güncelleniyor: {uni_name} ({current_type} → {row.university_type})")
+                type_updates.append({'id': uni_id, 'university_type': row.university_type})
+            continue
+        new_rows.append({
+            'name': uni_name,
+            'city': row.city,
+            'university_type': row.university_type,
+            'website': f"https://{uni_name.lower().replace(' ', '').replace('ü', 'u').replace('ı', 'i').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')[:20]}.edu.tr",
+        })
+    
+    ids = {name: uni_id for name, (uni_id, _) in existing.items()}
+    ids.update({name: uni_id for uni_id, name in _insert_returning(db, University, new_rows, University.id, University.name)})
+    _bulk_update(db, University, type_updates)
+    return ids, len(new_rows), len(type_updates)
+
+
+def _resolve_departments(frame: pd.DataFrame, year: int, db: Session) -> tuple[pd.Series, int]:
+    """
+    Bölüm anahtarlarını (university_id, normalized_name, field_type) id'lere çöz
+    
+    - Yeni bölümler: ilk satırın bilgileriyle, son pozitif puan/sıralama/kontenjanla eklenir
+    - Mevcut bölümler: attributes birleştirilir; dosya yılı bölümün son güncelleme
+      yılından eski değilse puan/sıralama/kontenjan son pozitif değerle güncellenir
+    
+    Returns:
+        (her satırın department_id serisi, yeni bölüm sayısı)
+    """
+    key_columns = ['university_id', 'normalized_name', 'field_type']
+    existing = {
+        (d.university_id, d.normalized_name, d.field_type): d
+        for d in db.query(
+            Department.id, Department.university_id, Department.normalized_name, Department.field_type,
+            Department.attributes, Department.min_score, Department.min_rank, Department.quota, Department.updated_at,
+        ).order_by(Department.id.desc())  # Aynı anahtarda en küçük id kazanır (.first() ile aynı)
+    }
+    
+    frame = frame.assign(
+        pos_min_score=_positive(frame['min_score']),
+        pos_min_rank=_positive(frame['min_rank']),
+        pos_quota=_positive(frame['quota']),
+    )
+    groups = frame.groupby(key_columns, sort=False)
+    first = groups[['name', 'language', 'duration', 'degree_type', 'quota']].first()
+    last_positive = groups[['pos_min_score', 'pos_min_rank', 'pos_quota']].last()
+    
+    # Attributes: gruptaki tüm satırların birleşimi (ilk görülme sırasıyla)
+    exploded = frame[key_columns + ['attributes']].explode('attributes').dropna(subset=['attributes'])
+    exploded = exploded.drop_duplicates()
+    attributes = exploded.groupby(key_columns, sort=False)['attributes'].agg(list)
+    
+    summary = first.join(last_positive).join(attributes.rename('new_attributes'))
+    
+    new_rows, updates = [], []
+    for key, info in zip(summary.index, _records(summary)):
+        new_attrs = info['new_attributes'] if isinstance(info['new_attributes'], list) else []
+        min_score = info['pos_min_score']
+        min_rank = info['pos_min_rank']
+        quota = info['pos_quota']
+        
+        current = existing.get(key)
+        if current is None:
+            new_rows.append({
+                'university_id': int(key[0]),
+                'name': info['name'],  # Orijinal isim
+                'normalized_name': key[1],  # ✅ Normalize edilmiş isim
+                'attributes': json.dumps(new_attrs, ensure_ascii=False) if new_attrs else None,  # ✅ JSON string
+                'field_type': key[2],
+                'language': info['language'],
+                'duration': int(info['duration']),  # ✅ 2 veya 4+
+                'degree_type': info['degree_type'],  # ✅ Associate veya Bachelor
+                'quota': int(quota) if quota is not None else int(info['quota']),
+                'min_score': min_score,
+                'min_rank': int(min_rank) if min_rank is not None else None,
+            })
+            continue
+        
+        # ✅ Mevcut bölümü güncelle (attributes birleşimi + en güncel yılın verileri)
+        existing_attrs = json.loads(current.attributes) if current.attributes else []
+        combined_attrs = list(dict.fromkeys(existing_attrs + new_attrs))
+        values = {'attributes': json.dumps(combined_attrs, ensure_ascii=False) if combined_attrs else None}
+        if year >= (current.updated_at.year if current.updated_at else 0):
+            values['min_score'] = min_score if min_score is not None else current.min_score
+            values['min_rank'] = int(min_rank) if min_rank is not None else current.min_rank
+            values['quota'] = int(quota) if quota is not None else current.quota
+        if any(getattr(current, column) != value for column, value in values.items()):
+            updates.append({'id': current.id, **values})
+    
+    ids = {key: d.id for key, d in existing.items()}
+    inserted = _insert_returning(
+        db, Department, new_rows,
+        Department.id, Department.university_id, Department.normalized_name, Department.field_type
+    )
+    ids.update({(uni_id, name, field_type): dept_id for dept_id, uni_id, name, field_type in inserted})
+    _bulk_update(db, Department, updates)
+    
+    department_ids = pd.Series(
+        [ids[key] for key in zip(frame['university_id'], frame['normalized_name'], frame['field_type'])],
+        index=frame.index
+    )
+    return department_ids, len(new_rows)
+
+
+def _write_yearly_stats(frame: pd.DataFrame, year: int, db: Session) -> int:
+    """
+    ✅ Yıllık istatistikleri (department_id, year) başına tek satıra indir ve upsert et
+    
+    Aynı bölümün farklı varyasyonları (Burslu, %50 İndirimli) aynı Department'ı kullanır:
+    taban için en düşük, tavan için en yüksek değer; kontenjan/yerleşen için son pozitif değer.
+    """
+    stats = frame.assign(
+        min_score=_positive(frame['min_score']),
+        max_score=_positive(frame['max_score']),
+        min_rank=_positive(frame['min_rank']),
+        max_rank=_positive(frame['max_rank']),
+        quota=_positive(frame['quota']),
+        placed_students=_positive(frame['placed_students']),
+    ).groupby('department_id', sort=False).agg(
+        min_score=('min_score', 'min'),
+        max_score=('max_score', 'max'),
+        min_rank=('min_rank', 'min'),
+        max_rank=('max_rank', 'max'),
+        quota=('quota', 'last'),
+        placed_students=('placed_students', 'last'),
+    )
+    
+    existing = {
+        department_id
+        for (department_id,) in db.query(DepartmentYearlyStats.department_id).filter(DepartmentYearlyStats.year == year)
+    }
+    integer_columns = ['min_rank', 'max_rank', 'quota', 'placed_students']
+    stats[integer_columns] = stats[integer_columns].astype('Int64')
+    stats = stats.reset_index().assign(year=year)
+    rows = _records(stats)
+    _upsert_yearly_stats(db, rows)
+    return sum(1 for row in rows if row['department_id'] not in existing)
+
+
 def import_excel_file(file_path: Path, year: int, db: Session):
-    """✅ GÜNCELLENMİŞ: Tek bir Excel/CSV dosyasını import et - normalize edilmiş isimler ve yıllara göre veri saklama"""
+    """✅ VEKTÖREL: Tek bir Excel/CSV dosyasını import et - normalize edilmiş isimler ve yıllara göre veri saklama
+    
+    Satır başına sorgu yerine: kolonlar pandas ile temizlenir, üniversite/bölüm anahtarları
+    bellekteki sözlüklerle çözülür ve yazma işlemleri büyük partiler halinde yapılır
+    (INSERT ... RETURNING, toplu UPDATE, INSERT ... ON CONFLICT). Dosya tek transaction'da yazılır.
+    """
     print(f"\n📁 {file_path.name} işleniyor (Yıl: {year})...")
     
     try:
@@ -295,318 +691,32 @@ def import_excel_file(file_path: Path, year: int, db: Session):
             print(f"   ℹ️  Script'teki COLUMN_MAPPING'i güncelleyin!")
             return 0, 0, 0
         
-        # Üniversite, Bölüm ve Yıllık İstatistik sayaçları
-        new_universities = 0
-        new_departments = 0
-        new_yearly_stats = 0
+        started = time.perf_counter()
+        frame = clean_placement_frame(df)
         
-        # Her satırı işle
-        for idx, row in df.iterrows():
-            try:
-                # Üniversite bilgilerini al
-                uni_name_raw = str(row.get('Üniversite Adı', '')).strip()
-                if not uni_name_raw or uni_name_raw == 'nan':
-                    continue
-                
-                # Şehri üniversite adından çıkar
-                city = extract_city_from_university(uni_name_raw)
-                
-                # Üniversite adından şehir kısmını temizle
-                if '(' in uni_name_raw:
-                    uni_name = uni_name_raw[:uni_name_raw.rfind('(')].strip()
-                else:
-                    uni_name = uni_name_raw
-                
-                # ✅ PostgreSQL uyumlu: String uzunluk kontrolü
-                uni_name = truncate_string_for_postgres(uni_name, max_length=200, field_name="university.name")
-                if not uni_name:
-                    continue  # Üniversite adı yoksa atla
-                
-                # ✅ PostgreSQL uyumlu: Enum doğrulama
-                # Önce normalize et (kapsamlı eşleştirme), sonra validate et (sessiz mod)
-                uni_type_raw = row.get('Üniversite Türü', 'devlet')
-                uni_type_normalized = normalize_university_type(uni_type_raw)
-                # Normalize edilmiş değer zaten geçerli enum değeri olmalı, sessiz mod ile validate et
-                uni_type = validate_enum_value(uni_type_normalized, ['devlet', 'vakif', 'kktc'], default=uni_type_normalized, silent=True)
-                
-                # Üniversite var mı kontrol et
-                university = db.query(University).filter(
-                    University.name == uni_name
-                ).first()
-                
-                if not university:
-                    # Yeni üniversite ekle
-                    university = University(
-                        name=uni_name,
-                        city=city,
-                        university_type=uni_type,
-                        website=f"https://{uni_name.lower().replace(' ', '').replace('ü', 'u').replace('ı', 'i').replace('ğ', 'g').replace('ş', 's').replace('ç', 'c').replace('ö', 'o')[:20]}.edu.tr"
-                    )
-                    db.add(university)
-                    db.flush()  # ID almak için
-                    new_universities += 1
-                else:
-                    # ✅ Mevcut üniversite varsa, türünü güncelle (yanlışsa düzelt)
-                    if university.university_type != uni_type:
-                        print(f"   🔧 Üniversite türü güncelleniyor: {uni_name} ({university.university_type} → {uni_type})")
-                        university.university_type = uni_type
-                        db.flush()  # Değişikliği kaydet
-                
-                # ✅ Bölüm bilgilerini al ve normalize et
-                dept_name_raw = str(row.get('Program Adı', '')).strip()
-                if not dept_name_raw or dept_name_raw == 'nan':
-                    continue
-                
-                # Normalize et
-                normalized_name, attributes = normalize_department_name(dept_name_raw)
-                if not normalized_name:
-                    continue
-                
-                # ✅ PostgreSQL uyumlu: String uzunluk kontrolü
-                dept_name_raw = truncate_string_for_postgres(dept_name_raw, max_length=200, field_name="department.name")
-                normalized_name = truncate_string_for_postgres(normalized_name, max_length=200, field_name="department.normalized_name")
-                
-                # ✅ PostgreSQL uyumlu: Enum doğrulama
-                field_type_raw = row.get('Puan Türü', 'SAY')
-                field_type = validate_enum_value(field_type_raw, ['SAY', 'EA', 'SÖZ', 'DİL', 'TYT'], default='SAY')
-                
-                # Dil bilgisini program adından çıkar (İngilizce, %30 İngilizce vs.)
-                language = 'Turkish'
-                if 'İngilizce' in dept_name_raw or 'English' in dept_name_raw:
-                    language = 'English'
-                elif '%' in dept_name_raw and ('İngilizce' in dept_name_raw or 'English' in dept_name_raw):
-                    language = 'Partial English'
-                
-                # ✅ CRITICAL FIX: Duration ve degree_type mantığı
-                # Bölüm adından veya field_type'dan önlisans/lisans ayrımı yap
-                dept_name_upper = dept_name_raw.upper()
-                is_onlisans = False
-                
-                # 1. Field type kontrolü: TYT = Önlisans
-                if field_type == 'TYT':
-                    is_onlisans = True
-                
-                # 2. Bölüm adı kontrolü: "Önlisans", "2 Yıllık", "MYO" gibi kelimeler
-                onlisans_keywords = ['ÖNLİSANS', 'ÖN LİSANS', '2 YILLIK', '2 YIL', 'MYO', 
-                                     'MESLEK YÜKSEKOKULU', 'MESLEK YÜKSEK OKULU', 'AÖF', 'AÇIKÖĞRETİM']
-                if any(keyword in dept_name_upper for keyword in onlisans_keywords):
-                    is_onlisans = True
-                    # Eğer field_type TYT değilse, TYT yap
-                    if field_type != 'TYT':
-                        field_type = 'TYT'
-                
-                # 3. Lisans bölümleri kontrolü: "Tıp", "Mühendislik", "Hukuk" gibi
-                # Bu bölümler kesinlikle lisans olmalı
-                lisans_keywords = ['TIP', 'MÜHENDİSLİK', 'HUKUK', 'MİMARLIK', 'DİŞ HEKİMLİĞİ',
-                                   'ECZACILIK', 'VETERİNER', 'ZİRAAT', 'ORMAN']
-                if any(keyword in dept_name_upper for keyword in lisans_keywords):
-                    is_onlisans = False
-                    # Eğer field_type TYT ise, SAY yap (çünkü lisans bölümü)
-                    if field_type == 'TYT':
-                        field_type = 'SAY'
-                
-                # Duration ve degree_type belirleme
-                if is_onlisans:
-                    duration = 2
-                    degree_type = 'Associate'
-                else:
-                    # Lisans bölümleri: genelde 4 yıl, bazıları 5-6 yıl
-                    # Tıp: 6 yıl, Diş Hekimliği: 5 yıl, Veteriner: 5 yıl
-                    if 'TIP' in dept_name_upper:
-                        duration = 6
-                    elif 'DİŞ HEKİMLİĞİ' in dept_name_upper or 'DİŞHEKİMLİĞİ' in dept_name_upper:
-                        duration = 5
-                    elif 'VETERİNER' in dept_name_upper:
-                        duration = 5
-                    elif 'MİMARLIK' in dept_name_upper:
-                        duration = 5
-                    else:
-                        duration = 4  # Varsayılan lisans süresi
-                    degree_type = 'Bachelor'
-                # ✅ PostgreSQL uyumlu: Sayısal değerleri temizle ve doğrula
-                # ✅ ÖSYM verilerindeki özel karakterleri temizle ("Dolmadı", "...", vb.)
-                quota_raw = clean_special_values(row.get('Kontenjan', None))
-                quota = safe_to_int(quota_raw, default=0) if quota_raw is not None else 0
-                
-                placed_students_raw = clean_special_values(row.get('Yerleşen', None))
-                placed_students = safe_to_int(placed_students_raw, default=0) if placed_students_raw is not None else 0
-                
-                min_score_raw = clean_special_values(row.get('En Küçük Puan', None))
-                min_score = safe_to_float(min_score_raw, default=None) if min_score_raw is not None else None  # ✅ NULL olabilir
-                
-                max_score_raw = clean_special_values(row.get('En Büyük Puan', None))
-                max_score = safe_to_float(max_score_raw, default=None) if max_score_raw is not None else None  # ✅ NULL olabilir
-                
-                min_rank_raw = clean_special_values(row.get('En Küçük Sıralama', None))
-                min_rank = safe_to_int(min_rank_raw, default=None) if min_rank_raw is not None else None  # ✅ NULL olabilir
-                
-                max_rank_raw = clean_special_values(row.get('En Büyük Sıralama', None))
-                max_rank = safe_to_int(max_rank_raw, default=None) if max_rank_raw is not None else None  # ✅ NULL olabilir
-                
-                # ✅ Bölüm var mı kontrol et (aynı üniversite, normalize edilmiş isim, aynı field_type)
-                # NOT: Orijinal isim farklı olabilir (örn: "Tıp (Burslu)" vs "Tıp (%50 İndirimli)")
-                # ama normalize edilmiş isim aynı olacak ("Tıp")
-                existing_dept = db.query(Department).filter(
-                    Department.university_id == university.id,
-                    Department.normalized_name == normalized_name,
-                    Department.field_type == field_type
-                ).first()
-                
-                if existing_dept:
-                    # ✅ Mevcut bölümü güncelle (en güncel yılın verileri)
-                    # Attributes'ı birleştir (yeni attributes varsa ekle)
-                    existing_attrs = json.loads(existing_dept.attributes) if existing_dept.attributes else []
-                    combined_attrs = list(set(existing_attrs + attributes))  # Unique attributes
-                    existing_dept.attributes = json.dumps(combined_attrs, ensure_ascii=False) if combined_attrs else None
-                    
-                    # En güncel yılın verilerini güncelle (sadece daha yeni yıl ise)
-                    if year >= (existing_dept.updated_at.year if existing_dept.updated_at else 0):
-                        existing_dept.min_score = min_score if (min_score is not None and min_score > 0) else existing_dept.min_score
-                        existing_dept.min_rank = min_rank if (min_rank is not None and min_rank > 0) else existing_dept.min_rank
-                        existing_dept.quota = quota if (quota is not None and quota > 0) else existing_dept.quota
-                    
-                    department = existing_dept
-                else:
-                    # ✅ Yeni bölüm ekle (normalize edilmiş isim ile)
-                    department = Department(
-                        university_id=university.id,
-                        name=dept_name_raw,  # Orijinal isim
-                        normalized_name=normalized_name,  # ✅ Normalize edilmiş isim
-                        attributes=json.dumps(attributes, ensure_ascii=False) if attributes else None,  # ✅ JSON string
-                        field_type=field_type,
-                        language=language,
-                        duration=duration,  # ✅ Artık doğru hesaplanıyor (2 veya 4+)
-                        degree_type=degree_type,  # ✅ Associate veya Bachelor
-                        quota=quota,
-                        min_score=min_score if (min_score is not None and min_score > 0) else None,
-                        min_rank=min_rank if (min_rank is not None and min_rank > 0) else None,
-                    )
-                    db.add(department)
-                    db.flush()  # ID almak için
-                    new_departments += 1
-                
-                # ✅ Yıllık istatistikleri kaydet (DepartmentYearlyStats)
-                # Aynı bölüm için aynı yıl zaten varsa güncelle, yoksa yeni ekle
-                # NOT: Aynı bölümün farklı varyasyonları (Burslu, %50 İndirimli) aynı Department'ı kullanır
-                # Bu yüzden her varyasyon için ayrı YearlyStats eklenmemeli
-                try:
-                    # Önce mevcut kaydı kontrol et
-                    existing_stats = db.query(DepartmentYearlyStats).filter(
-                        DepartmentYearlyStats.department_id == department.id,
-                        DepartmentYearlyStats.year == year
-                    ).first()
-                    
-                    if existing_stats:
-                        # Güncelle (daha iyi veriler varsa - min_score için en düşük, max_score için en yüksek)
-                        if (min_score is not None and min_score > 0) and (existing_stats.min_score is None or min_score < existing_stats.min_score):
-                            existing_stats.min_score = min_score
-                        if (max_score is not None and max_score > 0) and (existing_stats.max_score is None or max_score > existing_stats.max_score):
-                            existing_stats.max_score = max_score
-                        if (min_rank is not None and min_rank > 0) and (existing_stats.min_rank is None or min_rank < existing_stats.min_rank):
-                            existing_stats.min_rank = min_rank
-                        if (max_rank is not None and max_rank > 0) and (existing_stats.max_rank is None or max_rank > existing_stats.max_rank):
-                            existing_stats.max_rank = max_rank
-                        if quota is not None and quota > 0:
-                            existing_stats.quota = quota
-                        if placed_students is not None and placed_students > 0:
-                            existing_stats.placed_students = placed_students
-                    else:
-                        # Yeni yıllık istatistik ekle
-                        yearly_stats = DepartmentYearlyStats(
-                            department_id=department.id,
-                            year=year,
-                            min_score=min_score if (min_score is not None and min_score > 0) else None,
-                            max_score=max_score if (max_score is not None and max_score > 0) else None,
-                            min_rank=min_rank if (min_rank is not None and min_rank > 0) else None,
-                            max_rank=max_rank if (max_rank is not None and max_rank > 0) else None,
-                            quota=quota if (quota is not None and quota > 0) else None,
-                            placed_students=placed_students if (placed_students is not None and placed_students > 0) else None,
-                        )
-                        db.add(yearly_stats)
-                        db.flush()  # Flush yap ve hata varsa yakala
-                        new_yearly_stats += 1
-                except Exception as stats_error:
-                    # ✅ Duplicate key hatası olabilir (aynı yıl için birden fazla kayıt eklendi)
-                    # Bu durumda rollback yap ve mevcut kaydı güncelle
-                    error_msg = str(stats_error)
-                    if "UniqueViolation" in error_msg or "uq_department_year" in error_msg:
-                        try:
-                            db.rollback()  # Rollback yap
-                            # Tekrar mevcut kaydı bul ve güncelle
-                            existing_stats = db.query(DepartmentYearlyStats).filter(
-                                DepartmentYearlyStats.department_id == department.id,
-                                DepartmentYearlyStats.year == year
-                            ).first()
-                            if existing_stats:
-                                # Mevcut kaydı güncelle
-                                if (min_score is not None and min_score > 0) and (existing_stats.min_score is None or min_score < existing_stats.min_score):
-                                    existing_stats.min_score = min_score
-                                if (max_score is not None and max_score > 0) and (existing_stats.max_score is None or max_score > existing_stats.max_score):
-                                    existing_stats.max_score = max_score
-                                if quota is not None and quota > 0:
-                                    existing_stats.quota = quota
-                                if placed_students is not None and placed_students > 0:
-                                    existing_stats.placed_students = placed_students
-                        except Exception as retry_error:
-                            # Eğer hala hata varsa, bu satırı atla (zaten kayıt var)
-                            pass
-                    else:
-                        # Diğer hatalar için rollback yap
-                        try:
-                            db.rollback()
-                        except:
-                            pass
-                
-                # Her 500 satırda bir commit ve progress göster (daha sık feedback için)
-                if (idx + 1) % 500 == 0:
-                    try:
-                        db.commit()
-                        print(f"   ⏳ {idx + 1}/{len(df)} satır işlendi... (Uni: {new_universities}, Dept: {new_departments}, Stats: {new_yearly_stats})", flush=True)
-                    except (IntegrityError, DataError) as db_error:
-                        # ✅ PostgreSQL uyumlu hata yakalama
-                        db.rollback()
-                        error_msg = str(db_error)
-                        
-                        # ✅ PostgreSQL özel hata mesajları
-                        if "duplicate key" in error_msg.lower() or "unique constraint" in error_msg.lower():
-                            print(f"   ⚠️  Duplicate key hatası (satır {idx + 1}): Zaten mevcut kayıt, atlanıyor...", flush=True)
-                        elif "value too long" in error_msg.lower() or "character varying" in error_msg.lower():
-                            print(f"   ⚠️  String uzunluk hatası (satır {idx + 1}): {error_msg[:100]}", flush=True)
-                            # String'i kes ve tekrar dene (opsiyonel)
-                        elif "invalid input syntax" in error_msg.lower():
-                            print(f"   ⚠️  Veri tipi hatası (satır {idx + 1}): {error_msg[:100]}", flush=True)
-                        else:
-                            print(f"   ⚠️  PostgreSQL hatası (satır {idx + 1}): {error_msg[:100]}", flush=True)
-                        # Devam et, bir sonraki satırda düzelir
-                    except Exception as commit_error:
-                        db.rollback()
-                        print(f"   ⚠️  Genel commit hatası (satır {idx + 1}): {str(commit_error)[:100]}", flush=True)
-                        # Devam et, bir sonraki commit'te düzelir
-            
-            except Exception as e:
-                # ✅ Hata durumunda rollback yap ve devam et
-                try:
-                    db.rollback()
-                except:
-                    pass
-                
-                error_msg = str(e)
-                if "UniqueViolation" in error_msg or "uq_department_year" in error_msg or "PendingRollbackError" in error_msg:
-                    # Duplicate key hatası veya rollback hatası - normal, atla
-                    continue
-                else:
-                    print(f"   ⚠️  Satır {idx} hatası: {error_msg[:100]}")
-                    # Sadece önemli hataları göster
-                    if "Traceback" not in error_msg:  # Traceback zaten print edilmiş
-                        import traceback
-                        traceback.print_exc()
-                    continue
+        # 1. Üniversiteler (program adı geçersiz satırlar da üniversite oluşturur)
+        university_ids, new_universities, updated_universities = _resolve_universities(frame, db)
+        
+        # 2. Bölümler
+        frame = frame[frame['normalized_name'].notna()].reset_index(drop=True)
+        frame['university_id'] = frame['university_name'].map(university_ids).astype(int)
+        frame['department_id'], new_departments = _resolve_departments(frame, year, db)
+        
+        # 3. Yıllık istatistikler
+        new_yearly_stats = _write_yearly_stats(frame, year, db)
         
-        # Son commit
         db.commit()
-        print(f"   ✅ {new_universities} yeni üniversite, {new_departments} yeni bölüm, {new_yearly_stats} yıllık istatistik eklendi!")
+        elapsed = time.perf_counter() - started
+        if updated_universities:
+            print(f"   🔧 {updated_universities} üniversitenin türü güncellendi")
+        print(f"   ✅ {new_universities} yeni üniversite, {new_departments} yeni bölüm, {new_yearly_stats} yıllık istatistik eklendi! ({elapsed:.1f} sn)")
         return new_universities, new_departments, new_yearly_stats
         
+    except (IntegrityError, DataError) as db_error:
+        # ✅ PostgreSQL uyumlu hata yakalama
+        db.rollback()
+        print(f"   ❌ Veritabanı hatası, dosya geri alındı: {str(db_error)[:200]}")
+        return 0, 0, 0
     except Exception as e:
         print(f"   ❌ Dosya işleme hatası: {e}")
         import traceback
@@ -699,6 +809,10 @@ def main():
             total_departments += depts
             total_yearly_stats += stats
         
+        # ✅ Facet/trend/cache yenilemesi dosya başına değil, tüm dosyalardan sonra bir kez
+        print("\n🔄 Filtre boyutları ve bölüm trendleri yenileniyor...")
+        refresh_derived_data(db)
+        
         print("\n" + "=" * 70)
         print("✅ İMPORT TAMAMLANDI!")
         print("=" * 70)
@@ -9,6 +9,7 @@ from pathlib import Path
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models.university import University, Department
+from services.catalogue import refresh_derived_data
 
 DATA_DIR = Path('/app/data')
 
@@ -187,6 +188,9 @@ try:
     print(f"{'='*70}")
     print(f"📊 {total_uni} üniversite, {total_dept} bölüm eklendi")
     
+    # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+    refresh_derived_data(db)
+    
     # Toplam
     final_uni = db.query(University).count()
     final_dept = db.query(Department).count()
@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy.orm import Session
 from database import get_db, create_tables
 from models.university import University, Department
+from services.catalogue import refresh_derived_data
 import json
 
 def create_sample_universities():
@@ -439,6 +440,8 @@ def import_data():
         
         db.commit()
         print(f"{len(departments_data)} bölüm eklendi.")
+        # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+        refresh_derived_data(db)
         
         print("Veri import işlemi tamamlandı!")
         
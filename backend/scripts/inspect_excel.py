@@ -13,6 +13,9 @@ from pathlib import Path
 import pandas as pd
 
 sys.path.append('/app')
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.raw_data_cache import load_raw_table
 
 
 def inspect_excel_file(file_path: Path, header_row: int = 2):
@@ -35,18 +38,15 @@ def inspect_excel_file(file_path: Path, header_row: int = 2):
         return
     
     try:
-        # Önce header=2 ile dene (ÖSYM formatı)
+        # ✅ Kolonsal önbellek: header satırı tespit edilir (ÖSYM formatında 2), dosya bir kez ayrıştırılır
         try:
-            df = pd.read_excel(file_path, sheet_name=0, header=header_row)
-            print(f"✅ Dosya okundu (header={header_row})")
+            table = load_raw_table(file_path, header='auto', default_header=header_row)
+            df = table.frame
+            source = "önbellekten" if table.from_cache else "Excel'den"
+            print(f"✅ Dosya {source} okundu (header={table.header_row})")
         except Exception as e:
-            print(f"⚠️  header={header_row} ile okunamadı, header=0 deneniyor...")
-            try:
-                df = pd.read_excel(file_path, sheet_name=0, header=0)
-                print(f"✅ Dosya okundu (header=0)")
-            except Exception as e2:
-                print(f"❌ Dosya okunamadı: {e2}")
-                return
+            print(f"❌ Dosya okunamadı: {e}")
+            return
         
         # Duplicate sütunları temizle (gösterim için)
         df = df.loc[:, ~df.columns.duplicated()]
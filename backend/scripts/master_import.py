@@ -11,6 +11,9 @@ from typing import Optional, Dict, List
 # ---------------------------------------------------------
 script_dir = os.path.dirname(os.path.abspath(__file__))
 backend_dir = os.path.dirname(script_dir)
+sys.path.append(backend_dir)
+
+from utils.raw_data_cache import read_excel_cached  # ✅ Excel bir kez ayrıştırılır, sonra önbellekten
 
 # Olası path'leri dene
 possible_paths = [
@@ -217,11 +220,11 @@ def smart_read_file(filepath: str) -> Optional[pd.DataFrame]:
     # 2. Excel olarak dene
     try:
         if filename.endswith('.xlsx'):
-            df = pd.read_excel(filepath, header=None, dtype=str, engine='openpyxl')
+            df = read_excel_cached(filepath, header=None, dtype=str, engine='openpyxl')
         elif filename.endswith('.xls'):
-            df = pd.read_excel(filepath, header=None, dtype=str, engine='xlrd')
+            df = read_excel_cached(filepath, header=None, dtype=str, engine='xlrd')
         else:
-            df = pd.read_excel(filepath, header=None, dtype=str)
+            df = read_excel_cached(filepath, header=None, dtype=str)
         logger.info(f"  ✅ Successfully read as Excel")
         return df
     except Exception as e:
@@ -11,6 +11,7 @@ sys.path.append('/app')
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models.university import Department
+from services.catalogue import refresh_derived_data
 
 
 def normalize_department_name(dept_name: str) -> tuple[str, list[str]]:
@@ -133,6 +134,9 @@ def normalize_existing_departments():
                     print(f"   ⚠️  Son commit hatası: {error_msg[:100]}", flush=True)
                     break
         
+        # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+        refresh_derived_data(db)
+        
         print("\n" + "=" * 70)
         print("✅ NORMALİZASYON TAMAMLANDI!")
         print("=" * 70)
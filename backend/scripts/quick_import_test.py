@@ -5,6 +5,7 @@ sys.path.append('/app')
 import pandas as pd
 from database import SessionLocal
 from models.university import University, Department
+from services.catalogue import refresh_derived_data
 
 db = SessionLocal()
 
@@ -87,6 +88,8 @@ try:
             print(f"⏳ {idx + 1} satır işlendi...")
     
     db.commit()
+    # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+    refresh_derived_data(db)
     print(f"\n✅ Tamamlandı!")
     print(f"📊 {uni_count} yeni üniversite, {dept_count} yeni bölüm eklendi")
     
@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models.university import University, Department
+from services.catalogue import refresh_derived_data
 
 def seed_data():
     db = SessionLocal()
@@ -156,6 +157,8 @@ def seed_data():
         
         db.commit()
         print(f"✅ {len(departments)} bölüm eklendi")
+        # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+        refresh_derived_data(db)
         print("\n🎉 Başarıyla tamamlandı!")
         
     except Exception as e:
@@ -27,6 +27,7 @@ from database import SessionLocal, engine
 from models.university import University, Department, Recommendation
 from models.student import Student
 from models.exam_attempt import ExamAttempt
+from services.catalogue import refresh_derived_data
 
 
 def extract_city_from_university(uni_name: str) -> str:
@@ -462,6 +463,9 @@ def main():
         # 4. Demo öğrenci oluştur (gerçek bölümlerden tercih ile)
         create_demo_student(db)
         
+        # 5. Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+        refresh_derived_data(db)
+        
         # İstatistikler
         uni_count = db.query(University).count()
         dept_count = db.query(Department).count()
@@ -7,6 +7,7 @@ sys.path.append('/app')
 
 from database import SessionLocal
 from models.university import University, Department
+from services.catalogue import refresh_derived_data
 
 db = SessionLocal()
 
@@ -158,6 +159,8 @@ try:
     
     db.commit()
     print(f"✅ {dept_count} bölüm eklendi!")
+    # ✅ Filtre boyutları, bölüm trendleri ve katalog cache'leri yeni veriden yenilenir
+    refresh_derived_data(db)
     print(f"🎉 Toplam: {len(universities_db)} üniversite × {len(DEPARTMENTS_TEMPLATE)} bölüm = {dept_count} kayıt")
 
 except Exception as e:
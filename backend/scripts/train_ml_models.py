@@ -13,13 +13,19 @@ import pandas as pd
 from sqlalchemy.orm import Session
 from database import get_db
 from services.ml_recommendation_engine import MLRecommendationEngine
+from services.feature_store import feature_store_path, min_training_pairs, refresh_feature_store
 from models.student import Student
 from models.university import Department, Recommendation
 import json
 
-def generate_training_data():
-    """Eğitim verisi oluştur (gerçek veri yoksa simüle edilmiş)"""
+def generate_training_data(seed: int = 42):
+    """Eğitim verisi oluştur (gerçek veri yoksa simüle edilmiş)
+    
+    Simülasyon sabit tohumla yapılır; aynı girdiler aynı veriyi (ve aynı veri
+    hash'ini) üretir, böylece değişmeyen veriyle yeniden eğitim atlanabilir.
+    """
     print("Eğitim verisi oluşturuluyor...")
+    rng = np.random.RandomState(seed)
     
     # Simüle edilmiş eğitim verisi
     training_data = []
@@ -62,7 +68,7 @@ def generate_training_data():
                 success_prob = 0.1
             
             # Tercih skoru (rastgele + bazı kurallar)
-            preference = np.random.uniform(0.3, 0.9)
+            preference = rng.uniform(0.3, 0.9)
             if student['field_type'] == 'SAY' and dept['university_type'] == 'Devlet':
                 preference += 0.1
             if dept['city'] == 'İstanbul':
@@ -81,11 +87,11 @@ def generate_training_data():
                 'class_level_encoded': 0,  # 12. sınıf
                 'min_score': dept['min_score'],
                 'min_rank': dept['min_rank'],
-                'quota': np.random.randint(50, 200),
-                'tuition_fee': 0 if dept['university_type'] == 'Devlet' else np.random.randint(50000, 100000),
+                'quota': rng.randint(50, 200),
+                'tuition_fee': 0 if dept['university_type'] == 'Devlet' else rng.randint(50000, 100000),
                 'has_scholarship': dept['university_type'] == 'Vakıf',
                 'university_type_encoded': {'Devlet': 0, 'Vakıf': 1, 'Özel': 2}[dept['university_type']],
-                'city_encoded': hash(dept['city']) % 1000,
+                'city_encoded': MLRecommendationEngine._encode_city(dept['city']),
                 'compatibility': compatibility,
                 'success_probability': success_prob,
                 'preference': preference,
@@ -105,14 +111,20 @@ def train_models():
         # ML engine oluştur
         ml_engine = MLRecommendationEngine(db)
         
-        # Eğitim verisi oluştur
-        training_data = generate_training_data()
-        
-        # Modelleri eğit
-        ml_engine.train_models(training_data)
+        # Gerçek swipe/tercih/denemelerden özellik deposunu güncelle
+        store = refresh_feature_store(db, feature_store_path(ml_engine.model_path))
+        if store.pairs >= min_training_pairs():
+            ml_engine.train_models_from_store(store.path)
+            samples = store.pairs
+        else:
+            # Yeterli gerçek veri yok: simüle edilmiş eğitim verisi
+            print(f"ℹ️  Özellik deposunda {store.pairs} çift var, simüle edilmiş veri kullanılıyor")
+            training_data = generate_training_data()
+            ml_engine.train_models(training_data)
+            samples = len(training_data)
         
         print("✅ ML modelleri başarıyla eğitildi!")
-        print(f"📊 Eğitim verisi: {len(training_data)} örnek")
+        print(f"📊 Eğitim verisi: {samples} örnek")
         print("🎯 Modeller kaydedildi: models/ klasörü")
         
         # Test önerisi oluştur (veritabanından ilk öğrenciyi bul)
@@ -0,0 +1,256 @@
+"""
+Sıralama tabanlı yerleşme olasılığı
+
+Puan farkı kovaları (95/85/70/...) 250 ile 500 civarındaki 10 puanı aynı
+sayar; oysa yüksek puanlarda 10 puan binlerce sıralamaya karşılık gelir.
+Bu modül:
+
+1. Yıllık istatistiklerden (en güncel yıl) alan türü başına puan→sıralama
+   interpolasyon tablosu kurar (log-sıralama uzayında, monoton),
+2. Öğrencinin sıralamasını (girilmişse kendisi, yoksa puanından tahmin)
+   her bölümün tarihsel taban sıralama dağılımına (log-normal: merkez = son
+   yıl / trend tahmini, yayılım = yıllar arası log-sıralama sapması) karşı
+   değerlendirir.
+
+Tüm hesaplar bölüm dizileri üzerinde vektöreldir; tablo ve bölüm aramaları
+`searchsorted` ile O(log n)'dir. Sıralama bilgisi olmayan bölümler için NaN
+döner ve çağıran taraf puan farkı kurallarına düşer.
+"""
+import hashlib
+import threading
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import Department, DepartmentYearlyStats
+from core.logging_config import api_logger
+
+# Bölüm taban sıralamasının log-uzayındaki yayılımı: tek yıllık veri için varsayılan ve alt sınır
+DEFAULT_RANK_SPREAD = 0.25
+MIN_RANK_SPREAD = 0.08
+# Trend tahmini bu kadar yıllık veriyle merkez olarak kullanılır (daha azı gürültülü)
+MIN_YEARS_FOR_PROJECTION = 3
+# Normal dağılım CDF'inin lojistik yaklaşımı: Φ(z) ≈ 1 / (1 + exp(-1.702 z))
+LOGISTIC_SCALE = 1.702
+# Mevcut kurallarla aynı aralık
+MIN_PROBABILITY = 5.0
+MAX_PROBABILITY = 95.0
+
+
+class ScoreRankTable:
+    """Bir alan türü için puan→sıralama tablosu (puan artan, sıralama azalan)"""
+
+    __slots__ = ("scores", "log_ranks", "slope")
+
+    def __init__(self, scores: np.ndarray, log_ranks: np.ndarray, slope: float):
+        self.scores = scores
+        self.log_ranks = log_ranks
+        self.slope = slope  # tablo dışı için log-sıralama / puan eğimi (negatif)
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    @classmethod
+    def build(cls, scores: Sequence[float], ranks: Sequence[float]) -> Optional["ScoreRankTable"]:
+        """(taban puan, taban sıralama) çiftlerinden monoton tablo; 2'den az farklı puan varsa None"""
+        scores = np.asarray(scores, dtype=np.float64)
+        log_ranks = np.log(np.asarray(ranks, dtype=np.float64))
+        unique_scores, inverse = np.unique(scores, return_inverse=True)
+        if len(unique_scores) < 2:
+            return None
+        # Aynı puanlı bölümlerin log-sıralama ortalaması
+        mean_log_ranks = np.bincount(inverse, weights=log_ranks) / np.bincount(inverse)
+        # ✅ Monotonluk: üst zarf (sonek max) ve alt zarfın (önek min) ortalaması - ikisi de azalan
+        upper = np.maximum.accumulate(mean_log_ranks[::-1])[::-1]
+        lower = np.minimum.accumulate(mean_log_ranks)
+        slope = np.polyfit(scores, log_ranks, 1)[0]
+        return cls(unique_scores, (upper + lower) / 2.0, min(float(slope), 0.0))
+
+    def estimate_ranks(self, scores: np.ndarray) -> np.ndarray:
+        """Puanlar için tahmini sıralama (searchsorted + doğrusal interpolasyon, uçlarda eğimle uzatma)"""
+        scores = np.asarray(scores, dtype=np.float64)
+        table_scores, log_ranks = self.scores, self.log_ranks
+        index = np.clip(np.searchsorted(table_scores, scores, side="right") - 1, 0, len(table_scores) - 2)
+        left, right = table_scores[index], table_scores[index + 1]
+        with np.errstate(invalid="ignore"):
+            t = np.clip((scores - left) / (right - left), 0.0, 1.0)
+        log_rank = log_ranks[index] + t * (log_ranks[index + 1] - log_ranks[index])
+        log_rank = np.where(scores < table_scores[0], log_ranks[0] + self.slope * (scores - table_scores[0]), log_rank)
+        log_rank = np.where(scores > table_scores[-1], log_ranks[-1] + self.slope * (scores - table_scores[-1]), log_rank)
+        return np.maximum(np.exp(log_rank), 1.0)
+
+
+def build_rank_tables(rows: Iterable[Tuple[str, int, float, int]]) -> Dict[str, ScoreRankTable]:
+    """(alan türü, yıl, taban puan, taban sıralama) satırlarından alan türü başına tablo (en güncel yıl)"""
+    by_field: Dict[str, Dict[int, list]] = {}
+    for field_type, year, score, rank in rows:
+        if not field_type or not score or not rank or score <= 0 or rank <= 0:
+            continue
+        by_field.setdefault(field_type, {}).setdefault(year or 0, []).append((score, rank))
+
+    tables = {}
+    for field_type, years in by_field.items():
+        # En güncel ve en az 2 farklı puanı olan yıl
+        for year in sorted(years, reverse=True):
+            scores, ranks = zip(*years[year])
+            table = ScoreRankTable.build(scores, ranks)
+            if table is not None:
+                tables[field_type] = table
+                break
+    return tables
+
+
+class AdmissionModel:
+    """Puan→sıralama tabloları + bölüm başına taban sıralama dağılımı (id sıralı diziler)"""
+
+    __slots__ = ("tables", "ids", "centers", "spreads", "version")
+
+    def __init__(self, tables: Dict[str, ScoreRankTable], ids: np.ndarray, centers: np.ndarray, spreads: np.ndarray):
+        self.tables = tables
+        self.ids = ids
+        self.centers = centers  # log(beklenen taban sıralama)
+        self.spreads = spreads  # log-sıralama standart sapması
+        self.version = self._fingerprint()
+
+    def _fingerprint(self) -> str:
+        """Model parametrelerinin özeti: aynı veriden kurulan modeller her süreçte aynı sürümü verir
+
+        Saklı öneriler bu sürümle yazılır; sürüm değişince başarı olasılıkları yeniden hesaplanır.
+        """
+        digest = hashlib.sha1()
+        for field_type in sorted(self.tables):
+            table = self.tables[field_type]
+            digest.update(field_type.encode("utf-8"))
+            digest.update(table.scores.tobytes())
+            digest.update(table.log_ranks.tobytes())
+            digest.update(np.float64(table.slope).tobytes())
+        for array in (self.ids, self.centers, self.spreads):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return "a" + digest.hexdigest()[:16]
+
+    @classmethod
+    def from_trends(cls, tables: Dict[str, ScoreRankTable], trends) -> "AdmissionModel":
+        """`services.trends.TrendSnapshot` kayıtlarından bölüm dağılımlarını kur"""
+        records = trends.records if trends is not None else {}
+        ids, centers, spreads = [], [], []
+        for dept_id in sorted(records):
+            trend = records[dept_id]
+            ranks = [rank for rank in trend.series.get("min_rank", ()) if rank and rank > 0]
+            if not ranks:
+                continue
+            log_ranks = np.log(np.asarray(ranks, dtype=np.float64))
+            if len(ranks) >= MIN_YEARS_FOR_PROJECTION and trend.projected_min_rank:
+                center = np.log(trend.projected_min_rank)
+            else:
+                center = log_ranks[-1]
+            spread = max(MIN_RANK_SPREAD, float(log_ranks.std())) if len(ranks) >= 2 else DEFAULT_RANK_SPREAD
+            ids.append(dept_id)
+            centers.append(center)
+            spreads.append(spread)
+        return cls(
+            tables,
+            np.array(ids, dtype=np.int64),
+            np.array(centers, dtype=np.float64),
+            np.array(spreads, dtype=np.float64),
+        )
+
+    def student_ranks(self, student, arrays, positions: np.ndarray) -> np.ndarray:
+        """Bölüm başına öğrenci sıralaması
+
+        Girilen sıralama yalnızca öğrencinin kendi alan türündeki bölümlerde
+        geçerlidir; diğer alan türleri (TYT dahil) o türün puan-sıralama
+        tablosundan, puana göre tahmin edilir.
+        """
+        field_types = arrays.field_types[positions]
+        ranks = np.full(len(positions), np.nan)
+
+        rank = getattr(student, "rank", None)
+        student_field_type = getattr(student, "field_type", None)
+        if rank and rank > 0 and student_field_type:
+            ranks[field_types == student_field_type] = float(rank)
+
+        tyt = getattr(student, "tyt_total_score", None)
+        total = getattr(student, "total_score", None)
+        for field_type in set(field_types[np.isnan(ranks)].tolist()):
+            table = self.tables.get(field_type)
+            score = tyt if field_type.upper() == "TYT" else total
+            if table is None or not score:
+                continue
+            mask = np.isnan(ranks) & (field_types == field_type)
+            ranks[mask] = table.estimate_ranks(np.array([float(score)]))[0]
+        return ranks
+
+    def probabilities(self, student, arrays, positions: np.ndarray) -> np.ndarray:
+        """Yerleşme olasılığı (5-95); öğrenci veya bölüm sıralaması bilinmiyorsa NaN"""
+        positions = np.asarray(positions, dtype=np.int64)
+        department_ids = arrays.ids[positions]
+
+        centers = np.full(len(positions), np.nan)
+        spreads = np.full(len(positions), DEFAULT_RANK_SPREAD)
+        if len(self.ids):
+            index = np.minimum(np.searchsorted(self.ids, department_ids), len(self.ids) - 1)
+            found = self.ids[index] == department_ids
+            centers[found] = self.centers[index[found]]
+            spreads[found] = self.spreads[index[found]]
+        # Yıllık verisi olmayan bölümler: güncel taban sıralama, varsayılan yayılım
+        min_rank = arrays.min_rank[positions]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fallback = np.isnan(centers) & (min_rank > 0)
+            centers[fallback] = np.log(min_rank[fallback])
+
+            student_log_ranks = np.log(self.student_ranks(student, arrays, positions))
+            z = (centers - student_log_ranks) / spreads
+            probability = 100.0 / (1.0 + np.exp(-LOGISTIC_SCALE * z))
+        return np.round(np.clip(probability, MIN_PROBABILITY, MAX_PROBABILITY), 1)
+
+
+def _rank_table_rows(db: Session):
+    """Tablo satırları: yıllık istatistikler, yıllık verisi olmayan alan türleri için güncel katalog"""
+    rows = db.query(
+        Department.field_type,
+        DepartmentYearlyStats.year,
+        DepartmentYearlyStats.min_score,
+        DepartmentYearlyStats.min_rank,
+    ).join(Department, Department.id == DepartmentYearlyStats.department_id).filter(
+        DepartmentYearlyStats.min_score > 0,
+        DepartmentYearlyStats.min_rank > 0,
+    ).all()
+    covered = {row[0] for row in rows}
+    current = db.query(
+        Department.field_type, Department.min_score, Department.min_rank
+    ).filter(Department.min_score > 0, Department.min_rank > 0)
+    rows += [(field_type, 0, score, rank) for field_type, score, rank in current if field_type not in covered]
+    return rows
+
+
+class AdmissionStore:
+    """Süreç geneli olasılık modeli (trendlerle birlikte yüklenir/yenilenir)"""
+
+    def __init__(self):
+        self._model: Optional[AdmissionModel] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[AdmissionModel]:
+        return self._model
+
+    def load(self, db: Session) -> AdmissionModel:
+        from services.trends import trend_store
+
+        trends = trend_store.get() or trend_store.load(db)
+        with self._lock:
+            model = AdmissionModel.from_trends(build_rank_tables(_rank_table_rows(db)), trends)
+            self._model = model
+        api_logger.info(
+            "Admission model loaded",
+            field_types=sorted(model.tables),
+            departments=len(model.ids),
+        )
+        return model
+
+    def invalidate(self) -> None:
+        self._model = None
+
+
+# Süreç geneli olasılık modeli
+admission_store = AdmissionStore()
@@ -0,0 +1,443 @@
+"""
+Süreç genelinde salt-okunur bölüm/üniversite kataloğu
+
+Katalog yalnızca import script'leri çalıştığında değişir; bu yüzden tüm bölüm
+ve üniversiteler startup'ta bir kez belleğe yüklenir ve id, alan türü,
+normalize isim, şehir ve üniversite türüne göre indekslenir. Okuma endpoint'leri
+PostgreSQL'e gitmeden bu görüntüden (snapshot) beslenir.
+
+Veritabanındaki katalog sürümü (satır sayısı, en büyük id ve en son
+created_at/updated_at) periyodik olarak kontrol edilir; değişmişse yeni
+snapshot arka planda oluşturulup tek atama ile değiştirilir.
+"""
+import json
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from models import Department, University
+from schemas.dto import DepartmentDTO, UniversityDTO, department_dto, university_dto
+from core.cache import get_default_cache
+from core.logging_config import api_logger
+from services.facets import refresh_facets
+from services.trends import refresh_trends
+
+# ✅ Katalogdan türetilen cache'lenmiş sonuçların anahtar öneki (@cached(key=...) ile kullanılır);
+# katalog değişince bu önekteki tüm anahtarlar silinir
+CATALOGUE_CACHE_PREFIX = "catalogue."
+
+
+def invalidate_catalogue_caches() -> int:
+    """Katalogdan türetilen cache'lenmiş sonuçları (ör. unique bölüm listesi) iki katmandan da sil"""
+    return get_default_cache().delete_prefix(CATALOGUE_CACHE_PREFIX)
+
+
+def refresh_derived_data(db: Session) -> None:
+    """Katalogdan türetilen verileri yenile - katalog yazan her script'in sonunda bir kez çağrılır"""
+    # ✅ Katalogdan türetilen cache'ler (unique bölüm listesi vb.) paylaşılan katmandan da silinir
+    invalidate_catalogue_caches()
+    # ✅ Filtre boyutları (şehir/alan/derece türü sayıları) yeni katalogdan yeniden materyalize edilir
+    refresh_facets(db)
+    # ✅ Bölüm trendleri (yıllık seri, eğim, tahmin) yeni yıllık istatistiklerden yeniden hesaplanır
+    refresh_trends(db)
+
+
+class UniversityRecord(NamedTuple):
+    """Bellekteki üniversite kaydı (UniversityResponse alanları + logo_url)"""
+    id: int
+    name: str
+    city: str
+    university_type: str
+    website: Optional[str]
+    established_year: Optional[int]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    logo_url: Optional[str]
+
+
+class DepartmentRecord(NamedTuple):
+    """Bellekteki bölüm kaydı (attributes JSON'u önceden çözümlenmiş)"""
+    id: int
+    university_id: int
+    name: str
+    normalized_name: Optional[str]
+    attributes: Optional[List[str]]
+    field_type: str
+    language: Optional[str]
+    faculty: Optional[str]
+    duration: Optional[int]
+    degree_type: Optional[str]
+    min_score: Optional[float]
+    min_rank: Optional[int]
+    quota: Optional[int]
+    scholarship_quota: Optional[int]
+    tuition_fee: Optional[float]
+    has_scholarship: Optional[bool]
+    last_year_min_score: Optional[float]
+    last_year_min_rank: Optional[int]
+    last_year_quota: Optional[int]
+    description: Optional[str]
+    requirements: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+
+def _logo_url(website: Optional[str]) -> Optional[str]:
+    """Üniversite logosu URL'i (routers.universities.get_university_logo_url ile aynı)"""
+    if website:
+        domain = website.replace('http://', '').replace('https://', '').replace('www.', '').split('/')[0]
+        return f"https://www.google.com/s2/favicons?domain={domain}&sz=256"
+    return None
+
+
+def _parse_attributes(raw: Optional[str]) -> Optional[List[str]]:
+    # DepartmentResponse.parse_attributes ile aynı: NULL/geçersiz JSON -> None
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except (json.JSONDecodeError, TypeError):
+        return None
+
+
+def _index(records: Iterable[DepartmentRecord], key: Callable[[DepartmentRecord], Any]) -> Dict[Any, Tuple[int, ...]]:
+    """Anahtar → bölüm id'leri (görüntüleme sırasında) indeksi oluştur"""
+    index: Dict[Any, List[int]] = {}
+    for record in records:
+        value = key(record)
+        if value is None:
+            continue
+        index.setdefault(value, []).append(record.id)
+    return {k: tuple(v) for k, v in index.items()}
+
+
+def catalogue_version(db: Session) -> str:
+    """Katalog sürüm parmak izi: import sonrası (ekleme/silme/güncelleme) değişir"""
+    parts = []
+    for model in (Department, University):
+        row = db.query(
+            func.count(model.id),
+            func.max(model.id),
+            func.max(model.created_at),
+            func.max(model.updated_at),
+        ).one()
+        parts.append(":".join("" if value is None else str(value) for value in row))
+    return "|".join(parts)
+
+
+class CatalogueSnapshot:
+    """Değişmez katalog görüntüsü. Tüm indeksler bölüm id'lerini görüntüleme
+    sırasında, yani `(min_score IS NULL, name, id)` sırasında tutar."""
+
+    __slots__ = (
+        "version", "loaded_at", "universities", "departments", "ordered_ids",
+        "university_order", "positions", "by_field_type", "by_normalized_name",
+        "by_name", "by_university_id", "by_city", "by_university_type",
+        "_arrays", "_arrays_lock", "_dtos", "_university_dtos",
+    )
+
+    def __init__(self, version: str, universities: Sequence[UniversityRecord], departments: Sequence[DepartmentRecord]):
+        self.version = version
+        self.loaded_at = datetime.now()
+        self.universities: Dict[int, UniversityRecord] = {u.id: u for u in universities}
+        self.university_order: Tuple[int, ...] = tuple(u.id for u in universities)
+        self.departments: Dict[int, DepartmentRecord] = {d.id: d for d in departments}
+        self.ordered_ids: Tuple[int, ...] = tuple(d.id for d in departments)
+        self.positions: Dict[int, int] = {dept_id: i for i, dept_id in enumerate(self.ordered_ids)}
+
+        self.by_field_type = _index(departments, lambda d: d.field_type)
+        self.by_normalized_name = _index(departments, lambda d: d.normalized_name)
+        self.by_name = _index(departments, lambda d: d.name)
+        self.by_university_id = _index(departments, lambda d: d.university_id)
+
+        def university_attr(attr):
+            def key(d):
+                university = self.universities.get(d.university_id)
+                return getattr(university, attr) if university else None
+            return key
+
+        self.by_city = _index(departments, university_attr("city"))
+        self.by_university_type = _index(departments, university_attr("university_type"))
+
+        self._arrays: Dict[str, Any] = {}
+        self._arrays_lock = threading.Lock()
+        # Yanıt DTO'ları ilk kullanımda oluşturulur ve snapshot ömrü boyunca paylaşılır
+        self._dtos: Dict[int, DepartmentDTO] = {}
+        self._university_dtos: Dict[int, UniversityDTO] = {}
+
+    def __len__(self) -> int:
+        return len(self.ordered_ids)
+
+    @classmethod
+    def load(cls, db: Session, version: Optional[str] = None) -> "CatalogueSnapshot":
+        """Tüm bölüm ve üniversiteleri iki sorguda yükle"""
+        if version is None:
+            version = catalogue_version(db)
+
+        universities = [
+            UniversityRecord(
+                id=u.id, name=u.name, city=u.city, university_type=u.university_type,
+                website=u.website, established_year=u.established_year,
+                latitude=u.latitude, longitude=u.longitude,
+                created_at=u.created_at, updated_at=u.updated_at,
+                logo_url=_logo_url(u.website),
+            )
+            for u in db.query(
+                University.id, University.name, University.city, University.university_type,
+                University.website, University.established_year, University.latitude,
+                University.longitude, University.created_at, University.updated_at,
+            ).order_by(University.name, University.id)
+        ]
+
+        departments = [
+            DepartmentRecord(
+                id=d.id, university_id=d.university_id, name=d.name,
+                normalized_name=d.normalized_name, attributes=_parse_attributes(d.attributes),
+                field_type=d.field_type, language=d.language, faculty=d.faculty,
+                duration=d.duration, degree_type=d.degree_type, min_score=d.min_score,
+                min_rank=d.min_rank, quota=d.quota, scholarship_quota=d.scholarship_quota,
+                tuition_fee=d.tuition_fee, has_scholarship=d.has_scholarship,
+                last_year_min_score=d.last_year_min_score, last_year_min_rank=d.last_year_min_rank,
+                last_year_quota=d.last_year_quota, description=d.description,
+                requirements=d.requirements, created_at=d.created_at, updated_at=d.updated_at,
+            )
+            for d in db.query(*[getattr(Department, field) for field in DepartmentRecord._fields]).order_by(
+                case((Department.min_score.is_(None), 1), else_=0),
+                Department.name,
+                Department.id,
+            )
+        ]
+
+        return cls(version, universities, departments)
+
+    # --- Sorgular -----------------------------------------------------------
+
+    def get_department(self, department_id: int) -> Optional[DepartmentRecord]:
+        return self.departments.get(department_id)
+
+    def get_university(self, university_id: int) -> Optional[UniversityRecord]:
+        return self.universities.get(university_id)
+
+    def department_with_university(self, department_id: int) -> Tuple[Optional[DepartmentRecord], Optional[UniversityRecord]]:
+        department = self.departments.get(department_id)
+        if department is None:
+            return None, None
+        return department, self.universities.get(department.university_id)
+
+    def university_dto(self, university: UniversityRecord) -> UniversityDTO:
+        dto = self._university_dtos.get(university.id)
+        if dto is None:
+            dto = self._university_dtos.setdefault(university.id, university_dto(university))
+        return dto
+
+    def department_dto(self, department: DepartmentRecord, university: UniversityRecord) -> DepartmentDTO:
+        """Bölümün yanıt DTO'su (snapshot başına bir kez oluşturulur)"""
+        dto = self._dtos.get(department.id)
+        if dto is None:
+            dto = self._dtos.setdefault(
+                department.id, department_dto(department, self.university_dto(university))
+            )
+        return dto
+
+    def department_dtos(self, rows: Iterable[Tuple[DepartmentRecord, UniversityRecord]]) -> List[DepartmentDTO]:
+        """`filter_departments` satırlarının yanıt DTO'ları (tekrar eden isteklerde satır başına nesne oluşturulmaz)"""
+        dtos = self._dtos
+        result = []
+        for department, university in rows:
+            dto = dtos.get(department.id)
+            if dto is None:
+                dto = self.department_dto(department, university)
+            result.append(dto)
+        return result
+
+    def find_by_name(self, name: str) -> Optional[DepartmentRecord]:
+        """normalized_name veya name ile eşleşen ilk (en küçük id) bölüm"""
+        ids = self.by_normalized_name.get(name, ()) + self.by_name.get(name, ())
+        if not ids:
+            return None
+        return self.departments[min(ids)]
+
+    def field_types(self) -> List[str]:
+        return [field_type for field_type in self.by_field_type if field_type]
+
+    def _match_keys(self, index: Dict[str, Tuple[int, ...]], terms: Sequence[str]) -> List[int]:
+        """ILIKE '%term%' karşılığı: terimlerden birini içeren anahtarların id'leri"""
+        lowered = [term.lower() for term in terms]
+        ids: List[int] = []
+        for key, key_ids in index.items():
+            key_lower = key.lower()
+            if any(term in key_lower for term in lowered):
+                ids.extend(key_ids)
+        return ids
+
+    def filter_departments(
+        self,
+        field_type: Optional[str] = None,
+        degree_types: Optional[Sequence[str]] = None,
+        university_id: Optional[int] = None,
+        cities: Optional[Sequence[str]] = None,
+        university_type: Optional[str] = None,
+        normalized_name: Optional[str] = None,
+        min_score: Optional[float] = None,
+        max_score: Optional[float] = None,
+        has_scholarship: Optional[bool] = None,
+    ) -> List[Tuple[DepartmentRecord, UniversityRecord]]:
+        """Filtreleri uygula; sonuç görüntüleme sırasında, üniversitesi olmayanlar hariç.
+
+        Filtre anlamları routers.universities.get_departments ile aynıdır
+        (min_score/max_score yalnızca truthy ise uygulanır).
+        """
+        # En seçici indeksten başla
+        candidates: Optional[Sequence[int]] = None
+        narrowing = False
+        for index, key in (
+            (self.by_normalized_name, normalized_name),
+            (self.by_university_id, university_id),
+            (self.by_field_type, field_type),
+            (self.by_university_type, university_type),
+        ):
+            if key:
+                ids = index.get(key, ())
+                if candidates is None or len(ids) < len(candidates):
+                    candidates = ids
+        if cities:
+            city_ids = self._match_keys(self.by_city, cities)
+            if candidates is None or len(city_ids) < len(candidates):
+                candidates = city_ids
+                narrowing = True
+        if candidates is None:
+            candidates = self.ordered_ids
+        elif narrowing:
+            candidates = sorted(candidates, key=self.positions.__getitem__)
+
+        lowered_cities = [c.lower() for c in cities] if cities else None
+        degree_types = set(degree_types) if degree_types else None
+
+        result = []
+        for dept_id in candidates:
+            d = self.departments[dept_id]
+            if field_type and d.field_type != field_type:
+                continue
+            if degree_types is not None and d.degree_type not in degree_types:
+                continue
+            if university_id and d.university_id != university_id:
+                continue
+            if normalized_name and d.normalized_name != normalized_name:
+                continue
+            if min_score and (d.min_score is None or d.min_score < min_score):
+                continue
+            if max_score and (d.min_score is None or d.min_score > max_score):
+                continue
+            if has_scholarship is not None and d.has_scholarship != has_scholarship:
+                continue
+            university = self.universities.get(d.university_id)
+            if university is None:
+                continue
+            if university_type and university.university_type != university_type:
+                continue
+            if lowered_cities is not None:
+                city = (university.city or "").lower()
+                if not any(term in city for term in lowered_cities):
+                    continue
+            result.append((d, university))
+        return result
+
+    def filter_universities(
+        self, city: Optional[str] = None, university_type: Optional[str] = None
+    ) -> List[UniversityRecord]:
+        """Üniversiteleri isim sırasında filtrele (get_universities ile aynı)"""
+        city_lower = city.lower() if city else None
+        result = []
+        for university_id in self.university_order:
+            university = self.universities[university_id]
+            if city_lower and city_lower not in (university.city or "").lower():
+                continue
+            if university_type and university.university_type != university_type:
+                continue
+            result.append(university)
+        return result
+
+    def field_type_arrays(self, field_type: str):
+        """RecommendationEngine için alan türü dizileri (id sırasında, lazy cache)"""
+        arrays = self._arrays.get(field_type)
+        if arrays is not None:
+            return arrays
+        from services.vectorized_scoring import DepartmentArrays
+
+        with self._arrays_lock:
+            arrays = self._arrays.get(field_type)
+            if arrays is None:
+                rows = []
+                for dept_id in sorted(self.by_field_type.get(field_type, ())):
+                    d = self.departments[dept_id]
+                    university = self.universities.get(d.university_id)
+                    rows.append((
+                        d.id, d.university_id, d.name, d.field_type, d.min_score, d.min_rank,
+                        d.tuition_fee, d.has_scholarship,
+                        university.city if university else None,
+                        university.university_type if university else None,
+                    ))
+                arrays = DepartmentArrays.from_rows(rows)
+                self._arrays[field_type] = arrays
+        return arrays
+
+
+class DepartmentCatalogue:
+    """Katalog snapshot'ını tutan ve sürüm değişince yenileyen süreç geneli servis"""
+
+    def __init__(self):
+        self._snapshot: Optional[CatalogueSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[CatalogueSnapshot]:
+        """Güncel snapshot; henüz yüklenmemişse None (çağıran DB'ye düşer)"""
+        return self._snapshot
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._snapshot is not None
+
+    def load(self, db: Session) -> CatalogueSnapshot:
+        """Kataloğu yükle ve atomik olarak değiştir"""
+        with self._lock:
+            snapshot = CatalogueSnapshot.load(db)
+            self._snapshot = snapshot
+        api_logger.info(
+            "Department catalogue loaded",
+            departments=len(snapshot),
+            universities=len(snapshot.universities),
+            version=snapshot.version,
+        )
+        return snapshot
+
+    def refresh(self, db: Session) -> bool:
+        """Sürüm değiştiyse yeniden yükle. Yeniden yüklendiyse True döner."""
+        current = self._snapshot
+        version = catalogue_version(db)
+        if current is not None and current.version == version:
+            return False
+        with self._lock:
+            # Başka bir thread aynı sürümü yüklemiş olabilir
+            if self._snapshot is not None and self._snapshot is not current and self._snapshot.version == version:
+                return False
+            snapshot = CatalogueSnapshot.load(db, version=version)
+            self._snapshot = snapshot
+        # Başka bir süreç (import script'i) kataloğu değiştirdi: bu süreçteki türetilmiş sonuçlar da eskidi
+        invalidate_catalogue_caches()
+        api_logger.info("Department catalogue refreshed", departments=len(snapshot), version=version)
+        return True
+
+    def invalidate(self) -> None:
+        """Snapshot'ı düşür (bu süreçteki yazma işlemleri sonrası). Bir sonraki
+        yenilemeye kadar okuma endpoint'leri veritabanına düşer."""
+        self._snapshot = None
+        invalidate_catalogue_caches()
+
+
+# Süreç geneli katalog
+department_catalogue = DepartmentCatalogue()
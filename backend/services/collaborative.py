@@ -0,0 +1,403 @@
+"""
+Bölüm-bölüm işbirlikçi filtreleme ("senin gibi öğrenciler şunları da beğendi")
+
+Keşfet ekranındaki beğeniler (`swipes`, action='like') ve tercih listeleri
+(`preferences`) ikili öğrenci × bölüm etkileşim matrisi olarak okunur:
+
+1. Matris öğrenci id aralıkları halinde (`STUDENT_BLOCK`) sorgulanıp doğrudan
+   CSR satırlarına yazılır; bellekte yalnızca sıkıştırılmış matris ve tek bir
+   blok bulunur (milyonlarca swipe için de sınırlı bellek).
+2. Bölüm benzerliği küçültülmüş kosinüstür: ortak beğeni / √(n_i · n_j),
+   az ortak beğenili çiftler co / (co + `SHRINKAGE`) ile bastırılır.
+   Ortak beğeni sayıları sütun blokları halinde seyrek çarpımla hesaplanır;
+   yoğun ara dizi `MAX_BLOCK_CELLS` hücreyi aşmaz. Her bölüm için yalnızca en
+   benzer `top_n` bölüm (argpartition) `department_similarities` tablosuna yazılır.
+
+Tablo arka plan görevinde (main._periodic_collaborative_refresh_task)
+etkileşim verisi değiştiğinde yeniden hesaplanır; API süreçleri tabloyu
+`collaborative_store` ile belleğe alır. Bir bölümün komşuları ve öğrencinin
+beğenilerinden türetilen bölüm skorları sözlük aramasıyla O(1) okunur.
+"""
+import hashlib
+import os
+import threading
+import time
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func, select, union, union_all
+from sqlalchemy.orm import Session
+
+from models import DepartmentSimilarity, Preference, Swipe
+from core.logging_config import api_logger
+from services.refresh_lock import refresh_lock
+
+# Bölüm başına saklanan en benzer bölüm sayısı (COLLABORATIVE_TOP_N ile değiştirilebilir)
+DEFAULT_TOP_N = 50
+# Az ortak beğenili çiftlerin benzerliğini bastıran küçültme sabiti
+SHRINKAGE = 10.0
+# Matris kurulurken tek sorguda okunan öğrenci id aralığı
+STUDENT_BLOCK = 5000
+# Benzerlik adımındaki yoğun blok sınırı (float32: 16 MB)
+MAX_BLOCK_CELLS = 4_000_000
+BATCH_SIZE = 5000
+# Öğrenci + bölüm id'lerini tek int64 anahtarda birleştirmek için çarpan
+_KEY_BASE = 1 << 32
+# Parmak izindeki çift karması (Mersenne asal modül, çarpımlar bigint'e sığar)
+_HASH_MODULUS = 2147483647
+_HASH_STUDENT = 2654435761
+_HASH_DEPARTMENT = 40503
+# Benzerlikleri yeniden hesaplayan sürecin kilidi (çöken süreçten bu süre sonra devralınır)
+LOCK_NAME = "department_similarities"
+LOCK_TTL_SECONDS = 900
+
+
+def top_n() -> int:
+    """COLLABORATIVE_TOP_N (en az 1)"""
+    try:
+        return max(1, int(os.getenv("COLLABORATIVE_TOP_N", str(DEFAULT_TOP_N))))
+    except ValueError:
+        return DEFAULT_TOP_N
+
+
+class InteractionSummary(NamedTuple):
+    """Etkileşim verisinin parmak izi ve öğrenci id aralığı (tek toplama sorgusu/tablo)"""
+    version: str
+    min_student_id: Optional[int]
+    max_student_id: Optional[int]
+
+
+class InteractionMatrix(NamedTuple):
+    matrix: sparse.csr_matrix  # Etkileşimi olan öğrenciler × bölümler (ikili, float32)
+    department_ids: np.ndarray  # Sütun → bölüm id (artan)
+
+
+def _pair_hash(model):
+    """(öğrenci, bölüm) çiftinin tamsayı karması: toplamları çiftlerin kümesine bağlı parmak izi verir
+
+    Sayı + en büyük id, silinip yeniden eklenen ya da güncellenen (ör. beğeni ->
+    beğenmeme -> beğeni) satırları kaçırır; karmaların toplamı ve kareleri
+    toplamı çift kümesi değiştiğinde değişir. Değerler 2^31 altında kalır,
+    PostgreSQL bigint ve SQLite'ta taşmadan toplanır.
+    """
+    mixed = (model.student_id * _HASH_STUDENT + model.department_id * _HASH_DEPARTMENT) % _HASH_MODULUS
+    return mixed, (mixed * mixed) % _HASH_MODULUS
+
+
+def interaction_summary(db: Session) -> InteractionSummary:
+    """Beğeni ve tercih çiftlerinin sayısı + karma toplamlarından parmak izi (değişmediyse yeniden hesaplama yok)"""
+    like_hash, like_square = _pair_hash(Swipe)
+    likes = db.query(
+        func.count(Swipe.id), func.sum(like_hash), func.sum(like_square),
+        func.min(Swipe.student_id), func.max(Swipe.student_id),
+    ).filter(Swipe.action == "like").one()
+    preference_hash, preference_square = _pair_hash(Preference)
+    preferences = db.query(
+        func.count(Preference.id), func.sum(preference_hash), func.sum(preference_square),
+        func.min(Preference.student_id), func.max(Preference.student_id),
+    ).one()
+    student_ids = [value for value in (likes[3], likes[4], preferences[3], preferences[4]) if value is not None]
+    digest = hashlib.sha1(
+        f"{likes[1] or 0}.{likes[2] or 0}-{preferences[1] or 0}.{preferences[2] or 0}".encode("utf-8")
+    ).hexdigest()[:16]
+    return InteractionSummary(
+        version=f"s{likes[0]}-p{preferences[0]}-{digest}",
+        min_student_id=min(student_ids) if student_ids else None,
+        max_student_id=max(student_ids) if student_ids else None,
+    )
+
+
+def _interactions_query(first_student_id: int, last_student_id: int):
+    """Öğrenci id aralığındaki (öğrenci, bölüm) beğeni ve tercih çiftleri (tekrarlar olabilir)"""
+    likes = select(Swipe.student_id, Swipe.department_id).where(
+        Swipe.action == "like",
+        Swipe.student_id >= first_student_id,
+        Swipe.student_id <= last_student_id,
+    )
+    preferences = select(Preference.student_id, Preference.department_id).where(
+        Preference.student_id >= first_student_id,
+        Preference.student_id <= last_student_id,
+    )
+    return union_all(likes, preferences)
+
+
+def liked_department_ids_query(student_id: int):
+    """Öğrencinin beğendiği veya tercih listesine eklediği bölüm id'leri (sync ve async session'larla)"""
+    return union(
+        select(Swipe.department_id).where(Swipe.student_id == student_id, Swipe.action == "like"),
+        select(Preference.department_id).where(Preference.student_id == student_id),
+    )
+
+
+def build_interaction_matrix(
+    db: Session,
+    summary: Optional[InteractionSummary] = None,
+    student_block: int = STUDENT_BLOCK,
+) -> InteractionMatrix:
+    """Öğrenci × bölüm ikili matrisini öğrenci blokları halinde kur
+
+    Her blokta çiftler tekilleştirilip (öğrenci, bölüm) sırasına dizilir ve
+    CSR satırları olarak eklenir; etkileşimi olmayan öğrenciler satır almaz.
+    """
+    if summary is None:
+        summary = interaction_summary(db)
+    indices_blocks, count_blocks = [], []
+    if summary.max_student_id is not None:
+        for first in range(summary.min_student_id, summary.max_student_id + 1, student_block):
+            pairs = np.array(
+                db.execute(_interactions_query(first, first + student_block - 1)).all(), dtype=np.int64
+            ).reshape(-1, 2)
+            if not len(pairs):
+                continue
+            keys = np.unique((pairs[:, 0] - first) * _KEY_BASE + pairs[:, 1])
+            local_rows, department_ids = np.divmod(keys, _KEY_BASE)
+            counts = np.bincount(local_rows)
+            indices_blocks.append(department_ids)
+            count_blocks.append(counts[counts > 0])
+
+    if not indices_blocks:
+        return InteractionMatrix(sparse.csr_matrix((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64))
+    department_ids, columns = np.unique(np.concatenate(indices_blocks), return_inverse=True)
+    counts = np.concatenate(count_blocks)
+    indptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    matrix = sparse.csr_matrix(
+        (np.ones(len(columns), dtype=np.float32), columns.astype(np.int32), indptr),
+        shape=(len(counts), len(department_ids)),
+    )
+    return InteractionMatrix(matrix, department_ids)
+
+
+def item_similarities(
+    matrix: sparse.csr_matrix,
+    n_neighbors: int,
+    shrinkage: float = SHRINKAGE,
+    max_block_cells: int = MAX_BLOCK_CELLS,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Her sütun için en benzer `n_neighbors` sütun
+
+    Returns:
+        (komşu sütun indeksleri, benzerlikler, ortak beğeni sayıları) - her biri
+        (sütun sayısı, k) boyutunda, benzerliğe göre azalan; komşu yoksa -1 / 0
+    """
+    n_items = matrix.shape[1]
+    k = min(n_neighbors, max(n_items - 1, 0))
+    neighbors = np.full((n_items, k), -1, dtype=np.int64)
+    scores = np.zeros((n_items, k), dtype=np.float32)
+    co_likes = np.zeros((n_items, k), dtype=np.int32)
+    if k == 0:
+        return neighbors, scores, co_likes
+
+    by_column = matrix.tocsc()
+    norms = np.sqrt(np.diff(by_column.indptr).astype(np.float32))
+    block = max(1, min(n_items, max_block_cells // n_items))
+    for start in range(0, n_items, block):
+        stop = min(n_items, start + block)
+        rows = np.arange(stop - start)
+        # (blok × bölüm) ortak beğeni sayıları: seyrek çarpım, sonra sınırlı yoğun dizi
+        co = (by_column[:, start:stop].T @ matrix).toarray()
+        co[rows, rows + start] = 0.0
+        similarity = co / (norms[start:stop, None] * norms[None, :]) * (co / (co + shrinkage))
+
+        if k < n_items:
+            top = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n_items), (len(rows), n_items)).copy()
+        top_scores = np.take_along_axis(similarity, top, axis=1)
+        # Benzerliğe göre azalan, eşitlikte küçük bölüm sütunu önce
+        order = np.lexsort((top, -top_scores), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+        found = top_scores > 0
+        neighbors[start:stop] = np.where(found, top, -1)
+        scores[start:stop] = np.where(found, top_scores, 0.0)
+        co_likes[start:stop] = np.where(found, np.take_along_axis(co, top, axis=1), 0)
+    return neighbors, scores, co_likes
+
+
+def refresh_similarities(db: Session, summary: Optional[InteractionSummary] = None) -> str:
+    """department_similarities tablosunu yeniden hesapla ve yaz; hesaplanan veri sürümünü döndür"""
+    started = time.perf_counter()
+    if summary is None:
+        summary = interaction_summary(db)
+    interactions = build_interaction_matrix(db, summary)
+    neighbors, scores, co_likes = item_similarities(interactions.matrix, top_n())
+    department_ids = interactions.department_ids
+
+    db.query(DepartmentSimilarity).delete(synchronize_session=False)
+    items, ranks = np.nonzero(neighbors >= 0)
+    for begin in range(0, len(items), BATCH_SIZE):
+        batch_items, batch_ranks = items[begin:begin + BATCH_SIZE], ranks[begin:begin + BATCH_SIZE]
+        db.bulk_insert_mappings(DepartmentSimilarity, [
+            {
+                "department_id": int(department_ids[item]),
+                "rank": int(rank),
+                "similar_department_id": int(department_ids[neighbors[item, rank]]),
+                "score": float(scores[item, rank]),
+                "co_likes": int(co_likes[item, rank]),
+                "source_version": summary.version,
+            }
+            for item, rank in zip(batch_items.tolist(), batch_ranks.tolist())
+        ])
+    db.commit()
+    api_logger.info(
+        "Department similarities materialized",
+        students=interactions.matrix.shape[0],
+        departments=len(department_ids),
+        interactions=int(interactions.matrix.nnz),
+        rows=len(items),
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return summary.version
+
+
+def stored_version(db: Session) -> Optional[str]:
+    """Tablodaki benzerliklerin hesaplandığı veri sürümü (tablo boşsa None)"""
+    return db.query(DepartmentSimilarity.source_version).limit(1).scalar()
+
+
+def read_similarities(db: Session) -> Sequence[Tuple[int, int, float]]:
+    """(bölüm, benzer bölüm, skor) satırları; bölüm ve sıra düzeninde"""
+    return db.query(
+        DepartmentSimilarity.department_id,
+        DepartmentSimilarity.similar_department_id,
+        DepartmentSimilarity.score,
+    ).order_by(DepartmentSimilarity.department_id, DepartmentSimilarity.rank).all()
+
+
+class Affinity:
+    """Bir öğrencinin beğenilerinden türetilen bölüm skorları (0-1)
+
+    Skor, beğenilen bölümlere benzerliklerin "noisy-or" birleşimidir:
+    1 - Π(1 - benzerlik); tek güçlü benzerlik ya da çok sayıda zayıf benzerlik
+    skoru artırır ve skor 1'i aşmaz.
+    """
+
+    __slots__ = ("ids", "scores", "version", "_by_id")
+
+    def __init__(self, ids: np.ndarray, scores: np.ndarray, version: Optional[str] = None):
+        self.ids = ids  # Artan bölüm id'leri
+        self.scores = scores
+        self.version = version  # Benzerlik sürümü + beğeni kümesi; saklı önerilerde tutulur
+        self._by_id: Dict[int, float] = dict(zip(ids.tolist(), scores.tolist()))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get(self, department_id: int) -> float:
+        return self._by_id.get(department_id, 0.0)
+
+    def lookup(self, department_ids: np.ndarray) -> np.ndarray:
+        """Toplu okuma (searchsorted); skoru olmayan bölümler için 0"""
+        department_ids = np.asarray(department_ids, dtype=np.int64)
+        result = np.zeros(len(department_ids))
+        if len(self.ids):
+            index = np.minimum(np.searchsorted(self.ids, department_ids), len(self.ids) - 1)
+            found = self.ids[index] == department_ids
+            result[found] = self.scores[index[found]]
+        return result
+
+
+class SimilaritySnapshot:
+    """Bellekteki benzerlikler: bölüm id → komşu dilimi (düz diziler üzerinde)"""
+
+    __slots__ = ("version", "neighbors", "scores", "_slices")
+
+    def __init__(self, version: Optional[str], rows: Iterable[Tuple[int, int, float]]):
+        rows = list(rows)
+        self.version = version
+        department_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        self.neighbors = np.array([row[1] for row in rows], dtype=np.int64)
+        self.scores = np.array([row[2] for row in rows], dtype=np.float64)
+        ids, starts = np.unique(department_ids, return_index=True)
+        stops = np.append(starts[1:], len(department_ids))
+        self._slices: Dict[int, Tuple[int, int]] = {
+            dept_id: (start, stop) for dept_id, start, stop in zip(ids.tolist(), starts.tolist(), stops.tolist())
+        }
+
+    def __len__(self) -> int:
+        return len(self._slices)
+
+    def similar(self, department_id: int, limit: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """En benzer bölüm id'leri ve skorları (azalan)"""
+        start, stop = self._slices.get(department_id, (0, 0))
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self.neighbors[start:stop], self.scores[start:stop]
+
+    def affinity(self, liked_ids: Iterable[int]) -> Affinity:
+        """Beğenilen bölümlerin komşularından öğrenci skorları"""
+        liked = sorted(dept_id for dept_id in set(liked_ids) if dept_id in self._slices)
+        version = "c" + hashlib.sha1(f"{self.version}|{liked}".encode("utf-8")).hexdigest()[:16]
+        parts = [self._slices[dept_id] for dept_id in liked]
+        if not parts:
+            return Affinity(np.empty(0, dtype=np.int64), np.empty(0), version)
+        neighbors = np.concatenate([self.neighbors[start:stop] for start, stop in parts])
+        log_misses = np.log1p(-np.concatenate([self.scores[start:stop] for start, stop in parts]))
+        ids, inverse = np.unique(neighbors, return_inverse=True)
+        return Affinity(ids, 1.0 - np.exp(np.bincount(inverse, weights=log_misses)), version)
+
+
+class CollaborativeStore:
+    """Süreç geneli benzerlik snapshot'ı (arka plan görevi veri değişince yeniler)"""
+
+    def __init__(self):
+        self._snapshot: Optional[SimilaritySnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[SimilaritySnapshot]:
+        return self._snapshot
+
+    def load(self, db: Session) -> SimilaritySnapshot:
+        """Materyalize tabloyu belleğe al (hesaplama yapmaz; tablo boşsa boş snapshot)"""
+        with self._lock:
+            snapshot = SimilaritySnapshot(stored_version(db), read_similarities(db))
+            self._snapshot = snapshot
+        return snapshot
+
+    def refresh(self, db: Session, force: bool = False) -> bool:
+        """Etkileşim verisi değiştiyse benzerlikleri güncelle; snapshot yenilendiyse True
+
+        Başka bir süreç aynı veri için tabloyu zaten yazdıysa yeniden hesaplanmaz,
+        yalnızca okunur. Hesaplamayı `refresh_locks` kilidini alan tek süreç yapar;
+        kilit başkasındaysa tablo olduğu gibi okunur (yeni sürüm sonraki turda).
+        """
+        summary = interaction_summary(db)
+        with self._lock:
+            current = self._snapshot
+            if not force and current is not None and current.version == summary.version:
+                return False
+            version = summary.version
+            if force or stored_version(db) != summary.version:
+                with refresh_lock(db, LOCK_NAME, LOCK_TTL_SECONDS) as acquired:
+                    if acquired:
+                        # Kilidi beklerken başka bir süreç aynı veriyi yazmış olabilir
+                        if force or stored_version(db) != summary.version:
+                            refresh_similarities(db, summary)
+                    else:
+                        version = stored_version(db)
+                        api_logger.info("Similarity refresh running in another process, reusing stored table",
+                                        stored_version=version, data_version=summary.version)
+                        if current is not None and current.version == version:
+                            return False
+            snapshot = SimilaritySnapshot(version, read_similarities(db))
+            self._snapshot = snapshot
+        api_logger.info("Collaborative similarities loaded", departments=len(snapshot), version=snapshot.version)
+        return True
+
+    def affinity(self, db: Session, student_id: int) -> Optional[Affinity]:
+        """Öğrencinin "senin gibi öğrenciler şunları da beğendi" skorları (benzerlik/beğeni yoksa None)"""
+        snapshot = self._snapshot or self.load(db)
+        if not len(snapshot):
+            return None
+        liked = db.execute(liked_department_ids_query(student_id)).scalars().all()
+        affinity = snapshot.affinity(liked)
+        return affinity if len(affinity) else None
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+
+# Süreç geneli benzerlik deposu
+collaborative_store = CollaborativeStore()
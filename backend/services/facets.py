@@ -0,0 +1,231 @@
+"""
+Materyalize katalog filtre boyutları (facet'ler)
+
+Şehir, üniversite türü, alan türü, derece türü ve dil listeleri ile her değerin
+bölüm/üniversite sayıları `catalogue_facets` tablosunda tutulur. Tablo yalnızca
+katalog değiştiğinde (import script'leri) `refresh_facets` ile yeniden hesaplanır;
+API süreçleri tabloyu `facet_store` ile bir kez belleğe alır ve her facet'in
+JSON gövdesini ve ETag'ini önceden hazırlar. Filtre çubukları böylece her sayfa
+açılışında DISTINCT/GROUP BY sorgusu çalıştırmaz.
+"""
+import hashlib
+import json
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import CatalogueFacet, Department, University
+from core.logging_config import api_logger
+
+# 81 il listesi (seed_yok_data.py'den)
+TURKISH_81_CITIES = [
+    "Adana", "Adıyaman", "Afyonkarahisar", "Ağrı", "Aksaray", "Amasya", "Ankara", "Antalya",
+    "Ardahan", "Artvin", "Aydın", "Balıkesir", "Bartın", "Batman", "Bayburt", "Bilecik",
+    "Bingöl", "Bitlis", "Bolu", "Burdur", "Bursa", "Çanakkale", "Çankırı", "Çorum",
+    "Denizli", "Diyarbakır", "Düzce", "Edirne", "Elazığ", "Erzincan", "Erzurum", "Eskişehir",
+    "Gaziantep", "Giresun", "Gümüşhane", "Hakkari", "Hatay", "Iğdır", "Isparta", "İstanbul",
+    "İzmir", "Kahramanmaraş", "Karabük", "Karaman", "Kars", "Kastamonu", "Kayseri", "Kırıkkale",
+    "Kırklareli", "Kırşehir", "Kilis", "Kocaeli", "Konya", "Kütahya", "Malatya", "Manisa",
+    "Mardin", "Mersin", "Muğla", "Muş", "Nevşehir", "Niğde", "Ordu", "Osmaniye",
+    "Rize", "Sakarya", "Samsun", "Siirt", "Sinop", "Sivas", "Şanlıurfa", "Şırnak",
+    "Tekirdağ", "Tokat", "Trabzon", "Tunceli", "Uşak", "Van", "Yalova", "Yozgat", "Zonguldak"
+]
+
+# ✅ Veritabanındaki derece türü yazımları (Associate/Önlisans, Bachelor/Lisans)
+ASSOCIATE_DEGREE_TYPES = ('Associate', 'Önlisans', 'onlisans', 'önlisans')
+BACHELOR_DEGREE_TYPES = ('Bachelor', 'Lisans', 'lisans')
+
+# Sunulan facet'ler (sıra = /facets/ yanıtındaki sıra)
+FACET_NAMES = ("city", "university_type", "field_type", "degree_type", "language")
+
+_CITY_REPLACEMENTS = str.maketrans({
+    'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u',
+    'Ç': 'c', 'Ğ': 'g', 'İ': 'i', 'Ö': 'o', 'Ş': 's', 'Ü': 'u'
+})
+
+
+def normalize_city_name(text: str) -> str:
+    """Şehir adını normalize et (Türkçe karakterleri İngilizce karşılıklarına çevir)"""
+    return text.translate(_CITY_REPLACEMENTS).lower().strip()
+
+
+def canonical_degree_type(degree_type: Optional[str]) -> Optional[str]:
+    """Önlisans/Lisans yazımlarını get_departments filtresindeki değerlere (Associate/Bachelor) indirger"""
+    if degree_type in ASSOCIATE_DEGREE_TYPES:
+        return 'Associate'
+    if degree_type in BACHELOR_DEGREE_TYPES:
+        return 'Bachelor'
+    return degree_type
+
+
+class FacetValue(NamedTuple):
+    value: str
+    department_count: int
+    university_count: int
+
+
+def _group_counts(db: Session, column) -> List[Tuple[str, int, int]]:
+    """(değer, üniversite id, bölüm sayısı) satırları (tek GROUP BY)"""
+    return (
+        db.query(column, Department.university_id, func.count(Department.id))
+        .join(University, Department.university_id == University.id)
+        .filter(column.isnot(None))
+        .group_by(column, Department.university_id)
+        .all()
+    )
+
+
+def _aggregate(rows: Iterable[Tuple[str, int, int]], key=lambda value: value) -> Dict[str, Tuple[int, set]]:
+    """Ham değerleri `key` ile birleştirip bölüm sayısını ve farklı üniversiteleri topla"""
+    counts: Dict[str, list] = {}
+    for raw_value, university_id, department_count in rows:
+        value = key(raw_value) if raw_value else None
+        if not value:
+            continue
+        entry = counts.setdefault(value, [0, set()])
+        entry[0] += department_count
+        entry[1].add(university_id)
+    return {value: (entry[0], entry[1]) for value, entry in counts.items()}
+
+
+def _city_facet(db: Session) -> List[FacetValue]:
+    """81 il (bölümü olmasa da) + KKTC şehirleri; yabancı/bilinmeyen şehirler listelenmez"""
+    canonical = {normalize_city_name(city): city for city in TURKISH_81_CITIES}
+    # Bölümü olmayan üniversitelerin KKTC şehirleri de listelensin
+    db_cities = db.query(University.city).filter(University.city.isnot(None)).distinct()
+    for (city,) in db_cities:
+        if city and 'kktc' in city.lower():
+            canonical.setdefault(normalize_city_name(city), city)
+
+    # DB'deki yazım farkları (büyük/küçük harf, Türkçe karakter) kanonik isme indirgenir
+    counts = _aggregate(
+        _group_counts(db, University.city),
+        key=lambda city: canonical.get(normalize_city_name(city)),
+    )
+    kktc_cities = sorted(
+        (city for key, city in canonical.items() if city not in TURKISH_81_CITIES),
+        key=normalize_city_name,
+    )
+    ordered = sorted(TURKISH_81_CITIES, key=normalize_city_name) + kktc_cities
+
+    result = []
+    for city in ordered:
+        department_count, universities = counts.get(city, (0, ()))
+        result.append(FacetValue(city, department_count, len(universities)))
+    return result
+
+
+def _counted_facet(db: Session, column, key=lambda value: value) -> List[FacetValue]:
+    counts = _aggregate(_group_counts(db, column), key=key)
+    # Türkçe karakterler normalize edilerek alfabetik sıralanır
+    return [
+        FacetValue(value, department_count, len(universities))
+        for value, (department_count, universities) in sorted(
+            counts.items(), key=lambda item: normalize_city_name(item[0])
+        )
+    ]
+
+
+def compute_facets(db: Session) -> Dict[str, List[FacetValue]]:
+    """Tüm facet'leri veritabanından hesapla (facet başına tek GROUP BY)"""
+    return {
+        "city": _city_facet(db),
+        "university_type": _counted_facet(db, University.university_type),
+        "field_type": _counted_facet(db, Department.field_type),
+        "degree_type": _counted_facet(db, Department.degree_type, key=canonical_degree_type),
+        "language": _counted_facet(db, Department.language),
+    }
+
+
+def refresh_facets(db: Session) -> Dict[str, List[FacetValue]]:
+    """catalogue_facets tablosunu yeniden hesapla ve yaz (import sonrası çağrılır)"""
+    facets = compute_facets(db)
+    db.query(CatalogueFacet).delete(synchronize_session=False)
+    db.add_all(
+        CatalogueFacet(
+            facet=name,
+            value=item.value,
+            position=position,
+            department_count=item.department_count,
+            university_count=item.university_count,
+        )
+        for name, values in facets.items()
+        for position, item in enumerate(values)
+    )
+    db.commit()
+    api_logger.info(
+        "Catalogue facets materialized",
+        **{f"{name}_values": len(values) for name, values in facets.items()},
+    )
+    return facets
+
+
+def read_facets(db: Session) -> Dict[str, List[FacetValue]]:
+    """Materyalize tabloyu oku (boş facet'ler de anahtar olarak bulunur)"""
+    facets: Dict[str, List[FacetValue]] = {name: [] for name in FACET_NAMES}
+    rows = (
+        db.query(CatalogueFacet.facet, CatalogueFacet.value,
+                 CatalogueFacet.department_count, CatalogueFacet.university_count)
+        .order_by(CatalogueFacet.facet, CatalogueFacet.position)
+        .all()
+    )
+    for facet, value, department_count, university_count in rows:
+        facets.setdefault(facet, []).append(FacetValue(value, department_count, university_count))
+    return facets
+
+
+def _serialize(payload) -> Tuple[bytes, str]:
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+class FacetSnapshot:
+    """Facet değerleri + önceden serileştirilmiş JSON gövdeleri ve ETag'ler"""
+
+    def __init__(self, facets: Dict[str, List[FacetValue]]):
+        self.facets = facets
+        self._bodies: Dict[str, Tuple[bytes, str]] = {
+            name: _serialize([item._asdict() for item in values])
+            for name, values in facets.items()
+        }
+        self._all = _serialize({name: [item._asdict() for item in values] for name, values in facets.items()})
+
+    def values(self, facet: str) -> List[str]:
+        return [item.value for item in self.facets.get(facet, ())]
+
+    def body(self, facet: Optional[str] = None) -> Optional[Tuple[bytes, str]]:
+        """(JSON gövdesi, ETag); facet None ise tüm facet'ler, bilinmeyen facet için None"""
+        if facet is None:
+            return self._all
+        return self._bodies.get(facet)
+
+
+class FacetStore:
+    """Süreç geneli facet snapshot'ı (katalog yüklenince/yenilenince yeniden okunur)"""
+
+    def __init__(self):
+        self._snapshot: Optional[FacetSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[FacetSnapshot]:
+        """Güncel snapshot; henüz yüklenmemişse None"""
+        return self._snapshot
+
+    def load(self, db: Session) -> FacetSnapshot:
+        """Materyalize tabloyu belleğe al; tablo boşsa (ilk kurulum) önce hesapla"""
+        with self._lock:
+            facets = read_facets(db)
+            if not any(facets.values()):
+                facets = refresh_facets(db)
+            snapshot = FacetSnapshot(facets)
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+
+# Süreç geneli facet deposu
+facet_store = FacetStore()
@@ -0,0 +1,478 @@
+"""
+ML eğitim verisi için özellik deposu (feature store)
+
+Gerçek kullanıcı verisinden etiketli (öğrenci, bölüm) çiftleri türetir:
+
+- `Swipe` beğeni/beğenmeme ve `Preference` tercih listesi -> tercih etiketi
+- `ExamAttempt` puanları (son denemelerin ortalaması) ve bölüm taban puanı
+  -> uyumluluk ve başarı olasılığı etiketleri (sentetik veriyle aynı kurallar)
+
+Öğrenci bloğu, bölüm bloğu, çift başına tercih eşleşmeleri ve birleştirilmiş
+25 sütunlu özellik matrisi `.npy` dosyaları olarak yazılır; eğitim bunları
+`mmap_mode="r"` ile okur, pandas ile yeniden özellik üretmez. Sütun sırası
+`MLRecommendationEngine._prepare_feature_matrix` ile aynıdır.
+
+Her güncelleme `versions/{nesil}/` altına yeni bir dizin yazar; depo kökündeki
+`meta.json` manifest'i (sürüm, satır sayıları, nesil dizini) en son atomik
+olarak değiştirilir (bkz. ml_model_registry). Okunan dosyalar yerinde
+değiştirilmez.
+
+Güncelleme artımlıdır: her öğrencinin swipe/tercih/deneme özetinden bir
+parmak izi hesaplanır; yalnızca parmak izi değişen öğrencilerin satırları
+yeniden türetilir, diğerleri önceki dosyalardan kopyalanır. Bölüm kataloğu
+değişirse (eşleşmeler ve etiketler bölüme bağlı) tüm çiftler yeniden kurulur.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from core.logging_config import recommendation_logger
+from models import Department, ExamAttempt, Preference, Student, Swipe, University
+from services.ml_recommendation_engine import MLRecommendationEngine, resolve_model_path
+
+STUDENT_COLUMNS = (
+    "total_score", "rank", "percentile", "tyt_total_score", "ayt_total_score",
+    "field_type_encoded", "exam_type_encoded", "class_level_encoded",
+    "math_strength", "scholarship_preference",
+)
+DEPARTMENT_COLUMNS = (
+    "min_score", "min_rank", "quota", "tuition_fee", "has_scholarship",
+    "university_type_encoded", "city_encoded", "department_competitiveness",
+)
+MATCH_COLUMNS = ("preferred_cities_match", "preferred_types_match")
+TARGETS = ("compatibility", "success_probability", "preference")
+FEATURE_COLUMNS = (
+    STUDENT_COLUMNS[:8] + DEPARTMENT_COLUMNS[:7] + (
+        "score_diff", "rank_diff", "score_ratio", "rank_ratio", "percentile_diff",
+        "math_strength", "department_competitiveness",
+    ) + MATCH_COLUMNS + ("scholarship_match",)
+)
+
+META_FILENAME = "meta.json"
+VERSIONS_DIRNAME = "versions"
+ARRAY_FILES = (
+    "student_ids", "student_fingerprints", "student_features",
+    "department_ids", "department_features",
+    "pair_student_ids", "pair_department_ids", "pair_matches",
+    "features", "labels",
+)
+# Etiket için kullanılan son deneme sayısı
+RECENT_ATTEMPTS = 3
+IN_CHUNK_SIZE = 500
+
+
+class FeatureStoreInfo(NamedTuple):
+    path: str
+    version: str
+    students: int
+    pairs: int
+    changed_students: int
+    full_rebuild: bool
+
+
+def feature_store_path(model_path: Optional[str] = None) -> str:
+    """ML_FEATURE_STORE_PATH veya model dizini altında `feature_store/`"""
+    configured = os.getenv("ML_FEATURE_STORE_PATH")
+    if configured:
+        return configured
+    return os.path.join(model_path or resolve_model_path(), "feature_store")
+
+
+def min_training_pairs() -> int:
+    """ML_FEATURE_STORE_MIN_PAIRS: bundan az çift varsa eğitim simüle edilmiş veriyle yapılır"""
+    try:
+        return max(1, int(os.getenv("ML_FEATURE_STORE_MIN_PAIRS", "200")))
+    except ValueError:
+        return 200
+
+
+def keep_generations() -> int:
+    """ML_FEATURE_STORE_KEEP_VERSIONS: saklanan nesil dizini sayısı (eski nesli okuyan eğitim için en az 2)"""
+    try:
+        return max(1, int(os.getenv("ML_FEATURE_STORE_KEEP_VERSIONS", "2")))
+    except ValueError:
+        return 2
+
+
+def _fingerprint(*parts: Any) -> int:
+    digest = hashlib.blake2b(repr(parts).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little", signed=True)
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), IN_CHUNK_SIZE):
+        yield ids[start:start + IN_CHUNK_SIZE]
+
+
+def _parse_json_list(raw: Optional[str]) -> Optional[set]:
+    if not raw:
+        return None
+    try:
+        return set(json.loads(raw))
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Etiket kuralları (scripts/train_ml_models.generate_training_data ile aynı) ---
+
+def compatibility_labels(score_diff: np.ndarray) -> np.ndarray:
+    return np.clip(0.5 + (score_diff / 100) * 0.3, 0.0, 1.0)
+
+
+def success_labels(score_diff: np.ndarray) -> np.ndarray:
+    return np.select(
+        [score_diff > 50, score_diff > 20, score_diff > 0, score_diff > -20],
+        [0.9, 0.7, 0.5, 0.3],
+        default=0.1,
+    )
+
+
+# --- Bloklar -----------------------------------------------------------------
+
+def _department_block(db: Session) -> Tuple[np.ndarray, np.ndarray, Dict[int, Tuple[Optional[str], Optional[str]]], int]:
+    """Tüm bölümlerin özellik bloğu, üniversite şehir/türü ve katalog parmak izi"""
+    rows = (
+        db.query(
+            Department.id, Department.min_score, Department.min_rank, Department.quota,
+            Department.tuition_fee, Department.has_scholarship, University.city, University.university_type,
+        )
+        .outerjoin(University, University.id == Department.university_id)
+        .order_by(Department.id)
+        .all()
+    )
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    features = np.array([
+        (
+            float(min_score or 0.0), float(min_rank or 0.0), float(quota or 0.0), float(tuition_fee or 0.0),
+            1.0 if has_scholarship else 0.0,
+            MLRecommendationEngine._encode_university_type(university_type or "Devlet"),
+            MLRecommendationEngine._encode_city(city or ""),
+            float(min_rank or 0.0) / (float(quota or 1) + 1),
+        )
+        for _, min_score, min_rank, quota, tuition_fee, has_scholarship, city, university_type in rows
+    ], dtype=np.float64).reshape(len(rows), len(DEPARTMENT_COLUMNS))
+    universities = {row[0]: (row[6], row[7]) for row in rows}
+    fingerprint = _fingerprint(ids.tobytes(), features.tobytes(), sorted(universities.items()))
+    return ids, features, universities, fingerprint
+
+
+def student_fingerprints(db: Session) -> Dict[int, int]:
+    """Etkileşimi olan her öğrenci için swipe/tercih/deneme/profil özetinin parmak izi"""
+    summaries: Dict[int, List[Any]] = defaultdict(list)
+    queries = (
+        db.query(Swipe.student_id, func.count(Swipe.id), func.max(Swipe.id),
+                 func.sum(case((Swipe.action == "like", 1), else_=0)))
+        .group_by(Swipe.student_id),
+        db.query(Preference.student_id, func.count(Preference.id), func.max(Preference.id),
+                 func.sum(Preference.order))
+        .group_by(Preference.student_id),
+    )
+    for source, query in zip(("swipes", "preferences"), queries):
+        for student_id, *summary in query:
+            summaries[student_id].append((source, *summary))
+    if not summaries:
+        return {}
+    attempt_query = (
+        db.query(ExamAttempt.student_id, func.count(ExamAttempt.id), func.max(ExamAttempt.id),
+                 func.max(ExamAttempt.updated_at), func.sum(ExamAttempt.total_score))
+        .group_by(ExamAttempt.student_id)
+    )
+    for student_id, *summary in attempt_query:
+        if student_id in summaries:
+            summaries[student_id].append(("attempts", *summary))
+    for chunk in _chunks(sorted(summaries)):
+        for student_id, updated_at in db.query(Student.id, Student.updated_at).filter(Student.id.in_(chunk)):
+            summaries[student_id].append(("student", updated_at))
+    # Silinmiş öğrencinin yetim swipe/tercihleri dahil edilmez
+    return {
+        student_id: _fingerprint(summary)
+        for student_id, summary in summaries.items()
+        if summary[-1][0] == "student"
+    }
+
+
+def _student_row(student: Student) -> Tuple[float, ...]:
+    return (
+        float(student.total_score or 0), float(student.rank or 0), float(student.percentile or 0),
+        float(student.tyt_total_score or 0), float(student.ayt_total_score or 0),
+        MLRecommendationEngine._encode_field_type(student.field_type),
+        MLRecommendationEngine._encode_exam_type(student.exam_type),
+        MLRecommendationEngine._encode_class_level(student.class_level),
+        float((student.tyt_math_net or 0) + (student.ayt_math_net or 0)),
+        1.0 if student.scholarship_preference else 0.0,
+    )
+
+
+def _derive_students(
+    db: Session,
+    student_ids: List[int],
+    department_index: Dict[int, int],
+    department_features: np.ndarray,
+    universities: Dict[int, Tuple[Optional[str], Optional[str]]],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Değişen öğrencilerin satırları ve çiftleri (özellik matrisi hariç)"""
+    student_rows, pair_students, pair_departments, pair_matches, pair_labels = [], [], [], [], []
+    for chunk in _chunks(student_ids):
+        students = {s.id: s for s in db.query(Student).filter(Student.id.in_(chunk))}
+        swipes: Dict[int, Dict[int, float]] = defaultdict(dict)
+        for student_id, department_id, action in (
+            db.query(Swipe.student_id, Swipe.department_id, Swipe.action).filter(Swipe.student_id.in_(chunk))
+        ):
+            swipes[student_id][department_id] = 1.0 if action == "like" else 0.0
+        preferences: Dict[int, List[Tuple[Any, ...]]] = defaultdict(list)
+        for student_id, department_id, order, pref_id in (
+            db.query(Preference.student_id, Preference.department_id, Preference.order, Preference.id)
+            .filter(Preference.student_id.in_(chunk))
+        ):
+            preferences[student_id].append((order is None, order or 0, pref_id, department_id))
+        attempts: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+        for student_id, number, total_score in (
+            db.query(ExamAttempt.student_id, ExamAttempt.attempt_number, ExamAttempt.total_score)
+            .filter(ExamAttempt.student_id.in_(chunk))
+        ):
+            if total_score:
+                attempts[student_id].append((number or 0, float(total_score)))
+
+        for student_id in chunk:
+            student = students[student_id]
+            student_rows.append(_student_row(student))
+
+            # Tercih etiketi: beğeni 1, beğenmeme 0; tercih listesi sıraya göre 1.0 -> 0.6 (swipe'ı ezer)
+            labels = dict(swipes.get(student_id, {}))
+            ranked = sorted(preferences.get(student_id, []))
+            for position, (*_, department_id) in enumerate(ranked):
+                labels[department_id] = 1.0 - 0.4 * position / max(1, len(ranked) - 1)
+            department_ids = sorted(d for d in labels if d in department_index)
+            if not department_ids:
+                continue
+
+            recent = [score for _, score in sorted(attempts.get(student_id, []))[-RECENT_ATTEMPTS:]]
+            expected_score = float(np.mean(recent)) if recent else float(student.total_score or 0)
+            rows = np.array([department_index[d] for d in department_ids])
+            min_score = department_features[rows, 0]
+            score_diff = expected_score - min_score
+            has_min_score = min_score > 0
+
+            preferred_cities = _parse_json_list(student.preferred_cities)
+            preferred_types = _parse_json_list(student.preferred_university_types)
+            for department_id in department_ids:
+                city, university_type = universities[department_id]
+                pair_matches.append((
+                    1.0 if preferred_cities is not None and city is not None and city in preferred_cities else 0.0,
+                    1.0 if preferred_types is not None and university_type is not None
+                    and university_type in preferred_types else 0.0,
+                ))
+            pair_students.extend([student_id] * len(department_ids))
+            pair_departments.extend(department_ids)
+            pair_labels.extend(zip(
+                np.where(has_min_score, compatibility_labels(score_diff), 0.5),
+                np.where(has_min_score, success_labels(score_diff), 0.5),
+                [labels[d] for d in department_ids],
+            ))
+    return (
+        np.array(student_ids, dtype=np.int64),
+        np.array(student_rows, dtype=np.float64).reshape(len(student_rows), len(STUDENT_COLUMNS)),
+        np.array(pair_students, dtype=np.int64),
+        np.array(pair_departments, dtype=np.int64),
+        np.array(pair_matches, dtype=np.float64).reshape(len(pair_matches), len(MATCH_COLUMNS)),
+        np.array(pair_labels, dtype=np.float64).reshape(len(pair_labels), len(TARGETS)),
+    )
+
+
+def assemble_features(student_block: np.ndarray, department_block: np.ndarray, matches: np.ndarray) -> np.ndarray:
+    """Çift başına öğrenci/bölüm satırları ve eşleşmelerden 25 sütunlu özellik matrisi"""
+    total_score, rank, percentile = student_block[:, 0], student_block[:, 1], student_block[:, 2]
+    min_score, min_rank, has_scholarship = department_block[:, 0], department_block[:, 1], department_block[:, 4]
+    return np.column_stack([
+        student_block[:, :8],
+        department_block[:, :7],
+        total_score - min_score,
+        min_rank - rank,
+        total_score / (min_score + 1e-6),
+        rank / (min_rank + 1e-6),
+        percentile - (100 - (min_rank / 1000)),
+        student_block[:, 8],
+        department_block[:, 7],
+        matches,
+        has_scholarship * student_block[:, 9],
+    ])
+
+
+# --- Dosyalar ----------------------------------------------------------------
+
+def _save_array(path: str, array: np.ndarray) -> None:
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def read_meta(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(path, META_FILENAME), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_arrays(path: str) -> Optional[Dict[str, np.ndarray]]:
+    """Manifest'in gösterdiği neslin dizilerini bellek eşlemeli aç (satır sayıları tutmuyorsa None)"""
+    meta = read_meta(path)
+    if meta is None:
+        return None
+    # "directory" olmayan eski manifest: diziler depo kökünde
+    directory = os.path.join(path, meta.get("directory", ""))
+    try:
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode="r") for name in ARRAY_FILES}
+    except (OSError, ValueError):
+        return None
+    if len(arrays["student_ids"]) != meta.get("students") or len(arrays["features"]) != meta.get("pairs"):
+        return None
+    return arrays
+
+
+def _write_store(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]) -> Dict[str, Any]:
+    """Dizileri yeni nesil dizinine yaz, ardından meta.json'u atomik olarak o nesle çevir.
+
+    Yayımlanmış dosyalar yerinde değiştirilmez: okuyucular (eğitim, diğer
+    worker'lar) eşledikleri nesli sonuna kadar tutarlı görür, yeni nesli ancak
+    tüm diziler yerindeyken görür. Son `ML_FEATURE_STORE_KEEP_VERSIONS` nesil saklanır.
+    """
+    generation = datetime.now().strftime("%Y%m%dT%H%M%S.%f")
+    directory = os.path.join(VERSIONS_DIRNAME, generation)
+    os.makedirs(os.path.join(path, directory), exist_ok=True)
+    for name in ARRAY_FILES:
+        _save_array(os.path.join(path, directory, f"{name}.npy"), arrays[name])
+    meta = {**meta, "directory": directory}
+    tmp_path = os.path.join(path, f"{META_FILENAME}.tmp-{os.getpid()}-{threading.get_ident()}")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(path, META_FILENAME))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    _prune_generations(path, keep=generation)
+    return meta
+
+
+def _prune_generations(path: str, keep: str) -> None:
+    """En yeni nesiller dışındakileri sil (adlar zamana göre sıralanır; açık memmap'ler geçerli kalır)"""
+    root = os.path.join(path, VERSIONS_DIRNAME)
+    try:
+        generations = sorted(os.listdir(root))
+    except OSError:
+        return
+    for generation in generations[:-keep_generations()]:
+        if generation != keep:
+            shutil.rmtree(os.path.join(root, generation), ignore_errors=True)
+
+
+# --- Güncelleme ----------------------------------------------------------------
+
+def refresh_feature_store(db: Session, path: Optional[str] = None, force: bool = False) -> FeatureStoreInfo:
+    """Değişen öğrencilerin satırlarını yeniden türet, gerisini önceki dosyalardan kopyala"""
+    path = path or feature_store_path()
+    department_ids, department_features, universities, department_hash = _department_block(db)
+    fingerprints = student_fingerprints(db)
+    version = format(_fingerprint(department_hash, sorted(fingerprints.items())) & (2 ** 64 - 1), "016x")
+
+    meta = read_meta(path)
+    old = None if force else load_arrays(path)
+    if old is not None and meta.get("version") == version:
+        return FeatureStoreInfo(path, version, meta["students"], meta["pairs"], 0, False)
+
+    full_rebuild = old is None or meta.get("department_hash") != department_hash
+    if full_rebuild:
+        changed = sorted(fingerprints)
+        kept = np.empty(0, dtype=np.int64)
+    else:
+        old_fingerprints = dict(zip(old["student_ids"].tolist(), old["student_fingerprints"].tolist()))
+        changed = sorted(s for s, fp in fingerprints.items() if old_fingerprints.get(s) != fp)
+        kept = np.array(sorted(s for s, fp in old_fingerprints.items() if fingerprints.get(s) == fp), dtype=np.int64)
+
+    department_index = {int(d): i for i, d in enumerate(department_ids)}
+    new_ids, new_rows, pair_students, pair_departments, pair_matches, pair_labels = _derive_students(
+        db, changed, department_index, department_features, universities
+    )
+    # Yeni çiftlerin özellikleri yalnızca değişen öğrenciler için hesaplanır
+    student_positions = {int(s): i for i, s in enumerate(new_ids)}
+    new_features = assemble_features(
+        new_rows[[student_positions[int(s)] for s in pair_students]].reshape(len(pair_students), len(STUDENT_COLUMNS)),
+        department_features[[department_index[int(d)] for d in pair_departments]].reshape(len(pair_departments), len(DEPARTMENT_COLUMNS)),
+        pair_matches,
+    ).reshape(len(pair_students), len(FEATURE_COLUMNS))
+
+    # Değişmeyen öğrenciler: önceki dosyalardan kopyala
+    if len(kept):
+        old_students = np.isin(old["student_ids"], kept)
+        old_pairs = np.isin(old["pair_student_ids"], kept)
+        student_ids = np.concatenate([old["student_ids"][old_students], new_ids])
+        student_rows = np.concatenate([old["student_features"][old_students], new_rows])
+        pair_students = np.concatenate([old["pair_student_ids"][old_pairs], pair_students])
+        pair_departments = np.concatenate([old["pair_department_ids"][old_pairs], pair_departments])
+        pair_matches = np.concatenate([old["pair_matches"][old_pairs], pair_matches])
+        pair_labels = np.concatenate([old["labels"][old_pairs], pair_labels])
+        features = np.concatenate([old["features"][old_pairs], new_features])
+    else:
+        student_ids, student_rows, features = new_ids, new_rows, new_features
+
+    student_order = np.argsort(student_ids, kind="stable")
+    pair_order = np.lexsort((pair_departments, pair_students))
+    student_ids = student_ids[student_order]
+    arrays = {
+        "student_ids": student_ids,
+        "student_fingerprints": np.array([fingerprints[int(s)] for s in student_ids], dtype=np.int64),
+        "student_features": student_rows[student_order],
+        "department_ids": department_ids,
+        "department_features": department_features,
+        "pair_student_ids": pair_students[pair_order],
+        "pair_department_ids": pair_departments[pair_order],
+        "pair_matches": pair_matches[pair_order],
+        "features": features[pair_order],
+        "labels": pair_labels[pair_order],
+    }
+    old = None  # önceki neslin memmap'leri budanmadan önce bırakılır
+    new_meta = {
+        "version": version,
+        "department_hash": department_hash,
+        "students": int(len(student_ids)),
+        "departments": int(len(department_ids)),
+        "pairs": int(len(pair_order)),
+        "feature_columns": list(FEATURE_COLUMNS),
+        "targets": list(TARGETS),
+        "updated_at": datetime.now().isoformat(),
+    }
+    new_meta = _write_store(path, arrays, new_meta)
+    recommendation_logger.info(
+        "ML feature store refreshed",
+        version=version,
+        students=new_meta["students"],
+        pairs=new_meta["pairs"],
+        changed_students=len(changed),
+        full_rebuild=full_rebuild,
+    )
+    return FeatureStoreInfo(path, version, new_meta["students"], new_meta["pairs"], len(changed), full_rebuild)
+
+
+def load_training_matrix(path: Optional[str] = None) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Eğitim için (X, hedefler): önceden hesaplanmış matrisler, yeniden özellik üretimi yok"""
+    path = path or feature_store_path()
+    arrays = load_arrays(path)
+    if arrays is None:
+        raise FileNotFoundError(f"Feature store not found or incomplete: {path}")
+    labels = arrays["labels"]
+    return arrays["features"], {target: labels[:, i] for i, target in enumerate(TARGETS)}
@@ -0,0 +1,86 @@
+"""
+Paylaşılan çalışma anı log ayarları
+
+`PUT /api/logging/{logger_name}` ayarı `log_settings` tablosuna yazar; ayar
+yalnızca isteği alan worker'da değil, tüm süreçlerde uygulanır:
+
+- API worker'ları tabloyu `LOG_SETTINGS_POLL_SECONDS` aralıkla okur
+  (main._periodic_log_settings_task),
+- Celery worker'ları görev başlarken en fazla aynı aralıkla okur
+  (tasks.recommendation_tasks).
+
+Yalnızca son uygulanandan farklı satırlar uygulanır.
+"""
+import os
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models import LogSetting
+from core.logging_config import api_logger, set_log_level, set_sample_rate
+
+
+def poll_seconds() -> int:
+    """LOG_SETTINGS_POLL_SECONDS (en az 5)"""
+    try:
+        return max(5, int(os.getenv("LOG_SETTINGS_POLL_SECONDS", "15")))
+    except ValueError:
+        return 15
+
+
+def save_log_setting(db: Session, logger_name: str, level: Optional[str], sample_rate: Optional[float]) -> LogSetting:
+    """Ayarı tabloya yaz (verilmeyen alanlar korunur)"""
+    setting = db.get(LogSetting, logger_name)
+    if setting is None:
+        setting = LogSetting(logger_name=logger_name)
+        db.add(setting)
+    if level is not None:
+        setting.level = level.upper()
+    if sample_rate is not None:
+        setting.sample_rate = sample_rate
+    db.commit()
+    return setting
+
+
+class LogSettingsSync:
+    """Tablodaki ayarları bu sürece uygular (süreç başına bir tane)"""
+
+    def __init__(self):
+        self._applied: Dict[str, Tuple[Optional[str], Optional[float]]] = {}
+        self._last_sync = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, db: Session) -> int:
+        """Değişen ayarları uygula; uygulanan logger sayısını döndür"""
+        rows = db.query(LogSetting.logger_name, LogSetting.level, LogSetting.sample_rate).all()
+        changed = 0
+        with self._lock:
+            for logger_name, level, sample_rate in rows:
+                if self._applied.get(logger_name) == (level, sample_rate):
+                    continue
+                if level:
+                    try:
+                        set_log_level(logger_name, level)
+                    except ValueError as e:
+                        api_logger.warning("Invalid stored log level", logger=logger_name, error=str(e))
+                set_sample_rate(logger_name, sample_rate)
+                self._applied[logger_name] = (level, sample_rate)
+                changed += 1
+            self._last_sync = time.monotonic()
+        return changed
+
+    def sync_if_due(self, session_factory: Callable[[], Session]) -> int:
+        """Son okumadan bu yana `poll_seconds` geçtiyse yeni session ile oku (Celery görevleri için)"""
+        if time.monotonic() - self._last_sync < poll_seconds():
+            return 0
+        db = session_factory()
+        try:
+            return self.sync(db)
+        finally:
+            db.close()
+
+
+# Süreç geneli senkronizasyon durumu
+log_settings_sync = LogSettingsSync()
@@ -0,0 +1,337 @@
+"""
+Süreç geneli ML model kayıt defteri
+
+`MLRecommendationEngine` her istekte oluşturulur; modeller ise süreç başına
+bir kez yüklenir ve tüm isteklerce paylaşılır. Her eğitim artefaktlarını
+(`{ad}_model.pkl`, `{ad}_scaler.pkl`) kendi sürüm dizinine
+(`versions/{sürüm}/`) yazar; ardından model dizinine `manifest.json` (sürüm,
+dosyalar, boyutlar, eğitim raporu) atomik olarak yazılır. Yüklenen dosyalar
+hiçbir zaman yerinde değiştirilmez; son `ML_MODEL_KEEP_VERSIONS` sürüm saklanır. Kayıt
+defteri manifest'i periyodik olarak kontrol eder; sürüm değişmişse yeni
+modelleri arka planda değil çağıran thread'de yükler ve hazır olunca tek bir
+atama ile değiştirir (eski paket onu kullanan isteklerde geçerli kalır).
+
+Numpy dizileri içeren pickle'lar (scikit-learn ağaçları, scaler'lar)
+`joblib.load(mmap_mode="r")` ile bellek eşlemeli açılır; aynı makinedeki
+worker süreçleri sayfaları işletim sistemi önbelleğinden paylaşır.
+
+Kaydederken ağaç modelleri ayrıca `{ad}_compiled.npz` olarak NumPy dizilerine
+derlenir (bkz. services/tree_inference.py). Manifest'te derlenmiş dosya varsa
+ve `ML_INFERENCE_BACKEND` "native" değilse, yalnızca bu dosyalar yüklenir:
+pickle açılmaz, sklearn/xgboost import edilmez.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional
+
+import joblib
+
+from core.logging_config import recommendation_logger
+from services.tree_inference import load_compiled, save_compiled, try_compile
+
+MODEL_NAMES = ("compatibility", "success", "preference")
+MANIFEST_FILENAME = "manifest.json"
+REPORT_FILENAME = "training_report.json"
+VERSIONS_DIRNAME = "versions"
+
+
+def _check_interval() -> float:
+    try:
+        return max(0.0, float(os.getenv("ML_MODEL_CHECK_SECONDS", "30")))
+    except ValueError:
+        return 30.0
+
+
+def _keep_versions() -> int:
+    try:
+        return max(1, int(os.getenv("ML_MODEL_KEEP_VERSIONS", "3")))
+    except ValueError:
+        return 3
+
+
+def _inference_backend() -> str:
+    """auto/compiled: derlenmiş modeller varsa onları kullan; native: her zaman pickle"""
+    return os.getenv("ML_INFERENCE_BACKEND", "auto").strip().lower()
+
+
+def artifact_files(name: str) -> Dict[str, str]:
+    return {"model": f"{name}_model.pkl", "scaler": f"{name}_scaler.pkl"}
+
+
+def compiled_file(name: str) -> str:
+    return f"{name}_compiled.npz"
+
+
+class ModelBundle(NamedTuple):
+    """Bir sürümün yüklenmiş modelleri (değişmez; hot swap bütün paketi değiştirir)"""
+    version: Optional[str]
+    model_path: str
+    models: Dict[str, Any]
+    scalers: Dict[str, Any]
+    artifact_bytes: Dict[str, int]
+    loaded_at: Optional[datetime]
+    load_seconds: float
+    backend: str = "native"  # native (pickle) veya compiled (saf NumPy)
+    report: Optional[Dict[str, Any]] = None  # eğitim süreleri ve metrikleri
+
+    @property
+    def is_trained(self) -> bool:
+        return bool(self.models)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.artifact_bytes.values())
+
+
+def _empty_bundle(model_path: str) -> ModelBundle:
+    return ModelBundle(None, model_path, {}, {}, {}, None, 0.0)
+
+
+def _write_atomic(path: str, write) -> None:
+    """Geçici dosyaya yazıp os.replace ile yerine koy (okuyucular yarım dosya görmez)"""
+    tmp_path = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_artifacts(
+    model_path: str,
+    models: Dict[str, Any],
+    scalers: Dict[str, Any],
+    report: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Modelleri ve scaler'ları yeni sürüm dizinine kaydet, ardından manifest'i yaz.
+
+    Manifest en son yazılır: kayıt defteri yeni sürümü ancak tüm dosyalar
+    yerindeyken görür. `report` (eğitim süreleri ve metrikleri) manifest'e ve
+    `training_report.json` dosyasına eklenir.
+    """
+    created_at = datetime.now()
+    version = created_at.strftime("%Y%m%dT%H%M%S.%f")
+    version_dir = os.path.join(VERSIONS_DIRNAME, version)
+    os.makedirs(os.path.join(model_path, version_dir), exist_ok=True)
+    artifacts = {}
+    for name in models:
+        if name not in scalers:
+            continue
+        files = {kind: os.path.join(version_dir, f) for kind, f in artifact_files(name).items()}
+        _write_atomic(os.path.join(model_path, files["model"]), lambda p, obj=models[name]: joblib.dump(obj, p))
+        _write_atomic(os.path.join(model_path, files["scaler"]), lambda p, obj=scalers[name]: joblib.dump(obj, p))
+        artifacts[name] = {
+            **files,
+            "bytes": sum(os.path.getsize(os.path.join(model_path, f)) for f in files.values()),
+        }
+        # ✅ Ağaç modelini NumPy dizilerine derle (desteklenmeyen model türünde yalnızca pickle)
+        compiled = try_compile(models[name], scalers[name])
+        if compiled is None:
+            recommendation_logger.warning("ML model not compiled", model=name, model_type=type(models[name]).__name__)
+            continue
+        compiled_path = os.path.join(model_path, version_dir, compiled_file(name))
+        _write_atomic(compiled_path, lambda p, pair=compiled: save_compiled(p, *pair))
+        artifacts[name]["compiled"] = os.path.join(version_dir, compiled_file(name))
+        artifacts[name]["compiled_bytes"] = os.path.getsize(compiled_path)
+
+    manifest = {
+        "version": version,
+        "created_at": created_at.isoformat(),
+        "artifacts": artifacts,
+    }
+    if report is not None:
+        manifest["report"] = {**report, "version": version}
+        for path in (os.path.join(model_path, version_dir, REPORT_FILENAME), os.path.join(model_path, REPORT_FILENAME)):
+            _write_atomic(path, lambda p: _write_json(p, manifest["report"]))
+    _write_atomic(
+        os.path.join(model_path, MANIFEST_FILENAME),
+        lambda p: _write_json(p, manifest),
+    )
+    _prune_versions(model_path, keep=version)
+    return manifest
+
+
+def _prune_versions(model_path: str, keep: str) -> None:
+    """En yeni ML_MODEL_KEEP_VERSIONS sürüm dizini dışındakileri sil (sürüm adları zamana göre sıralanır)"""
+    root = os.path.join(model_path, VERSIONS_DIRNAME)
+    try:
+        versions = sorted(os.listdir(root))
+    except OSError:
+        return
+    for version in versions[:-_keep_versions()]:
+        if version != keep:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+
+
+def _write_json(path: str, payload: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+
+
+def read_manifest(model_path: str) -> Optional[Dict[str, Any]]:
+    """Manifest'i oku; yoksa (eski kurulum) mevcut pkl dosyalarından türet"""
+    try:
+        with open(os.path.join(model_path, MANIFEST_FILENAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        recommendation_logger.warning("ML manifest unreadable", error=str(e))
+        return None
+
+    artifacts, mtimes = {}, []
+    for name in MODEL_NAMES:
+        files = artifact_files(name)
+        paths = [os.path.join(model_path, f) for f in files.values()]
+        if not all(os.path.exists(p) for p in paths):
+            continue
+        artifacts[name] = {**files, "bytes": sum(os.path.getsize(p) for p in paths)}
+        mtimes.extend(os.path.getmtime(p) for p in paths)
+    if not artifacts:
+        return None
+    return {"version": f"legacy-{int(max(mtimes))}", "artifacts": artifacts}
+
+
+def _load(path: str) -> Any:
+    """Bellek eşlemeli yükleme; desteklenmeyen (sıkıştırılmış vb.) dosyalarda normal yükleme"""
+    try:
+        return joblib.load(path, mmap_mode="r")
+    except (ValueError, OSError):
+        return joblib.load(path)
+
+
+def load_bundle(model_path: str, manifest: Dict[str, Any]) -> ModelBundle:
+    started = time.perf_counter()
+    artifacts = manifest.get("artifacts", {})
+    # Derlenmiş paket yalnızca tüm modeller derlenmişse kullanılır (karışık paket yok)
+    compiled = (
+        _inference_backend() != "native"
+        and bool(artifacts)
+        and all(entry.get("compiled") for entry in artifacts.values())
+    )
+    if artifacts and not compiled:
+        recommendation_logger.warning(
+            "ML compiled backend not used, loading pickled models",
+            version=manifest.get("version"),
+            inference_backend=_inference_backend(),
+            not_compiled=sorted(name for name, entry in artifacts.items() if not entry.get("compiled")),
+        )
+    models, scalers, sizes = {}, {}, {}
+    for name, entry in artifacts.items():
+        if compiled:
+            models[name], scalers[name] = load_compiled(os.path.join(model_path, entry["compiled"]))
+            sizes[name] = int(entry.get("compiled_bytes") or 0)
+        else:
+            models[name] = _load(os.path.join(model_path, entry["model"]))
+            scalers[name] = _load(os.path.join(model_path, entry["scaler"]))
+            sizes[name] = int(entry.get("bytes") or 0)
+    return ModelBundle(
+        version=manifest.get("version"),
+        model_path=model_path,
+        models=models,
+        scalers=scalers,
+        artifact_bytes=sizes,
+        loaded_at=datetime.now(),
+        load_seconds=time.perf_counter() - started,
+        backend="compiled" if compiled else "native",
+        report=manifest.get("report"),
+    )
+
+
+class ModelRegistry:
+    """Süreç başına tek yüklenen, manifest değişince atomik olarak değiştirilen model paketi"""
+
+    def __init__(self, check_interval: Optional[float] = None):
+        self.check_interval = _check_interval() if check_interval is None else check_interval
+        self._bundle: Optional[ModelBundle] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.swaps = 0
+        self.last_error: Optional[str] = None
+
+    def get(self, model_path: Optional[str] = None) -> ModelBundle:
+        """Güncel paket; kontrol aralığı dolduysa manifest'e bakıp gerekirse yeniden yükle"""
+        if model_path is None:
+            from services.ml_recommendation_engine import resolve_model_path
+            model_path = resolve_model_path()
+        bundle = self._bundle
+        if (
+            bundle is not None
+            and bundle.model_path == model_path
+            and time.monotonic() - self._checked_at < self.check_interval
+        ):
+            return bundle
+        # Yükleme sürerken diğer istekler beklemez, mevcut paketle devam eder
+        return self.refresh(model_path, blocking=bundle is None or bundle.model_path != model_path)
+
+    def refresh(self, model_path: str, force: bool = False, blocking: bool = True) -> ModelBundle:
+        """Manifest sürümü değiştiyse yeni paketi yükle ve değiştir"""
+        if not self._lock.acquire(blocking=blocking):
+            return self._bundle
+        try:
+            bundle = self._bundle
+            self._checked_at = time.monotonic()
+            manifest = read_manifest(model_path)
+            version = manifest.get("version") if manifest else None
+            if (
+                not force
+                and bundle is not None
+                and bundle.model_path == model_path
+                and bundle.version == version
+            ):
+                return bundle
+            if manifest is None:
+                new_bundle = _empty_bundle(model_path)
+            else:
+                try:
+                    new_bundle = load_bundle(model_path, manifest)
+                except Exception as e:
+                    # Yarım/bozuk artefakt: mevcut paketle devam et, sonraki kontrolde tekrar dene
+                    self.last_error = str(e)
+                    recommendation_logger.warning("ML model load failed", error=str(e), version=version)
+                    return bundle if bundle is not None else _empty_bundle(model_path)
+            self._bundle = new_bundle
+            self.last_error = None
+            if bundle is not None and bundle.version != new_bundle.version:
+                self.swaps += 1
+        finally:
+            self._lock.release()
+        if new_bundle.is_trained:
+            recommendation_logger.info(
+                "ML models loaded",
+                version=new_bundle.version,
+                models=sorted(new_bundle.models),
+                load_seconds=round(new_bundle.load_seconds, 4),
+                artifact_bytes=new_bundle.total_bytes,
+                backend=new_bundle.backend,
+            )
+        return new_bundle
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._bundle = None
+            self._checked_at = 0.0
+
+    def status(self) -> Dict[str, Any]:
+        """/model-status için yüklü sürüm bilgisi"""
+        bundle = self._bundle
+        return {
+            "version": bundle.version if bundle else None,
+            "backend": bundle.backend if bundle else None,
+            "loaded_at": bundle.loaded_at if bundle else None,
+            "load_seconds": bundle.load_seconds if bundle else None,
+            "artifact_bytes": bundle.total_bytes if bundle else 0,
+            "artifacts": dict(bundle.artifact_bytes) if bundle else {},
+            "training_report": bundle.report if bundle else None,
+            "swaps": self.swaps,
+            "last_error": self.last_error,
+        }
+
+
+# Süreç geneli kayıt defteri
+model_registry = ModelRegistry()
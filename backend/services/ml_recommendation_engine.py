@@ -5,17 +5,28 @@ Bu modül, geçmiş verilerle eğitilmiş modeller kullanarak daha akıllı öne
 
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import train_test_split, GridSearchCV
-from xgboost import XGBRegressor
 from typing import List, Dict, Any, Tuple, Optional
-import joblib
 import os
 import json
+import zlib
 from sqlalchemy.orm import Session
 from models import Student, Department, Recommendation, University
 from core.logging_config import recommendation_logger
+from services.vectorized_scoring import select_top_k
+from services.ml_model_registry import model_registry, save_artifacts
+from services.ml_training_pipeline import train_models_parallel
+
+def resolve_model_path() -> str:
+    """Model dosyalarının bulunduğu dizin"""
+    # Docker volume'da ml_models, local'de models/ kullanılır
+    model_path = os.getenv("ML_MODELS_PATH", "models/")
+    # Docker volume kontrolü
+    if os.path.exists("/app/ml_models"):
+        model_path = "/app/ml_models/"
+    elif os.path.exists("ml_models"):
+        model_path = "ml_models/"
+    return model_path
+
 
 class MLRecommendationEngine:
     """Makine öğrenmesi destekli öneri motoru"""
@@ -25,15 +36,11 @@ class MLRecommendationEngine:
         self.models = {}
         self.scalers = {}
         self.is_trained = False
-        # Docker volume'da ml_models, local'de models/ kullanılır
-        self.model_path = os.getenv("ML_MODELS_PATH", "models/")
-        # Docker volume kontrolü
-        if os.path.exists("/app/ml_models"):
-            self.model_path = "/app/ml_models/"
-        elif os.path.exists("ml_models"):
-            self.model_path = "ml_models/"
-        
-        # Model dosyalarını yükle
+        self.model_path = resolve_model_path()
+        self.model_version = None
+        self.training_report = None
+        
+        # ✅ Modeller süreç geneli kayıt defterinden paylaşılır (istek başına joblib.load yok)
         self._load_models()
     
     def train_models(self, training_data: List[Dict[str, Any]]):
@@ -46,22 +53,45 @@ class MLRecommendationEngine:
             
             # Özellik mühendisliği
             X, y = self._prepare_features(df)
+            self._fit_and_save(X, y, source="records")
             
-            # Modelleri eğit
-            self._train_compatibility_model(X, y['compatibility'])
-            self._train_success_model(X, y['success_probability'])
-            self._train_preference_model(X, y['preference'])
-            
-            # Modelleri kaydet
-            self._save_models()
-            
-            self.is_trained = True
-            recommendation_logger.info("ML models trained successfully")
-            
         except Exception as e:
             recommendation_logger.error("ML training failed", error=str(e))
             raise
     
+    def train_models_from_store(self, store_path: Optional[str] = None):
+        """Modelleri özellik deposundaki hazır matrislerle eğit (bkz. services/feature_store.py)"""
+        from services.feature_store import load_training_matrix
+        
+        try:
+            X, y = load_training_matrix(store_path)
+            recommendation_logger.info("Starting ML model training", data_size=len(X), source="feature_store")
+            self._fit_and_save(np.asarray(X), {target: np.asarray(values) for target, values in y.items()},
+                               source="feature_store")
+        except Exception as e:
+            recommendation_logger.error("ML training failed", error=str(e))
+            raise
+    
+    def _fit_and_save(self, X: np.ndarray, y: Dict[str, np.ndarray], source: str):
+        # ✅ Modeller paralel worker süreçlerinde, erken durdurmayla eğitilir
+        result = train_models_parallel(X, y)
+        self.models.update(result.models)
+        self.scalers.update(result.scalers)
+        
+        # Modelleri kaydet (sürüm dizini + eğitim raporu)
+        report = {**result.report, "source": source}
+        self._save_models(report=report)
+        self.training_report = report
+        
+        self.is_trained = True
+        recommendation_logger.info(
+            "ML models trained successfully",
+            version=self.model_version,
+            source=source,
+            wall_seconds=report["wall_seconds"],
+            workers=report["workers"],
+        )
+    
     def generate_recommendations(
         self,
         student_id: int,
@@ -78,9 +108,6 @@ class MLRecommendationEngine:
             if not student:
                 raise ValueError(f"Student {student_id} not found")
             
-            # Öğrenci özelliklerini hazırla
-            student_features = self._prepare_student_features(student)
-            
             # Bölümleri getir
             departments = self.db.query(Department).filter(
                 Department.field_type == student.field_type
@@ -93,47 +120,51 @@ class MLRecommendationEngine:
             total_w = max(1e-9, (w_c + w_s + w_p))
             w_c, w_s, w_p = w_c / total_w, w_s / total_w, w_p / total_w
 
-            recommendations = []
+            if not departments:
+                return []
             
-            for department in departments:
-                # Gelişmiş özellik hazırlama (interaksiyon özellikleri dahil)
-                combined_features = self._prepare_combined_features(student, department)
-                combined_features = combined_features.reshape(1, -1)
-                
-                # Skorları tahmin et
-                compatibility = self._predict_compatibility(combined_features)
-                success_prob = self._predict_success_probability(combined_features)
-                preference = self._predict_preference(combined_features)
-                
-                # Final skor
-                final_score = (compatibility * w_c + success_prob * w_s + preference * w_p)
+            # ✅ TOPLU ÇIKARIM: (bölüm sayısı × özellik sayısı) matrisi tek seferde kurulur,
+            # her model için scaler bir kez uygulanır ve tek predict çağrısı yapılır
+            universities = self._load_universities(departments)
+            features = self._prepare_feature_matrix(student, departments, universities)
+            
+            compatibility = self._predict_batch('compatibility', features)
+            success_prob = self._predict_batch('success', features)
+            preference = self._predict_batch('preference', features)
+            
+            # Final skor
+            final_scores = compatibility * w_c + success_prob * w_s + preference * w_p
+            
+            # Skora göre sırala (eşit skorlarda bölüm sırası korunur)
+            top = select_top_k(final_scores, limit)
+            
+            recommendations = []
+            for i in top.tolist():
+                department = departments[i]
                 
                 # Öneri türünü belirle
-                is_safe = success_prob >= 0.8
-                is_dream = success_prob <= 0.3
-                is_realistic = 0.3 < success_prob < 0.8
+                is_safe = success_prob[i] >= 0.8
+                is_dream = success_prob[i] <= 0.3
+                is_realistic = 0.3 < success_prob[i] < 0.8
                 
                 # Öneri sebebi
-                reason = self._generate_ml_reason(compatibility, success_prob, preference)
+                reason = self._generate_ml_reason(compatibility[i], success_prob[i], preference[i])
                 
                 recommendations.append({
                     'student_id': student_id,
                     'department_id': department.id,
-                    'compatibility_score': float(compatibility),
-                    'success_probability': float(success_prob),
-                    'preference_score': float(preference),
-                    'final_score': float(final_score),
+                    'compatibility_score': float(compatibility[i]),
+                    'success_probability': float(success_prob[i]),
+                    'preference_score': float(preference[i]),
+                    'final_score': float(final_scores[i]),
                     'recommendation_reason': reason,
-                    'is_safe_choice': is_safe,
-                    'is_dream_choice': is_dream,
-                    'is_realistic_choice': is_realistic,
+                    'is_safe_choice': bool(is_safe),
+                    'is_dream_choice': bool(is_dream),
+                    'is_realistic_choice': bool(is_realistic),
                     'department': department,
                 })
             
-            # Skora göre sırala
-            recommendations.sort(key=lambda x: x['final_score'], reverse=True)
-            
-            return recommendations[:limit]
+            return recommendations
             
         except Exception as e:
             recommendation_logger.error("ML recommendation failed", error=str(e))
@@ -282,97 +313,102 @@ class MLRecommendationEngine:
         combined = np.concatenate([student_features, dept_features, interaction_features])
         return combined
     
-    def _train_compatibility_model(self, X: np.ndarray, y: np.ndarray):
-        """Uyumluluk modelini eğit - XGBoost ile iyileştirilmiş"""
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        # Özellikleri ölçeklendir
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # XGBoost Regressor (daha güçlü ve hızlı model)
-        model = XGBRegressor(
-            n_estimators=200,
-            max_depth=6,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            objective='reg:squarederror',
-            n_jobs=-1,  # Tüm CPU çekirdeklerini kullan
-            tree_method='hist'  # Daha hızlı eğitim için
-        )
-        model.fit(X_train_scaled, y_train)
-        
-        # Modeli kaydet
-        self.models['compatibility'] = model
-        self.scalers['compatibility'] = scaler
-        
-        # Performansı logla
-        train_score = model.score(X_train_scaled, y_train)
-        test_score = model.score(X_test_scaled, y_test)
-        recommendation_logger.info("Compatibility model trained", train_score=train_score, test_score=test_score)
+    def _load_universities(self, departments: List[Department]) -> Dict[int, University]:
+        """Bölümlerin üniversitelerini tek sorguda getir"""
+        university_ids = {department.university_id for department in departments}
+        return {
+            university.id: university
+            for university in self.db.query(University).filter(University.id.in_(university_ids)).all()
+        }
     
-    def _train_success_model(self, X: np.ndarray, y: np.ndarray):
-        """Başarı olasılığı modelini eğit - XGBoost ile iyileştirilmiş"""
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # XGBoost (başarı olasılığı için daha önemli - daha derin ağaç)
-        model = XGBRegressor(
-            n_estimators=250,
-            max_depth=7,
-            learning_rate=0.04,
-            subsample=0.85,
-            colsample_bytree=0.85,
-            random_state=42,
-            objective='reg:squarederror',
-            n_jobs=-1,
-            tree_method='hist',
-            min_child_weight=3,  # Overfitting'i önlemek için
-            gamma=0.1  # Regularization
-        )
-        model.fit(X_train_scaled, y_train)
+    @staticmethod
+    def _parse_json_list(raw: Optional[str]):
+        """Öğrenci tercih alanını çözümle (geçersizse None)"""
+        if not raw:
+            return None
+        try:
+            return json.loads(raw)
+        except Exception:
+            return None
+    
+    def _prepare_feature_matrix(
+        self,
+        student: Student,
+        departments: List[Department],
+        universities: Dict[int, University]
+    ) -> np.ndarray:
+        """Tüm bölümler için özellik matrisini tek seferde hazırla.
+        
+        Satırlar `_prepare_combined_features` ile birebir aynıdır; fark yalnızca
+        bölüm sütunlarının dizi olarak işlenmesi ve üniversitelerin önceden
+        yüklenmiş olmasıdır.
+        """
+        n = len(departments)
+        min_score = np.array([float(d.min_score or 0.0) for d in departments])
+        min_rank = np.array([float(d.min_rank or 0.0) for d in departments])
+        quota = np.array([float(d.quota or 0.0) for d in departments])
+        tuition_fee = np.array([float(d.tuition_fee or 0.0) for d in departments])
+        has_scholarship = np.array([1.0 if bool(d.has_scholarship) else 0.0 for d in departments])
+        
+        department_universities = [universities.get(d.university_id) for d in departments]
+        university_types = [
+            u.university_type if u and getattr(u, 'university_type', None) else 'Devlet'
+            for u in department_universities
+        ]
+        university_cities = [
+            u.city if u and getattr(u, 'city', None) else ''
+            for u in department_universities
+        ]
         
-        self.models['success'] = model
-        self.scalers['success'] = scaler
+        # Kodlamalar tekil değerler üzerinden bir kez hesaplanır
+        type_codes = {value: self._encode_university_type(value) for value in set(university_types)}
+        city_codes = {value: self._encode_city(value) for value in set(university_cities)}
         
-        train_score = model.score(X_train_scaled, y_train)
-        test_score = model.score(X_test_scaled, y_test)
-        recommendation_logger.info("Success model trained", train_score=train_score, test_score=test_score)
-    
-    def _train_preference_model(self, X: np.ndarray, y: np.ndarray):
-        """Tercih modelini eğit - XGBoost ile iyileştirilmiş"""
-        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        
-        scaler = StandardScaler()
-        X_train_scaled = scaler.fit_transform(X_train)
-        X_test_scaled = scaler.transform(X_test)
-        
-        # XGBoost (tercih skorları için)
-        model = XGBRegressor(
-            n_estimators=200,
-            max_depth=5,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            random_state=42,
-            objective='reg:squarederror',
-            n_jobs=-1,
-            tree_method='hist'
-        )
-        model.fit(X_train_scaled, y_train)
+        # Tercih eşleşmeleri (üniversitesi olmayan bölümler eşleşmez)
+        preferred_cities = self._parse_json_list(student.preferred_cities)
+        preferred_types = self._parse_json_list(student.preferred_university_types)
+        
+        def match(attr, preferred):
+            if preferred is None:
+                return np.zeros(n)
+            values = [getattr(u, attr) if u is not None else None for u in department_universities]
+            try:
+                hits = {value: value in preferred for value in set(values) if value is not None}
+            except Exception:
+                return np.zeros(n)
+            return np.array([1.0 if value is not None and hits[value] else 0.0 for value in values])
         
-        self.models['preference'] = model
-        self.scalers['preference'] = scaler
+        # Öğrenci sütunları tüm satırlarda aynıdır
+        student_block = np.broadcast_to(self._prepare_student_features(student).astype(float), (n, 8))
         
-        train_score = model.score(X_train_scaled, y_train)
-        test_score = model.score(X_test_scaled, y_test)
-        recommendation_logger.info("Preference model trained", train_score=train_score, test_score=test_score)
+        total_score = float(student.total_score or 0)
+        student_rank = float(student.rank or 0)
+        percentile = float(student.percentile or 0)
+        math_strength = (student.tyt_math_net or 0) + (getattr(student, 'ayt_math_net', None) or 0)
+        scholarship_match = has_scholarship if student.scholarship_preference else np.zeros(n)
+        
+        raw_quota = np.array([float(d.quota or 1) for d in departments])
+        
+        return np.column_stack([
+            student_block,
+            min_score,
+            min_rank,
+            quota,
+            tuition_fee,
+            has_scholarship,
+            np.array([type_codes[value] for value in university_types], dtype=float),
+            np.array([city_codes[value] for value in university_cities], dtype=float),
+            total_score - min_score,
+            min_rank - student_rank,
+            total_score / (min_score + 1e-6),
+            student_rank / (min_rank + 1e-6),
+            percentile - (100 - (min_rank / 1000)),
+            np.full(n, float(math_strength)),
+            min_rank / (raw_quota + 1),
+            match('city', preferred_cities),
+            match('university_type', preferred_types),
+            scholarship_match,
+        ])
     
     def _predict_compatibility(self, features: np.ndarray) -> float:
         """Uyumluluk skorunu tahmin et"""
@@ -398,6 +434,14 @@ class MLRecommendationEngine:
         features_scaled = self.scalers['preference'].transform(features)
         return self.models['preference'].predict(features_scaled)[0]
     
+    def _predict_batch(self, name: str, features: np.ndarray) -> np.ndarray:
+        """Tüm satırlar için tek predict çağrısı (model yoksa varsayılan 0.5)"""
+        if name not in self.models:
+            return np.full(len(features), 0.5)
+        
+        features_scaled = self.scalers[name].transform(features)
+        return np.asarray(self.models[name].predict(features_scaled), dtype=float)
+    
     def _generate_ml_reason(self, compatibility: float, success: float, preference: float) -> str:
         """ML destekli öneri sebebi oluştur"""
         reasons = []
@@ -426,10 +470,11 @@ class MLRecommendationEngine:
         from services.recommendation_engine import RecommendationEngine
         rule_engine = RecommendationEngine(self.db)
         recommendations = rule_engine.generate_recommendations(student_id, limit)
-        # Convert Pydantic models to dicts
+        # Convert DTOs to dicts
+        from schemas.dto import to_dict
         result = []
         for rec in recommendations:
-            rec_dict = rec.model_dump() if hasattr(rec, 'model_dump') else rec.dict()
+            rec_dict = to_dict(rec)
             # Ensure department is accessible as ORM object if needed
             if 'department' not in rec_dict or isinstance(rec_dict['department'], dict):
                 # Get department ORM object
@@ -439,54 +484,50 @@ class MLRecommendationEngine:
             result.append(rec_dict)
         return result
     
-    def _save_models(self):
-        """Modelleri kaydet"""
-        os.makedirs(self.model_path, exist_ok=True)
-        
-        for name, model in self.models.items():
-            joblib.dump(model, f"{self.model_path}{name}_model.pkl")
-        
-        for name, scaler in self.scalers.items():
-            joblib.dump(scaler, f"{self.model_path}{name}_scaler.pkl")
+    def _save_models(self, report: Optional[Dict[str, Any]] = None):
+        """Modelleri kaydet ve yeni sürüm manifest'ini yaz (çalışan süreçler manifest'i görünce modeli değiştirir)"""
+        manifest = save_artifacts(self.model_path, self.models, self.scalers, report=report)
+        self.model_version = manifest["version"]
     
     def _load_models(self):
-        """Modelleri yükle"""
+        """Modelleri kayıt defterinden al (süreç başına bir kez yüklenir, manifest değişince yenilenir)"""
         try:
-            for name in ['compatibility', 'success', 'preference']:
-                model_path = f"{self.model_path}{name}_model.pkl"
-                scaler_path = f"{self.model_path}{name}_scaler.pkl"
-                
-                if os.path.exists(model_path) and os.path.exists(scaler_path):
-                    self.models[name] = joblib.load(model_path)
-                    self.scalers[name] = joblib.load(scaler_path)
-                    self.is_trained = True
-            
-            if self.is_trained:
-                recommendation_logger.info("ML models loaded successfully")
+            bundle = model_registry.get(self.model_path)
+            # Sözlükler kopyalanır: train_models bu örneğin modellerini değiştirir, paylaşılan paketi değil
+            self.models = dict(bundle.models)
+            self.scalers = dict(bundle.scalers)
+            self.model_version = bundle.version
+            self.training_report = bundle.report
+            self.is_trained = bundle.is_trained
         except Exception as e:
             recommendation_logger.warning("Failed to load ML models", error=str(e))
     
-    def _encode_field_type(self, field_type: str) -> int:
+    @staticmethod
+    def _encode_field_type(field_type: str) -> int:
         """Alan türünü encode et"""
         mapping = {'SAY': 0, 'EA': 1, 'SÖZ': 2, 'DİL': 3}
         return mapping.get(field_type, 0)
     
-    def _encode_exam_type(self, exam_type: str) -> int:
+    @staticmethod
+    def _encode_exam_type(exam_type: str) -> int:
         """Sınav türünü encode et"""
         mapping = {'TYT': 0, 'AYT': 1, 'TYT+AYT': 2}
         return mapping.get(exam_type, 2)
     
-    def _encode_class_level(self, class_level: str) -> int:
+    @staticmethod
+    def _encode_class_level(class_level: str) -> int:
         """Sınıf seviyesini encode et"""
         mapping = {'12': 0, 'mezun': 1}
         return mapping.get(class_level, 0)
     
-    def _encode_university_type(self, uni_type: str) -> int:
+    @staticmethod
+    def _encode_university_type(uni_type: str) -> int:
         """Üniversite türünü encode et"""
         mapping = {'Devlet': 0, 'Vakıf': 1, 'Özel': 2}
         return mapping.get(uni_type, 0)
     
-    def _encode_city(self, city: str) -> int:
+    @staticmethod
+    def _encode_city(city: str) -> int:
         """Şehri encode et"""
-        # Basit hash fonksiyonu
-        return hash(city) % 1000
+        # Süreçten bağımsız hash (hash() her süreçte farklı tohumlanır; eğitim ve çıkarım aynı kodu görmeli)
+        return zlib.crc32((city or '').encode('utf-8')) % 1000
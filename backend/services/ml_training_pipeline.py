@@ -0,0 +1,278 @@
+"""
+Paralel, erken durdurmalı ML eğitim hattı
+
+Uyumluluk, başarı ve tercih modelleri ayrı worker süreçlerinde aynı anda
+eğitilir. Her model için veri bir kez (sabit tohumla) eğitim / doğrulama /
+test olarak bölünür; XGBoost doğrulama kümesinde `early_stopping_rounds`
+ile durdurulur, test skoru yalnızca raporlama içindir.
+
+İsteğe bağlı sınırlı hiperparametre araması (`search_candidates`) her model
+için temel parametrelerin çevresinden sabit tohumla seçilen adayları da aynı
+havuza gönderir; doğrulama RMSE'si en düşük aday seçilir.
+
+Worker sayısı × worker başına XGBoost thread'i CPU sayısını aşmaz ve worker'lar
+düşük öncelikle (nice) çalışır; eğitim sırasında API süreçleri CPU için
+eğitimle yarışmaz. Sonuçta her model için süre ve metrikleri içeren bir
+rapor döner (kaydedilirken manifest sürümüyle birlikte yazılır).
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from core.logging_config import recommendation_logger
+
+# Model adı -> (hedef sütun, XGBoost parametreleri)
+MODEL_SPECS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    # Uyumluluk
+    "compatibility": ("compatibility", {
+        "n_estimators": 200, "max_depth": 6, "learning_rate": 0.05,
+        "subsample": 0.8, "colsample_bytree": 0.8,
+    }),
+    # Başarı olasılığı (daha önemli - daha derin ağaç, regularization)
+    "success": ("success_probability", {
+        "n_estimators": 250, "max_depth": 7, "learning_rate": 0.04,
+        "subsample": 0.85, "colsample_bytree": 0.85,
+        "min_child_weight": 3, "gamma": 0.1,
+    }),
+    # Tercih skorları
+    "preference": ("preference", {
+        "n_estimators": 200, "max_depth": 5, "learning_rate": 0.05,
+        "subsample": 0.8, "colsample_bytree": 0.8,
+    }),
+}
+
+# Hiperparametre araması: temel değerin çarpanları / farkları
+SEARCH_SPACE: Dict[str, List[Any]] = {
+    "max_depth": [-1, 0, 1],
+    "learning_rate": [0.5, 1.0, 2.0],
+    "subsample": [0.7, 0.8, 0.9],
+    "min_child_weight": [1, 3, 5],
+}
+
+TEST_SIZE = 0.2
+VALIDATION_SIZE = 0.15
+EARLY_STOPPING_ROUNDS = 25
+# Bundan küçük doğrulama kümesiyle erken durdurma yapılmaz (tüm ağaçlar eğitilir)
+MIN_VALIDATION_ROWS = 5
+RANDOM_STATE = 42
+# Süreç başlatma maliyeti küçük veride fit süresini aşar; otomatik modda bu boyutun altı tek süreçte
+PARALLEL_MIN_ROWS = 2000
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(0, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def training_workers() -> int:
+    """ML_TRAINING_WORKERS (0 = otomatik: CPU sayısı - 1, en az 1)"""
+    workers = _env_int("ML_TRAINING_WORKERS", 0)
+    return workers or max(1, (os.cpu_count() or 1) - 1)
+
+
+def search_candidates() -> int:
+    """ML_HYPERPARAM_CANDIDATES: model başına ek aday sayısı (0 = arama yok)"""
+    return _env_int("ML_HYPERPARAM_CANDIDATES", 0)
+
+
+class DataSplit(NamedTuple):
+    """Tüm modeller ve adaylar için ortak eğitim / doğrulama / test indeksleri"""
+    train: np.ndarray
+    validation: np.ndarray
+    test: np.ndarray
+
+
+class FitResult(NamedTuple):
+    name: str
+    params: Dict[str, Any]
+    model: Any
+    scaler: Any
+    metrics: Dict[str, Any]
+
+
+class TrainingResult(NamedTuple):
+    models: Dict[str, Any]
+    scalers: Dict[str, Any]
+    report: Dict[str, Any]
+
+
+def split_indices(n: int, seed: int = RANDOM_STATE) -> DataSplit:
+    """Sabit tohumla karıştırıp test ve doğrulama kümelerini ayır"""
+    order = np.random.RandomState(seed).permutation(n)
+    n_test = int(np.ceil(n * TEST_SIZE)) if n > 1 else 0
+    n_validation = int(np.ceil((n - n_test) * VALIDATION_SIZE))
+    if n_validation < MIN_VALIDATION_ROWS:
+        n_validation = 0
+    return DataSplit(
+        train=np.sort(order[n_test + n_validation:]),
+        validation=np.sort(order[n_test:n_test + n_validation]),
+        test=np.sort(order[:n_test]),
+    )
+
+
+def candidate_params(base: Dict[str, Any], count: int, seed: int = RANDOM_STATE) -> List[Dict[str, Any]]:
+    """Temel parametreler + çevresinden sabit tohumla seçilen en fazla `count` farklı aday"""
+    rng = np.random.RandomState(seed)
+    candidates, seen = [dict(base)], {tuple(sorted(base.items()))}
+    for _ in range(count * 10):
+        if len(candidates) > count:
+            break
+        params = dict(base)
+        params["max_depth"] = max(2, base["max_depth"] + int(rng.choice(SEARCH_SPACE["max_depth"])))
+        params["learning_rate"] = round(base["learning_rate"] * float(rng.choice(SEARCH_SPACE["learning_rate"])), 4)
+        params["subsample"] = float(rng.choice(SEARCH_SPACE["subsample"]))
+        params["min_child_weight"] = int(rng.choice(SEARCH_SPACE["min_child_weight"]))
+        key = tuple(sorted(params.items()))
+        if key not in seen:
+            seen.add(key)
+            candidates.append(params)
+    return candidates
+
+
+def _r2(y_true: np.ndarray, y_pred: np.ndarray) -> Optional[float]:
+    if len(y_true) < 2:
+        return None
+    denominator = float(np.sum((y_true - y_true.mean()) ** 2))
+    if denominator == 0.0:
+        return None
+    return 1.0 - float(np.sum((y_true - y_pred) ** 2)) / denominator
+
+
+def _rmse(y_true: np.ndarray, y_pred: np.ndarray) -> Optional[float]:
+    return float(np.sqrt(np.mean((y_true - y_pred) ** 2))) if len(y_true) else None
+
+
+def fit_model(
+    name: str,
+    X: np.ndarray,
+    y: np.ndarray,
+    split: DataSplit,
+    params: Dict[str, Any],
+    n_jobs: int = 1,
+) -> FitResult:
+    """Tek modeli eğit (worker sürecinde çalışır; sonuç pickle ile geri döner)"""
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBRegressor
+
+    started = time.perf_counter()
+    scaler = StandardScaler()
+    X_train = scaler.fit_transform(X[split.train])
+    early_stopping = len(split.validation) > 0
+    model = XGBRegressor(
+        **params,
+        random_state=RANDOM_STATE,
+        objective="reg:squarederror",
+        tree_method="hist",
+        n_jobs=n_jobs,
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS if early_stopping else None,
+    )
+    if early_stopping:
+        X_validation = scaler.transform(X[split.validation])
+        model.fit(X_train, y[split.train], eval_set=[(X_validation, y[split.validation])], verbose=False)
+    else:
+        model.fit(X_train, y[split.train])
+    fit_seconds = time.perf_counter() - started
+
+    metrics: Dict[str, Any] = {
+        "fit_seconds": round(fit_seconds, 4),
+        "train_rows": int(len(split.train)),
+        "validation_rows": int(len(split.validation)),
+        "test_rows": int(len(split.test)),
+        "n_estimators": int(params["n_estimators"]),
+        "best_iteration": int(model.best_iteration) if early_stopping else None,
+        "train_r2": _r2(y[split.train], model.predict(X_train)),
+    }
+    for part in ("validation", "test"):
+        rows = getattr(split, part)
+        predictions = model.predict(scaler.transform(X[rows])) if len(rows) else np.empty(0)
+        metrics[f"{part}_r2"] = _r2(y[rows], predictions)
+        metrics[f"{part}_rmse"] = _rmse(y[rows], predictions)
+    return FitResult(name, params, model, scaler, metrics)
+
+
+def _init_worker() -> None:
+    """Eğitim worker'ları API süreçlerinden düşük öncelikle çalışır"""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(10)
+        except OSError:
+            pass
+
+
+def _selection_key(result: FitResult) -> float:
+    """Doğrulama RMSE'si (doğrulama kümesi yoksa test, o da yoksa eğitim sırası)"""
+    metrics = result.metrics
+    for key in ("validation_rmse", "test_rmse"):
+        if metrics.get(key) is not None:
+            return metrics[key]
+    return 0.0
+
+
+def train_models_parallel(
+    X: np.ndarray,
+    targets: Dict[str, np.ndarray],
+    max_workers: Optional[int] = None,
+    n_candidates: Optional[int] = None,
+) -> TrainingResult:
+    """Tüm modelleri (ve arama adaylarını) süreç havuzunda eğit, en iyileri seç
+
+    max_workers verilmezse ML_TRAINING_WORKERS kullanılır (küçük veride tek süreç).
+    """
+    started_at = datetime.now()
+    started = time.perf_counter()
+    split = split_indices(len(X))
+    n_candidates = search_candidates() if n_candidates is None else n_candidates
+
+    jobs = [
+        (name, np.asarray(targets[target], dtype=float), params)
+        for name, (target, base) in MODEL_SPECS.items()
+        for params in candidate_params(base, n_candidates)
+    ]
+    if max_workers is None:
+        max_workers = training_workers() if len(X) >= PARALLEL_MIN_ROWS else 1
+    workers = min(len(jobs), max(1, max_workers))
+    # Worker'lar toplamda CPU sayısını aşmayacak kadar thread kullanır
+    n_jobs = max(1, (os.cpu_count() or 1) // workers)
+
+    if workers <= 1:
+        results = [fit_model(name, X, y, split, params, n_jobs) for name, y, params in jobs]
+    else:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as executor:
+            futures = [executor.submit(fit_model, name, X, y, split, params, n_jobs) for name, y, params in jobs]
+            results = [future.result() for future in futures]
+
+    models, scalers, report_models = {}, {}, {}
+    for name in MODEL_SPECS:
+        candidates = [r for r in results if r.name == name]
+        best = min(candidates, key=_selection_key)
+        models[name], scalers[name] = best.model, best.scaler
+        report_models[name] = {
+            "params": best.params,
+            "metrics": best.metrics,
+            "candidates": len(candidates),
+        }
+        recommendation_logger.info("ML model trained", model=name, candidates=len(candidates), **best.metrics)
+
+    wall_seconds = time.perf_counter() - started
+    report = {
+        "started_at": started_at.isoformat(),
+        "wall_seconds": round(wall_seconds, 4),
+        # Tüm fit sürelerinin toplamı: sıralı eğitimin yaklaşık süresi
+        "fit_seconds_total": round(sum(r.metrics["fit_seconds"] for r in results), 4),
+        "workers": workers,
+        "threads_per_worker": n_jobs,
+        "samples": int(len(X)),
+        "features": int(X.shape[1]) if X.ndim == 2 else 0,
+        "search_candidates": n_candidates,
+        "early_stopping_rounds": EARLY_STOPPING_ROUNDS if len(split.validation) else None,
+        "models": report_models,
+    }
+    return TrainingResult(models, scalers, report)
@@ -0,0 +1,313 @@
+"""
+ML yeniden eğitim zamanlayıcısı
+Deneme/profil değişikliklerinden gelen eğitim tetiklerini bir pencere içinde
+birleştirir, eğitim verisi değişmediyse eğitimi atlar ve eğitimi ayrı bir
+süreçte çalıştırır (event loop ve istek işleme bloklanmaz).
+
+Eğitim verisi önce gerçek swipe/tercih/denemelerden özellik deposuna
+(services/feature_store.py) artımlı olarak işlenir; depoda yeterli çift
+yoksa simüle edilmiş veriye dönülür.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from core.logging_config import recommendation_logger
+
+DATA_HASH_FILENAME = "training_data.sha256"
+
+
+def training_data_hash(training_data: List[Dict[str, Any]]) -> str:
+    """Eğitim verisinin içerik hash'i (sıralı anahtarlarla kararlı JSON)"""
+    payload = json.dumps(
+        training_data,
+        sort_keys=True,
+        default=lambda value: value.item() if hasattr(value, "item") else str(value),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _refresh_feature_store(model_path: str):
+    """Özellik deposunu güncelle; yeterli çift yoksa veya güncellenemezse None"""
+    from database import SessionLocal
+    from services.feature_store import feature_store_path, min_training_pairs, refresh_feature_store
+
+    db = SessionLocal()
+    try:
+        store = refresh_feature_store(db, feature_store_path(model_path))
+    except Exception as e:
+        recommendation_logger.warning("ML feature store refresh failed", error=str(e))
+        return None
+    finally:
+        db.close()
+    return store if store.pairs >= min_training_pairs() else None
+
+
+def _read_data_hash(model_path: str) -> Optional[str]:
+    try:
+        with open(os.path.join(model_path, DATA_HASH_FILENAME), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _models_exist(model_path: str) -> bool:
+    """Manifest'teki sürüm tüm modelleri içeriyor ve dosyaları yerinde mi"""
+    from services.ml_model_registry import MODEL_NAMES, read_manifest
+
+    manifest = read_manifest(model_path)
+    artifacts = manifest.get("artifacts", {}) if manifest else {}
+    return all(
+        name in artifacts
+        and all(os.path.exists(os.path.join(model_path, artifacts[name][kind])) for kind in ("model", "scaler"))
+        for name in MODEL_NAMES
+    )
+
+
+def _train_in_subprocess(
+    training_data: Optional[List[Dict[str, Any]]],
+    data_hash: str,
+    model_path: str,
+    store_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Alt süreçte çalışır: modelleri eğitir, kaydeder ve veri hash'ini yazar"""
+    from services.ml_recommendation_engine import MLRecommendationEngine
+
+    started = time.perf_counter()
+    engine = MLRecommendationEngine(db=None)
+    engine.model_path = model_path
+    if store_path is not None:
+        engine.train_models_from_store(store_path)
+    else:
+        engine.train_models(training_data)
+    with open(os.path.join(model_path, DATA_HASH_FILENAME), "w", encoding="utf-8") as f:
+        f.write(data_hash)
+    report = engine.training_report or {}
+    return {
+        "duration_seconds": time.perf_counter() - started,
+        "samples": report.get("samples"),
+        "source": report.get("source"),
+        "version": engine.model_version,
+        "fit_wall_seconds": report.get("wall_seconds"),
+        "fit_seconds_total": report.get("fit_seconds_total"),
+        "workers": report.get("workers"),
+    }
+
+
+class MLTrainingScheduler:
+    """Tetikleri pencere başına tek eğitime indiren, süreç geneli zamanlayıcı"""
+
+    def __init__(self, window_seconds: Optional[float] = None, use_subprocess: bool = True):
+        if window_seconds is None:
+            try:
+                window_seconds = max(0.0, float(os.getenv("ML_RETRAIN_WINDOW_SECONDS", "300")))
+            except ValueError:
+                window_seconds = 300.0
+        self.window_seconds = window_seconds
+        self.use_subprocess = use_subprocess
+
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._scheduled_for: Optional[datetime] = None
+        self._running = False
+        self._closed = False
+
+        # Bekleyen tetikler (bir sonraki çalıştırmada birleştirilir)
+        self._pending_triggers = 0
+        self._pending_reasons: Dict[str, int] = {}
+        self._pending_force = False
+
+        # İstatistikler
+        self.total_triggers = 0
+        self.coalesced_triggers = 0
+        self.runs = 0
+        self.skipped_runs = 0
+        self.failed_runs = 0
+        self.last_trigger_at: Optional[datetime] = None
+        self.last_started_at: Optional[datetime] = None
+        self.last_finished_at: Optional[datetime] = None
+        self.last_duration_seconds: Optional[float] = None
+        self.last_result: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_data_hash: Optional[str] = None
+
+    # --- Tetikleme ----------------------------------------------------------
+
+    def request_retrain(self, reason: str = "unspecified", force: bool = False, delay: Optional[float] = None) -> None:
+        """Yeniden eğitim iste. Pencere içindeki tüm istekler tek eğitimde birleşir.
+
+        Args:
+            reason: Tetik kaynağı (durum raporunda sayılır)
+            force: Veri hash'i aynı olsa bile eğit
+            delay: Pencere yerine kullanılacak bekleme (ör. manuel tetik için 0)
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self.total_triggers += 1
+            self.last_trigger_at = datetime.now()
+            if self._pending_triggers:
+                self.coalesced_triggers += 1
+            self._pending_triggers += 1
+            self._pending_reasons[reason] = self._pending_reasons.get(reason, 0) + 1
+            self._pending_force = self._pending_force or force
+
+            wait = self.window_seconds if delay is None else max(0.0, delay)
+            if self._running:
+                # Çalışan eğitim bitince bekleyen tetikler için yeni tur planlanır
+                return
+            if self._timer is not None:
+                # Daha erken bir çalıştırma istenmediyse mevcut pencere korunur
+                if self._scheduled_for is None or time.time() + wait >= self._scheduled_for.timestamp():
+                    return
+                self._timer.cancel()
+            self._schedule_locked(wait)
+
+        recommendation_logger.debug("ML retrain requested", reason=reason, wait_seconds=wait)
+
+    def _schedule_locked(self, wait: float) -> None:
+        self._scheduled_for = datetime.fromtimestamp(time.time() + wait)
+        self._timer = threading.Timer(wait, self._run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    # --- Çalıştırma ---------------------------------------------------------
+
+    def _run(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._scheduled_for = None
+            if self._closed or self._running or not self._pending_triggers:
+                return
+            self._running = True
+            triggers = self._pending_triggers
+            reasons = dict(self._pending_reasons)
+            force = self._pending_force
+            self._pending_triggers = 0
+            self._pending_reasons = {}
+            self._pending_force = False
+            self.last_started_at = datetime.now()
+
+        try:
+            self.run_once(force=force, triggers=triggers, reasons=reasons)
+        finally:
+            with self._lock:
+                self._running = False
+                if self._pending_triggers and not self._closed:
+                    self._schedule_locked(self.window_seconds)
+
+    def run_once(self, force: bool = False, triggers: int = 1, reasons: Optional[Dict[str, int]] = None) -> str:
+        """Eğitim verisini oluştur, hash değişmediyse atla, aksi halde eğit.
+
+        Returns:
+            "trained", "skipped" veya "failed"
+        """
+        from scripts.train_ml_models import generate_training_data
+        from services.ml_recommendation_engine import resolve_model_path
+
+        started = time.perf_counter()
+        model_path = resolve_model_path()
+        try:
+            store = _refresh_feature_store(model_path)
+            if store is not None:
+                training_data, store_path, samples = None, store.path, store.pairs
+                data_hash = hashlib.sha256(f"feature_store:{store.version}".encode("utf-8")).hexdigest()
+            else:
+                training_data, store_path = generate_training_data(), None
+                samples = len(training_data)
+                data_hash = training_data_hash(training_data)
+
+            if not force and data_hash == _read_data_hash(model_path) and _models_exist(model_path):
+                result = "skipped"
+                with self._lock:
+                    self.skipped_runs += 1
+                recommendation_logger.info(
+                    "ML retrain skipped, training data unchanged",
+                    triggers=triggers, reasons=reasons, data_hash=data_hash[:12]
+                )
+            else:
+                os.makedirs(model_path, exist_ok=True)
+                recommendation_logger.info(
+                    "ML retrain started", triggers=triggers, reasons=reasons, samples=samples,
+                    source="feature_store" if store_path else "synthetic"
+                )
+                if self.use_subprocess:
+                    context = multiprocessing.get_context("spawn")
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        summary = executor.submit(
+                            _train_in_subprocess, training_data, data_hash, model_path, store_path
+                        ).result()
+                else:
+                    summary = _train_in_subprocess(training_data, data_hash, model_path, store_path)
+                result = "trained"
+                with self._lock:
+                    self.runs += 1
+                recommendation_logger.info("ML retrain completed", **summary)
+
+            with self._lock:
+                self.last_data_hash = data_hash
+                self.last_error = None
+        except Exception as e:
+            result = "failed"
+            with self._lock:
+                self.failed_runs += 1
+                self.last_error = str(e)
+            recommendation_logger.error("ML retrain failed", error=str(e))
+
+        with self._lock:
+            self.last_result = result
+            self.last_finished_at = datetime.now()
+            self.last_duration_seconds = time.perf_counter() - started
+        return result
+
+    # --- Durum --------------------------------------------------------------
+
+    @property
+    def state(self) -> str:
+        if self._running:
+            return "training"
+        if self._timer is not None:
+            return "scheduled"
+        return "idle"
+
+    def status(self) -> Dict[str, Any]:
+        """/model-status için zamanlayıcı durumu"""
+        with self._lock:
+            return {
+                "state": self.state,
+                "window_seconds": self.window_seconds,
+                "pending_triggers": self._pending_triggers,
+                "scheduled_for": self._scheduled_for,
+                "total_triggers": self.total_triggers,
+                "coalesced_triggers": self.coalesced_triggers,
+                "runs": self.runs,
+                "skipped_runs": self.skipped_runs,
+                "failed_runs": self.failed_runs,
+                "last_trigger_at": self.last_trigger_at,
+                "last_started_at": self.last_started_at,
+                "last_finished_at": self.last_finished_at,
+                "last_duration_seconds": self.last_duration_seconds,
+                "last_result": self.last_result,
+                "last_error": self.last_error,
+                "last_data_hash": self.last_data_hash,
+            }
+
+    def shutdown(self) -> None:
+        """Planlanmış eğitimi iptal et (uygulama kapanışı)"""
+        with self._lock:
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+                self._scheduled_for = None
+
+
+# Süreç geneli zamanlayıcı
+ml_training_scheduler = MLTrainingScheduler()
@@ -1,10 +1,33 @@
 # -*- coding: utf-8 -*-
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Callable, Iterable, Tuple, Optional
 from sqlalchemy.orm import Session
 from models import Student, Department, University, Recommendation
-from schemas.university import RecommendationResponse, DepartmentWithUniversityResponse
+from schemas.dto import RecommendationDTO, department_dto, recommendation_dto, university_dto
 from core.logging_config import recommendation_logger
 from core.exceptions import RecommendationError, StudentNotFoundError
+from services.admission import AdmissionModel, admission_store
+from services.catalogue import department_catalogue
+from services.collaborative import Affinity, collaborative_store
+from services.vectorized_scoring import (
+    DepartmentArrays,
+    ScoreArrays,
+    city_priority_mask,
+    eligible_mask,
+    parse_preferred_cities,
+    score_departments,
+    select_top_k,
+    success_probabilities,
+)
+from services.recommendation_materializer import (
+    MaterializationResult,
+    changed_components,
+    incremental_scores,
+    load_stored,
+    materialize,
+    model_versions,
+)
+from types import SimpleNamespace
+import numpy as np
 import json
 
 
@@ -14,22 +37,13 @@ class RecommendationEngine:
     def __init__(self, db: Session):
         self.db = db
     
-    @staticmethod
-    def _get_university_logo_url(university: University) -> Optional[str]:
-        """Üniversite logosu URL'i oluştur"""
-        if university.website:
-            # Website varsa, domain'den favicon çek (Google Favicon API)
-            domain = university.website.replace('http://', '').replace('https://', '').replace('www.', '').split('/')[0]
-            return f"https://www.google.com/s2/favicons?domain={domain}&sz=256"
-        return None
-    
     def generate_recommendations(
         self,
         student_id: int,
         limit: int = 50,
         weights: Optional[Tuple[float, float, float]] = None
-    ) -> List[RecommendationResponse]:
-        """Öğrenci için tercih önerileri oluştur"""
+    ) -> List[RecommendationDTO]:
+        """Öğrenci için tercih önerileri oluştur (RecommendationResponse ile aynı alanlara sahip DTO'lar)"""
         try:
             recommendation_logger.info(
                 "Starting recommendation generation",
@@ -45,142 +59,57 @@ class RecommendationEngine:
                 )
                 raise StudentNotFoundError(f"Student with ID {student_id} not found")
             
-            # Öğrencinin alan türüne uygun bölümleri getir
-            # ✅ min_score None olan bölümleri de dahil et (filtreleme yapma)
-            departments = self.db.query(Department).filter(
-                Department.field_type == student.field_type
-            ).all()
-            
-            # ✅ min_score None olan bölümleri listenin sonuna taşı (öncelik verme)
-            departments_with_score = []
-            departments_without_score = []
-            for dept in departments:
-                if dept.min_score is not None and dept.min_score > 0:
-                    departments_with_score.append(dept)
-                else:
-                    departments_without_score.append(dept)
-            departments = departments_with_score + departments_without_score
-            
-            # ✅ ŞEHİR ÖNCELİĞİ: Öğrencinin tercih ettiği şehirleri al
-            preferred_cities = []
-            if student.preferred_cities:
-                try:
-                    import json
-                    preferred_cities = json.loads(student.preferred_cities) if isinstance(student.preferred_cities, str) else student.preferred_cities
-                except:
-                    preferred_cities = []
-            
-            # ✅ Şehir önceliğine göre bölümleri sırala
-            # Önce tercih edilen şehirlerdeki üniversiteler, sonra diğerleri
-            from models import University
-            departments_with_priority = []
-            other_departments = []
-            
-            for department in departments:
-                university = self.db.query(University).filter(University.id == department.university_id).first()
-                if university and preferred_cities:
-                    # Şehir ismini normalize et (büyük/küçük harf duyarsız)
-                    city_normalized = university.city.lower().strip() if university.city else ""
-                    if any(pref_city.lower().strip() == city_normalized for pref_city in preferred_cities):
-                        departments_with_priority.append(department)
-                        continue
-                other_departments.append(department)
+            # ✅ VEKTÖREL SKORLAMA: Alan türündeki tüm bölümleri tek sorguda sütunsal dizilere yükle
+            # (bölüm başına University sorgusu ve JSON çözümleme yok)
+            arrays = self._load_department_arrays(student.field_type)
             
-            # Tercih edilen şehirlerdeki bölümler önce, sonra diğerleri
-            departments = departments_with_priority + other_departments
+            # ✅ ŞEHİR ÖNCELİĞİ: Tercih edilen şehirlerdeki bölümler eşit skorlarda önce gelir
+            preferred_cities = parse_preferred_cities(student.preferred_cities)
+            priority = city_priority_mask(arrays, preferred_cities)
+            tie_order = np.where(priority, 0, len(arrays)) + np.arange(len(arrays))
             
             # Ağırlıklar (compatibility, success, preference)
             if not weights:
                 weights = (0.4, 0.4, 0.2)
             w_c, w_s, w_p = weights
             total_w = max(1e-9, (w_c + w_s + w_p))
-            w_c, w_s, w_p = w_c / total_w, w_s / total_w, w_p / total_w
-
-            recommendations = []
+            weights = (w_c / total_w, w_s / total_w, w_p / total_w)
             
-            for department in departments:
-                # ✅ NULL/None KONTROLÜ: Eğer kritik veriler eksikse atla veya varsayılan değer kullan
-                # Field type kontrolü (kritik - None olamaz)
-                if not department.field_type or department.field_type.strip() == '':
-                    continue  # Field type yoksa bölümü atla
-                
-                # Öğrencinin alan türü ile eşleşmeyen bölümleri atla
-                if student.field_type and department.field_type != student.field_type:
-                    continue
-                
-                # ✅ NULL PUAN KORUMASI: min_score veya min_rank None olan bölümleri hesaplamaya katma
-                if department.min_score is None or department.min_score <= 0:
-                    recommendation_logger.debug(
-                        f"Skipping department {department.id} (name: {department.name}) - min_score is None or <= 0",
-                        department_id=department.id
-                    )
-                    continue  # min_score None ise bu bölümü atla (hesaplamaya katma)
-                
-                # ✅ min_rank kontrolü (opsiyonel ama güvenlik için)
-                if department.min_rank is None or department.min_rank <= 0:
-                    # min_rank None ise de devam et, ama logla
-                    recommendation_logger.debug(
-                        f"Department {department.id} has None min_rank, continuing with min_score only",
-                        department_id=department.id
-                    )
-                
-                try:
-                    # Uyumluluk skorunu hesapla
-                    compatibility_score = self._calculate_compatibility_score(student, department)
-                    
-                    # Başarı olasılığını hesapla
-                    success_probability = self._calculate_success_probability(student, department)
-                    
-                    # Tercih skorunu hesapla
-                    preference_score = self._calculate_preference_score(student, department)
-                except Exception as e:
-                    # Hesaplama hatası durumunda bu bölümü atla
-                    recommendation_logger.warning(
-                        f"Error calculating scores for department {department.id}: {str(e)}",
-                        department_id=department.id
-                    )
-                    continue
-                
-                # Final skorunu hesapla (ağırlıklı ortalama)
-                final_score = (
-                    compatibility_score * w_c +
-                    success_probability * w_s +
-                    preference_score * w_p
-                )
-                
-                # Öneri türünü belirle
-                is_safe = success_probability >= 80
-                is_dream = success_probability <= 30
-                is_realistic = 30 < success_probability < 80
-                
-                # Öneri sebebini oluştur
-                reason = self._generate_recommendation_reason(
-                    student, department, compatibility_score, 
-                    success_probability, preference_score
+            # ✅ NULL PUAN KORUMASI: alan türü boş veya min_score None/<= 0 olan bölümler hesaplamaya katılmaz
+            eligible = eligible_mask(arrays, student.field_type)
+            skipped = len(arrays) - int(eligible.sum())
+            if skipped:
+                recommendation_logger.debug(
+                    "Skipping departments without min_score",
+                    user_id=student_id,
+                    skipped=skipped
                 )
-                
-                # Veritabanına kaydet
-                recommendation = Recommendation(
-                    student_id=student_id,
-                    department_id=department.id,
-                    compatibility_score=compatibility_score,
-                    success_probability=success_probability,
-                    preference_score=preference_score,
-                    final_score=final_score,
-                    recommendation_reason=reason,
-                    is_safe_choice=is_safe,
-                    is_dream_choice=is_dream,
-                    is_realistic_choice=is_realistic
-                )
-                
-                self.db.add(recommendation)
-                recommendations.append(recommendation)
             
-            self.db.commit()
+            admission = self._admission_model()
+            collaborative = self._collaborative_affinity(student_id)
+            scores = score_departments(
+                student, arrays, weights, np.flatnonzero(eligible), admission=admission,
+                collaborative=collaborative
+            )
+            reasons = self._generate_recommendation_reasons(student, arrays, scores)
             
-            # Final skora göre sırala ve limit uygula
-            recommendations.sort(key=lambda x: x.final_score, reverse=True)
-            recommendations = recommendations[:limit]
+            # Final skora göre en iyi `limit` bölümü seç (argpartition)
+            top = select_top_k(scores.final, limit, tie_order[scores.positions])
+            
+            # ✅ DELTA YAZMA: Tüm skorlanan bölümler saklanır ama yalnızca değişen satırlar
+            # güncellenir, yeni bölümler eklenir, uygun olmayanlar silinir (delete-all + insert-all yok)
+            result_summary = materialize(
+                self.db, student_id, arrays, scores, reasons, versions=model_versions(admission, collaborative)
+            )
+            self.db.commit()
+            recommendation_logger.debug(
+                "Recommendations materialized",
+                user_id=student_id,
+                inserted=result_summary.inserted,
+                updated=result_summary.updated,
+                deleted=result_summary.deleted
+            )
+            recommendations = self._load_recommendations(student_id, arrays.ids[scores.positions[top]])
             
             # ✅ FALLBACK: Eğer hiç öneri yoksa popüler bölümleri döndür
             if not recommendations or len(recommendations) == 0:
@@ -233,24 +162,36 @@ class RecommendationEngine:
                 self.db.commit()
             
             # ✅ N+1 problemini çöz: Tüm department ve university'leri tek seferde çek
+            # (katalog yüklüyse bellekten, DB'ye gitmeden)
             department_ids = {rec.department_id for rec in recommendations}
-            departments_dict = {
-                dept.id: dept 
-                for dept in self.db.query(Department)
-                    .filter(Department.id.in_(department_ids))
-                    .all()
-            }
-            
-            university_ids = {dept.university_id for dept in departments_dict.values()}
-            universities_dict = {
-                uni.id: uni 
-                for uni in self.db.query(University)
-                    .filter(University.id.in_(university_ids))
-                    .all()
-            }
+            snapshot = department_catalogue.get()
+            if snapshot is not None:
+                departments_dict = {
+                    dept_id: snapshot.departments[dept_id]
+                    for dept_id in department_ids
+                    if dept_id in snapshot.departments
+                }
+                universities_dict = snapshot.universities
+            else:
+                departments_dict = {
+                    dept.id: dept 
+                    for dept in self.db.query(Department)
+                        .filter(Department.id.in_(department_ids))
+                        .all()
+                }
+                
+                university_ids = {dept.university_id for dept in departments_dict.values()}
+                universities_dict = {
+                    uni.id: uni 
+                    for uni in self.db.query(University)
+                        .filter(University.id.in_(university_ids))
+                        .all()
+                }
             
-            # Response formatına çevir
+            # Response formatına çevir (DTO: satır başına Pydantic doğrulaması yok,
+            # katalog yüklüyse bölüm DTO'ları snapshot'tan paylaşılır)
             result = []
+            university_dtos = {}
             for rec in recommendations:
                 department = departments_dict.get(rec.department_id)
                 if not department:
@@ -260,65 +201,15 @@ class RecommendationEngine:
                 if not university:
                     continue
                 
-                # Logo URL ekle
-                logo_url = self._get_university_logo_url(university)
-                
-                # University response oluştur
-                from schemas.university import UniversityResponse
-                university_response = UniversityResponse(
-                    id=university.id,
-                    name=university.name,
-                    city=university.city,
-                    university_type=university.university_type,
-                    website=university.website,
-                    established_year=university.established_year,
-                    latitude=university.latitude,
-                    longitude=university.longitude,
-                    created_at=university.created_at,
-                    updated_at=university.updated_at,
-                    logo_url=logo_url
-                )
-                
-                department_response = DepartmentWithUniversityResponse(
-                    id=department.id,
-                    university_id=department.university_id,
-                    name=department.name,
-                    field_type=department.field_type,
-                    language=department.language,
-                    faculty=department.faculty,
-                    duration=department.duration,
-                    degree_type=department.degree_type,
-                    min_score=department.min_score,
-                    min_rank=department.min_rank,
-                    quota=department.quota,
-                    scholarship_quota=department.scholarship_quota,
-                    tuition_fee=department.tuition_fee,
-                    has_scholarship=department.has_scholarship,
-                    last_year_min_score=department.last_year_min_score,
-                    last_year_min_rank=department.last_year_min_rank,
-                    last_year_quota=department.last_year_quota,
-                    description=department.description,
-                    requirements=department.requirements,
-                    created_at=department.created_at,
-                    updated_at=department.updated_at,
-                    university=university_response
-                )
+                if snapshot is not None:
+                    department_response = snapshot.department_dto(department, university)
+                else:
+                    university_response = university_dtos.get(university.id)
+                    if university_response is None:
+                        university_response = university_dtos[university.id] = university_dto(university)
+                    department_response = department_dto(department, university_response)
                 
-                result.append(RecommendationResponse(
-                    id=rec.id,
-                    student_id=rec.student_id,
-                    department_id=rec.department_id,
-                    compatibility_score=rec.compatibility_score,
-                    success_probability=rec.success_probability,
-                    preference_score=rec.preference_score,
-                    final_score=rec.final_score,
-                    recommendation_reason=rec.recommendation_reason,
-                    is_safe_choice=rec.is_safe_choice,
-                    is_dream_choice=rec.is_dream_choice,
-                    is_realistic_choice=rec.is_realistic_choice,
-                    created_at=rec.created_at,
-                    department=department_response
-                ))
+                result.append(recommendation_dto(rec, department_response))
             
             recommendation_logger.info(
                 "Recommendations generated successfully",
@@ -334,7 +225,167 @@ class RecommendationEngine:
             recommendation_logger.error(f"Error generating recommendations: {str(e)}", user_id=student_id)
             self.db.rollback()
             raise RecommendationError(f"Tercih önerileri oluşturulurken bir hata oluştu: {str(e)}")
-    
+
+    def _admission_model(self) -> Optional[AdmissionModel]:
+        """Sıralama tabanlı olasılık modeli (yüklenmemişse bir kez yüklenir; hata olursa puan kuralları)"""
+        model = admission_store.get()
+        if model is None:
+            try:
+                model = admission_store.load(self.db)
+            except Exception as e:
+                self.db.rollback()
+                recommendation_logger.warning(f"Admission model unavailable: {str(e)[:100]}")
+                return None
+        return model
+
+    def _collaborative_affinity(self, student_id: int) -> Optional[Affinity]:
+        """Öğrencinin beğenilerine benzer bölümlerin skorları (benzerlik yoksa veya hata olursa None)"""
+        try:
+            return collaborative_store.affinity(self.db, student_id)
+        except Exception as e:
+            self.db.rollback()
+            recommendation_logger.warning(f"Collaborative scores unavailable: {str(e)[:100]}", user_id=student_id)
+            return None
+
+    def _load_department_arrays(self, field_type: str) -> DepartmentArrays:
+        """Alan türündeki bölümleri (üniversite şehir/tür bilgisiyle) tek sorguda dizilere yükle"""
+        snapshot = department_catalogue.get()
+        if snapshot is not None:
+            return snapshot.field_type_arrays(field_type)
+        rows = self.db.query(
+            Department.id,
+            Department.university_id,
+            Department.name,
+            Department.field_type,
+            Department.min_score,
+            Department.min_rank,
+            Department.tuition_fee,
+            Department.has_scholarship,
+            University.city,
+            University.university_type,
+        ).outerjoin(
+            University, University.id == Department.university_id
+        ).filter(
+            Department.field_type == field_type
+        ).order_by(Department.id).all()
+        return DepartmentArrays.from_rows(rows)
+
+    def _generate_recommendation_reasons(
+        self, student: Student, arrays: DepartmentArrays, scores: ScoreArrays
+    ) -> List[str]:
+        """Öneri sebeplerini toplu oluştur.
+
+        Sebep metni yalnızca skor aralıklarına bağlı olduğundan her benzersiz
+        aralık kombinasyonu için `_generate_recommendation_reason` bir kez çağrılır.
+        """
+        if len(scores) == 0:
+            return []
+        min_score = arrays.min_score[scores.positions]
+        success_bucket = np.select([scores.success >= 80, scores.success >= 60], [0, 1], 2)
+        compatibility_bucket = np.select([scores.compatibility >= 80, scores.compatibility >= 60], [0, 1], 2)
+        preference_bucket = np.select([scores.preference >= 80, scores.preference >= 60], [0, 1], 2)
+        diff_bucket = np.full(len(scores), 3)
+        if student.total_score and student.total_score > 0:
+            with np.errstate(invalid="ignore"):
+                score_diff = float(student.total_score) - min_score
+                diff_bucket = np.where(
+                    min_score > 0,
+                    np.select([score_diff > 20, score_diff > 0], [0, 1], 2),
+                    3,
+                )
+        codes = ((success_bucket * 3 + compatibility_bucket) * 3 + preference_bucket) * 4 + diff_bucket
+
+        unique_codes, first_index, inverse = np.unique(codes, return_index=True, return_inverse=True)
+        texts = [
+            self._generate_recommendation_reason(
+                student,
+                SimpleNamespace(min_score=float(min_score[i])),
+                float(scores.compatibility[i]),
+                float(scores.success[i]),
+                float(scores.preference[i]),
+            )
+            for i in first_index
+        ]
+        return [texts[k] for k in inverse.tolist()]
+
+    def _load_recommendations(self, student_id: int, department_ids: np.ndarray) -> List[Recommendation]:
+        """Verilen bölümlerin saklı öneri satırlarını bu sırayla getir (tek sorgu)"""
+        ids = [int(dept_id) for dept_id in department_ids]
+        if not ids:
+            return []
+        by_department = {}
+        for rec in self.db.query(Recommendation).filter(
+            Recommendation.student_id == student_id,
+            Recommendation.department_id.in_(ids)
+        ).order_by(Recommendation.id.desc()):
+            by_department[rec.department_id] = rec
+        return [by_department[dept_id] for dept_id in ids if dept_id in by_department]
+
+    def refresh_recommendations(
+        self,
+        student_id: int,
+        changed_fields: Optional[Iterable[str]] = None,
+        weights: Optional[Tuple[float, float, float]] = None,
+        progress: Optional[Callable[[str, int], None]] = None
+    ) -> MaterializationResult:
+        """✅ ARTIMLI GÜNCELLEME: Öğrencinin saklı önerilerini değişen alanlara göre yenile
+
+        Args:
+            student_id: Öğrenci id'si
+            changed_fields: Güncellenen öğrenci alanları (None -> tüm bileşenler)
+            weights: (uyumluluk, başarı, tercih) ağırlıkları
+            progress: İsteğe bağlı (aşama, yüzde) geri çağrısı (ör. Celery görev durumu)
+
+        Puan değiştiyse yalnızca uyumluluk/başarı, tercihler değiştiyse yalnızca
+        tercih bileşeni yeniden hesaplanır; final skor vektörel güncellenir ve
+        yalnızca skoru değişen satırlar yazılır.
+        """
+        student = self.db.query(Student).filter(Student.id == student_id).first()
+        if not student:
+            raise StudentNotFoundError(f"Student with ID {student_id} not found")
+
+        w_c, w_s, w_p = weights or (0.4, 0.4, 0.2)
+        total_w = max(1e-9, (w_c + w_s + w_p))
+        weights = (w_c / total_w, w_s / total_w, w_p / total_w)
+
+        if progress is None:
+            progress = lambda stage, percent: None
+
+        try:
+            progress("loading", 10)
+            arrays = self._load_department_arrays(student.field_type)
+            positions = np.flatnonzero(eligible_mask(arrays, student.field_type))
+            stored = load_stored(self.db, student_id)
+            progress("scoring", 40)
+            admission = self._admission_model()
+            collaborative = self._collaborative_affinity(student_id)
+            scores, recomputed = incremental_scores(
+                student, arrays, positions, weights, stored, changed_components(changed_fields),
+                admission=admission, collaborative=collaborative
+            )
+            reasons = self._generate_recommendation_reasons(student, arrays, scores)
+            progress("writing", 70)
+            result = materialize(
+                self.db, student_id, arrays, scores, reasons, stored, recomputed,
+                versions=model_versions(admission, collaborative)
+            )
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            recommendation_logger.error(f"Error refreshing recommendations: {str(e)}", user_id=student_id)
+            raise RecommendationError(f"Tercih önerileri güncellenirken bir hata oluştu: {str(e)}")
+
+        recommendation_logger.info(
+            "Recommendations refreshed",
+            user_id=student_id,
+            recomputed=list(result.recomputed),
+            inserted=result.inserted,
+            updated=result.updated,
+            deleted=result.deleted,
+            unchanged=result.unchanged
+        )
+        return result
+
     def _calculate_compatibility_score(self, student: Student, department: Department) -> float:
         """Uyumluluk skorunu hesapla (0-100) - NULL SAFE + TYT DESTEĞİ"""
         score = 50.0  # Base score
@@ -389,43 +440,17 @@ class RecommendationEngine:
         return max(0, min(100, score))
     
     def _calculate_success_probability(self, student: Student, department: Department) -> float:
-        """Başarı olasılığını hesapla (0-100) - NULL SAFE + TYT DESTEĞİ"""
-        # ✅ TYT DESTEĞİ: Eğer bölüm TYT ise, öğrencinin TYT puanını kullan
-        is_tyt_department = department.field_type and department.field_type.upper() == 'TYT'
-        student_score = None
-        
-        if is_tyt_department:
-            # TYT bölümü için sadece TYT puanını kullan (AYT puanı gerekmez)
-            student_score = student.tyt_total_score if hasattr(student, 'tyt_total_score') else None
-        else:
-            # Lisans bölümü için total_score kullan (TYT + AYT)
-            student_score = student.total_score if hasattr(student, 'total_score') else None
-        
-        # ✅ NULL/None kontrolü - Eksik veriler için varsayılan değer
-        if not department.min_score or department.min_score == 0 or not student_score or student_score == 0:
-            # Eğer min_score yoksa, varsayılan olarak orta seviye başarı olasılığı döndür
-            return 50.0
-        
-        try:
-            score_diff = float(student_score) - float(department.min_score)
-        except (ValueError, TypeError):
-            # Dönüşüm hatası durumunda varsayılan değer
-            return 50.0
-        
-        if score_diff > 50:
-            return 95.0
-        elif score_diff > 30:
-            return 85.0
-        elif score_diff > 10:
-            return 70.0
-        elif score_diff > 0:
-            return 60.0
-        elif score_diff > -10:
-            return 40.0
-        elif score_diff > -30:
-            return 20.0
-        else:
-            return 5.0
+        """Başarı olasılığını hesapla (0-100) - NULL SAFE + TYT DESTEĞİ
+
+        Öğrenci ve bölüm sıralaması biliniyorsa sıralama tabanlı model
+        (`services.admission`), aksi halde puan farkı kuralları kullanılır;
+        vektörel `success_probabilities` ile aynı sonucu verir.
+        """
+        arrays = DepartmentArrays.from_rows([(
+            department.id or 0, department.university_id or 0, department.name, department.field_type,
+            department.min_score, department.min_rank, None, False, None, None,
+        )])
+        return float(success_probabilities(student, arrays, np.zeros(1, dtype=np.int64), self._admission_model())[0])
     
     def _calculate_preference_score(self, student: Student, department: Department) -> float:
         """Tercih skorunu hesapla (0-100)"""
@@ -512,3 +537,20 @@ class RecommendationEngine:
         
         return ", ".join(reasons) if reasons else "Genel uyumluluk"
 
+
+
+def refresh_student_recommendations(student_id: int, changed_fields: Optional[Iterable[str]] = None) -> None:
+    """Arka plan görevi: öğrencinin önerilerini kendi DB session'ı ile artımlı yenile
+
+    Değişen alanlar hiçbir skor bileşenini etkilemiyorsa (ör. bio) hiçbir şey yapılmaz.
+    """
+    if changed_fields is not None and not changed_components(changed_fields):
+        return
+    from database import SessionLocal
+    db = SessionLocal()
+    try:
+        RecommendationEngine(db).refresh_recommendations(student_id, changed_fields)
+    except Exception as e:
+        recommendation_logger.error("Recommendation refresh failed", user_id=student_id, error=str(e))
+    finally:
+        db.close()
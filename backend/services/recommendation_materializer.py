@@ -0,0 +1,307 @@
+"""
+Öğrenci başına önerilerin (recommendations tablosu) artımlı güncellenmesi
+
+Bir öğrencinin önerileri alan türündeki tüm uygun bölümler için tablo
+satırları olarak saklanır. Profil güncellemesi veya yeni deneme sonrasında
+her şeyi silip yeniden eklemek yerine:
+
+- Yalnızca değişen girdilere bağlı skor bileşenleri yeniden hesaplanır
+  (puan/sıralama -> uyumluluk + başarı olasılığı, tercihler -> tercih skoru);
+  diğer bileşenler saklı satırlardan dizi olarak okunur.
+- Skorların hesaplandığı model sürümleri (yerleşme olasılığı modeli, ortak
+  filtreleme benzerlikleri) öğrenci başına tek satırda (`recommendation_versions`)
+  saklanır: her yazımdan sonra öğrencinin tüm satırları aynı sürümlerle
+  hesaplanmıştır. Sürüm değişince ilgili bileşen (başarı / tercih) girdi
+  değişmese de yeniden hesaplanır.
+- Final skor ağırlıklı toplam olarak vektörel hesaplanır.
+- Yalnızca skoru değişen satırlar güncellenir, yeni uygun bölümler eklenir,
+  artık uygun olmayan (veya çift kaydedilmiş) satırlar silinir.
+"""
+from functools import partial
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import Recommendation, RecommendationVersion
+from services.vectorized_scoring import (
+    DepartmentArrays,
+    ScoreArrays,
+    compatibility_scores,
+    preference_scores,
+    success_probabilities,
+)
+
+COMPONENTS: FrozenSet[str] = frozenset({"compatibility", "success", "preference"})
+
+# Öğrenci alanı -> etkilediği skor bileşenleri
+SCORE_FIELDS = frozenset({"total_score", "tyt_total_score", "rank"})
+PREFERENCE_FIELDS = frozenset({
+    "preferred_cities", "preferred_university_types", "budget_preference",
+    "scholarship_preference", "interest_areas",
+})
+# Uygun bölüm kümesini değiştiren alanlar: tam yeniden hesaplama
+FULL_REFRESH_FIELDS = frozenset({"field_type"})
+
+_CALCULATORS = {
+    "compatibility": compatibility_scores,
+    "success": success_probabilities,
+    "preference": preference_scores,
+}
+
+# Model sürümüne bağlı bileşenler: bileşen -> ModelVersions alanı
+VERSIONED_COMPONENTS = {"success": "admission", "preference": "collaborative"}
+
+BATCH_SIZE = 1000
+
+
+class ModelVersions(NamedTuple):
+    """Skorların hesaplandığı model sürümleri (model kullanılmadıysa None)"""
+    admission: Optional[str] = None
+    collaborative: Optional[str] = None
+
+
+def model_versions(admission=None, collaborative=None) -> ModelVersions:
+    """AdmissionModel / Affinity nesnelerinin sürümleri"""
+    return ModelVersions(getattr(admission, "version", None), getattr(collaborative, "version", None))
+
+
+class MaterializationResult(NamedTuple):
+    """Artımlı güncelleme özeti"""
+    inserted: int
+    updated: int
+    deleted: int
+    unchanged: int
+    recomputed: Tuple[str, ...]
+
+
+class StoredRecommendations(NamedTuple):
+    """Öğrencinin saklı önerileri (department_id'ye göre sıralı diziler)"""
+    ids: np.ndarray
+    department_ids: np.ndarray
+    compatibility: np.ndarray
+    success: np.ndarray
+    preference: np.ndarray
+    final: np.ndarray
+    reasons: List[Optional[str]]
+    duplicate_ids: List[int]
+    versions: ModelVersions = ModelVersions()  # saklı satırların hesaplandığı sürümler
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def lookup(self, department_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Bölüm id'leri için (saklı satır indeksi, bulundu maskesi)"""
+        if len(self.department_ids) == 0:
+            return np.zeros(len(department_ids), dtype=np.int64), np.zeros(len(department_ids), dtype=bool)
+        index = np.searchsorted(self.department_ids, department_ids)
+        index = np.minimum(index, len(self.department_ids) - 1)
+        return index, self.department_ids[index] == department_ids
+
+    def outdated(self, field: str, version: Optional[str], found: np.ndarray) -> np.ndarray:
+        """`field` modeli başka bir sürümle hesaplanmışsa bulunan satırların tümü, değilse boş maske"""
+        if getattr(self.versions, field) != version:
+            return found
+        return np.zeros(len(found), dtype=bool)
+
+
+def changed_components(fields: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """Güncellenen öğrenci alanlarından yeniden hesaplanacak bileşenleri çıkar.
+
+    None döndürürse tüm bileşenler yeniden hesaplanır.
+    """
+    if fields is None:
+        return None
+    fields = set(fields)
+    if fields & FULL_REFRESH_FIELDS:
+        return None
+    components = set()
+    if fields & SCORE_FIELDS:
+        # Uyumluluk skoru da puan farkına ve sıralamaya bağlı
+        components |= {"compatibility", "success"}
+    if fields & PREFERENCE_FIELDS:
+        components.add("preference")
+    return frozenset(components)
+
+
+def load_stored(db: Session, student_id: int) -> StoredRecommendations:
+    """Öğrencinin saklı önerilerini tek sorguda dizilere yükle.
+
+    Aynı bölüm için birden fazla satır varsa en eskisi tutulur, diğerleri
+    silinmek üzere `duplicate_ids` listesine alınır.
+    """
+    rows = db.query(
+        Recommendation.id,
+        Recommendation.department_id,
+        Recommendation.compatibility_score,
+        Recommendation.success_probability,
+        Recommendation.preference_score,
+        Recommendation.final_score,
+        Recommendation.recommendation_reason,
+    ).filter(
+        Recommendation.student_id == student_id
+    ).order_by(Recommendation.department_id, Recommendation.id).all()
+
+    kept, duplicate_ids, last_department = [], [], None
+    for row in rows:
+        if row.department_id == last_department:
+            duplicate_ids.append(row.id)
+            continue
+        kept.append(row)
+        last_department = row.department_id
+
+    if kept:
+        ids, department_ids, compatibility, success, preference, final, reasons = zip(*kept)
+    else:
+        ids = department_ids = compatibility = success = preference = final = reasons = ()
+    version_row = db.get(RecommendationVersion, student_id)
+    return StoredRecommendations(
+        ids=np.array(ids, dtype=np.int64),
+        department_ids=np.array(department_ids, dtype=np.int64),
+        compatibility=np.array(compatibility, dtype=np.float64),
+        success=np.array(success, dtype=np.float64),
+        preference=np.array(preference, dtype=np.float64),
+        final=np.array(final, dtype=np.float64),
+        reasons=list(reasons),
+        duplicate_ids=duplicate_ids,
+        versions=ModelVersions(version_row.admission_version, version_row.collaborative_version)
+        if version_row is not None else ModelVersions(),
+    )
+
+
+def incremental_scores(
+    student,
+    arrays: DepartmentArrays,
+    positions: np.ndarray,
+    weights: Tuple[float, float, float],
+    stored: StoredRecommendations,
+    components: Optional[FrozenSet[str]] = None,
+    admission=None,
+    collaborative=None,
+) -> Tuple[ScoreArrays, Tuple[str, ...]]:
+    """Skorları yalnızca gerekli bileşenler için yeniden hesapla.
+
+    `components` içindeki bileşenler tüm bölümler için hesaplanır; diğerleri
+    saklı satırlardan alınır. Saklı satırı olmayan (yeni) bölümler ve başarı /
+    tercih skoru farklı bir model sürümüyle hesaplanmış satırlar için yalnızca
+    o bölümlerde hesaplanır.
+
+    Returns:
+        (skorlar, tümüyle yeniden hesaplanan bileşenler)
+    """
+    if components is None:
+        components = COMPONENTS
+    versions = model_versions(admission, collaborative)
+    index, found = stored.lookup(arrays.ids[positions])
+
+    values: Dict[str, np.ndarray] = {}
+    for name in ("compatibility", "success", "preference"):
+        calculate = _CALCULATORS[name]
+        if name == "success":
+            calculate = partial(calculate, admission=admission)
+        elif name == "preference":
+            calculate = partial(calculate, collaborative=collaborative)
+        if name in components:
+            values[name] = calculate(student, arrays, positions)
+            continue
+        column = np.empty(len(positions), dtype=np.float64)
+        column[found] = getattr(stored, name)[index[found]]
+        stale = ~found
+        field = VERSIONED_COMPONENTS.get(name)
+        if field is not None:
+            stale |= stored.outdated(field, getattr(versions, field), found)
+        if stale.any():
+            column[stale] = calculate(student, arrays, positions[stale])
+        values[name] = column
+
+    w_c, w_s, w_p = weights
+    final = values["compatibility"] * w_c + values["success"] * w_s + values["preference"] * w_p
+    scores = ScoreArrays(positions, values["compatibility"], values["success"], values["preference"], final)
+    return scores, tuple(sorted(components))
+
+
+def _row_values(scores: ScoreArrays, reasons: List[str], i: int) -> Dict:
+    success_probability = float(scores.success[i])
+    return {
+        "compatibility_score": float(scores.compatibility[i]),
+        "success_probability": success_probability,
+        "preference_score": float(scores.preference[i]),
+        "final_score": float(scores.final[i]),
+        "recommendation_reason": reasons[i],
+        "is_safe_choice": success_probability >= 80,
+        "is_dream_choice": success_probability <= 30,
+        "is_realistic_choice": 30 < success_probability < 80,
+    }
+
+
+def materialize(
+    db: Session,
+    student_id: int,
+    arrays: DepartmentArrays,
+    scores: ScoreArrays,
+    reasons: List[str],
+    stored: Optional[StoredRecommendations] = None,
+    recomputed: Tuple[str, ...] = tuple(sorted(COMPONENTS)),
+    versions: ModelVersions = ModelVersions(),
+) -> MaterializationResult:
+    """Hesaplanan skorları tabloya delta olarak yaz (commit çağıranın işi).
+
+    Skoru veya sebebi değişmeyen satırlara dokunulmaz; model sürümleri değiştiyse
+    öğrencinin `recommendation_versions` satırı güncellenir.
+    """
+    if stored is None:
+        stored = load_stored(db, student_id)
+    department_ids = arrays.ids[scores.positions]
+    index, found = stored.lookup(department_ids)
+
+    # Değişen satırlar: dört skordan biri veya sebep metni farklı
+    changed = np.zeros(len(scores), dtype=bool)
+    if found.any():
+        existing = index[found]
+        changed[found] = (
+            (stored.compatibility[existing] != scores.compatibility[found])
+            | (stored.success[existing] != scores.success[found])
+            | (stored.preference[existing] != scores.preference[found])
+            | (stored.final[existing] != scores.final[found])
+        )
+        reason_changed = np.array(
+            [stored.reasons[j] != reasons[i] for i, j in zip(np.flatnonzero(found).tolist(), existing.tolist())],
+            dtype=bool,
+        )
+        changed[np.flatnonzero(found)[reason_changed]] = True
+
+    updates = [
+        {"id": int(stored.ids[index[i]]), **_row_values(scores, reasons, i)}
+        for i in np.flatnonzero(changed).tolist()
+    ]
+    inserts = [
+        {"student_id": student_id, "department_id": int(department_ids[i]), **_row_values(scores, reasons, i)}
+        for i in np.flatnonzero(~found).tolist()
+    ]
+    kept = np.zeros(len(stored), dtype=bool)
+    kept[index[found]] = True
+    deletes = stored.ids[~kept].tolist() + stored.duplicate_ids
+
+    for start in range(0, len(updates), BATCH_SIZE):
+        db.execute(update(Recommendation), updates[start:start + BATCH_SIZE])
+    if inserts:
+        db.bulk_insert_mappings(Recommendation, inserts)
+    for start in range(0, len(deletes), BATCH_SIZE):
+        db.query(Recommendation).filter(
+            Recommendation.id.in_(deletes[start:start + BATCH_SIZE])
+        ).delete(synchronize_session=False)
+    if versions != stored.versions:
+        db.merge(RecommendationVersion(
+            student_id=student_id,
+            admission_version=versions.admission,
+            collaborative_version=versions.collaborative,
+        ))
+
+    return MaterializationResult(
+        inserted=len(inserts),
+        updated=len(updates),
+        deleted=len(deletes),
+        unchanged=int(found.sum()) - len(updates),
+        recomputed=recomputed,
+    )
@@ -0,0 +1,60 @@
+"""
+Veritabanı satırıyla süreçler arası kilit
+
+API worker'ları ve Celery worker'ları aynı materyalize tabloyu aynı anda
+yeniden hesaplamasın diye `refresh_locks` tablosunda isim başına tek satır
+tutulur. Satırı ekleyebilen (ya da süresi dolmuş satırı devralan) süreç kilidi
+alır; alamayanlar hesaplamayı atlayıp tabloyu olduğu gibi okur. PostgreSQL ve
+SQLite'ta aynı şekilde çalışır (advisory lock gerektirmez).
+"""
+import secrets
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import RefreshLock
+
+
+def try_acquire(db: Session, name: str, ttl_seconds: float) -> Optional[str]:
+    """Kilidi almayı dene; alınırsa sahiplik token'ı, başka süreçteyse None (commit eder)"""
+    token = secrets.token_hex(16)
+    now = time.time()
+    try:
+        db.add(RefreshLock(name=name, owner=token, expires_at=now + ttl_seconds))
+        db.commit()
+        return token
+    except IntegrityError:
+        db.rollback()
+    # Satır var: yalnızca süresi dolmuşsa devral (koşullu UPDATE tek kazanan bırakır)
+    taken = db.execute(
+        update(RefreshLock)
+        .where(RefreshLock.name == name, RefreshLock.expires_at <= now)
+        .values(owner=token, expires_at=now + ttl_seconds)
+    ).rowcount
+    db.commit()
+    return token if taken else None
+
+
+def release(db: Session, name: str, token: str) -> None:
+    """Kilidi yalnızca hâlâ sahibiysek bırak (commit eder)"""
+    db.execute(delete(RefreshLock).where(RefreshLock.name == name, RefreshLock.owner == token))
+    db.commit()
+
+
+@contextmanager
+def refresh_lock(db: Session, name: str, ttl_seconds: float) -> Iterator[bool]:
+    """`with refresh_lock(db, "x", 600) as acquired:` - blok sonunda kilit bırakılır"""
+    token = try_acquire(db, name, ttl_seconds)
+    try:
+        yield token is not None
+    finally:
+        if token is not None:
+            try:
+                release(db, name, token)
+            except Exception:
+                # Bırakılamayan kilit TTL sonunda devralınır
+                db.rollback()
@@ -0,0 +1,294 @@
+"""
+Ağaç topluluklarının NumPy dizilerine derlenmesi ve saf NumPy çıkarım
+
+Eğitim sonrası her model (XGBoost, RandomForest, GradientBoosting,
+DecisionTree regresörleri) düz dizilere aktarılır: düğüm başına özellik,
+eşik, sol/sağ çocuk, eksik değer yönü ve yaprak değeri. Tüm ağaçlar tek bir
+düğüm dizisinde art arda durur; yapraklar kendilerine döner, böylece
+tahmin tüm ağaçlar ve tüm satırlar için derinlik sayısı kadar vektörel adımla
+yapılır (ağaç başına Python döngüsü yok).
+
+Bu modül yalnızca numpy'a bağlıdır; sklearn/xgboost yalnızca `compile_model`
+içinde (dışa aktarma sırasında) import edilir. Çıkarım worker'ları derlenmiş
+`.npz` dosyalarını yükleyip bu kütüphaneleri hiç import etmeden tahmin yapabilir.
+
+Karşılaştırmalar, kaynak kütüphanelerle aynı biçimde float32 üzerinde yapılır:
+sklearn'ün `x <= eşik` koşulu float32 için eşdeğer `x < eşik'` koşuluna çevrilir.
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Tek seferde değerlendirilen satır sayısı (ağaç × satır düğüm matrisi bellekte tutulur)
+PREDICT_BATCH_SIZE = 4096
+
+
+class CompiledScaler:
+    """StandardScaler karşılığı: (X - mean) / scale"""
+
+    __slots__ = ("mean", "scale")
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray):
+        self.mean = mean
+        self.scale = scale
+
+    def transform(self, X: np.ndarray) -> np.ndarray:
+        return (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+
+
+class CompiledEnsemble:
+    """Düz dizilere aktarılmış ağaç topluluğu (tahmin = base + scale * topla/ortala(yapraklar))"""
+
+    __slots__ = ("roots", "feature", "threshold", "left", "right", "default_left",
+                 "value", "depth", "base", "scale", "average")
+
+    def __init__(self, roots, feature, threshold, left, right, default_left, value,
+                 depth: int, base: float = 0.0, scale: float = 1.0, average: bool = False):
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.value = value
+        self.depth = int(depth)
+        self.base = float(base)
+        self.scale = float(scale)
+        self.average = bool(average)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Tüm ağaçları seviye seviye, tüm satırlar için birlikte değerlendir"""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), PREDICT_BATCH_SIZE):
+            out[start:start + PREDICT_BATCH_SIZE] = self._predict_batch(X[start:start + PREDICT_BATCH_SIZE])
+        return out
+
+    def _predict_batch(self, X: np.ndarray) -> np.ndarray:
+        n, n_features = X.shape
+        if self.n_trees == 0:
+            return np.full(n, self.base)
+        flat = X.ravel()
+        row_offsets = (np.arange(n, dtype=np.int64) * n_features)[:, None]
+        # children[2 * düğüm] sol, children[2 * düğüm + 1] sağ çocuk
+        children = np.stack([self.left, self.right], axis=1).ravel()
+        has_missing = bool(np.isnan(flat).any())
+        node = np.broadcast_to(self.roots, (n, self.n_trees))
+        for _ in range(self.depth):
+            x = flat[row_offsets + self.feature[node]]
+            go_right = x >= self.threshold[node]
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.default_left[node], go_right)
+            node = children[2 * node + go_right]
+        leaves = self.value[node]
+        total = leaves.mean(axis=1) if self.average else leaves.sum(axis=1)
+        return self.base + self.scale * total
+
+
+# --- Dışa aktarma ------------------------------------------------------------
+
+class _Builder:
+    """Ağaçları tek düğüm dizisine ekler (yaprak: kendine dönen düğüm)"""
+
+    def __init__(self):
+        self.roots: List[int] = []
+        self.feature: List[int] = []
+        self.threshold: List[float] = []
+        self.left: List[int] = []
+        self.right: List[int] = []
+        self.default_left: List[bool] = []
+        self.value: List[float] = []
+        self.depth = 0
+
+    def add_tree(self, nodes: Dict[int, Tuple], root: int = 0) -> None:
+        """nodes: yerel id -> (özellik, eşik, sol, sağ, eksik_sola, değer); yaprakta özellik = -1"""
+        offset = len(self.feature)
+        index = {node_id: offset + i for i, node_id in enumerate(nodes)}
+        for node_id, (feature, threshold, left, right, missing_left, value) in nodes.items():
+            me = index[node_id]
+            if feature < 0:
+                self.feature.append(0)
+                self.threshold.append(0.0)
+                self.left.append(me)
+                self.right.append(me)
+                self.default_left.append(True)
+                self.value.append(float(value))
+            else:
+                self.feature.append(int(feature))
+                self.threshold.append(threshold)
+                self.left.append(index[left])
+                self.right.append(index[right])
+                self.default_left.append(bool(missing_left))
+                self.value.append(0.0)
+        self.roots.append(index[root])
+        self.depth = max(self.depth, _tree_depth(nodes, root))
+
+    def build(self, **params) -> CompiledEnsemble:
+        return CompiledEnsemble(
+            roots=np.array(self.roots, dtype=np.int32),
+            feature=np.array(self.feature, dtype=np.int32),
+            threshold=np.array(self.threshold, dtype=np.float32),
+            left=np.array(self.left, dtype=np.int32),
+            right=np.array(self.right, dtype=np.int32),
+            default_left=np.array(self.default_left, dtype=bool),
+            value=np.array(self.value, dtype=np.float64),
+            depth=self.depth,
+            **params,
+        )
+
+
+def _tree_depth(nodes: Dict[int, Tuple], root: int) -> int:
+    depth, frontier = 0, [root]
+    while True:
+        frontier = [child for node_id in frontier if nodes[node_id][0] >= 0 for child in nodes[node_id][2:4]]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def _sklearn_threshold(threshold: float) -> np.float32:
+    """float32 x için `x <= t` koşulunu `x < t'` koşuluna çevir"""
+    t32 = np.float32(threshold)
+    if t32 > threshold:
+        t32 = np.nextafter(t32, np.float32(-np.inf))
+    return np.nextafter(t32, np.float32(np.inf))
+
+
+def _add_sklearn_tree(builder: _Builder, tree) -> None:
+    t = tree.tree_
+    nodes = {}
+    for i in range(t.node_count):
+        left, right = int(t.children_left[i]), int(t.children_right[i])
+        if left == -1:
+            nodes[i] = (-1, 0.0, -1, -1, True, float(t.value[i].ravel()[0]))
+        else:
+            nodes[i] = (int(t.feature[i]), _sklearn_threshold(t.threshold[i]), left, right, True, 0.0)
+    builder.add_tree(nodes)
+
+
+def _parse_base_score(raw) -> float:
+    """learner_model_param.base_score: "5E-1" veya (XGBoost >= 3) "[5E-1]" biçiminde"""
+    if isinstance(raw, str) and raw.strip().startswith("["):
+        raw = json.loads(raw)
+    if isinstance(raw, list):
+        if len(raw) != 1:
+            raise ValueError(f"Unsupported multi-target base_score: {raw}")
+        raw = raw[0]
+    return float(raw)
+
+
+def _compile_xgboost(model) -> CompiledEnsemble:
+    booster = model.get_booster()
+    config = json.loads(booster.save_config())
+    base_score = _parse_base_score(config["learner"]["learner_model_param"]["base_score"])
+    dumps = booster.get_dump(dump_format="json")
+    # Erken durdurma: predict() yalnızca en iyi iterasyona kadar olan ağaçları kullanır
+    try:
+        best_iteration = model.best_iteration
+    except AttributeError:
+        best_iteration = None
+    if best_iteration is not None:
+        trees_per_round = max(1, int(config["learner"]["gradient_booster"]["gbtree_model_param"].get("num_parallel_tree", 1)))
+        dumps = dumps[:(best_iteration + 1) * trees_per_round]
+
+    builder = _Builder()
+    for dump in dumps:
+        nodes = {}
+        stack = [json.loads(dump)]
+        while stack:
+            node = stack.pop()
+            if "leaf" in node:
+                nodes[node["nodeid"]] = (-1, 0.0, -1, -1, True, node["leaf"])
+                continue
+            feature = node["split"]
+            feature = int(feature[1:]) if isinstance(feature, str) and feature.startswith("f") else int(feature)
+            nodes[node["nodeid"]] = (
+                feature, np.float32(node["split_condition"]), node["yes"], node["no"],
+                node["missing"] == node["yes"], 0.0,
+            )
+            stack.extend(node["children"])
+        builder.add_tree(nodes)
+    return builder.build(base=base_score)
+
+
+def compile_model(model) -> CompiledEnsemble:
+    """Eğitilmiş regresörü derle; desteklenmeyen türlerde TypeError"""
+    kind = type(model).__name__
+    if kind == "XGBRegressor":
+        return _compile_xgboost(model)
+
+    builder = _Builder()
+    if kind == "DecisionTreeRegressor":
+        _add_sklearn_tree(builder, model)
+        return builder.build()
+    if kind in ("RandomForestRegressor", "ExtraTreesRegressor"):
+        for tree in model.estimators_:
+            _add_sklearn_tree(builder, tree)
+        return builder.build(average=True)
+    if kind == "GradientBoostingRegressor":
+        init = model.init_
+        if init == "zero":
+            base = 0.0
+        elif hasattr(init, "constant_"):
+            base = float(np.ravel(init.constant_)[0])
+        else:
+            raise TypeError(f"Unsupported GradientBoosting init estimator: {type(init).__name__}")
+        for tree in model.estimators_[:, 0]:
+            _add_sklearn_tree(builder, tree)
+        return builder.build(base=base, scale=model.learning_rate)
+    raise TypeError(f"Unsupported model type for compilation: {kind}")
+
+
+def compile_scaler(scaler) -> CompiledScaler:
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    n = scaler.n_features_in_
+    return CompiledScaler(
+        np.zeros(n) if mean is None else np.asarray(mean, dtype=np.float64),
+        np.ones(n) if scale is None else np.asarray(scale, dtype=np.float64),
+    )
+
+
+# --- Kaydetme / yükleme --------------------------------------------------------
+
+def save_compiled(path: str, ensemble: CompiledEnsemble, scaler: CompiledScaler) -> None:
+    """Derlenmiş modeli ve scaler'ı tek `.npz` dosyasına yaz"""
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            roots=ensemble.roots, feature=ensemble.feature, threshold=ensemble.threshold,
+            left=ensemble.left, right=ensemble.right, default_left=ensemble.default_left,
+            value=ensemble.value,
+            params=np.array([ensemble.depth, ensemble.base, ensemble.scale, float(ensemble.average)]),
+            scaler_mean=scaler.mean, scaler_scale=scaler.scale,
+        )
+
+
+def load_compiled(path: str) -> Tuple[CompiledEnsemble, CompiledScaler]:
+    with np.load(path) as data:
+        depth, base, scale, average = data["params"]
+        ensemble = CompiledEnsemble(
+            data["roots"], data["feature"], data["threshold"], data["left"], data["right"],
+            data["default_left"], data["value"],
+            depth=int(depth), base=base, scale=scale, average=bool(average),
+        )
+        return ensemble, CompiledScaler(data["scaler_mean"], data["scaler_scale"])
+
+
+def try_compile(model, scaler) -> Optional[Tuple[CompiledEnsemble, CompiledScaler]]:
+    """Derlenebiliyorsa (model, scaler) çifti; değilse None"""
+    try:
+        return compile_model(model), compile_scaler(scaler)
+    except (TypeError, AttributeError, KeyError, ValueError):
+        return None
@@ -0,0 +1,248 @@
+"""
+Bölüm taban puan/sıralama trendleri
+
+`DepartmentYearlyStats` (2022-2025) satırlarından bölüm başına yıllık seri ve
+türetilmiş metrikler (taban puan/sıralama eğimi, oynaklık, gelecek yıl
+tahmini) hesaplanır ve `department_trends` tablosuna yazılır. Tablo yalnızca
+import sonrası (`refresh_trends`) yeniden hesaplanır; API süreçleri tabloyu
+`trend_store` ile belleğe alır ve bölüm id'sine göre O(1) (tek id) veya
+`searchsorted` ile toplu (numpy) okur.
+"""
+import json
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from models import DepartmentTrend, DepartmentYearlyStats
+from core.logging_config import api_logger
+
+# Seride tutulan yıllık alanlar (series JSON'undaki anahtarlar)
+SERIES_FIELDS = ("min_score", "max_score", "min_rank", "quota", "placed_students")
+
+# Tahminler için makul sınırlar (ÖSYM puanları 100-560 aralığındadır)
+MIN_PROJECTED_SCORE = 100.0
+MAX_PROJECTED_SCORE = 560.0
+
+
+class TrendRecord(NamedTuple):
+    department_id: int
+    first_year: int
+    last_year: int
+    year_count: int
+    series: Dict[str, list]
+    min_score_slope: Optional[float]
+    min_rank_slope: Optional[float]
+    min_score_volatility: Optional[float]
+    projected_min_score: Optional[float]
+    projected_min_rank: Optional[int]
+
+    @property
+    def last_min_score(self) -> Optional[float]:
+        return _last_value(self.series.get("min_score", ()))
+
+    @property
+    def last_min_rank(self) -> Optional[int]:
+        return _last_value(self.series.get("min_rank", ()))
+
+
+def _last_value(values: Sequence) -> Optional[float]:
+    for value in reversed(values):
+        if value is not None:
+            return value
+    return None
+
+
+def _points(years: Sequence[int], values: Sequence) -> Tuple[List[int], List[float]]:
+    """None/0 olmayan (yıl, değer) çiftleri"""
+    pairs = [(year, float(value)) for year, value in zip(years, values) if value]
+    return [p[0] for p in pairs], [p[1] for p in pairs]
+
+
+def linear_slope(xs: Sequence[float], ys: Sequence[float]) -> Optional[float]:
+    """En küçük kareler eğimi (en az 2 nokta gerekir)"""
+    n = len(xs)
+    if n < 2:
+        return None
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    denominator = sum((x - mean_x) ** 2 for x in xs)
+    if denominator == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / denominator
+
+
+def _project(xs: Sequence[int], ys: Sequence[float], slope: Optional[float], target_year: int) -> Optional[float]:
+    """Doğrusal eğilimle hedef yıl tahmini; tek nokta varsa son değer"""
+    if not ys:
+        return None
+    if slope is None:
+        return ys[-1]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    return mean_y + slope * (target_year - mean_x)
+
+
+def _volatility(values: Sequence[float]) -> Optional[float]:
+    """Ardışık yıl değişimlerinin standart sapması (en az 2 değişim gerekir)"""
+    changes = [b - a for a, b in zip(values, values[1:])]
+    if len(changes) < 2:
+        return None
+    mean = sum(changes) / len(changes)
+    return (sum((c - mean) ** 2 for c in changes) / len(changes)) ** 0.5
+
+
+def build_trend(department_id: int, rows: Sequence[tuple]) -> TrendRecord:
+    """Bir bölümün yıl sıralı (year, min_score, max_score, min_rank, quota, placed_students) satırlarından trend"""
+    years = [row[0] for row in rows]
+    series = {"year": years}
+    for index, field in enumerate(SERIES_FIELDS, start=1):
+        series[field] = [row[index] for row in rows]
+
+    target_year = years[-1] + 1
+    score_years, scores = _points(years, series["min_score"])
+    rank_years, ranks = _points(years, series["min_rank"])
+    score_slope = linear_slope(score_years, scores)
+    rank_slope = linear_slope(rank_years, ranks)
+
+    projected_score = _project(score_years, scores, score_slope, target_year)
+    if projected_score is not None:
+        projected_score = round(min(MAX_PROJECTED_SCORE, max(MIN_PROJECTED_SCORE, projected_score)), 3)
+    projected_rank = _project(rank_years, ranks, rank_slope, target_year)
+    if projected_rank is not None:
+        projected_rank = max(1, int(round(projected_rank)))
+
+    return TrendRecord(
+        department_id=department_id,
+        first_year=years[0],
+        last_year=years[-1],
+        year_count=len(years),
+        series=series,
+        min_score_slope=None if score_slope is None else round(score_slope, 4),
+        min_rank_slope=None if rank_slope is None else round(rank_slope, 2),
+        min_score_volatility=None if (v := _volatility(scores)) is None else round(v, 4),
+        projected_min_score=projected_score,
+        projected_min_rank=projected_rank,
+    )
+
+
+def compute_trends(db: Session) -> List[TrendRecord]:
+    """Tüm yıllık istatistikleri tek sorguda okuyup bölüm başına trend hesapla"""
+    rows = db.query(
+        DepartmentYearlyStats.department_id,
+        DepartmentYearlyStats.year,
+        *[getattr(DepartmentYearlyStats, field) for field in SERIES_FIELDS],
+    ).order_by(DepartmentYearlyStats.department_id, DepartmentYearlyStats.year)
+
+    trends = []
+    current_id, current_rows = None, []
+    for department_id, *values in rows:
+        if department_id != current_id:
+            if current_rows:
+                trends.append(build_trend(current_id, current_rows))
+            current_id, current_rows = department_id, []
+        current_rows.append(tuple(values))
+    if current_rows:
+        trends.append(build_trend(current_id, current_rows))
+    return trends
+
+
+def refresh_trends(db: Session) -> List[TrendRecord]:
+    """department_trends tablosunu yeniden hesapla ve yaz (import sonrası çağrılır)"""
+    trends = compute_trends(db)
+    db.query(DepartmentTrend).delete(synchronize_session=False)
+    db.bulk_insert_mappings(DepartmentTrend, [
+        {
+            **trend._asdict(),
+            "series": json.dumps(trend.series, separators=(",", ":")),
+        }
+        for trend in trends
+    ])
+    db.commit()
+    api_logger.info("Department trends materialized", departments=len(trends))
+    return trends
+
+
+def read_trends(db: Session) -> List[TrendRecord]:
+    """Materyalize tabloyu oku"""
+    columns = [getattr(DepartmentTrend, field) for field in TrendRecord._fields]
+    return [
+        TrendRecord(*row[:4], json.loads(row[4]), *row[5:])
+        for row in db.query(*columns).order_by(DepartmentTrend.department_id)
+    ]
+
+
+class TrendSnapshot:
+    """Bellekteki trendler: id → kayıt ve toplu okuma için id sıralı numpy dizileri"""
+
+    __slots__ = ("records", "ids", "projected_min_score", "projected_min_rank",
+                 "min_score_slope", "min_rank_slope", "min_score_volatility")
+
+    def __init__(self, records: Iterable[TrendRecord]):
+        records = sorted(records, key=lambda r: r.department_id)
+        self.records: Dict[int, TrendRecord] = {r.department_id: r for r in records}
+        self.ids = np.array([r.department_id for r in records], dtype=np.int64)
+
+        def column(name):
+            return np.array(
+                [np.nan if getattr(r, name) is None else getattr(r, name) for r in records],
+                dtype=np.float64,
+            )
+
+        self.projected_min_score = column("projected_min_score")
+        self.projected_min_rank = column("projected_min_rank")
+        self.min_score_slope = column("min_score_slope")
+        self.min_rank_slope = column("min_rank_slope")
+        self.min_score_volatility = column("min_score_volatility")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, department_id: int) -> Optional[TrendRecord]:
+        return self.records.get(department_id)
+
+    def positions(self, department_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Bölüm id'lerinin dizilerdeki konumları ve trendi olup olmadığı maskesi (searchsorted)"""
+        department_ids = np.asarray(department_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.zeros(len(department_ids), dtype=np.int64), np.zeros(len(department_ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.ids, department_ids), len(self.ids) - 1)
+        return positions, self.ids[positions] == department_ids
+
+    def column_for(self, name: str, department_ids: np.ndarray) -> np.ndarray:
+        """Verilen bölümler için metrik dizisi (trendi olmayanlar NaN)"""
+        positions, found = self.positions(department_ids)
+        values = getattr(self, name)
+        if len(values) == 0:
+            return np.full(len(found), np.nan)
+        return np.where(found, values[positions], np.nan)
+
+
+class TrendStore:
+    """Süreç geneli trend snapshot'ı (katalog yüklenince/yenilenince yeniden okunur)"""
+
+    def __init__(self):
+        self._snapshot: Optional[TrendSnapshot] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Optional[TrendSnapshot]:
+        """Güncel snapshot; henüz yüklenmemişse None"""
+        return self._snapshot
+
+    def load(self, db: Session) -> TrendSnapshot:
+        """Materyalize tabloyu belleğe al; tablo boşsa (ilk kurulum) önce hesapla"""
+        with self._lock:
+            records = read_trends(db)
+            if not records:
+                records = refresh_trends(db)
+            snapshot = TrendSnapshot(records)
+            self._snapshot = snapshot
+        return snapshot
+
+    def invalidate(self) -> None:
+        self._snapshot = None
+
+
+# Süreç geneli trend deposu
+trend_store = TrendStore()
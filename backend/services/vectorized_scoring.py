@@ -0,0 +1,367 @@
+"""
+Vektörel (NumPy) öneri skorlama
+
+RecommendationEngine'in kural tabanlı skorlarını (uyumluluk, başarı olasılığı,
+tercih) bir alan türündeki tüm bölümler için tek seferde dizi işlemleriyle
+hesaplar. Kurallar `_calculate_compatibility_score`,
+`_calculate_success_probability` ve `_calculate_preference_score` ile birebir
+aynıdır; skaler metotlar referans olarak korunur.
+"""
+import json
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# "Senin gibi öğrenciler şunları da beğendi" skorunun (0-1) tercih skoruna en fazla katkısı
+COLLABORATIVE_BONUS = 15.0
+
+
+def _as_float_array(values: Sequence[Optional[float]]) -> np.ndarray:
+    """None değerleri NaN olan float64 dizisine çevir"""
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+
+
+def _encode(values: Sequence[Optional[str]]) -> Tuple[np.ndarray, List[Optional[str]]]:
+    """Kategorik değerleri (kod dizisi, benzersiz değer listesi) olarak kodla.
+
+    None değerler -1 kodunu alır (ör. üniversitesi bulunmayan bölüm).
+    """
+    lookup: dict = {}
+    uniques: List[Optional[str]] = []
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+            continue
+        code = lookup.get(value)
+        if code is None:
+            code = len(uniques)
+            lookup[value] = code
+            uniques.append(value)
+        codes[i] = code
+    return codes, uniques
+
+
+class DepartmentArrays:
+    """Bir alan türündeki bölüm kataloğunun sütunsal (columnar) görüntüsü.
+
+    Tüm diziler aynı uzunluktadır ve aynı bölüm sırasını paylaşır.
+    """
+
+    __slots__ = (
+        "ids", "university_ids", "field_types", "has_field_type", "is_tyt",
+        "min_score", "has_min_score", "min_rank", "tuition_fee", "has_scholarship",
+        "name_codes", "names_lower", "city_codes", "cities", "type_codes", "university_types",
+    )
+
+    # Sorguda kullanılan sütun sırası (from_rows bu sırayı bekler)
+    COLUMNS = (
+        "id", "university_id", "name", "field_type", "min_score", "min_rank",
+        "tuition_fee", "has_scholarship", "city", "university_type",
+    )
+
+    def __init__(self, ids, university_ids, field_types, has_field_type, is_tyt,
+                 min_score, has_min_score, min_rank, tuition_fee, has_scholarship,
+                 name_codes, names_lower, city_codes, cities, type_codes, university_types):
+        self.ids = ids
+        self.university_ids = university_ids
+        self.field_types = field_types
+        self.has_field_type = has_field_type
+        self.is_tyt = is_tyt
+        self.min_score = min_score
+        self.has_min_score = has_min_score
+        self.min_rank = min_rank
+        self.tuition_fee = tuition_fee
+        self.has_scholarship = has_scholarship
+        self.name_codes = name_codes
+        self.names_lower = names_lower
+        self.city_codes = city_codes
+        self.cities = cities
+        self.type_codes = type_codes
+        self.university_types = university_types
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> "DepartmentArrays":
+        """`COLUMNS` sırasındaki satırlardan (tuple) dizileri oluştur"""
+        rows = list(rows)
+        if rows:
+            (ids, university_ids, names, field_types, min_scores, min_ranks,
+             tuition_fees, scholarships, cities, university_types) = zip(*rows)
+        else:
+            ids = university_ids = names = field_types = min_scores = ()
+            min_ranks = tuition_fees = scholarships = cities = university_types = ()
+
+        field_types = [ft or "" for ft in field_types]
+        name_codes, name_values = _encode([(n or "").lower() for n in names])
+        city_codes, city_values = _encode(cities)
+        type_codes, type_values = _encode(university_types)
+
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            university_ids=np.array(university_ids, dtype=np.int64),
+            field_types=np.array(field_types, dtype=object),
+            has_field_type=np.array([bool(ft.strip()) for ft in field_types], dtype=bool),
+            is_tyt=np.array([ft.upper() == "TYT" for ft in field_types], dtype=bool),
+            min_score=_as_float_array(min_scores),
+            has_min_score=np.array([v is not None for v in min_scores], dtype=bool),
+            min_rank=_as_float_array(min_ranks),
+            tuition_fee=_as_float_array(tuition_fees),
+            has_scholarship=np.array([bool(v) for v in scholarships], dtype=bool),
+            name_codes=name_codes,
+            names_lower=name_values,
+            city_codes=city_codes,
+            cities=city_values,
+            type_codes=type_codes,
+            university_types=type_values,
+        )
+
+
+class ScoreArrays:
+    """Vektörel skorlama çıktısı (tüm diziler `positions` ile hizalı)"""
+
+    __slots__ = ("positions", "compatibility", "success", "preference", "final")
+
+    def __init__(self, positions, compatibility, success, preference, final):
+        self.positions = positions
+        self.compatibility = compatibility
+        self.success = success
+        self.preference = preference
+        self.final = final
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+
+def _code_mask(codes: np.ndarray, values: List[Optional[str]], predicate) -> np.ndarray:
+    """Benzersiz değerler üzerinde predicate çalıştırıp kod dizisine yay.
+
+    -1 kodu (eksik üniversite) her zaman False döner.
+    """
+    lut = np.zeros(len(values) + 1, dtype=bool)
+    for i, value in enumerate(values):
+        lut[i] = bool(predicate(value))
+    return lut[codes]
+
+
+def _membership(container: Any):
+    """`value in container` kontrolü - hatalı JSON yapısında False döner"""
+    def predicate(value):
+        try:
+            return value in container
+        except Exception:
+            return False
+    return predicate
+
+
+def parse_preferred_cities(raw: Any) -> list:
+    """Öğrencinin tercih ettiği şehirleri şehir önceliği için çözümle"""
+    if not raw:
+        return []
+    try:
+        return json.loads(raw) if isinstance(raw, str) else raw
+    except Exception:
+        return []
+
+
+def city_priority_mask(arrays: DepartmentArrays, preferred_cities: list) -> np.ndarray:
+    """Tercih edilen şehirdeki (büyük/küçük harf duyarsız) bölümler için True"""
+    if not preferred_cities:
+        return np.zeros(len(arrays), dtype=bool)
+    wanted = [pref_city.lower().strip() for pref_city in preferred_cities]
+    return _code_mask(
+        arrays.city_codes,
+        arrays.cities,
+        lambda city: (city.lower().strip() if city else "") in wanted,
+    )
+
+
+def eligible_mask(arrays: DepartmentArrays, student_field_type: Optional[str]) -> np.ndarray:
+    """Skorlanacak bölümler: alan türü dolu/eşleşen ve min_score > 0"""
+    field_ok = arrays.has_field_type.copy()
+    if student_field_type:
+        field_ok &= arrays.field_types == student_field_type
+    # NaN (None) için `<= 0` False döner; None ayrıca has_min_score ile elenir
+    return field_ok & arrays.has_min_score & ~(arrays.min_score <= 0)
+
+
+def _student_scores(student, arrays: DepartmentArrays, positions: np.ndarray) -> np.ndarray:
+    """TYT bölümleri için TYT puanı, diğerleri için toplam puan"""
+    is_tyt = arrays.is_tyt[positions]
+    tyt = getattr(student, "tyt_total_score", None)
+    total = getattr(student, "total_score", None)
+    tyt = float(tyt) if tyt else np.nan
+    total = float(total) if total else np.nan
+    return np.where(is_tyt, tyt, total)
+
+
+def compatibility_scores(student, arrays: DepartmentArrays, positions: np.ndarray) -> np.ndarray:
+    """Vektörel `_calculate_compatibility_score`"""
+    min_score = arrays.min_score[positions]
+    min_rank = arrays.min_rank[positions]
+    student_score = _student_scores(student, arrays, positions)
+
+    score = np.full(len(positions), 50.0)
+
+    with np.errstate(invalid="ignore"):
+        score_diff = student_score - min_score
+        has_score = (min_score > 0) & (student_score > 0)
+        score += np.where(
+            has_score,
+            np.select(
+                [score_diff > 50, score_diff > 20, score_diff > 0, score_diff > -20],
+                [20.0, 15.0, 10.0, 5.0],
+                default=-10.0,
+            ),
+            0.0,
+        )
+
+        student_rank = student.rank if student.rank and student.rank > 0 else None
+        if student_rank is not None:
+            rank_diff = min_rank - float(int(student_rank))
+            has_rank = min_rank > 0
+            score += np.where(
+                has_rank,
+                np.select(
+                    [rank_diff > 10000, rank_diff > 5000, rank_diff > 0],
+                    [15.0, 10.0, 5.0],
+                    default=-5.0,
+                ),
+                0.0,
+            )
+
+    score += np.where(arrays.field_types[positions] == student.field_type, 10.0, 0.0)
+    return np.clip(score, 0.0, 100.0)
+
+
+def success_probabilities(student, arrays: DepartmentArrays, positions: np.ndarray, admission=None) -> np.ndarray:
+    """Vektörel `_calculate_success_probability`
+
+    `admission` (`services.admission.AdmissionModel`) verilirse olasılık öğrenci
+    sıralamasının bölümün tarihsel taban sıralama dağılımına göre hesaplanır;
+    sıralama bilgisi olmayan bölümlerde puan farkı kurallarına düşülür.
+    """
+    min_score = arrays.min_score[positions]
+    has_min_score = arrays.has_min_score[positions]
+    student_score = _student_scores(student, arrays, positions)
+
+    with np.errstate(invalid="ignore"):
+        score_diff = student_score - min_score
+        buckets = np.select(
+            [score_diff > 50, score_diff > 30, score_diff > 10, score_diff > 0,
+             score_diff > -10, score_diff > -30],
+            [95.0, 85.0, 70.0, 60.0, 40.0, 20.0],
+            default=5.0,
+        )
+    # Eksik veri → 50.0 (min_score None/0 ya da öğrenci puanı yok)
+    missing = ~has_min_score | (min_score == 0) | np.isnan(student_score)
+    probabilities = np.where(missing, 50.0, buckets)
+    if admission is not None:
+        by_rank = admission.probabilities(student, arrays, positions)
+        probabilities = np.where(np.isnan(by_rank), probabilities, by_rank)
+    return probabilities
+
+
+def preference_scores(student, arrays: DepartmentArrays, positions: np.ndarray, collaborative=None) -> np.ndarray:
+    """Vektörel `_calculate_preference_score`.
+
+    Öğrencinin JSON tercihleri bir kez çözümlenir; şehir/tür eşleşmeleri
+    benzersiz değerler üzerinde hesaplanıp kodlara yayılır. `collaborative`
+    (`services.collaborative.Affinity`) verilirse "senin gibi öğrenciler
+    şunları da beğendi" skoru (0-1) en fazla `COLLABORATIVE_BONUS` puan ekler.
+    """
+    score = np.full(len(positions), 50.0)
+    city_codes = arrays.city_codes[positions]
+    type_codes = arrays.type_codes[positions]
+
+    if student.preferred_cities:
+        try:
+            preferred_cities = json.loads(student.preferred_cities)
+            score += np.where(
+                _code_mask(city_codes, arrays.cities, _membership(preferred_cities)), 20.0, 0.0
+            )
+        except Exception:
+            pass
+
+    if student.preferred_university_types:
+        try:
+            preferred_types = json.loads(student.preferred_university_types)
+            score += np.where(
+                _code_mask(type_codes, arrays.university_types, _membership(preferred_types)), 15.0, 0.0
+            )
+        except Exception:
+            pass
+
+    if student.scholarship_preference:
+        score += np.where(arrays.has_scholarship[positions], 15.0, 0.0)
+
+    tuition = arrays.tuition_fee[positions]
+    with np.errstate(invalid="ignore"):
+        if student.budget_preference == 'low':
+            score += np.where((tuition != 0) & (tuition < 10000), 10.0, 0.0)
+        elif student.budget_preference == 'high':
+            score += np.where((tuition != 0) & (tuition > 50000), 10.0, 0.0)
+
+    if student.interest_areas:
+        try:
+            interest_areas = json.loads(student.interest_areas)
+            name_codes = arrays.name_codes[positions]
+            for area in interest_areas:
+                needle = area.lower()
+                matches = _code_mask(name_codes, arrays.names_lower, lambda name: needle in name)
+                score += np.where(matches, 5.0, 0.0)
+        except Exception:
+            pass
+
+    if collaborative is not None:
+        score += COLLABORATIVE_BONUS * collaborative.lookup(arrays.ids[positions])
+
+    return np.clip(score, 0.0, 100.0)
+
+
+def score_departments(
+    student,
+    arrays: DepartmentArrays,
+    weights: Tuple[float, float, float],
+    positions: Optional[np.ndarray] = None,
+    admission=None,
+    collaborative=None,
+) -> ScoreArrays:
+    """Verilen bölüm pozisyonları için üç skoru ve ağırlıklı final skoru hesapla"""
+    if positions is None:
+        positions = np.flatnonzero(eligible_mask(arrays, student.field_type))
+    w_c, w_s, w_p = weights
+
+    compatibility = compatibility_scores(student, arrays, positions)
+    success = success_probabilities(student, arrays, positions, admission)
+    preference = preference_scores(student, arrays, positions, collaborative)
+    final = compatibility * w_c + success * w_s + preference * w_p
+
+    return ScoreArrays(positions, compatibility, success, preference, final)
+
+
+def select_top_k(final: np.ndarray, k: int, tie_order: Optional[np.ndarray] = None) -> np.ndarray:
+    """Final skora göre en iyi k elemanın indekslerini (azalan sırada) döndür.
+
+    Eşit skorlarda `tie_order` küçük olan önce gelir (kararlı sıralama ile aynı
+    sonuç). Önce argpartition ile aday kümesi daraltılır, sonra yalnızca
+    adaylar sıralanır.
+    """
+    n = len(final)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if tie_order is None:
+        tie_order = np.arange(n)
+
+    if k < n:
+        kth = np.argpartition(-final, k - 1)[:k]
+        threshold = final[kth].min()
+        # Eşik değerindeki eşitlikleri de aday kümesine al
+        candidates = np.flatnonzero(final >= threshold)
+    else:
+        candidates = np.arange(n)
+
+    order = np.lexsort((tie_order[candidates], -final[candidates]))
+    return candidates[order][:k]
@@ -2,73 +2,173 @@
 Celery tasks for recommendation generation
 Uzun süren recommendation hesaplamalarını asenkron olarak çalıştırır
 """
+from typing import Any, Dict, Optional, Tuple
+
+from celery.result import AsyncResult
+from celery.signals import task_prerun
+
 from celery_app import celery_app
 from database import SessionLocal
+from models import Recommendation
 from services.recommendation_engine import RecommendationEngine
+from core.exceptions import StudentNotFoundError
 from core.logging_config import api_logger
+from services.log_settings import log_settings_sync
 import traceback
 
 
-@celery_app.task(bind=True, name="generate_recommendations_async")
+# Celery durumları -> API'nin döndürdüğü iş durumları
+JOB_STATUSES = {
+    "PENDING": "queued",
+    "RECEIVED": "queued",
+    "STARTED": "running",
+    "PROGRESS": "running",
+    "RETRY": "retrying",
+    "SUCCESS": "completed",
+    "FAILURE": "failed",
+    "REVOKED": "cancelled",
+}
+
+
+@task_prerun.connect
+def apply_shared_log_settings(**kwargs):
+    """Worker süreçleri PUT /api/logging ile yazılan ayarları görev başında (en fazla poll aralığıyla) uygular"""
+    try:
+        log_settings_sync.sync_if_due(SessionLocal)
+    except Exception as e:
+        api_logger.warning("Log settings sync failed", error=str(e))
+
+
+@celery_app.task(bind=True, name="generate_recommendations_async", max_retries=3)
 def generate_recommendations_async(self, student_id: int, limit: int = 50, w_c: float = 0.4, w_s: float = 0.4, w_p: float = 0.2):
     """
     Asenkron recommendation generation task
-    
+
+    Tüm uygun bölümler vektörel skorlanır ve saklı öneriler tek seferde
+    delta olarak yazılır (yalnızca değişen satırlar). İlerleme PROGRESS
+    durumu ile yayınlanır.
+
     Args:
         student_id: Öğrenci ID'si
-        limit: Öneri limiti
+        limit: Öneri limiti (sonuçta döndürülen en iyi bölüm sayısı)
         w_c: Compatibility weight
         w_s: Success probability weight
         w_p: Preference weight
-    
+
     Returns:
-        dict: Task sonucu (job_id, status, recommendations)
+        dict: Task sonucu (job_id, status, yazılan satır sayıları, en iyi bölümler)
     """
+    def report(stage: str, percent: int) -> None:
+        self.update_state(
+            state="PROGRESS",
+            meta={"student_id": student_id, "stage": stage, "progress": percent}
+        )
+
     db = SessionLocal()
     try:
         api_logger.info(
-            f"Starting async recommendation generation",
+            "Starting async recommendation generation",
             student_id=student_id,
             task_id=self.request.id
         )
-        
-        # Recommendation engine oluştur
+        report("started", 0)
+
         engine = RecommendationEngine(db)
-        
-        # Önerileri oluştur
-        recommendations = engine.generate_recommendations(
-            student_id=student_id,
-            limit=limit,
-            w_c=w_c,
-            w_s=w_s,
-            w_p=w_p
+        result = engine.refresh_recommendations(
+            student_id,
+            weights=(w_c, w_s, w_p),
+            progress=report
         )
-        
+        top_department_ids = [
+            department_id
+            for (department_id,) in db.query(Recommendation.department_id).filter(
+                Recommendation.student_id == student_id
+            ).order_by(Recommendation.final_score.desc()).limit(limit)
+        ]
+
         api_logger.info(
-            f"Async recommendation generation completed",
+            "Async recommendation generation completed",
             student_id=student_id,
             task_id=self.request.id,
-            recommendations_count=len(recommendations)
+            inserted=result.inserted,
+            updated=result.updated,
+            deleted=result.deleted
         )
-        
+
         return {
             "status": "completed",
             "student_id": student_id,
-            "recommendations_count": len(recommendations),
-            "job_id": self.request.id
+            "job_id": self.request.id,
+            "inserted": result.inserted,
+            "updated": result.updated,
+            "deleted": result.deleted,
+            "unchanged": result.unchanged,
+            "recommendations_count": len(top_department_ids),
+            "department_ids": top_department_ids,
         }
-        
+
+    except StudentNotFoundError:
+        # Öğrenci yoksa tekrar denemenin anlamı yok
+        api_logger.warning(
+            "Async recommendation generation for unknown student",
+            student_id=student_id,
+            task_id=self.request.id
+        )
+        raise
     except Exception as e:
         api_logger.error(
-            f"Async recommendation generation failed",
+            "Async recommendation generation failed",
             student_id=student_id,
             task_id=self.request.id,
             error=str(e),
             traceback=traceback.format_exc()
         )
-        # Celery'ye hata bildir
-        self.retry(exc=e, countdown=60, max_retries=3)
-        raise
+        # Celery'ye hata bildir (max_retries sonrası hata FAILURE olarak kalır)
+        raise self.retry(exc=e, countdown=60)
     finally:
         db.close()
 
+
+def enqueue_recommendation_job(student_id: int, limit: int, weights: Tuple[float, float, float]) -> str:
+    """Öneri üretimini kuyruğa al ve job id döndür (eager modda hemen çalışır)"""
+    w_c, w_s, w_p = weights
+    async_result = generate_recommendations_async.apply_async(
+        args=(student_id,),
+        kwargs={"limit": limit, "w_c": w_c, "w_s": w_s, "w_p": w_p},
+    )
+    return async_result.id
+
+
+def get_recommendation_job(job_id: str) -> Dict[str, Any]:
+    """Bir öneri işinin durumunu, ilerlemesini ve (bittiyse) sonucunu döndür"""
+    async_result = AsyncResult(job_id, app=celery_app)
+    state = async_result.state
+    info = async_result.info
+
+    job: Dict[str, Any] = {
+        "job_id": job_id,
+        "status": JOB_STATUSES.get(state, state.lower()),
+        "stage": None,
+        "progress": 0,
+        "result": None,
+        "error": None,
+    }
+    if state == "PROGRESS" and isinstance(info, dict):
+        job["stage"] = info.get("stage")
+        job["progress"] = info.get("progress", 0)
+    elif state == "SUCCESS":
+        job["stage"] = "done"
+        job["progress"] = 100
+        job["result"] = info
+    elif state == "FAILURE":
+        job["stage"] = "failed"
+        job["error"] = _error_message(info)
+    return job
+
+
+def _error_message(info: Any) -> Optional[str]:
+    if info is None:
+        return None
+    if isinstance(info, BaseException):
+        return f"{type(info).__name__}: {info}"
+    return str(info)
@@ -0,0 +1,110 @@
+"""Testlerin ortak fixture'ları"""
+import json
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from core import cache as cache_module
+from core.cache import TwoTierCache
+from database import Base
+from models import Student, University, Department
+from services.admission import admission_store
+from services.trends import trend_store
+
+CITIES = ["İstanbul", "Ankara", "İzmir", "Bursa", "Eskişehir"]
+TYPES = ["devlet", "vakif"]
+NAMES = ["Bilgisayar Mühendisliği", "Tıp", "Hukuk", "Makine Mühendisliği", "İşletme"]
+
+
+@pytest.fixture
+def db():
+    """Tüm tabloları oluşturulmuş, bellek içi SQLite session'ı"""
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def isolated_cache(monkeypatch):
+    """Varsayılan cache'i paylaşılan katmanı olmayan taze bir örnekle değiştir
+
+    Paylaşılan katman testler arasında sonuç taşımasın diye her test kendi cache'ini kullanır.
+    """
+    cache = TwoTierCache(max_entries=64, shared=None)
+    monkeypatch.setattr(cache_module, "_default_cache", cache)
+    return cache
+
+
+@pytest.fixture(autouse=True)
+def fresh_admission_model():
+    """Trend ve kabul modeli önbelleklerini her testin başında ve sonunda sıfırla"""
+    trend_store.invalidate()
+    admission_store.invalidate()
+    yield
+    trend_store.invalidate()
+    admission_store.invalidate()
+
+
+def _build_catalogue(db, n_departments=400, seed=7):
+    rng = random.Random(seed)
+    universities = []
+    for i in range(20):
+        uni = University(
+            name=f"Üniversite {i}",
+            city=rng.choice(CITIES),
+            university_type=rng.choice(TYPES),
+        )
+        db.add(uni)
+        universities.append(uni)
+    db.flush()
+
+    for i in range(n_departments):
+        min_score = rng.choice([None, 0.0, round(rng.uniform(200, 560), 2)])
+        db.add(Department(
+            university_id=rng.choice(universities).id,
+            name=rng.choice(NAMES),
+            field_type=rng.choice(["SAY", "SAY", "EA"]),
+            min_score=min_score,
+            min_rank=rng.choice([None, 0, rng.randint(100, 200000)]),
+            tuition_fee=rng.choice([None, 0.0, 5000.0, 30000.0, 80000.0]),
+            has_scholarship=rng.random() < 0.3,
+        ))
+    db.commit()
+
+
+def _student(**overrides):
+    data = dict(
+        name="Test Student",
+        class_level="12",
+        exam_type="TYT+AYT",
+        field_type="SAY",
+        total_score=430.0,
+        tyt_total_score=380.0,
+        rank=25000,
+        preferred_cities=json.dumps(["İstanbul", "ankara"]),
+        preferred_university_types=json.dumps(["devlet"]),
+        scholarship_preference=True,
+        budget_preference="low",
+        interest_areas=json.dumps(["mühendis", "tıp"]),
+    )
+    data.update(overrides)
+    return Student(**data)
+
+
+@pytest.fixture
+def build_catalogue():
+    """Sabit seed'li rastgele üniversite/bölüm kataloğu kuran yardımcı: build_catalogue(db, n_departments=400, seed=7)"""
+    return _build_catalogue
+
+
+@pytest.fixture
+def make_student():
+    """Varsayılan SAY öğrencisini alan bazında değiştirerek üreten yardımcı: make_student(**overrides)"""
+    return _student
@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Department, DepartmentYearlyStats, University
+from services.admission import AdmissionModel, ScoreRankTable, admission_store, build_rank_tables
+from services.trends import TrendSnapshot, build_trend, trend_store
+from services.vectorized_scoring import DepartmentArrays
+
+
+@pytest.fixture(autouse=True)
+def fresh_stores():
+    trend_store.invalidate()
+    admission_store.invalidate()
+    yield
+    trend_store.invalidate()
+    admission_store.invalidate()
+
+
+def _student(**overrides):
+    data = dict(rank=None, total_score=None, tyt_total_score=None, field_type="SAY")
+    data.update(overrides)
+    return SimpleNamespace(**data)
+
+
+def _arrays(*rows):
+    """(id, alan türü, min_score, min_rank) satırlarından bölüm dizileri"""
+    return DepartmentArrays.from_rows([
+        (dept_id, 1, "Bölüm", field_type, score, rank, None, False, None, None)
+        for dept_id, field_type, score, rank in rows
+    ])
+
+
+# Yüksek puanlarda sıralama puana çok daha duyarlı (log-sıralama doğrusal)
+SAY_TABLE_ROWS = [("SAY", 2025, score, rank) for score, rank in (
+    (250.0, 600000), (300.0, 350000), (350.0, 180000), (400.0, 80000),
+    (450.0, 30000), (500.0, 6000), (540.0, 500),
+)]
+
+
+class TestScoreRankTable:
+    def test_interpolates_monotonically_and_extrapolates(self):
+        table = ScoreRankTable.build([300.0, 400.0, 400.0, 450.0, 500.0], [350000, 90000, 70000, 35000, 30000])
+
+        ranks = table.estimate_ranks(np.array([300.0, 400.0, 425.0, 500.0, 200.0, 560.0]))
+
+        assert ranks[0] == pytest.approx(350000)
+        assert ranks[1] == pytest.approx(np.exp(np.mean(np.log([90000, 70000]))))
+        assert ranks[1] > ranks[2] > ranks[3]
+        assert ranks[4] > 350000  # tablo altı: eğimle uzatılır
+        assert 1.0 <= ranks[5] < ranks[3]
+        assert np.all(np.diff(table.log_ranks) <= 0)
+
+    def test_noisy_pairs_are_made_monotone(self):
+        table = ScoreRankTable.build([300.0, 350.0, 400.0], [100000, 120000, 20000])
+        assert np.all(np.diff(table.log_ranks) <= 0)
+        assert ScoreRankTable.build([300.0, 300.0], [1000, 2000]) is None
+
+    def test_latest_year_per_field_type(self):
+        tables = build_rank_tables(SAY_TABLE_ROWS + [
+            ("SAY", 2024, 400.0, 1), ("SAY", 2024, 500.0, 1),
+            ("EA", 2023, 300.0, 200000), ("EA", 2023, 400.0, 50000), ("EA", 2024, 300.0, None),
+        ])
+        assert sorted(tables) == ["EA", "SAY"]
+        assert len(tables["SAY"]) == 7
+        assert tables["EA"].estimate_ranks(np.array([300.0]))[0] == pytest.approx(200000)
+
+
+class TestAdmissionModel:
+    def test_same_score_gap_means_more_near_the_top(self):
+        model = AdmissionModel.from_trends(build_rank_tables(SAY_TABLE_ROWS), None)
+        arrays = _arrays((1, "SAY", 490.0, 9000), (2, "SAY", 290.0, 400000))
+
+        top = model.probabilities(_student(total_score=500.0), arrays, np.array([0]))[0]
+        bottom = model.probabilities(_student(total_score=300.0), arrays, np.array([1]))[0]
+
+        # İkisi de taban puanın 10 puan üstünde; 500 civarında bu çok daha fazla sıralama demek
+        assert 50.0 < bottom < top <= 95.0
+
+    def test_history_sets_center_and_spread(self):
+        stable = build_trend(1, [(year, None, None, 10000, None, None) for year in (2023, 2024, 2025)])
+        volatile = build_trend(2, [(2023, None, None, 5000, None, None), (2025, None, None, 20000, None, None)])
+        model = AdmissionModel.from_trends({}, TrendSnapshot([stable, volatile]))
+        arrays = _arrays((1, "SAY", 400.0, 99), (2, "SAY", 400.0, 99), (3, "SAY", 400.0, None))
+
+        probabilities = model.probabilities(_student(rank=8000), arrays, np.arange(3))
+
+        assert probabilities[0] > probabilities[1] > 50.0
+        assert np.isnan(probabilities[2])  # sıralama bilgisi yok -> puan kuralları
+        # Puan tablosu yoksa ve sıralama girilmemişse öğrenci sıralaması bilinmez
+        assert np.isnan(model.probabilities(_student(total_score=450.0), arrays, np.arange(1))[0])
+
+    def test_tyt_departments_use_tyt_score(self):
+        tables = build_rank_tables([("TYT", 2025, 250.0, 900000), ("TYT", 2025, 400.0, 50000)] + SAY_TABLE_ROWS)
+        model = AdmissionModel.from_trends(tables, None)
+        arrays = _arrays((1, "TYT", 300.0, 500000))
+
+        # Girilen (SAY) sıralama TYT bölümünde kullanılmaz
+        weak = model.probabilities(_student(rank=100, tyt_total_score=260.0), arrays, np.arange(1))[0]
+        strong = model.probabilities(_student(rank=900000, tyt_total_score=390.0), arrays, np.arange(1))[0]
+        assert weak < 50.0 < strong
+
+    def test_entered_rank_applies_only_to_own_field_type(self):
+        ea_rows = [("EA", 2025, score, rank) for score, rank in ((300.0, 300000), (400.0, 90000), (500.0, 5000))]
+        model = AdmissionModel.from_trends(build_rank_tables(SAY_TABLE_ROWS + ea_rows), None)
+        arrays = _arrays((1, "SAY", 400.0, 80000), (2, "EA", 400.0, 90000))
+        student = _student(rank=5000, total_score=410.0)
+
+        ranks = model.student_ranks(student, arrays, np.arange(2))
+
+        assert ranks[0] == 5000.0
+        # SAY sıralaması EA bölümüne taşınmaz; EA tablosundan puanla tahmin edilir
+        assert ranks[1] == pytest.approx(model.tables["EA"].estimate_ranks(np.array([410.0]))[0])
+        assert ranks[1] > 50000
+
+    def test_store_loads_from_yearly_stats(self, tmp_path):
+        engine = create_engine(f"sqlite:///{tmp_path / 'admission.db'}")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+        session.add(University(id=1, name="A", city="Ankara", university_type="devlet"))
+        for dept_id, (score, rank) in enumerate(((300.0, 350000), (400.0, 80000), (500.0, 6000)), start=1):
+            session.add(Department(id=dept_id, university_id=1, name=f"B{dept_id}", field_type="SAY",
+                                   min_score=score, min_rank=rank))
+            session.add_all([
+                DepartmentYearlyStats(department_id=dept_id, year=2024, min_score=score - 5, min_rank=int(rank * 1.1)),
+                DepartmentYearlyStats(department_id=dept_id, year=2025, min_score=score, min_rank=rank),
+            ])
+        session.commit()
+
+        model = admission_store.load(session)
+
+        assert model.ids.tolist() == [1, 2, 3]
+        assert model.tables["SAY"].estimate_ranks(np.array([400.0]))[0] == pytest.approx(80000)
+        session.close()
@@ -0,0 +1,172 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import Base, get_async_db
+from models import Department, Preference, Recommendation, Swipe
+from routers import discovery, preferences, recommendations, stats
+from services.catalogue import department_catalogue
+from services.collaborative import collaborative_store
+
+
+@pytest.fixture
+def db(tmp_path, build_catalogue, make_student):
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    session = session_factory()
+    build_catalogue(session, n_departments=120)
+    session.add(make_student())
+    session.commit()
+    department_catalogue.invalidate()
+    try:
+        yield session, path, session_factory
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    session, path, session_factory = db
+    async_session = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool),
+        expire_on_commit=False,
+    )
+
+    async def override_get_async_db():
+        async with async_session() as db_session:
+            yield db_session
+
+    # Skorlama thread pool'da senkron session ile çalışır
+    monkeypatch.setattr(recommendations, "SessionLocal", session_factory)
+
+    app = FastAPI()
+    app.include_router(recommendations.router, prefix="/api/recommendations")
+    app.include_router(preferences.router, prefix="/api/preferences")
+    app.include_router(discovery.router, prefix="/api/discovery")
+    app.include_router(stats.router, prefix="/api/stats")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return TestClient(app)
+
+
+class TestAsyncRouters:
+    """AsyncSession'a taşınan router'ların senkron sürümle aynı sonuçları verdiğini doğrular"""
+
+    def test_generate_and_read_recommendations(self, client, db):
+        session = db[0]
+        generated = client.post("/api/recommendations/generate/1", params={"limit": 15})
+        assert generated.status_code == 200
+        assert len(generated.json()) == 15
+
+        listed = client.get("/api/recommendations/student/1", params={"limit": 15}).json()
+        assert [r["department_id"] for r in listed] == [r["department_id"] for r in generated.json()]
+
+        stats_response = client.get("/api/recommendations/stats/1").json()
+        assert stats_response["total_recommendations"] == session.query(Recommendation).count()
+
+        assert client.delete("/api/recommendations/student/1").status_code == 200
+        session.expire_all()
+        assert session.query(Recommendation).count() == 0
+
+    def test_async_generation_reports_broker_failure(self, client, monkeypatch):
+        def broker_down(*args, **kwargs):
+            raise ConnectionError("broker unreachable")
+
+        monkeypatch.setattr("tasks.recommendation_tasks.enqueue_recommendation_job", broker_down)
+        response = client.post("/api/recommendations/generate/1", params={"async": "true"})
+
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Öneri işi kuyruğa alınamadı"
+
+    def test_job_status_is_read_off_the_event_loop(self, client, monkeypatch):
+        def read_status(job_id):
+            with pytest.raises(RuntimeError):
+                asyncio.get_running_loop()  # thread pool'da çalışan kodda event loop yok
+            return {"job_id": job_id, "status": "PENDING"}
+
+        monkeypatch.setattr("tasks.recommendation_tasks.get_recommendation_job", read_status)
+        response = client.get("/api/recommendations/jobs/abc")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "PENDING"
+
+    def test_swipe_adds_preference(self, client, db):
+        session = db[0]
+        department_id = session.query(Department.id).filter(Department.min_score > 0).first()[0]
+
+        response = client.post("/api/discovery/swipe", json={
+            "student_id": 1, "department_id": department_id, "action": "like"
+        })
+        assert response.json()["added_to_preferences"] is True
+        assert session.query(Swipe).count() == 1
+
+        listed = client.get("/api/preferences/", params={"student_id": 1}).json()
+        assert [p["department_id"] for p in listed] == [department_id]
+        assert listed[0]["order"] == 1
+
+        assert client.delete(f"/api/preferences/{listed[0]['id']}").status_code == 200
+        session.expire_all()
+        assert session.query(Preference).count() == 0
+
+    def test_discovery_filters_from_database(self, client):
+        response = client.get("/api/discovery/departments", params={"field_type": "SAY", "min_score": 300})
+        assert response.status_code == 200
+        departments = response.json()
+        assert departments
+        assert all(d["field_type"] == "SAY" and d["min_score"] >= 300 for d in departments)
+
+        sample = client.get("/api/discovery/departments", params={"random": True}).json()
+        assert 0 < len(sample) <= 10
+
+    def test_discovery_orders_by_collaborative_scores(self, client, db):
+        session = db[0]
+        listed = [d["id"] for d in client.get("/api/discovery/departments", params={"field_type": "SAY"}).json()]
+        liked, also_liked = listed[0], listed[-1]
+        for student_id in (1, 2, 3):
+            session.add(Swipe(student_id=student_id, department_id=liked, action="like"))
+        for student_id in (2, 3):
+            session.add(Swipe(student_id=student_id, department_id=also_liked, action="like"))
+        session.commit()
+        collaborative_store.refresh(session)
+        try:
+            similar = client.get(f"/api/discovery/departments/{liked}/similar").json()
+            assert [d["id"] for d in similar] == [also_liked]
+
+            ordered = client.get("/api/discovery/departments", params={"field_type": "SAY", "student_id": 1}).json()
+            assert [d["id"] for d in ordered] == [also_liked] + [i for i in listed if i != also_liked]
+        finally:
+            collaborative_store.invalidate()
+
+    def test_discovery_ranks_whole_filtered_set_without_catalogue(self, client, db):
+        session = db[0]
+        listed = [d["id"] for d in client.get("/api/discovery/departments").json()]
+        assert len(listed) == 100
+        liked = listed[0]
+        # İlk 100'ün dışında kalan bölüm: skora göre sıralama kesmeden önce yapılmalı
+        also_liked = next(d for (d,) in session.query(Department.id).order_by(Department.id) if d not in listed)
+        for student_id in (1, 2, 3):
+            session.add(Swipe(student_id=student_id, department_id=liked, action="like"))
+        for student_id in (2, 3):
+            session.add(Swipe(student_id=student_id, department_id=also_liked, action="like"))
+        session.commit()
+        collaborative_store.refresh(session)
+        try:
+            from_database = [d["id"] for d in client.get("/api/discovery/departments", params={"student_id": 1}).json()]
+            department_catalogue.load(session)
+            from_catalogue = [d["id"] for d in client.get("/api/discovery/departments", params={"student_id": 1}).json()]
+
+            assert from_database[0] == also_liked
+            assert from_database == from_catalogue
+        finally:
+            department_catalogue.invalidate()
+            collaborative_store.invalidate()
+
+    def test_stats_without_attempts(self, client):
+        assert client.get("/api/stats/progress", params={"student_id": 1}).json()["progress"] == []
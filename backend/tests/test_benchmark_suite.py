@@ -0,0 +1,56 @@
+from scripts.benchmark_suite import compare_with_baseline, measure
+
+
+class TestBenchmarkSuite:
+    def test_measure_reports_percentiles_and_memory(self):
+        calls = []
+
+        def fn(i):
+            calls.append(i)
+            return [0] * 10000
+
+        result = measure("list_alloc", fn, iterations=10, setup=lambda i: None).as_dict()
+        # 1 ısınma + 10 ölçüm + 1 bellek ölçümü
+        assert len(calls) == 12
+        assert result["iterations"] == 10
+        assert 0 <= result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+        assert result["peak_memory_kib"] > 70  # 10.000 elemanlı liste ~78 KiB
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        config = {"departments": 100}
+        baseline = {"config": config, "results": {
+            "a": {"p95_ms": 10.0, "peak_memory_kib": 100.0},
+            "b": {"p95_ms": 10.0, "peak_memory_kib": 100.0},
+        }}
+        current = {
+            "a": {"p95_ms": 12.0, "peak_memory_kib": 100.0},
+            "b": {"p95_ms": 15.0, "peak_memory_kib": 200.0},
+            "new": {"p95_ms": 1.0, "peak_memory_kib": 1.0},
+        }
+
+        regressions = compare_with_baseline(current, baseline, config, tolerance=0.25)
+        assert len(regressions) == 2
+        assert all(line.startswith("b.") for line in regressions)
+        # Farklı boyut ayarlarıyla alınmış baseline karşılaştırılmaz
+        assert compare_with_baseline(current, baseline, {"departments": 5}, tolerance=0.25) == []
+
+    def test_compare_normalizes_timings_by_calibration(self):
+        config = {"departments": 100}
+        baseline = {"config": config, "calibration_ms": 10.0, "results": {
+            "a": {"p95_ms": 10.0, "peak_memory_kib": 100.0},
+            "b": {"p95_ms": 10.0, "peak_memory_kib": 100.0, "calibration_ms": 20.0},
+        }}
+        current = {
+            "a": {"p95_ms": 19.0, "peak_memory_kib": 100.0},
+            "b": {"p95_ms": 19.0, "peak_memory_kib": 130.0},
+        }
+
+        # İki kat yavaş makinede a'nın p95'i 20 ms'ye kadar gerileme sayılmaz; b kendi
+        # kalibrasyonuyla (20 ms) kaydedildiği için aynı hızda ve p95'i neredeyse iki katı
+        assert compare_with_baseline(current, baseline, config, tolerance=0.25, calibration_ms=20.0) == [
+            "b.p95_ms: 10.0 -> 19.0 (+90%)",
+            "b.peak_memory_kib: 100.0 -> 130.0 (+30%)",
+        ]
+        # Aynı hızdaki makinede a da gerilemiş sayılır
+        regressions = compare_with_baseline(current, baseline, config, tolerance=0.25, calibration_ms=10.0)
+        assert "a.p95_ms: 10.0 -> 19.0 (+90%)" in regressions
@@ -0,0 +1,206 @@
+import asyncio
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from core import cache as cache_module
+from core.cache import CacheStats, LocalLRUCache, SQLiteSharedBackend, TwoTierCache, cached
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestLocalLRUCache:
+    """Yerel katmanın boyut sınırı, LRU sırası ve TTL davranışı"""
+
+    def test_evicts_least_recently_used(self):
+        lru = LocalLRUCache(max_entries=2)
+        lru.set("a", 1, 60)
+        lru.set("b", 2, 60)
+        assert lru.get("a") == 1
+        lru.set("c", 3, 60)
+
+        assert lru.get("b") is None
+        assert (lru.get("a"), lru.get("c")) == (1, 3)
+        assert lru.stats.snapshot()["evictions"] == 1
+
+    def test_expired_entries_are_purged_before_eviction(self):
+        clock = FakeClock()
+        lru = LocalLRUCache(max_entries=2, clock=clock)
+        lru.set("old", 1, 5)
+        lru.set("fresh", 2, 60)
+        clock.now = 10
+        lru.set("new", 3, 60)
+
+        assert (lru.get("old"), lru.get("fresh"), lru.get("new")) == (None, 2, 3)
+        stats = lru.stats.snapshot()
+        assert (stats["expirations"], stats["evictions"]) == (1, 0)
+
+
+class TestTwoTierCache:
+    """Paylaşılan katman, single-flight ve dekoratör"""
+
+    def test_shared_tier_is_seen_by_other_workers(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        writer = TwoTierCache(shared=SQLiteSharedBackend(path))
+        reader = TwoTierCache(shared=SQLiteSharedBackend(path))
+
+        writer.set("cities", ["Ankara", "İzmir"], ttl=60)
+
+        assert reader.get("cities") == ["Ankara", "İzmir"]
+        assert reader.stats.snapshot()["shared_hits"] == 1
+        assert len(reader.local) == 1
+
+        writer.delete("cities")
+        reader.local.clear()
+        assert reader.get("cities") is None
+
+    def test_shared_keys_are_namespaced_by_version(self, tmp_path):
+        path = str(tmp_path / "cache.sqlite3")
+        old = TwoTierCache(shared=SQLiteSharedBackend(path), namespace="v1")
+        new = TwoTierCache(shared=SQLiteSharedBackend(path), namespace="v2")
+
+        old.set("cities", ["Ankara"], ttl=60)
+        assert new.get("cities") is None
+
+        new.set("cities", ["İzmir"], ttl=60)
+        new.clear()
+        old.local.clear()
+        assert old.get("cities") == ["Ankara"]
+
+    def test_sqlite_file_is_private(self, tmp_path):
+        path = tmp_path / "private" / "cache.sqlite3"
+        SQLiteSharedBackend(str(path))
+
+        assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+
+    def test_sqlite_rejects_world_writable_file(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        path.touch()
+        os.chmod(path, 0o666)
+
+        with pytest.raises(PermissionError):
+            SQLiteSharedBackend(str(path))
+
+    def test_shared_tier_is_off_unless_configured(self, monkeypatch):
+        monkeypatch.delenv("CACHE_SHARED_BACKEND", raising=False)
+        monkeypatch.delenv("CACHE_REDIS_URL", raising=False)
+
+        assert cache_module._build_shared_backend() is None
+
+    def test_cache_version_prefers_env(self, monkeypatch):
+        monkeypatch.setenv("CACHE_VERSION", "deploy-42")
+        assert cache_module.cache_version() == "deploy-42"
+
+        monkeypatch.delenv("CACHE_VERSION")
+        assert cache_module.cache_version().startswith("b")
+
+    def test_shared_tier_failure_falls_back_to_local(self):
+        class Broken:
+            name = "broken"
+
+            def __getattr__(self, item):
+                def fail(*args, **kwargs):
+                    raise ConnectionError("down")
+                return fail
+
+        cache = TwoTierCache(shared=Broken())
+        cache.set("k", 1, ttl=60)
+
+        assert cache.get("k") == 1
+        cache.local.clear()
+        assert cache.get("k") is None
+        assert cache.stats.snapshot()["shared_errors"] == 2
+
+    def test_get_or_set_single_flight(self):
+        cache = TwoTierCache()
+        calls = []
+        release = threading.Event()
+
+        def loader():
+            calls.append(1)
+            release.wait(5)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_set("k", loader, ttl=60)))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        while cache.stats.snapshot()["stampede_waits"] < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        assert calls == [1]
+        assert results == ["value"] * 8
+
+    def test_cached_decorator_skips_db_argument(self, isolated_cache):
+        calls = []
+
+        @cached(ttl=60)
+        def lookup(city, db=None):
+            calls.append(city)
+            return city.upper()
+
+        assert lookup("ankara", db=object()) == "ANKARA"
+        assert lookup("ankara", db=object()) == "ANKARA"
+        assert lookup("izmir") == "IZMIR"
+        assert calls == ["ankara", "izmir"]
+
+    def test_cache_clear_removes_only_own_keys_from_both_tiers(self, tmp_path, monkeypatch):
+        cache = TwoTierCache(max_entries=16, shared=SQLiteSharedBackend(str(tmp_path / "cache.sqlite3")))
+        monkeypatch.setattr(cache_module, "_default_cache", cache)
+        calls = []
+
+        @cached(ttl=60, key="catalogue.lookup")
+        def lookup(city):
+            calls.append(city)
+            return city.upper()
+
+        cache.set("catalogue.lookup_other", "keep", ttl=60)
+        lookup("ankara")
+        lookup("izmir")
+
+        assert lookup.cache_clear() == 4  # 2 anahtar x 2 katman
+        assert cache.get("catalogue.lookup_other") == "keep"
+        lookup("ankara")
+        assert calls == ["ankara", "izmir", "ankara"]
+
+    def test_cached_async_single_flight(self, isolated_cache):
+        calls = []
+
+        @cached(ttl=60)
+        async def slow(value):
+            calls.append(value)
+            await asyncio.sleep(0.01)
+            return value * 2
+
+        async def run():
+            return await asyncio.gather(*(slow(21) for _ in range(5)))
+
+        assert asyncio.run(run()) == [42] * 5
+        assert calls == [21]
+        assert isolated_cache.stats.snapshot()["stampede_waits"] == 4
+
+    def test_stats_counts_hits_and_misses(self):
+        stats = CacheStats()
+        cache = TwoTierCache(stats=stats)
+        cache.get("missing")
+        cache.set("k", 1)
+        cache.get("k")
+
+        snapshot = stats.snapshot()
+        assert (snapshot["hits"], snapshot["misses"], snapshot["sets"]) == (1, 1, 1)
@@ -0,0 +1,86 @@
+import pytest
+
+from models import University, Department
+from services.catalogue import CatalogueSnapshot, DepartmentCatalogue, catalogue_version
+
+
+def _seed(db):
+    ankara = University(name="Ankara Üniversitesi", city="Ankara", university_type="devlet",
+                        website="https://www.ankara.edu.tr")
+    bilkent = University(name="Bilkent Üniversitesi", city="Ankara", university_type="vakif")
+    ege = University(name="Ege Üniversitesi", city="İzmir", university_type="devlet")
+    db.add_all([ankara, bilkent, ege])
+    db.flush()
+    db.add_all([
+        Department(university_id=ankara.id, name="Tıp", normalized_name="Tıp", field_type="SAY",
+                   min_score=520.0, degree_type="Bachelor", attributes='["Türkçe"]'),
+        Department(university_id=bilkent.id, name="Bilgisayar Mühendisliği", normalized_name="Bilgisayar Mühendisliği",
+                   field_type="SAY", min_score=480.0, degree_type="Bachelor", has_scholarship=True),
+        Department(university_id=ege.id, name="Hukuk", normalized_name="Hukuk", field_type="EA",
+                   min_score=None, degree_type="Bachelor"),
+        Department(university_id=ege.id, name="Adalet", normalized_name="Adalet", field_type="TYT",
+                   min_score=300.0, degree_type="Önlisans"),
+    ])
+    db.commit()
+
+
+class TestCatalogueSnapshot:
+    """Bellekteki katalog filtrelerinin veritabanı sorgularıyla aynı sonucu verdiğini doğrular"""
+
+    def test_display_order_puts_missing_scores_last(self, db):
+        _seed(db)
+        snapshot = CatalogueSnapshot.load(db)
+        names = [snapshot.departments[i].name for i in snapshot.ordered_ids]
+        assert names == ["Adalet", "Bilgisayar Mühendisliği", "Tıp", "Hukuk"]
+
+    def test_filters(self, db):
+        _seed(db)
+        snapshot = CatalogueSnapshot.load(db)
+
+        def names(**filters):
+            return [d.name for d, _ in snapshot.filter_departments(**filters)]
+
+        assert names(field_type="SAY") == ["Bilgisayar Mühendisliği", "Tıp"]
+        assert names(cities=["ankara"]) == ["Bilgisayar Mühendisliği", "Tıp"]
+        assert names(cities=["izm", "ANK"], field_type="SAY") == ["Bilgisayar Mühendisliği", "Tıp"]
+        assert names(university_type="devlet") == ["Adalet", "Tıp", "Hukuk"]
+        assert names(min_score=490) == ["Tıp"]
+        assert names(max_score=500) == ["Adalet", "Bilgisayar Mühendisliği"]
+        assert names(degree_types=["Önlisans"]) == ["Adalet"]
+        assert names(has_scholarship=True) == ["Bilgisayar Mühendisliği"]
+
+    def test_records_are_preparsed(self, db):
+        _seed(db)
+        snapshot = CatalogueSnapshot.load(db)
+        tip = snapshot.find_by_name("Tıp")
+        university = snapshot.get_university(tip.university_id)
+        assert tip.attributes == ["Türkçe"]
+        assert university.logo_url == "https://www.google.com/s2/favicons?domain=ankara.edu.tr&sz=256"
+        assert snapshot.find_by_name("Yok") is None
+
+    def test_field_type_arrays_follow_id_order(self, db):
+        _seed(db)
+        snapshot = CatalogueSnapshot.load(db)
+        arrays = snapshot.field_type_arrays("SAY")
+        assert arrays.ids.tolist() == sorted(arrays.ids.tolist())
+        assert len(arrays) == 2
+        assert snapshot.field_type_arrays("SAY") is arrays
+
+    def test_refresh_only_reloads_on_version_change(self, db):
+        _seed(db)
+        catalogue = DepartmentCatalogue()
+        assert catalogue.get() is None
+        assert catalogue.refresh(db) is True
+        first = catalogue.get()
+        assert catalogue.refresh(db) is False
+        assert catalogue.get() is first
+
+        version = catalogue_version(db)
+        db.add(Department(university_id=first.university_order[0], name="Fizik", field_type="SAY", min_score=400.0))
+        db.commit()
+        assert catalogue_version(db) != version
+        assert catalogue.refresh(db) is True
+        assert catalogue.get().find_by_name("Fizik") is not None
+
+        catalogue.invalidate()
+        assert catalogue.get() is None
@@ -0,0 +1,244 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import DepartmentSimilarity, Preference, RefreshLock, Swipe
+from services import refresh_lock
+from services.collaborative import (
+    LOCK_NAME,
+    CollaborativeStore,
+    build_interaction_matrix,
+    collaborative_store,
+    interaction_summary,
+    item_similarities,
+    refresh_similarities,
+)
+from services.recommendation_engine import RecommendationEngine
+from services.vectorized_scoring import COLLABORATIVE_BONUS, score_departments
+
+
+# Öğrenci -> beğenilen bölümler (1 ve 2 birlikte sık beğenilir)
+LIKES = {
+    1: [1, 2, 3],
+    2: [1, 2],
+    3: [1, 2, 4],
+    4: [2, 3],
+    5: [4, 5],
+    9: [5],
+}
+
+
+@pytest.fixture
+def db(db):
+    for student_id, department_ids in LIKES.items():
+        for department_id in department_ids:
+            # Tek sayılı bölümler swipe, çiftler tercih listesinden gelir
+            if department_id % 2:
+                db.add(Swipe(student_id=student_id, department_id=department_id, action="like"))
+            else:
+                db.add(Preference(student_id=student_id, department_id=department_id))
+    db.add_all([
+        # Aynı bölüm hem beğeni hem tercih: tek etkileşim
+        Preference(student_id=1, department_id=1),
+        # Beğenmeme etkileşim değildir
+        Swipe(student_id=5, department_id=1, action="dislike"),
+    ])
+    db.commit()
+    collaborative_store.invalidate()
+    try:
+        yield db
+    finally:
+        collaborative_store.invalidate()
+
+
+def _brute_force(matrix, shrinkage=10.0):
+    dense = matrix.toarray().astype(np.float64)
+    co = dense.T @ dense
+    norms = np.sqrt(np.diag(co))
+    similarity = co / np.outer(norms, norms) * (co / (co + shrinkage))
+    np.fill_diagonal(similarity, 0.0)
+    return similarity
+
+
+class TestInteractionMatrix:
+    def test_blocks_build_deduplicated_binary_matrix(self, db):
+        interactions = build_interaction_matrix(db, student_block=2)
+
+        assert interactions.department_ids.tolist() == [1, 2, 3, 4, 5]
+        expected = np.zeros((len(LIKES), 5))
+        for row, department_ids in enumerate(LIKES.values()):
+            expected[row, np.array(department_ids) - 1] = 1.0
+        np.testing.assert_array_equal(interactions.matrix.toarray(), expected)
+        assert interactions.matrix.dtype == np.float32
+
+    def test_empty(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=engine)
+        session = sessionmaker(bind=engine)()
+
+        interactions = build_interaction_matrix(session)
+
+        assert interactions.matrix.shape == (0, 0)
+        assert item_similarities(interactions.matrix, 5)[0].shape == (0, 0)
+        session.close()
+
+
+class TestItemSimilarities:
+    def test_blocked_top_n_matches_brute_force(self):
+        matrix = sparse.random(400, 60, density=0.08, format="csr", dtype=np.float32, random_state=3)
+        matrix.data[:] = 1.0
+        expected = _brute_force(matrix)
+
+        # Küçük blok sınırı: her blokta birkaç sütun
+        neighbors, scores, co_likes = item_similarities(matrix, 7, max_block_cells=300)
+
+        assert neighbors.shape == (60, 7)
+        for item in range(60):
+            np.testing.assert_allclose(scores[item], np.sort(expected[item])[::-1][:7], rtol=1e-5)
+            valid = neighbors[item] >= 0
+            np.testing.assert_allclose(expected[item, neighbors[item, valid]], scores[item, valid], rtol=1e-5)
+            assert item not in neighbors[item].tolist()
+        dense = matrix.toarray()
+        assert co_likes[0, 0] == int(dense[:, 0] @ dense[:, neighbors[0, 0]])
+
+
+class TestCollaborativeStore:
+    def test_refresh_materializes_and_skips_unchanged_data(self, db):
+        store = CollaborativeStore()
+
+        assert store.refresh(db) is True
+        assert store.refresh(db) is False
+
+        rows = db.query(DepartmentSimilarity).order_by(DepartmentSimilarity.rank).filter(
+            DepartmentSimilarity.department_id == 1
+        ).all()
+        # 1 ile 2: üç ortak beğeni, 3 ve 4: birer
+        assert [(r.similar_department_id, r.co_likes) for r in rows][0] == (2, 3)
+        assert {r.similar_department_id for r in rows} == {2, 3, 4}
+        assert rows[0].source_version == interaction_summary(db).version
+
+        similar_ids, scores = store.get().similar(1, limit=2)
+        assert similar_ids.tolist()[0] == 2 and len(scores) == 2
+        assert np.all(np.diff(scores) <= 0)
+
+        db.add(Swipe(student_id=9, department_id=3, action="like"))
+        db.commit()
+        assert store.refresh(db) is True
+
+    def test_other_process_reuses_stored_similarities(self, db, monkeypatch):
+        CollaborativeStore().refresh(db)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("recomputed")
+
+        monkeypatch.setattr("services.collaborative.refresh_similarities", fail)
+        other = CollaborativeStore()
+        assert other.refresh(db) is True
+        assert len(other.get()) == 5
+
+    def test_version_changes_when_pairs_change_in_place(self, db):
+        before = interaction_summary(db).version
+
+        # Aynı sayı ve id'ler, farklı çift: sayı + max(id) bunu görmezdi
+        swipe = db.query(Swipe).filter(Swipe.student_id == 9).one()
+        swipe.department_id = 3
+        db.commit()
+        moved = interaction_summary(db).version
+        assert moved != before
+
+        dislike = db.query(Swipe).filter(Swipe.action == "dislike").one()
+        dislike.action = "like"
+        swipe.action = "dislike"
+        db.commit()
+        assert interaction_summary(db).version not in (before, moved)
+
+    def test_locked_refresh_reloads_stored_table(self, db, monkeypatch):
+        CollaborativeStore().refresh(db)
+        stored = interaction_summary(db).version
+        db.add(Swipe(student_id=9, department_id=3, action="like"))
+        db.commit()
+
+        def fail(*args, **kwargs):
+            raise AssertionError("recomputed while another process holds the lock")
+
+        monkeypatch.setattr("services.collaborative.refresh_similarities", fail)
+        token = refresh_lock.try_acquire(db, LOCK_NAME, ttl_seconds=60)
+        other = CollaborativeStore()
+        assert other.refresh(db) is True
+        assert other.get().version == stored
+        assert other.refresh(db) is False
+
+        refresh_lock.release(db, LOCK_NAME, token)
+        monkeypatch.undo()
+        assert other.refresh(db) is True
+        assert other.get().version == interaction_summary(db).version
+
+    def test_student_affinity_combines_liked_neighbours(self, db):
+        refresh_similarities(db)
+        store = CollaborativeStore()
+
+        affinity = store.affinity(db, 9)  # yalnızca 5'i beğendi
+        neighbours, scores_from_5 = store.get().similar(5)
+
+        assert set(affinity.ids.tolist()) == set(neighbours.tolist())
+        assert affinity.get(4) == pytest.approx(float(scores_from_5[neighbours.tolist().index(4)]))
+        assert affinity.get(2) == 0.0
+        np.testing.assert_allclose(affinity.lookup(np.array([4, 2, 99])), [affinity.get(4), 0.0, 0.0])
+
+        # Birden fazla beğeni: 1 - Π(1 - benzerlik)
+        snapshot = store.get()
+        combined = snapshot.affinity([1, 3])
+        s1 = dict(zip(*[a.tolist() for a in snapshot.similar(1)]))
+        s3 = dict(zip(*[a.tolist() for a in snapshot.similar(3)]))
+        assert combined.get(2) == pytest.approx(1 - (1 - s1[2]) * (1 - s3[2]))
+
+        assert store.affinity(db, 42) is None  # beğenisi olmayan öğrenci
+
+
+class TestRefreshLock:
+    def test_single_holder_and_expired_takeover(self, db):
+        token = refresh_lock.try_acquire(db, "job", ttl_seconds=60)
+        assert token is not None
+        assert refresh_lock.try_acquire(db, "job", ttl_seconds=60) is None
+
+        # Çöken sahibin kilidi süresi dolunca devralınır
+        db.query(RefreshLock).update({RefreshLock.expires_at: 0.0})
+        db.commit()
+        taken = refresh_lock.try_acquire(db, "job", ttl_seconds=60)
+        assert taken not in (None, token)
+
+        refresh_lock.release(db, "job", token)  # eski sahip artık bırakamaz
+        assert db.query(RefreshLock).count() == 1
+        refresh_lock.release(db, "job", taken)
+        assert db.query(RefreshLock).count() == 0
+
+
+class TestRecommendationIntegration:
+    def test_affinity_raises_preference_score(self, db, build_catalogue, make_student):
+        build_catalogue(db, n_departments=60)
+        student = make_student(id=500)
+        db.add(student)
+        db.commit()
+        engine = RecommendationEngine(db)
+        arrays = engine._load_department_arrays("SAY")
+        positions = np.arange(len(arrays))
+        liked = arrays.ids[:2].tolist()
+        for department_id in liked:
+            db.add(Swipe(student_id=student.id, department_id=department_id, action="like"))
+        for other in (101, 102, 103):
+            for department_id in liked + arrays.ids[2:4].tolist():
+                db.add(Swipe(student_id=other, department_id=department_id, action="like"))
+        db.commit()
+        collaborative_store.refresh(db)
+
+        affinity = engine._collaborative_affinity(student.id)
+        plain = score_departments(student, arrays, (0.4, 0.4, 0.2), positions)
+        boosted = score_departments(student, arrays, (0.4, 0.4, 0.2), positions, collaborative=affinity)
+
+        bonus = COLLABORATIVE_BONUS * affinity.lookup(arrays.ids)
+        assert bonus[2] > 0 and bonus[3] > 0
+        np.testing.assert_allclose(boosted.preference, np.clip(plain.preference + bonus, 0, 100))
+        assert np.all(boosted.compatibility == plain.compatibility)
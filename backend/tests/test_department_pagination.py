@@ -0,0 +1,113 @@
+import json
+import random
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import Base, get_async_db
+from models import University, Department
+from routers import universities
+from services.catalogue import department_catalogue
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return tmp_path / "departments.db"
+
+
+@pytest.fixture
+def db(db_path):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    rng = random.Random(3)
+    unis = [University(name=f"Üniversite {i}", city=rng.choice(["Ankara", "İzmir"]), university_type="devlet")
+            for i in range(5)]
+    session.add_all(unis)
+    session.flush()
+    for i in range(137):
+        session.add(Department(
+            university_id=rng.choice(unis).id,
+            name=rng.choice(["Tıp", "Hukuk", "Fizik", "Matematik"]),
+            field_type=rng.choice(["SAY", "EA"]),
+            min_score=rng.choice([None, round(rng.uniform(200, 500), 2)]),
+            degree_type="Bachelor",
+        ))
+    session.commit()
+    try:
+        yield session
+    finally:
+        department_catalogue.invalidate()
+        session.close()
+
+
+@pytest.fixture(params=["database", "catalogue"])
+def client(request, db, db_path):
+    # Her TestClient isteği kendi event loop'unda çalışır: havuzlanmış aiosqlite bağlantısı kullanılmaz
+    async_session = async_sessionmaker(
+        create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool),
+        expire_on_commit=False,
+    )
+
+    async def override_get_async_db():
+        async with async_session() as session:
+            yield session
+
+    app = FastAPI()
+    app.include_router(universities.router, prefix="/api/universities")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    if request.param == "catalogue":
+        department_catalogue.load(db)
+    else:
+        department_catalogue.invalidate()
+    return TestClient(app)
+
+
+def _expected_ids(db, field_type=None):
+    departments = db.query(Department).all()
+    if field_type:
+        departments = [d for d in departments if d.field_type == field_type]
+    departments.sort(key=lambda d: (d.min_score is None, d.name, d.id))
+    return [d.id for d in departments]
+
+
+class TestDepartmentPagination:
+    """/departments/ keyset sayfalama ve NDJSON akışının tam listeyle aynı sırayı verdiğini doğrular"""
+
+    def test_cursor_pages_cover_full_listing(self, client, db):
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 20, "field_type": "SAY"}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/universities/departments/", params=params)
+            assert response.status_code == 200
+            ids.extend(d["id"] for d in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+        assert ids == _expected_ids(db, "SAY")
+
+    def test_ndjson_stream_matches_json_listing(self, client, db):
+        listing = client.get("/api/universities/departments/").json()
+        response = client.get("/api/universities/departments/", params={"format": "ndjson"})
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [d["id"] for d in lines] == [d["id"] for d in listing] == _expected_ids(db)
+        assert lines[0]["university"]["name"] == listing[0]["university"]["name"]
+
+    def test_ndjson_stream_resumes_from_cursor(self, client, db):
+        first = client.get("/api/universities/departments/", params={"limit": 50})
+        cursor = first.headers["X-Next-Cursor"]
+        response = client.get("/api/universities/departments/", params={"format": "ndjson", "cursor": cursor})
+        ids = [json.loads(line)["id"] for line in response.text.splitlines()]
+        assert [d["id"] for d in first.json()] + ids == _expected_ids(db)
+
+    def test_invalid_cursor_is_rejected(self, client):
+        response = client.get("/api/universities/departments/", params={"cursor": "bozuk"})
+        assert response.status_code == 400
@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import update
+
+from schemas.dto import (
+    PreferenceDTO,
+    department_dto,
+    department_dtos,
+    department_dtos_from_tuples,
+    department_rows_query,
+    logo_url,
+    recommendation_dto,
+    to_dict,
+    university_dto,
+)
+from schemas.preference import PreferenceWithDepartmentResponse
+from schemas.university import DepartmentWithUniversityResponse, RecommendationResponse, UniversityResponse
+from core.responses import FastJSONResponse, dumps
+from models import Department, Recommendation, University
+from routers.universities import build_department_response, build_university_response
+from services.catalogue import CatalogueSnapshot
+
+
+def _university(**overrides):
+    values = dict(
+        id=3, name="Ankara Üniversitesi", city="Ankara", university_type="devlet",
+        website="https://www.ankara.edu.tr/", established_year=1946, latitude=39.9, longitude=32.8,
+        created_at=datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc), updated_at=None,
+    )
+    values.update(overrides)
+    return University(**values)
+
+
+def _department(**overrides):
+    values = dict(
+        id=11, university_id=3, name="Hukuk (İngilizce)", normalized_name="Hukuk",
+        attributes=json.dumps(["İngilizce"]), field_type="EA", language="Turkish", faculty="Hukuk",
+        duration=4, degree_type="Bachelor", min_score=455.25, min_rank=1200, quota=100,
+        scholarship_quota=0, tuition_fee=None, has_scholarship=False, last_year_min_score=450.0,
+        last_year_min_rank=1500, last_year_quota=90, description=None, requirements=None,
+        created_at=datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc),
+        updated_at=datetime(2024, 6, 1, 8, 0),
+    )
+    values.update(overrides)
+    return Department(**values)
+
+
+def _pydantic_json(model) -> dict:
+    return json.loads(model.model_dump_json())
+
+
+class TestDTOs:
+    def test_department_json_matches_pydantic_response(self):
+        university, department = _university(), _department()
+        expected = build_department_response(department, build_university_response(university))
+
+        dto = department_dto(department, university_dto(university))
+
+        assert dumps(dto) == expected.model_dump_json().encode("utf-8")
+        assert DepartmentWithUniversityResponse.model_validate(to_dict(dto)) == expected
+
+    def test_tuple_projection_matches_orm_builder(self):
+        university, department = _university(), _department()
+        dept_row = tuple(getattr(department, c.key) for c in department_rows_query().selected_columns[:23])
+        uni_row = tuple(getattr(university, c.key) for c in department_rows_query().selected_columns[23:])
+
+        dtos = department_dtos_from_tuples([dept_row + uni_row, dept_row + uni_row])
+
+        assert dtos == department_dtos([(department, university)] * 2)
+        # Aynı üniversitenin DTO'su tekrar kullanılır
+        assert dtos[0].university is dtos[1].university
+
+    def test_catalogue_snapshot_reuses_dtos(self):
+        university, department = _university(), _department()
+        snapshot = CatalogueSnapshot("v1", [university], [department])
+        rows = [(department, university)]
+
+        first, second = snapshot.department_dtos(rows), snapshot.department_dtos(rows)
+
+        assert first[0] is second[0]
+        assert first[0].attributes == ["İngilizce"]
+
+    def test_recommendation_and_preference_json(self):
+        university, department = _university(), _department()
+        department_response = build_department_response(department, build_university_response(university))
+        rec = Recommendation(
+            id=5, student_id=1, department_id=11, compatibility_score=80.0, success_probability=65.5,
+            preference_score=40.0, final_score=66.2, recommendation_reason="Uygun",
+            is_safe_choice=False, is_dream_choice=False, is_realistic_choice=True,
+            created_at=datetime(2024, 7, 1),
+        )
+        expected = RecommendationResponse(**{k: getattr(rec, k) for k in (
+            "id", "student_id", "department_id", "compatibility_score", "success_probability",
+            "preference_score", "final_score", "recommendation_reason", "is_safe_choice",
+            "is_dream_choice", "is_realistic_choice", "created_at",
+        )}, department=department_response)
+        dto = department_dto(department, university_dto(university))
+
+        assert dumps(recommendation_dto(rec, dto)) == expected.model_dump_json().encode("utf-8")
+
+        preference = PreferenceDTO(1, 1, 11, 2, datetime(2024, 7, 2), dto, 70.0, "Yüksek")
+        expected_preference = PreferenceWithDepartmentResponse(
+            id=1, student_id=1, department_id=11, order=2, created_at=datetime(2024, 7, 2),
+            department=department_response, probability=70.0, probability_label="Yüksek",
+        )
+        assert json.loads(FastJSONResponse([preference]).body) == [_pydantic_json(expected_preference)]
+
+
+def _schema_payload(row, schema) -> dict:
+    """Kolon değerleri; NULL olup şemada varsayılanı olan alanlar atlanır (şema varsayılanı uygular)"""
+    values = {column.key: getattr(row, column.key) for column in row.__table__.columns}
+    return {
+        key: value for key, value in values.items()
+        if value is not None or key not in schema.model_fields or schema.model_fields[key].default is None
+    }
+
+
+class TestSchemaParity:
+    """Aynı veritabanı satırları eski Pydantic şeması ve DTO'lar üzerinden aynı JSON'u üretmeli"""
+
+    @pytest.fixture
+    def db(self, db):
+        db.add(_university(created_at=datetime(2024, 5, 1, 12, 30)))
+        db.add_all([
+            _department(id=1),
+            _department(id=2, attributes=None),
+            _department(id=3, attributes="İngilizce, Burslu"),  # geçersiz JSON
+            _department(id=4, field_type="TYT"),
+        ])
+        db.flush()
+        # INSERT kolon varsayılanlarını uygular; NULL değerleri sonradan yaz (eski içe aktarmalar gibi)
+        db.execute(update(Department).where(Department.id == 4).values(
+            language=None, duration=None, degree_type=None, scholarship_quota=None, has_scholarship=None,
+        ))
+        db.commit()
+        return db
+
+    def _schema_json(self, department, university) -> bytes:
+        university_payload = _schema_payload(university, UniversityResponse)
+        university_payload["logo_url"] = logo_url(university.website)
+        return DepartmentWithUniversityResponse(
+            **_schema_payload(department, DepartmentWithUniversityResponse),
+            university=UniversityResponse(**university_payload),
+        ).model_dump_json().encode("utf-8")
+
+    def test_rows_serialize_identically(self, db):
+        pairs = db.query(Department, University).join(University).order_by(Department.id).all()
+        expected = [self._schema_json(department, university) for department, university in pairs]
+
+        orm_dtos = department_dtos(pairs)
+        tuple_dtos = department_dtos_from_tuples(db.execute(department_rows_query().order_by(Department.id)))
+
+        assert [dumps(dto) for dto in orm_dtos] == expected
+        assert [dumps(dto) for dto in tuple_dtos] == expected
+        assert [dto.attributes for dto in orm_dtos] == [["İngilizce"], None, None, ["İngilizce"]]
+        assert (orm_dtos[3].language, orm_dtos[3].duration) == ("Turkish", 4)
+
+    def test_validators_reject_the_same_values(self, db):
+        university = db.get(University, 3)
+        department = db.get(Department, 1)
+        department.field_type = "FEN"
+        university.university_type = "özel"
+
+        with pytest.raises(ValueError, match="field_type must be one of"):
+            DepartmentWithUniversityResponse(**_schema_payload(department, DepartmentWithUniversityResponse),
+                                             university=build_university_response(_university()))
+        with pytest.raises(ValueError, match="field_type must be one of"):
+            department_dto(department, university_dto(_university()))
+        with pytest.raises(ValueError, match="university_type must be one of"):
+            build_university_response(university)
+        with pytest.raises(ValueError, match="university_type must be one of"):
+            university_dto(university)
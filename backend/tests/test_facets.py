@@ -0,0 +1,126 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import Base, get_async_db
+from models import CatalogueFacet, University, Department
+from routers import universities
+from services.facets import TURKISH_81_CITIES, facet_store, read_facets, refresh_facets
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    facet_store.invalidate()
+    yield
+    facet_store.invalidate()
+
+
+@pytest.fixture
+def setup(tmp_path):
+    db_path = tmp_path / "facets.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    ankara, istanbul, kktc = (
+        University(name="A", city="Ankara", university_type="devlet"),
+        University(name="B", city="ISTANBUL", university_type="vakif"),
+        University(name="C", city="Lefkoşa (KKTC)", university_type="vakif"),
+    )
+    session.add_all([ankara, istanbul, kktc, University(name="D", city="Bakü", university_type="yabanci")])
+    session.flush()
+    session.add_all([
+        Department(university_id=ankara.id, name="Hukuk", field_type="EA", degree_type="Lisans", language="Türkçe"),
+        Department(university_id=ankara.id, name="Tıp", field_type="SAY", degree_type="Bachelor", language="Türkçe"),
+        Department(university_id=istanbul.id, name="Hukuk", field_type="EA", degree_type="Bachelor", language="İngilizce"),
+        Department(university_id=istanbul.id, name="Adalet", field_type="TYT", degree_type="Önlisans", language="Türkçe"),
+    ])
+    session.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session() as db_session:
+            yield db_session
+
+    app = FastAPI()
+    app.include_router(universities.router, prefix="/api/universities")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield TestClient(app), session, statements
+    finally:
+        session.close()
+
+
+def by_value(items):
+    return {item["value"]: (item["department_count"], item["university_count"]) for item in items}
+
+
+class TestFacets:
+    def test_counts_materialized_on_first_load(self, setup):
+        client, session, _ = setup
+
+        facets = client.get("/api/universities/facets/").json()
+
+        assert list(facets) == ["city", "university_type", "field_type", "degree_type", "language"]
+        cities = by_value(facets["city"])
+        assert cities["Ankara"] == (2, 1)
+        assert cities["İstanbul"] == (2, 1)  # DB'deki yazım kanonik il adına indirgenir
+        assert cities["Adana"] == (0, 0)
+        assert cities["Lefkoşa (KKTC)"] == (0, 0)
+        assert "Bakü" not in cities
+        assert [item["value"] for item in facets["city"]][-1] == "Lefkoşa (KKTC)"
+        assert by_value(facets["degree_type"]) == {"Associate": (1, 1), "Bachelor": (3, 2)}
+        assert by_value(facets["field_type"]) == {"EA": (2, 2), "SAY": (1, 1), "TYT": (1, 1)}
+        assert by_value(facets["university_type"]) == {"devlet": (2, 1), "vakif": (2, 1)}
+        # Tablo ilk yüklemede yazıldı
+        assert session.query(CatalogueFacet).filter_by(facet="language").count() == 2
+
+    def test_etag_and_not_modified(self, setup):
+        client, _, statements = setup
+
+        first = client.get("/api/universities/facets/field_type")
+        assert first.status_code == 200
+        assert [item["value"] for item in first.json()] == ["EA", "SAY", "TYT"]
+        etag = first.headers["etag"]
+        query_count = len(statements)
+
+        second = client.get("/api/universities/facets/field_type", headers={"If-None-Match": etag})
+        assert second.status_code == 304
+        assert second.content == b""
+        # Snapshot bellekte: tekrar eden istekler sorgu atmaz
+        assert len(statements) == query_count
+
+        assert client.get("/api/universities/facets/unknown").status_code == 404
+
+    def test_cities_and_field_types_served_from_facets(self, setup):
+        client, _, statements = setup
+
+        cities = client.get("/api/universities/cities/").json()
+        assert cities[:2] == ["Adana", "Adıyaman"]
+        assert len(cities) == len(TURKISH_81_CITIES) + 1
+        query_count = len(statements)
+        assert client.get("/api/universities/field-types/").json() == ["EA", "SAY", "TYT"]
+        assert len(statements) == query_count
+
+    def test_refresh_after_catalogue_change(self, setup):
+        client, session, _ = setup
+        etag = client.get("/api/universities/facets/").headers["etag"]
+
+        session.add(Department(university_id=1, name="Fizik", field_type="SAY", degree_type="Lisans"))
+        session.commit()
+        refresh_facets(session)
+        assert by_value([f._asdict() for f in read_facets(session)["field_type"]])["SAY"] == (2, 1)
+
+        facet_store.load(session)
+        response = client.get("/api/universities/facets/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert by_value(response.json()["field_type"])["SAY"] == (2, 1)
@@ -0,0 +1,144 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from models import Department, ExamAttempt, Preference, Student, Swipe, University
+from services.feature_store import (
+    FEATURE_COLUMNS,
+    TARGETS,
+    VERSIONS_DIRNAME,
+    load_arrays,
+    load_training_matrix,
+    refresh_feature_store,
+)
+from services.ml_recommendation_engine import MLRecommendationEngine
+
+
+@pytest.fixture
+def db(db):
+    db.add_all([
+        University(id=1, name="A", city="Ankara", university_type="Devlet"),
+        University(id=2, name="B", city="İstanbul", university_type="Vakıf"),
+    ])
+    for dept_id in range(1, 9):
+        db.add(Department(
+            id=dept_id, university_id=1 + dept_id % 2, name=f"Bölüm {dept_id}", field_type="SAY",
+            min_score=300.0 + dept_id * 20, min_rank=200000 - dept_id * 15000, quota=50 + dept_id,
+            tuition_fee=0.0 if dept_id % 2 else 90000.0, has_scholarship=dept_id % 2 == 1,
+        ))
+    db.add(Department(id=9, university_id=99, name="Üniversitesiz", field_type="SAY"))
+    for student_id, score in ((1, 420.0), (2, 360.0), (3, 480.0)):
+        db.add(Student(
+            id=student_id, name=f"Öğrenci {student_id}", class_level="12", exam_type="TYT+AYT", field_type="SAY",
+            total_score=score, rank=int(600000 - score * 1000), percentile=score / 5, tyt_total_score=score * 0.6,
+            ayt_total_score=score * 0.4, tyt_math_net=20.0, ayt_math_net=10.0,
+            preferred_cities=json.dumps(["İstanbul"]), preferred_university_types=json.dumps(["Devlet"]),
+            scholarship_preference=student_id == 1,
+        ))
+    db.add_all([
+        Swipe(student_id=1, department_id=1, action="like"),
+        Swipe(student_id=1, department_id=2, action="dislike"),
+        Swipe(student_id=1, department_id=3, action="dislike"),
+        Swipe(student_id=1, department_id=9, action="like"),
+        Preference(student_id=1, department_id=3, order=1),
+        Preference(student_id=1, department_id=4, order=2),
+        Swipe(student_id=2, department_id=5, action="like"),
+        ExamAttempt(student_id=1, attempt_number=1, total_score=400.0),
+        ExamAttempt(student_id=1, attempt_number=2, total_score=440.0),
+    ])
+    # Öğrenci 3'ün swipe/tercihi yok: depoya girmez
+    db.commit()
+    return db
+
+
+class TestFeatureStore:
+    def test_labels_and_features_match_serving_matrix(self, db, tmp_path):
+        info = refresh_feature_store(db, str(tmp_path / "store"))
+        arrays = load_arrays(info.path)
+
+        assert (info.students, info.pairs, info.full_rebuild) == (2, 6, True)
+        pairs = list(zip(arrays["pair_student_ids"].tolist(), arrays["pair_department_ids"].tolist()))
+        assert pairs == [(1, 1), (1, 2), (1, 3), (1, 4), (1, 9), (2, 5)]
+        labels = dict(zip(pairs, arrays["labels"].tolist()))
+        assert labels[(1, 1)][2] == 1.0 and labels[(1, 2)][2] == 0.0
+        assert labels[(1, 3)][2] == 1.0  # tercih listesindeki ilk bölüm beğenmemeyi ezer
+        assert labels[(1, 4)][2] == pytest.approx(0.6)
+        # Uyumluluk/başarı: son denemelerin ortalaması (420) ile taban puan farkı
+        assert labels[(1, 1)][:2] == pytest.approx([0.5 + 1.0 * 0.3, 0.9])
+        assert labels[(1, 9)][:2] == [0.5, 0.5]  # taban puanı yok
+
+        engine = MLRecommendationEngine(db)
+        for student_id in (1, 2):
+            student = db.get(Student, student_id)
+            rows = np.flatnonzero(arrays["pair_student_ids"] == student_id)
+            departments = [db.get(Department, int(d)) for d in arrays["pair_department_ids"][rows]]
+            expected = engine._prepare_feature_matrix(student, departments, engine._load_universities(departments))
+            np.testing.assert_allclose(arrays["features"][rows], expected)
+        assert arrays["features"].shape[1] == len(FEATURE_COLUMNS) == 25
+
+    def test_only_changed_students_are_rebuilt(self, db, tmp_path):
+        path = str(tmp_path / "store")
+        first = refresh_feature_store(db, path)
+        before = {name: np.array(values) for name, values in load_arrays(path).items()}
+
+        assert refresh_feature_store(db, path) == first._replace(changed_students=0, full_rebuild=False)
+
+        db.add(Swipe(student_id=2, department_id=6, action="dislike"))
+        db.commit()
+        second = refresh_feature_store(db, path)
+        arrays = load_arrays(path)
+
+        assert (second.changed_students, second.full_rebuild, second.pairs) == (1, False, 7)
+        assert second.version != first.version
+        unchanged = arrays["pair_student_ids"] == 1
+        np.testing.assert_array_equal(arrays["features"][unchanged], before["features"][before["pair_student_ids"] == 1])
+
+        # Katalog değişikliği tüm çiftleri etkiler
+        db.get(Department, 1).min_score = 500.0
+        db.commit()
+        assert refresh_feature_store(db, path).full_rebuild
+
+    def test_each_refresh_publishes_new_generation(self, db, tmp_path, monkeypatch):
+        monkeypatch.setenv("ML_FEATURE_STORE_KEEP_VERSIONS", "2")
+        path = str(tmp_path / "store")
+        refresh_feature_store(db, path)
+        reader = load_arrays(path)  # eğitim sırasında açık kalan memmap'ler
+        before = np.array(reader["features"])
+
+        db.add(Swipe(student_id=2, department_id=6, action="dislike"))
+        db.commit()
+        refresh_feature_store(db, path)
+
+        # Önceki nesil yerinde değiştirilmez; manifest yeni nesli gösterir
+        np.testing.assert_array_equal(reader["features"], before)
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        assert meta["directory"].startswith(VERSIONS_DIRNAME)
+        assert len(load_arrays(path)["features"]) == meta["pairs"] == len(before) + 1
+
+        db.add(Swipe(student_id=2, department_id=7, action="like"))
+        db.commit()
+        refresh_feature_store(db, path)
+        assert len(os.listdir(os.path.join(path, VERSIONS_DIRNAME))) == 2
+
+    def test_training_reads_store_matrices(self, db, tmp_path):
+        path = str(tmp_path / "store")
+        refresh_feature_store(db, path)
+
+        X, y = load_training_matrix(path)
+
+        assert isinstance(X, np.memmap) and X.shape == (6, 25)
+        assert sorted(y) == sorted(TARGETS)
+
+        engine = MLRecommendationEngine(db)
+        engine.models, engine.scalers = {}, {}
+        engine.model_path = str(tmp_path / "models") + os.sep
+        engine.train_models_from_store(path)
+        assert engine.is_trained and engine.training_report["source"] == "feature_store"
+        assert engine.training_report["samples"] == 6
+
+    def test_missing_store(self, tmp_path):
+        with pytest.raises(FileNotFoundError):
+            load_training_matrix(str(tmp_path / "missing"))
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from database import Base, get_db
+from models import ForumPost, ForumComment
+from routers import forum
+
+
+pytestmark = pytest.mark.usefixtures("isolated_cache")
+
+
+@pytest.fixture
+def setup(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'forum.db'}")
+    Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(bind=engine)
+    session = SessionLocal()
+    # Aynı saniyede oluşturulan gönderiler: sıralama id ile ayrışmalı
+    same_second = datetime(2025, 1, 2, 10, 0, 0)
+    session.add_all([
+        ForumPost(id=i, student_id=1, title=f"Soru {i}", content="...",
+                  category="TYT" if i % 2 else "AYT",
+                  created_at=same_second if i > 3 else datetime(2025, 1, 1, 9, i))
+        for i in range(1, 8)
+    ])
+    session.flush()
+    session.add_all([ForumComment(post_id=post_id, student_id=1, content="c") for post_id in (7, 7, 5, 2)])
+    session.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    def override_get_db():
+        db = SessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(forum.router, prefix="/api/forum")
+    app.dependency_overrides[get_db] = override_get_db
+    try:
+        yield TestClient(app), statements
+    finally:
+        session.close()
+
+
+class TestForumListing:
+    def test_single_query_with_comment_counts_and_cached_total(self, setup):
+        client, statements = setup
+
+        body = client.get("/api/forum/posts", params={"size": 3}).json()
+
+        assert [(p["id"], p["comment_count"]) for p in body["posts"]] == [(7, 2), (6, 0), (5, 1)]
+        assert body["total"] == 7
+        assert len(statements) == 2  # sayfa + toplam
+
+        client.get("/api/forum/posts", params={"size": 3, "page": 2})
+        assert len(statements) == 3  # toplam cache'ten
+
+    def test_keyset_pages_cover_all_posts_once(self, setup):
+        client, _ = setup
+
+        seen, cursor = [], None
+        while True:
+            params = {"size": 2, **({"cursor": cursor} if cursor else {})}
+            body = client.get("/api/forum/posts", params=params).json()
+            seen += [p["id"] for p in body["posts"]]
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+        tyt = client.get("/api/forum/posts", params={"size": 2, "category": "TYT"}).json()
+        assert [p["id"] for p in tyt["posts"]] == [7, 5]
+        after = client.get("/api/forum/posts", params={"size": 2, "category": "TYT", "cursor": tyt["next_cursor"]}).json()
+        assert [p["id"] for p in after["posts"]] == [3, 1]
+        assert tyt["total"] == 4
+
+    def test_invalid_cursor(self, setup):
+        client, _ = setup
+        assert client.get("/api/forum/posts", params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+    def test_cursor_of_deleted_post_is_rejected(self, setup):
+        client, _ = setup
+        first = client.get("/api/forum/posts", params={"size": 2}).json()
+        db = next(client.app.dependency_overrides[get_db]())
+        db.query(ForumPost).filter(ForumPost.id == 6).delete()  # sayfanın son gönderisi
+        db.commit()
+        db.close()
+
+        response = client.get("/api/forum/posts", params={"size": 2, "cursor": first["next_cursor"]})
+
+        assert response.status_code == 400
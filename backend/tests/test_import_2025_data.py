@@ -0,0 +1,34 @@
+import pytest
+
+from models import CatalogueFacet, Department, DepartmentTrend, DepartmentYearlyStats, University
+from scripts import import_2025_data
+
+
+@pytest.fixture
+def programs_dir(tmp_path, monkeypatch):
+    (tmp_path / "2025_lisans.csv").write_text("", encoding="utf-8")
+    monkeypatch.setattr(import_2025_data, "PROGRAMS_DIR", tmp_path)
+    return tmp_path
+
+
+def test_main_refreshes_trends_and_facets(db, programs_dir, monkeypatch, isolated_cache):
+    def import_data_file(path, session, degree_type):
+        # Dosya ayrıştırması test dışı: 2025 istatistiği yazan bir import
+        session.add(University(id=1, name="EGE ÜNİVERSİTESİ", city="İzmir", university_type="devlet"))
+        session.add(Department(id=1, university_id=1, name="Tıp", field_type="SAY", min_score=520.0))
+        session.add_all([
+            DepartmentYearlyStats(department_id=1, year=year, min_score=score, min_rank=rank)
+            for year, score, rank in ((2024, 510.0, 9000), (2025, 520.0, 8000))
+        ])
+        session.commit()
+        return 1, 1
+
+    db.close = lambda: None  # script oturumu kapatır; test aynı oturumla kontrol eder
+    monkeypatch.setattr(import_2025_data, "SessionLocal", lambda: db)
+    monkeypatch.setattr(import_2025_data, "import_data_file", import_data_file)
+
+    assert import_2025_data.main() == 0
+
+    trend = db.get(DepartmentTrend, 1)
+    assert (trend.first_year, trend.last_year) == (2024, 2025)
+    assert db.query(CatalogueFacet).filter(CatalogueFacet.facet == "city", CatalogueFacet.value == "İzmir").count() == 1
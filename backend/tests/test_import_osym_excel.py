@@ -0,0 +1,101 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from models import University, Department, DepartmentYearlyStats
+from scripts import import_osym_excel
+from services import catalogue
+from scripts.import_osym_excel import clean_placement_frame, import_excel_file
+
+COLUMNS = ['Üniversite Türü', 'Üniversite Adı', 'Program Adı', 'Puan Türü',
+           'Kontenjan', 'Yerleşen', 'En Küçük Puan', 'En Büyük Puan']
+
+
+def _sheet(rows):
+    return pd.DataFrame(rows, columns=COLUMNS)
+
+
+ROWS_2024 = [
+    ['DEVLET', 'ANKARA ÜNİVERSİTESİ (ANKARA)', 'Tıp Fakültesi', 'SAY', 100, 100, 480.5, 520.25],
+    ['VAKIF', 'BAŞKENT ÜNİVERSİTESİ (ANKARA)', 'Hukuk (Burslu)', 'EA', 20, 20, 450.0, 470.0],
+    ['VAKIF', 'BAŞKENT ÜNİVERSİTESİ (ANKARA)', 'Hukuk (%50 İndirimli)', 'EA', 40, 38, 380.0, 430.0],
+    ['VAKIF', 'BAŞKENT ÜNİVERSİTESİ (ANKARA)', 'Hukuk (Ücretli)', 'EA', '--', '--', 'Dolmadı', '--'],
+    ['DEVLET', 'ANKARA ÜNİVERSİTESİ (ANKARA)', 'Adalet', 'TYT', 60, 55, 250.0, 300.0],
+    ['KKTC', 'YAKIN DOĞU ÜNİVERSİTESİ (LEFKOŞA)', 'Mimarlık (İngilizce)', 'SAY', 30, 12, 210.0, 320.0],
+    ['DEVLET', 'nan', 'Fizik', 'SAY', 10, 10, 300.0, 310.0],
+]
+
+
+@pytest.fixture
+def sheets(monkeypatch):
+    """Dosya okumayı bellekteki tablolarla değiştir"""
+    data = {}
+    monkeypatch.setattr(import_osym_excel, 'read_data_file', lambda path: data[path.name].copy())
+    return data
+
+
+class TestImportOsymExcel:
+    """Vektörel ÖSYM import'unun satır satır kurallarla aynı sonucu verdiğini doğrular"""
+
+    def test_clean_frame_applies_row_rules(self):
+        frame = clean_placement_frame(_sheet(ROWS_2024))
+
+        assert len(frame) == 6  # geçersiz üniversite adı atlandı
+        assert frame.loc[0, 'city'] == 'Ankara'
+        assert frame.loc[0, 'university_name'] == 'ANKARA ÜNİVERSİTESİ'
+        assert frame.loc[0, 'duration'] == 6
+        assert frame.loc[3, 'quota'] == 0 and pd.isna(frame.loc[3, 'min_score'])
+        assert frame.loc[4, 'field_type'] == 'TYT' and frame.loc[4, 'degree_type'] == 'Associate'
+        assert frame.loc[5, 'university_type'] == 'kktc'
+        assert frame.loc[5, 'language'] == 'English'
+
+    def test_variants_collapse_into_one_department(self, db, sheets):
+        sheets['2024.xlsx'] = _sheet(ROWS_2024)
+
+        assert import_excel_file(Path('2024.xlsx'), 2024, db) == (3, 4, 4)
+
+        law = db.query(Department).filter(Department.normalized_name == 'Hukuk').one()
+        assert law.name == 'Hukuk (Burslu)'
+        assert law.min_score == 380.0 and law.quota == 40
+        assert set(json.loads(law.attributes)) == {'Burslu', '%50 İndirimli', 'Ücretli'}
+
+        stats = db.query(DepartmentYearlyStats).filter(DepartmentYearlyStats.department_id == law.id).one()
+        assert (stats.min_score, stats.max_score, stats.quota, stats.placed_students) == (380.0, 470.0, 40, 38)
+
+    def test_reimport_merges_yearly_stats(self, db, sheets):
+        sheets['2024.xlsx'] = _sheet(ROWS_2024)
+        sheets['2024_ek.xlsx'] = _sheet([
+            ['VAKIF', 'BAŞKENT ÜNİVERSİTESİ (ANKARA)', 'Hukuk (Burslu)', 'EA', 25, 25, 440.0, 490.0],
+        ])
+        sheets['2025.xlsx'] = _sheet([
+            ['DEVLET', 'BAŞKENT ÜNİVERSİTESİ (ANKARA)', 'Hukuk (Burslu)', 'EA', 22, 22, 455.0, 475.0],
+        ])
+
+        import_excel_file(Path('2024.xlsx'), 2024, db)
+        assert import_excel_file(Path('2024.xlsx'), 2024, db) == (0, 0, 0)
+        assert import_excel_file(Path('2024_ek.xlsx'), 2024, db) == (0, 0, 0)
+        assert import_excel_file(Path('2025.xlsx'), 2025, db) == (0, 0, 1)
+
+        law = db.query(Department).filter(Department.normalized_name == 'Hukuk').one()
+        stats = {s.year: s for s in db.query(DepartmentYearlyStats).filter(DepartmentYearlyStats.department_id == law.id)}
+        assert (stats[2024].min_score, stats[2024].max_score, stats[2024].quota) == (380.0, 490.0, 25)
+        assert (stats[2025].min_score, stats[2025].quota) == (455.0, 22)
+        assert db.query(University).filter(University.name == 'BAŞKENT ÜNİVERSİTESİ').one().university_type == 'devlet'
+        assert db.query(DepartmentYearlyStats).count() == 5
+
+    def test_main_refreshes_derived_data_once(self, db, sheets, monkeypatch):
+        sheets['2024.xlsx'] = _sheet(ROWS_2024)
+        sheets['2025.xlsx'] = _sheet(ROWS_2024[:2])
+        calls = []
+        monkeypatch.setattr(import_osym_excel, 'find_data_files', lambda: [Path('2024.xlsx'), Path('2025.xlsx')])
+        monkeypatch.setattr(import_osym_excel, 'SessionLocal', lambda: db)
+        monkeypatch.setattr(catalogue, 'invalidate_catalogue_caches', lambda: calls.append('cache'))
+        monkeypatch.setattr(catalogue, 'refresh_facets', lambda session: calls.append('facets'))
+        monkeypatch.setattr(catalogue, 'refresh_trends', lambda session: calls.append('trends'))
+
+        import_osym_excel.main()
+
+        assert calls == ['cache', 'facets', 'trends']
+        assert db.query(DepartmentYearlyStats).count() == 6
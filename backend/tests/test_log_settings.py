@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.logging_config import get_log_config, get_logger, set_log_level, set_sample_rate
+from database import Base, get_db
+from models import LogSetting
+from routers import logging_settings
+from services.log_settings import LogSettingsSync, save_log_setting
+
+LOGGER = "api.test_shared_settings"
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    get_logger(LOGGER)
+    try:
+        yield sessionmaker(bind=engine)
+    finally:
+        set_log_level(LOGGER, "INFO")
+        set_sample_rate(LOGGER, None)
+
+
+@pytest.fixture
+def client(session_factory):
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(logging_settings.router, prefix="/api/logging")
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+class TestLoggingEndpoint:
+    def test_requires_admin_token(self, client, monkeypatch):
+        monkeypatch.delenv("ADMIN_API_TOKEN", raising=False)
+        assert client.put(f"/api/logging/{LOGGER}", params={"level": "DEBUG"}).status_code == 403
+
+        monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+        wrong = client.put(f"/api/logging/{LOGGER}", params={"level": "DEBUG"}, headers={"X-Admin-Token": "nope"})
+        assert wrong.status_code == 403
+        assert logging.getLogger(LOGGER).level == logging.INFO
+
+    def test_update_is_stored_and_applied(self, client, session_factory, monkeypatch):
+        monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+        headers = {"X-Admin-Token": "secret"}
+
+        response = client.put(f"/api/logging/{LOGGER}", params={"level": "debug", "sample_rate": 0.25}, headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["levels"][LOGGER] == "DEBUG"
+        db = session_factory()
+        setting = db.get(LogSetting, LOGGER)
+        assert (setting.level, setting.sample_rate) == ("DEBUG", 0.25)
+        db.close()
+        assert client.put(f"/api/logging/{LOGGER}", params={"level": "LOUD"}, headers=headers).status_code == 400
+
+
+class TestLogSettingsSync:
+    def test_other_worker_applies_changed_rows_once(self, session_factory):
+        db = session_factory()
+        save_log_setting(db, LOGGER, "warning", None)
+        worker = LogSettingsSync()
+
+        assert worker.sync(db) == 1
+        assert logging.getLogger(LOGGER).level == logging.WARNING
+        assert worker.sync(db) == 0
+
+        save_log_setting(db, LOGGER, None, 0.5)
+        assert worker.sync(db) == 1
+        assert get_log_config()["debug_sample_rates"][LOGGER] == 0.5
+        assert logging.getLogger(LOGGER).level == logging.WARNING
+        db.close()
+
+    def test_sync_if_due_is_throttled(self, session_factory):
+        worker = LogSettingsSync()
+        db = session_factory()
+        save_log_setting(db, LOGGER, "ERROR", None)
+
+        assert worker.sync_if_due(session_factory) == 1
+        save_log_setting(db, LOGGER, "DEBUG", None)
+        assert worker.sync_if_due(session_factory) == 0  # poll aralığı dolmadı
+        db.close()
@@ -0,0 +1,134 @@
+import json
+import logging
+import logging.handlers
+import os
+
+import pytest
+
+from core import logging_config
+from core.logging_config import JsonFormatter, SamplingFilter, get_logger, set_log_level, set_sample_rate
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(level=logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def listener_capture(monkeypatch):
+    """Kuyruk dinleyicisini dosya yerine belleğe yazan bir handler ile değiştirir"""
+    pipeline = logging_config._pipeline
+    pipeline.stop()
+    capture = _Capture()
+    monkeypatch.setattr(pipeline, "_build_handlers", lambda: (capture,))
+    pipeline.start()
+    try:
+        yield capture, pipeline
+    finally:
+        pipeline.stop()
+        monkeypatch.undo()
+        pipeline.start()
+
+
+class TestLoggingPipeline:
+    def test_logger_only_enqueues(self):
+        logger = get_logger("api.test_enqueue")
+        assert [type(h) for h in logger.logger.handlers] == [logging_config._PipelineQueueHandler]
+        assert logger.logger.propagate is False
+
+    def test_json_line_contains_context(self, listener_capture):
+        capture, pipeline = listener_capture
+        get_logger("api.test_json").info("Recommendations materialized", user_id=7, inserted=3)
+        pipeline.stop()
+
+        line = json.loads(JsonFormatter().format(capture.records[-1]))
+        assert line["message"] == "Recommendations materialized"
+        assert line["logger"] == "api.test_json"
+        assert line["level"] == "INFO"
+        assert line["user_id"] == 7 and line["inserted"] == 3
+
+    def test_debug_sampling_and_runtime_level(self, listener_capture):
+        capture, pipeline = listener_capture
+        logger = get_logger("api.test_sampling")
+
+        for _ in range(10):
+            logger.debug("dropped by level")
+        set_log_level("api.test_sampling", "DEBUG")
+        set_sample_rate("api.test_sampling", 0.1)
+        for i in range(100):
+            logger.debug("sampled", i=i)
+        logger.info("never sampled")
+        pipeline.stop()
+
+        messages = [r.event for r in capture.records if r.name == "api.test_sampling"]
+        assert "dropped by level" not in messages
+        assert messages.count("sampled") == 10
+        assert messages.count("never sampled") == 1
+        set_sample_rate("api.test_sampling", None)
+
+    def test_sampling_filter_rate_bounds(self):
+        sampler = SamplingFilter(default_rate=0.0)
+        record = logging.LogRecord("x", logging.DEBUG, __file__, 1, "m", None, None)
+        assert sampler.filter(record) is False
+        sampler.set_rate("x", 1.0)
+        assert sampler.filter(record) is True
+        record.levelno = logging.WARNING
+        assert SamplingFilter(default_rate=0.0).filter(record) is True
+
+    def test_traceback_survives_queue(self, listener_capture):
+        capture, pipeline = listener_capture
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            get_logger("api.test_exc").error("Scoring failed", user_id=3, exc_info=True)
+        pipeline.stop()
+
+        line = json.loads(JsonFormatter().format(capture.records[-1]))
+        assert line["message"] == "Scoring failed" and line["user_id"] == 3
+        assert "Traceback (most recent call last)" in line["exc_info"]
+        assert "ZeroDivisionError" in line["exc_info"]
+
+    def test_full_queue_drops_and_counts(self, monkeypatch):
+        pipeline = logging_config._LoggingPipeline(maxsize=3)
+        # Dinleyici başlamaz: kuyruk boşaltılmaz
+        monkeypatch.setattr(pipeline, "ensure_started", lambda: None)
+        logger = logging.getLogger("api.test_drop")
+        logger.handlers[:] = [pipeline.make_handler()]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+
+        for i in range(5):
+            logger.info("event %d", i)
+
+        assert pipeline.queue.qsize() == 3
+        assert pipeline.dropped == 2
+        logger.handlers.clear()
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="fork gerekli")
+    def test_forked_child_starts_its_own_listener(self, tmp_path, monkeypatch):
+        path = tmp_path / "child.log"
+
+        def build_handlers():
+            handler = logging.FileHandler(path, encoding="utf-8")
+            handler.setFormatter(JsonFormatter())
+            return (handler,)
+
+        pipeline = logging_config._pipeline
+        get_logger("api.test_fork").info("parent")  # ebeveynde dinleyici çalışıyor
+        monkeypatch.setattr(pipeline, "_build_handlers", build_handlers)
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - çocuk süreç
+            try:
+                get_logger("api.test_fork").info("from child", pid=os.getpid())
+                logging_config.shutdown_logging()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+
+        lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        assert [line["message"] for line in lines] == ["from child"]
+        assert lines[0]["pid"] == pid
@@ -0,0 +1,66 @@
+from fastapi import Depends, FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from core.metrics import MetricsMiddleware, MetricsRegistry, instrument_engine
+
+
+def _build_app(tmp_path, registry, threshold=None):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    instrument_engine(engine)
+    instrument_engine(engine)  # ikinci çağrı olayları tekrar bağlamamalı
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    def get_conn():
+        with engine.connect() as conn:
+            yield conn
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int, queries: int = 1, conn=Depends(get_conn)):
+        for _ in range(queries):
+            conn.execute(text("SELECT 1")).scalar()
+        return {"item_id": item_id}
+
+    @app.get("/metrics")
+    def metrics():
+        return PlainTextResponse(registry.render())
+
+    return app
+
+
+class TestMetrics:
+    def test_records_route_template_and_db_usage(self, tmp_path):
+        registry = MetricsRegistry()
+        client = TestClient(_build_app(tmp_path, registry))
+
+        response = client.get("/items/1", params={"queries": 3})
+        client.get("/items/2", params={"queries": 3})
+        assert 'desc="3 queries"' in response.headers["server-timing"]
+
+        body = client.get("/metrics").text
+        assert 'osym_http_requests_total{method="GET",route="/items/{item_id}",status="200"} 2' in body
+        assert 'osym_db_queries_per_request_sum{method="GET",route="/items/{item_id}"} 6' in body
+        assert 'osym_http_request_duration_seconds_count{method="GET",route="/items/{item_id}"} 2' in body
+        assert 'osym_http_response_size_bytes_sum{method="GET",route="/items/{item_id}"} ' in body
+        # /metrics kendi kendini ölçmez
+        assert 'route="/metrics"' not in body
+
+    def test_flags_n_plus_one(self, tmp_path):
+        registry = MetricsRegistry()
+        client = TestClient(_build_app(tmp_path, registry))
+        labels = ("GET", "/items/{item_id}")
+
+        client.get("/items/1", params={"queries": 5})
+        assert registry.n_plus_one.value(labels) == 0
+
+        client.get("/items/1", params={"queries": 40})
+        assert registry.n_plus_one.value(labels) == 1
+
+    def test_unmatched_route_label(self, tmp_path):
+        registry = MetricsRegistry()
+        client = TestClient(_build_app(tmp_path, registry))
+        assert client.get("/does-not-exist").status_code == 404
+        assert registry.requests.value(("GET", "unmatched", "404")) == 1
@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+from models import Department
+from services.ml_recommendation_engine import MLRecommendationEngine
+from scripts.benchmark_ml_inference import build_catalogue, per_department_scores
+from scripts.train_ml_models import generate_training_data
+
+
+@pytest.fixture
+def ml_engine(db, tmp_path):
+    engine = MLRecommendationEngine(db)
+    engine.models, engine.scalers = {}, {}
+    engine.model_path = str(tmp_path) + os.sep
+    engine.train_models(generate_training_data())
+    return engine
+
+
+class TestMLBatchInference:
+    """Toplu ML çıkarımının bölüm başına yol ile aynı sonucu verdiğini doğrular"""
+
+    def test_feature_matrix_matches_per_department_rows(self, db, ml_engine):
+        student = build_catalogue(db, 120)
+        departments = db.query(Department).all()
+        departments[0].university_id = 9999  # üniversitesi olmayan bölüm
+
+        matrix = ml_engine._prepare_feature_matrix(student, departments, ml_engine._load_universities(departments))
+        expected = np.array([ml_engine._prepare_combined_features(student, d) for d in departments], dtype=float)
+
+        assert matrix.shape == expected.shape
+        np.testing.assert_array_equal(matrix, expected)
+
+    def test_generate_recommendations_matches_per_department_ranking(self, db, ml_engine):
+        student = build_catalogue(db, 150)
+        departments = db.query(Department).filter(Department.field_type == student.field_type).all()
+
+        scores = per_department_scores(ml_engine, student, departments)
+        final = scores[:, 0] * 0.4 + scores[:, 1] * 0.4 + scores[:, 2] * 0.2
+        expected = sorted(range(len(departments)), key=lambda i: final[i], reverse=True)[:20]
+
+        result = ml_engine.generate_recommendations(student.id, limit=20)
+
+        assert [r['department_id'] for r in result] == [departments[i].id for i in expected]
+        assert [r['final_score'] for r in result] == [float(final[i]) for i in expected]
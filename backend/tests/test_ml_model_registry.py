@@ -0,0 +1,84 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+
+from services import ml_model_registry as registry_module
+from services.ml_model_registry import MANIFEST_FILENAME, ModelRegistry, read_manifest, save_artifacts
+from services.ml_recommendation_engine import MLRecommendationEngine
+
+
+def _artifacts(offset=0.0):
+    X = np.arange(20, dtype=float).reshape(10, 2)
+    models, scalers = {}, {}
+    for name in ("compatibility", "success", "preference"):
+        scalers[name] = StandardScaler().fit(X)
+        models[name] = LinearRegression().fit(scalers[name].transform(X), X[:, 0] + offset)
+    return models, scalers
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    path = str(tmp_path) + os.sep
+    monkeypatch.setenv("ML_MODELS_PATH", path)
+    return path
+
+
+class TestModelRegistry:
+    def test_loads_once_and_shares_across_engines(self, model_dir, monkeypatch):
+        save_artifacts(model_dir, *_artifacts())
+        registry = ModelRegistry(check_interval=3600)
+        monkeypatch.setattr(registry_module, "model_registry", registry)
+        monkeypatch.setattr("services.ml_recommendation_engine.model_registry", registry)
+        loads = []
+        monkeypatch.setattr(registry_module, "_load", lambda path: loads.append(path) or joblib.load(path))
+
+        first, second = MLRecommendationEngine(db=None), MLRecommendationEngine(db=None)
+
+        assert len(loads) == 6
+        assert first.is_trained and first.models["success"] is second.models["success"]
+        # Örnek başına sözlük: bir motorda eğitim paylaşılan paketi değiştirmez
+        first.models.pop("success")
+        assert "success" in registry.get(model_dir).models
+
+        status = registry.status()
+        assert status["version"] == read_manifest(model_dir)["version"]
+        assert status["artifact_bytes"] == sum(status["artifacts"].values()) > 0
+        assert status["load_seconds"] >= 0 and status["loaded_at"] is not None
+
+    def test_new_manifest_is_swapped_in(self, model_dir):
+        save_artifacts(model_dir, *_artifacts())
+        registry = ModelRegistry(check_interval=0)
+        old = registry.get(model_dir)
+
+        assert registry.get(model_dir) is old  # sürüm aynı: yeniden yükleme yok
+
+        save_artifacts(model_dir, *_artifacts(offset=100.0))
+        new = registry.get(model_dir)
+
+        assert new.version != old.version and registry.status()["swaps"] == 1
+        X = np.array([[4.0, 5.0]])
+        predict = lambda bundle: bundle.models["success"].predict(bundle.scalers["success"].transform(X))[0]
+        assert predict(new) == pytest.approx(predict(old) + 100.0)
+
+    def test_legacy_artifacts_and_broken_manifest(self, model_dir):
+        models, scalers = _artifacts()
+        for name in models:
+            joblib.dump(models[name], os.path.join(model_dir, f"{name}_model.pkl"))
+            joblib.dump(scalers[name], os.path.join(model_dir, f"{name}_scaler.pkl"))
+        registry = ModelRegistry(check_interval=0)
+
+        bundle = registry.get(model_dir)
+        assert bundle.is_trained and bundle.version.startswith("legacy-")
+
+        with open(os.path.join(model_dir, MANIFEST_FILENAME), "w") as f:
+            f.write('{"version": "v2", "artifacts": {"success": {"model": "missing.pkl", "scaler": "missing.pkl"}}}')
+        assert registry.get(model_dir) is bundle  # yüklenemeyen sürüm: mevcut paketle devam
+        assert registry.status()["last_error"]
+
+    def test_empty_directory(self, model_dir):
+        bundle = ModelRegistry(check_interval=0).get(model_dir)
+        assert not bundle.is_trained and bundle.version is None
@@ -0,0 +1,85 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from services.ml_model_registry import REPORT_FILENAME, VERSIONS_DIRNAME, read_manifest, save_artifacts
+from services.ml_training_pipeline import (
+    MODEL_SPECS,
+    candidate_params,
+    split_indices,
+    train_models_parallel,
+)
+
+
+def _data(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5))
+    targets = {
+        "compatibility": 0.5 + 0.2 * np.tanh(X[:, 0]),
+        "success_probability": (X[:, 1] > 0).astype(float) * 0.6 + 0.2,
+        "preference": 0.5 + 0.1 * X[:, 2] + rng.normal(size=n) * 0.05,
+    }
+    return X, targets
+
+
+class TestSplitsAndCandidates:
+    def test_split_is_disjoint_and_deterministic(self):
+        split = split_indices(100)
+        parts = np.concatenate([split.train, split.validation, split.test])
+
+        assert sorted(parts.tolist()) == list(range(100))
+        assert (len(split.test), len(split.validation)) == (20, 12)
+        assert split.validation.tolist() == split_indices(100).validation.tolist()
+
+    def test_tiny_data_skips_validation(self):
+        split = split_indices(25)
+        assert len(split.validation) == 0 and len(split.test) == 5
+
+    def test_candidates_are_unique_and_start_with_base(self):
+        base = MODEL_SPECS["success"][1]
+        candidates = candidate_params(base, 4)
+
+        assert candidates[0] == base
+        assert len(candidates) == 5
+        assert len({tuple(sorted(c.items())) for c in candidates}) == 5
+        assert candidate_params(base, 0) == [base]
+
+
+class TestParallelTraining:
+    def test_parallel_matches_inline_and_reports_metrics(self):
+        X, targets = _data()
+
+        parallel = train_models_parallel(X, targets, max_workers=2, n_candidates=1)
+        inline = train_models_parallel(X, targets, max_workers=1, n_candidates=1)
+
+        assert parallel.report["workers"] == 2 and inline.report["workers"] == 1
+        for name in MODEL_SPECS:
+            entry = parallel.report["models"][name]
+            assert entry["candidates"] == 2
+            assert entry["metrics"]["best_iteration"] < entry["params"]["n_estimators"]  # erken durdu
+            assert entry["metrics"]["validation_rmse"] is not None
+            np.testing.assert_allclose(
+                parallel.models[name].predict(parallel.scalers[name].transform(X)),
+                inline.models[name].predict(inline.scalers[name].transform(X)),
+            )
+        assert parallel.report["fit_seconds_total"] > 0
+
+    def test_versioned_artifacts_and_report(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("ML_MODEL_KEEP_VERSIONS", "2")
+        model_dir = str(tmp_path) + os.sep
+        X, targets = _data(n=120)
+        result = train_models_parallel(X, targets, max_workers=1, n_candidates=0)
+
+        manifests = [save_artifacts(model_dir, result.models, result.scalers, report=result.report) for _ in range(3)]
+
+        latest = read_manifest(model_dir)
+        assert latest["version"] == manifests[-1]["version"]
+        assert latest["artifacts"]["success"]["model"].startswith(VERSIONS_DIRNAME)
+        assert sorted(os.listdir(tmp_path / VERSIONS_DIRNAME)) == [m["version"] for m in manifests[-2:]]
+        with open(tmp_path / REPORT_FILENAME, encoding="utf-8") as f:
+            report = json.load(f)
+        assert report["version"] == latest["version"]
+        assert set(report["models"]) == set(MODEL_SPECS)
+        assert latest["report"]["wall_seconds"] == pytest.approx(result.report["wall_seconds"])
@@ -0,0 +1,66 @@
+import os
+import time
+
+import pytest
+
+from services.ml_model_registry import read_manifest
+from services.ml_training_scheduler import MLTrainingScheduler, training_data_hash
+from scripts.train_ml_models import generate_training_data
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ML_MODELS_PATH", str(tmp_path) + os.sep)
+    return tmp_path
+
+
+def _wait_until_idle(scheduler, timeout=30):
+    deadline = time.time() + timeout
+    while scheduler.state != "idle" and time.time() < deadline:
+        time.sleep(0.02)
+    assert scheduler.state == "idle"
+
+
+class TestMLTrainingScheduler:
+    """Eğitim tetiklerinin birleştirildiğini ve değişmeyen veride eğitimin atlandığını doğrular"""
+
+    def test_training_data_is_deterministic(self):
+        assert training_data_hash(generate_training_data()) == training_data_hash(generate_training_data())
+        assert training_data_hash(generate_training_data(seed=1)) != training_data_hash(generate_training_data())
+
+    def test_triggers_in_window_are_coalesced(self, model_dir):
+        scheduler = MLTrainingScheduler(window_seconds=0.2, use_subprocess=False)
+        for _ in range(25):
+            scheduler.request_retrain(reason="exam_attempt_created")
+        assert scheduler.state == "scheduled"
+        assert scheduler.status()["pending_triggers"] == 25
+
+        _wait_until_idle(scheduler)
+        status = scheduler.status()
+        assert status["runs"] == 1
+        assert status["coalesced_triggers"] == 24
+        assert status["last_result"] == "trained"
+        manifest = read_manifest(str(model_dir))
+        assert (model_dir / manifest["artifacts"]["success"]["model"]).exists()
+
+    def test_unchanged_data_skips_training(self, model_dir):
+        scheduler = MLTrainingScheduler(window_seconds=0, use_subprocess=False)
+        assert scheduler.run_once() == "trained"
+        manifest = read_manifest(str(model_dir))
+        model_file = model_dir / manifest["artifacts"]["compatibility"]["model"]
+        modified = os.path.getmtime(model_file)
+
+        assert scheduler.run_once() == "skipped"
+        assert read_manifest(str(model_dir))["version"] == manifest["version"]
+        assert os.path.getmtime(model_file) == modified
+        assert scheduler.run_once(force=True) == "trained"
+        assert read_manifest(str(model_dir))["version"] != manifest["version"]
+        assert scheduler.status()["skipped_runs"] == 1
+
+    def test_shutdown_cancels_scheduled_run(self, model_dir):
+        scheduler = MLTrainingScheduler(window_seconds=60, use_subprocess=False)
+        scheduler.request_retrain(reason="student_updated")
+        scheduler.shutdown()
+        assert scheduler.state == "idle"
+        scheduler.request_retrain(reason="student_updated")
+        assert scheduler.status()["total_triggers"] == 1
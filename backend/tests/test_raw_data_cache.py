@@ -0,0 +1,100 @@
+import json
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+from utils import raw_data_cache
+from utils.raw_data_cache import decode_from_arrow, detect_header_row, encode_for_arrow, load_raw_table
+
+COLUMN_MAPPING = {'Üniversite Adı': 'university_name', 'Program Adı': 'name', 'En Küçük Puan': 'min_score'}
+
+
+def _write_osym_sheet(path, rows):
+    """ÖSYM formatı: iki başlık satırı, üçüncü satır kolon isimleri"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['2024 YKS Yerleştirme Sonuçları'])
+    sheet.append(['Tablo 4'])
+    sheet.append(['Program Kodu', 'Üniversite Adı', 'Program Adı', 'En Küçük Puan'])
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+@pytest.fixture
+def excel_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('RAW_DATA_CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / '2024_yerlestirme_l.xlsx'
+    _write_osym_sheet(path, [
+        [100110010, 'ANKARA ÜNİVERSİTESİ (ANKARA)', 'Tıp', 480.25],
+        [100110011, 'ANKARA ÜNİVERSİTESİ (ANKARA)', 'Hukuk', '--'],
+        [100110012, 'BAŞKENT ÜNİVERSİTESİ (ANKARA)', 'Fizik', 301],
+    ])
+    return path
+
+
+class TestRawDataCache:
+    """Ayrıştırılmış Excel önbelleğinin pd.read_excel ile aynı tabloyu verdiğini doğrular"""
+
+    def test_second_read_comes_from_cache(self, excel_file, monkeypatch):
+        expected = pd.read_excel(excel_file, header=2)
+        first = load_raw_table(excel_file, header='auto', default_header=0, column_mapping=COLUMN_MAPPING)
+        assert not first.from_cache
+        assert first.header_row == 2
+        assert first.column_mapping == COLUMN_MAPPING
+
+        def fail(*args, **kwargs):
+            raise AssertionError("Excel yeniden ayrıştırıldı")
+
+        monkeypatch.setattr(raw_data_cache.pd, 'read_excel', fail)
+        second = load_raw_table(excel_file, header='auto', default_header=0, column_mapping=COLUMN_MAPPING)
+
+        assert second.from_cache
+        assert (second.header_row, second.column_mapping) == (first.header_row, first.column_mapping)
+        pd.testing.assert_frame_equal(second.frame, expected)
+        assert [type(value) for value in second.frame['En Küçük Puan']] == [float, str, int]
+
+    def test_changed_file_is_reparsed(self, excel_file):
+        load_raw_table(excel_file, header=2)
+        _write_osym_sheet(excel_file, [[100110013, 'EGE ÜNİVERSİTESİ (İZMİR)', 'Kimya', 350.5]])
+
+        table = load_raw_table(excel_file, header=2)
+
+        assert not table.from_cache
+        assert table.frame['Program Adı'].tolist() == ['Kimya']
+
+    def test_metadata_stored_alongside(self, excel_file, tmp_path):
+        table = load_raw_table(excel_file, header='auto', default_header=0, column_mapping=COLUMN_MAPPING)
+
+        [meta_path] = (tmp_path / 'cache').glob('*.json')
+        meta = json.loads(meta_path.read_text(encoding='utf-8'))
+        assert meta['source_sha256'] == table.source_hash
+        assert meta['header_row'] == 2 and meta['column_mapping'] == COLUMN_MAPPING
+        assert (tmp_path / 'cache' / meta_path.name.replace('.json', '.arrow' if meta['format'] == 'arrow' else '.pkl')).exists()
+
+    def test_pickle_fallback_without_pyarrow(self, excel_file, monkeypatch):
+        monkeypatch.setattr(raw_data_cache, 'feather', None)
+        expected = load_raw_table(excel_file, header=None, dtype=str).frame
+        cached = load_raw_table(excel_file, header=None, dtype=str)
+
+        assert cached.from_cache
+        pd.testing.assert_frame_equal(cached.frame, expected)
+
+    def test_mixed_object_columns_round_trip(self):
+        frame = pd.DataFrame({0: [1, 'PROGRAM', None, 2.5, True], 'Ad': ['a', None, 'c', 'd', 'e']})
+
+        decoded = decode_from_arrow(*encode_for_arrow(frame))
+
+        pd.testing.assert_frame_equal(decoded, frame.fillna(float('nan')))
+        assert [type(value) for value in decoded[0]] == [int, str, float, float, bool]
+
+    def test_detect_header_row_without_expected_columns(self):
+        preview = pd.DataFrame([
+            ['Başlık', None, None],
+            [None, None, None],
+            ['Kod', 'Üniversite', 'Puan'],
+            [1001, 'ODTÜ', 450.5],
+        ])
+        assert detect_header_row(preview) == 2
+        assert detect_header_row(preview, expected_columns=['Yok', 'Hiç'], default=5) == 5
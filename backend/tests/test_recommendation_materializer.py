@@ -0,0 +1,130 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from models import Recommendation, RecommendationVersion, Student
+from services.recommendation_engine import RecommendationEngine
+from services.recommendation_materializer import changed_components
+from services.vectorized_scoring import score_departments
+
+
+def _stored(db, student_id):
+    rows = db.query(Recommendation).filter(Recommendation.student_id == student_id).all()
+    return {
+        r.department_id: (r.compatibility_score, r.success_probability, r.preference_score, r.final_score)
+        for r in rows
+    }
+
+
+def _expected(engine, student):
+    arrays = engine._load_department_arrays(student.field_type)
+    scores = score_departments(student, arrays, (0.4, 0.4, 0.2), admission=engine._admission_model())
+    return {
+        int(arrays.ids[p]): (scores.compatibility[i], scores.success[i], scores.preference[i], scores.final[i])
+        for i, p in enumerate(scores.positions)
+    }
+
+
+@pytest.fixture
+def student(db, build_catalogue, make_student):
+    build_catalogue(db)
+    student = make_student()
+    db.add(student)
+    db.commit()
+    RecommendationEngine(db).generate_recommendations(student.id, limit=20)
+    return student
+
+
+class TestRecommendationMaterializer:
+    """Önerilerin artımlı güncellenmesinin tam yeniden hesaplama ile aynı tabloyu verdiğini doğrular"""
+
+    def test_regenerate_writes_nothing_when_unchanged(self, db, student):
+        engine = RecommendationEngine(db)
+        before = db.query(Recommendation).count()
+
+        result = engine.refresh_recommendations(student.id)
+
+        assert (result.inserted, result.updated, result.deleted) == (0, 0, 0)
+        assert db.query(Recommendation).count() == before == len(_expected(engine, student))
+        assert len(engine.generate_recommendations(student.id, limit=20)) == 20
+        assert db.query(Recommendation).count() == before
+
+    def test_score_change_reuses_stored_preference(self, db, student):
+        engine = RecommendationEngine(db)
+        tampered = db.query(Recommendation).filter(Recommendation.student_id == student.id).first()
+        tampered.preference_score = 1.0
+        db.commit()
+
+        student.total_score = 470.0
+        student.rank = 9000
+        db.commit()
+        result = engine.refresh_recommendations(student.id, changed_fields=["total_score", "rank"])
+
+        assert result.recomputed == ("compatibility", "success")
+        stored, expected = _stored(db, student.id), _expected(engine, student)
+        assert stored[tampered.department_id][2] == 1.0
+        del stored[tampered.department_id], expected[tampered.department_id]
+        assert stored == expected
+
+    def test_preference_change_updates_only_changed_rows(self, db, student):
+        engine = RecommendationEngine(db)
+        statements = []
+        event.listen(db.get_bind(), "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        student.preferred_cities = json.dumps(["Bursa"])
+        db.commit()
+        result = engine.refresh_recommendations(student.id, changed_fields=["preferred_cities"])
+
+        assert result.recomputed == ("preference",)
+        assert 0 < result.updated < len(_expected(engine, student))
+        assert result.inserted == result.deleted == 0
+        assert not any(statement.lstrip().upper().startswith("DELETE") for statement in statements)
+        assert _stored(db, student.id) == _expected(engine, student)
+
+    def test_model_version_change_recomputes_component(self, db, student):
+        engine = RecommendationEngine(db)
+        current = engine._admission_model().version
+        versions = db.get(RecommendationVersion, student.id)
+        assert (versions.admission_version, versions.collaborative_version) == (current, None)
+
+        rows = db.query(Recommendation).filter(Recommendation.student_id == student.id).limit(3).all()
+        rows[0].success_probability = 1.0
+        rows[1].preference_score = 1.0
+        rows[2].compatibility_score = 1.0  # sürüme bağlı değil: yalnızca final skor yeniden toplanır
+        versions.admission_version, versions.collaborative_version = "a-old", "c-old"
+        db.commit()
+
+        # Girdi değişmedi: yalnızca sürümü eskiyen bileşenler yeniden hesaplanır
+        result = engine.refresh_recommendations(student.id, changed_fields=["bio"])
+
+        assert result.recomputed == ()
+        assert (result.updated, result.inserted, result.deleted) == (3, 0, 0)
+        db.expire_all()
+        assert db.get(Recommendation, rows[2].id).compatibility_score == 1.0
+        versions = db.get(RecommendationVersion, student.id)
+        assert (versions.admission_version, versions.collaborative_version) == (current, None)
+        assert db.query(RecommendationVersion).count() == 1
+
+    def test_field_type_change_replaces_rows(self, db, student):
+        engine = RecommendationEngine(db)
+        duplicate = db.query(Recommendation).filter(Recommendation.student_id == student.id).first()
+        db.add(Recommendation(**{
+            c.name: getattr(duplicate, c.name) for c in Recommendation.__table__.columns if c.name != "id"
+        }))
+        student.field_type = "EA"
+        db.commit()
+
+        result = engine.refresh_recommendations(student.id, changed_fields=["field_type"])
+
+        assert result.inserted == len(_expected(engine, student))
+        assert _stored(db, student.id) == _expected(engine, student)
+        assert db.query(Recommendation).count() == result.inserted
+
+    def test_changed_components(self):
+        assert changed_components(None) is None
+        assert changed_components(["field_type", "bio"]) is None
+        assert changed_components(["bio", "avatar_url"]) == frozenset()
+        assert changed_components(["tyt_total_score"]) == {"compatibility", "success"}
+        assert changed_components(["interest_areas", "rank"]) == {"compatibility", "success", "preference"}
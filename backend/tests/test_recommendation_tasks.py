@@ -0,0 +1,47 @@
+import os
+
+os.environ.setdefault("CELERY_EAGER", "1")
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from models import Recommendation
+from tasks import recommendation_tasks
+from tasks.recommendation_tasks import enqueue_recommendation_job, get_recommendation_job
+
+
+@pytest.fixture
+def task_db(db, monkeypatch, build_catalogue):
+    monkeypatch.setattr(recommendation_tasks, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    build_catalogue(db)
+    return db
+
+
+class TestRecommendationTasks:
+    """Asenkron öneri işinin eager broker ile uçtan uca çalıştığını doğrular"""
+
+    def test_job_writes_recommendations_and_reports_result(self, task_db, make_student):
+        student = make_student()
+        task_db.add(student)
+        task_db.commit()
+
+        job_id = enqueue_recommendation_job(student.id, 10, (0.4, 0.4, 0.2))
+        job = get_recommendation_job(job_id)
+
+        assert job["status"] == "completed"
+        assert (job["stage"], job["progress"]) == ("done", 100)
+        stored = task_db.query(Recommendation).filter(Recommendation.student_id == student.id).count()
+        assert job["result"]["inserted"] == stored > 0
+        assert job["result"]["recommendations_count"] == len(job["result"]["department_ids"]) == 10
+
+        rerun = get_recommendation_job(enqueue_recommendation_job(student.id, 10, (0.4, 0.4, 0.2)))
+        assert (rerun["result"]["inserted"], rerun["result"]["updated"], rerun["result"]["deleted"]) == (0, 0, 0)
+
+    def test_unknown_student_fails_without_retry(self, task_db):
+        job = get_recommendation_job(enqueue_recommendation_job(999, 10, (0.4, 0.4, 0.2)))
+
+        assert job["status"] == "failed"
+        assert "StudentNotFoundError" in job["error"]
+
+    def test_unknown_job_is_queued(self):
+        assert get_recommendation_job("missing-job")["status"] == "queued"
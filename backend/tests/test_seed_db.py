@@ -0,0 +1,29 @@
+import json
+import sys
+
+import pytest
+
+from models import CatalogueFacet, Department
+from scripts import seed_db
+
+
+@pytest.fixture
+def json_file(tmp_path):
+    path = tmp_path / "final_cleaned_data.json"
+    path.write_text(json.dumps([
+        {"university": "ANKARA ÜNİVERSİTESİ (ANKARA)", "clean_name": "Hukuk", "field_type": "EA", "min_score": 450.0},
+        {"university": "EGE ÜNİVERSİTESİ (İZMİR)", "clean_name": "Tıp", "field_type": "SAY", "min_score": 520.0},
+    ], ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def test_main_refreshes_facets_after_seeding(db, json_file, monkeypatch, isolated_cache):
+    db.close = lambda: None  # script oturumu kapatır; test aynı oturumla kontrol eder
+    monkeypatch.setattr(seed_db, "SessionLocal", lambda: db)
+    monkeypatch.setattr(sys, "argv", ["seed_db.py", "--json-file", str(json_file), "--no-truncate"])
+
+    seed_db.main()
+
+    assert db.query(Department).count() == 2
+    field_types = {row.value: row.department_count for row in db.query(CatalogueFacet).filter(CatalogueFacet.facet == "field_type")}
+    assert field_types == {"EA": 1, "SAY": 1}
@@ -0,0 +1,131 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.preprocessing import StandardScaler
+from sklearn.tree import DecisionTreeRegressor
+from xgboost import XGBRegressor
+
+from services.ml_model_registry import ModelRegistry, read_manifest, save_artifacts
+from services import ml_model_registry
+from services.tree_inference import _parse_base_score, compile_model, compile_scaler, load_compiled, save_compiled
+
+
+def _data(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 6)) * [1.0, 50.0, 0.1, 3.0, 1000.0, 1.0]
+    y = X[:, 0] * 2 + np.sin(X[:, 1] / 20) + (X[:, 4] > 0) + rng.normal(size=n) * 0.1
+    return X, y
+
+
+MODELS = [
+    DecisionTreeRegressor(max_depth=8, random_state=0),
+    RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0),
+    GradientBoostingRegressor(n_estimators=40, max_depth=3, learning_rate=0.1, random_state=0),
+    XGBRegressor(n_estimators=60, max_depth=5, learning_rate=0.1, tree_method="hist", random_state=0),
+]
+
+
+class TestCompiledEnsemble:
+    @pytest.mark.parametrize("model", MODELS, ids=lambda m: type(m).__name__)
+    def test_matches_library_predictions(self, model):
+        X, y = _data()
+        model.fit(X, y)
+        X_test, _ = _data(n=5000, seed=1)
+        # Eşik değerlerine tam denk gelen satırlar (<= / < farkı)
+        X_test[:len(X)] = X
+
+        compiled = compile_model(model)
+
+        np.testing.assert_allclose(compiled.predict(X_test), model.predict(X_test), rtol=1e-5, atol=1e-5)
+
+    def test_xgboost_missing_values_follow_default_direction(self):
+        X, y = _data()
+        X[::7, 0] = np.nan
+        model = XGBRegressor(n_estimators=30, max_depth=4, tree_method="hist", random_state=0).fit(X, y)
+        X_test, _ = _data(n=300, seed=2)
+        X_test[::3, 0] = np.nan
+        X_test[::5, 4] = np.nan
+
+        np.testing.assert_allclose(compile_model(model).predict(X_test), model.predict(X_test), rtol=1e-5, atol=1e-5)
+
+    def test_roundtrip_with_scaler(self, tmp_path):
+        X, y = _data()
+        scaler = StandardScaler().fit(X)
+        model = XGBRegressor(n_estimators=30, max_depth=4, random_state=0).fit(scaler.transform(X), y)
+        path = str(tmp_path / "m.npz")
+
+        save_compiled(path, compile_model(model), compile_scaler(scaler))
+        ensemble, compiled_scaler = load_compiled(path)
+
+        expected = model.predict(scaler.transform(X))
+        np.testing.assert_allclose(ensemble.predict(compiled_scaler.transform(X)), expected, rtol=1e-5, atol=1e-5)
+
+    @pytest.mark.parametrize("raw", ["5E-1", "[5E-1]", " [5E-1] ", 0.5, [0.5]])
+    def test_base_score_formats(self, raw):
+        assert _parse_base_score(raw) == 0.5
+
+    def test_multi_target_base_score_is_rejected(self):
+        with pytest.raises(ValueError):
+            _parse_base_score("[5E-1,2.5E-1]")
+
+    def test_unsupported_model(self):
+        X, y = _data()
+        with pytest.raises(TypeError):
+            compile_model(LinearRegression().fit(X, y))
+
+
+class TestCompiledArtifacts:
+    def _save(self, model_dir):
+        X, y = _data()
+        models, scalers = {}, {}
+        for offset, name in enumerate(("compatibility", "success", "preference")):
+            scalers[name] = StandardScaler().fit(X)
+            models[name] = XGBRegressor(n_estimators=20, max_depth=4, random_state=0).fit(scalers[name].transform(X), y + offset)
+        save_artifacts(model_dir, models, scalers)
+        return models, scalers, X
+
+    def test_registry_serves_compiled_models(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("ML_INFERENCE_BACKEND", raising=False)
+        model_dir = str(tmp_path) + os.sep
+        models, scalers, X = self._save(model_dir)
+
+        bundle = ModelRegistry(check_interval=0).get(model_dir)
+
+        assert bundle.backend == "compiled"
+        assert read_manifest(model_dir)["artifacts"]["success"]["compiled"].endswith("success_compiled.npz")
+        for name in models:
+            expected = models[name].predict(scalers[name].transform(X))
+            actual = bundle.models[name].predict(bundle.scalers[name].transform(X))
+            np.testing.assert_allclose(actual, expected, rtol=1e-5, atol=1e-5)
+
+        warnings = []
+        monkeypatch.setattr(ml_model_registry.recommendation_logger, "warning",
+                            lambda message, **kwargs: warnings.append((message, kwargs)))
+        monkeypatch.setenv("ML_INFERENCE_BACKEND", "native")
+        assert ModelRegistry(check_interval=0).get(model_dir).backend == "native"
+        assert [kwargs["inference_backend"] for message, kwargs in warnings
+                if message.startswith("ML compiled backend not used")] == ["native"]
+
+    def test_compiled_serving_does_not_import_training_libraries(self, tmp_path):
+        model_dir = str(tmp_path) + os.sep
+        self._save(model_dir)
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        script = (
+            "import sys, numpy as np\n"
+            "from services.ml_model_registry import ModelRegistry\n"
+            f"bundle = ModelRegistry(check_interval=0).get({model_dir!r})\n"
+            "features = np.zeros((3, 6))\n"
+            "bundle.models['success'].predict(bundle.scalers['success'].transform(features))\n"
+            "print(bundle.backend, 'sklearn' in sys.modules, 'xgboost' in sys.modules)\n"
+        )
+        env = {**os.environ, "ML_INFERENCE_BACKEND": "auto"}
+
+        result = subprocess.run([sys.executable, "-c", script], cwd=backend_dir, env=env,
+                                capture_output=True, text=True, check=True)
+
+        assert result.stdout.split()[-3:] == ["compiled", "False", "False"]
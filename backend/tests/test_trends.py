@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import Base, get_async_db
+from models import Department, DepartmentTrend, DepartmentYearlyStats, University
+from routers import universities
+from services.trends import build_trend, read_trends, refresh_trends, trend_store
+
+
+@pytest.fixture(autouse=True)
+def fresh_store():
+    trend_store.invalidate()
+    yield
+    trend_store.invalidate()
+
+
+@pytest.fixture
+def setup(tmp_path):
+    db_path = tmp_path / "trends.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    university = University(name="A", city="Ankara", university_type="devlet")
+    session.add(university)
+    session.flush()
+    rising = Department(university_id=university.id, name="Tıp", field_type="SAY")
+    single = Department(university_id=university.id, name="Hukuk", field_type="EA")
+    session.add_all([rising, single, Department(university_id=university.id, name="Fizik", field_type="SAY")])
+    session.flush()
+    session.add_all([
+        DepartmentYearlyStats(department_id=rising.id, year=year, min_score=score, min_rank=rank, quota=100)
+        for year, score, rank in ((2024, 440.0, 3000), (2022, 420.0, 5000), (2023, 430.0, 4000))
+    ])
+    session.add(DepartmentYearlyStats(department_id=single.id, year=2025, min_score=380.0, min_rank=20000))
+    session.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session() as db_session:
+            yield db_session
+
+    app = FastAPI()
+    app.include_router(universities.router, prefix="/api/universities")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield TestClient(app), session, (rising.id, single.id)
+    finally:
+        session.close()
+
+
+class TestTrends:
+    def test_slope_volatility_and_projection(self):
+        trend = build_trend(1, [
+            (2022, 400.0, 450.0, 9000, 50, 50),
+            (2023, 410.0, 455.0, 8000, 50, 50),
+            (2024, None, None, None, 50, 0),
+            (2025, 430.0, 470.0, 6000, 60, 60),
+        ])
+
+        assert (trend.first_year, trend.last_year, trend.year_count) == (2022, 2025, 4)
+        assert trend.min_score_slope == pytest.approx(10.0)
+        assert trend.min_rank_slope == pytest.approx(-1000.0)
+        assert trend.projected_min_score == pytest.approx(440.0)
+        assert trend.projected_min_rank == 5000
+        assert trend.min_score_volatility == pytest.approx(5.0)  # değişimler: 10, 20
+        assert trend.series["min_score"] == [400.0, 410.0, None, 430.0]
+        assert trend.last_min_score == 430.0
+
+        only = build_trend(2, [(2025, 300.0, None, 100000, None, None)])
+        assert only.min_score_slope is None and only.min_score_volatility is None
+        assert (only.projected_min_score, only.projected_min_rank) == (300.0, 100000)
+
+    def test_materialized_on_first_load_and_lookup(self, setup):
+        _, session, (rising_id, single_id) = setup
+
+        snapshot = trend_store.load(session)
+
+        assert session.query(DepartmentTrend).count() == 2
+        trend = snapshot.get(rising_id)
+        assert trend.series["year"] == [2022, 2023, 2024]
+        assert trend.projected_min_score == pytest.approx(450.0)
+        assert snapshot.get(999) is None
+        projected = snapshot.column_for("projected_min_score", np.array([single_id, 999, rising_id]))
+        assert projected[0] == pytest.approx(380.0)
+        assert np.isnan(projected[1])
+        assert projected[2] == pytest.approx(450.0)
+        assert read_trends(session) == list(snapshot.records.values())
+
+    def test_refresh_after_new_year(self, setup):
+        _, session, (_, single_id) = setup
+        refresh_trends(session)
+
+        session.add(DepartmentYearlyStats(department_id=single_id, year=2024, min_score=370.0, min_rank=22000))
+        session.commit()
+        refresh_trends(session)
+
+        trend = trend_store.load(session).get(single_id)
+        assert trend.year_count == 2
+        assert trend.min_score_slope == pytest.approx(10.0)
+
+    def test_trend_endpoint(self, setup):
+        client, _, (rising_id, _) = setup
+
+        body = client.get(f"/api/universities/departments/{rising_id}/trend").json()
+
+        assert body["department_id"] == rising_id
+        assert body["series"][0] == {
+            "year": 2022, "min_score": 420.0, "max_score": None, "min_rank": 5000,
+            "quota": 100, "placed_students": None,
+        }
+        assert body["projected_min_rank"] == 2000
+        assert client.get("/api/universities/departments/999/trend").status_code == 404
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from database import Base, get_async_db
+from models import University, Department
+from routers import universities
+from services.catalogue import department_catalogue
+
+
+pytestmark = pytest.mark.usefixtures("isolated_cache")
+
+
+@pytest.fixture
+def setup(tmp_path):
+    db_path = tmp_path / "unique.db"
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    state, foundation = University(name="A", city="Ankara", university_type="devlet"), \
+        University(name="B", city="İzmir", university_type="vakif")
+    session.add_all([state, foundation])
+    session.flush()
+    session.add_all([
+        Department(university_id=state.id, name="Hukuk", normalized_name="Hukuk", field_type="EA",
+                   attributes=json.dumps([])),
+        Department(university_id=foundation.id, name="Hukuk (Burslu)", normalized_name="Hukuk", field_type="EA",
+                   attributes=json.dumps(["Burslu"])),
+        Department(university_id=foundation.id, name="Tıp (İngilizce)", normalized_name="Tıp", field_type="SAY",
+                   attributes=json.dumps(["İngilizce", "Burslu", "KKTC", "x"])),
+        Department(university_id=state.id, name="Fizik", normalized_name=None, field_type="SAY"),
+    ])
+    session.commit()
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
+    statements = []
+    event.listen(async_engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, statement, *args: statements.append(statement))
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session() as db_session:
+            yield db_session
+
+    app = FastAPI()
+    app.include_router(universities.router, prefix="/api/universities")
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        yield TestClient(app), session, statements
+    finally:
+        session.close()
+
+
+class TestUniqueDepartments:
+    def test_single_query_with_representative_attributes(self, setup):
+        client, _, statements = setup
+
+        result = client.get("/api/universities/departments/unique/").json()
+
+        assert result == [
+            {"normalized_name": "Hukuk", "variation_count": 2, "attributes_examples": []},
+            {"normalized_name": "Tıp", "variation_count": 1, "attributes_examples": ["İngilizce", "Burslu", "KKTC"]},
+        ]
+        assert len(statements) == 1
+
+        filtered = client.get("/api/universities/departments/unique/", params={"university_type": "vakif"}).json()
+        assert [(d["normalized_name"], d["variation_count"], d["attributes_examples"]) for d in filtered] == [
+            ("Hukuk", 1, ["Burslu"]), ("Tıp", 1, ["İngilizce", "Burslu", "KKTC"])
+        ]
+
+    def test_cached_per_filter_and_invalidated_on_catalogue_change(self, setup):
+        client, session, statements = setup
+        url = "/api/universities/departments/unique/"
+
+        client.get(url, params={"field_type": "EA"})
+        client.get(url, params={"field_type": "EA"})
+        assert len(statements) == 1
+        client.get(url, params={"field_type": "SAY"})
+        assert len(statements) == 2
+
+        session.add(Department(university_id=1, name="İktisat", normalized_name="İktisat", field_type="EA"))
+        session.commit()
+        department_catalogue.invalidate()
+
+        names = [d["normalized_name"] for d in client.get(url, params={"field_type": "EA"}).json()]
+        assert names == ["Hukuk", "İktisat"]
+        assert len(statements) == 3
@@ -0,0 +1,108 @@
+import json
+
+import numpy as np
+import pytest
+
+from models import University, Department, Recommendation
+from services.recommendation_engine import RecommendationEngine
+from services.vectorized_scoring import (
+    DepartmentArrays,
+    city_priority_mask,
+    eligible_mask,
+    parse_preferred_cities,
+    score_departments,
+    select_top_k,
+)
+
+
+class TestVectorizedScoring:
+    """Vektörel skorlamanın skaler kurallarla birebir aynı olduğunu doğrular"""
+
+    @pytest.mark.parametrize("overrides", [
+        {},
+        {"rank": 0, "budget_preference": "high"},
+        {"total_score": None, "preferred_cities": "not json"},
+        {"interest_areas": json.dumps(["hukuk", 5]), "scholarship_preference": False},
+    ])
+    def test_matches_scalar_scores(self, db, overrides, build_catalogue, make_student):
+        build_catalogue(db)
+        engine = RecommendationEngine(db)
+        student = make_student(**overrides)
+
+        arrays = engine._load_department_arrays("SAY")
+        scores = score_departments(student, arrays, (0.4, 0.4, 0.2), admission=engine._admission_model())
+        departments = {d.id: d for d in db.query(Department).all()}
+
+        assert len(scores) > 0
+        for i, position in enumerate(scores.positions):
+            department = departments[int(arrays.ids[position])]
+            assert department.min_score is not None and department.min_score > 0
+            compatibility = engine._calculate_compatibility_score(student, department)
+            success = engine._calculate_success_probability(student, department)
+            preference = engine._calculate_preference_score(student, department)
+            assert scores.compatibility[i] == compatibility
+            assert scores.success[i] == success
+            assert scores.preference[i] == preference
+            assert scores.final[i] == compatibility * 0.4 + success * 0.4 + preference * 0.2
+
+    def test_eligible_mask_skips_missing_scores(self):
+        arrays = DepartmentArrays.from_rows([
+            (1, 1, "Tıp", "SAY", 500.0, 100, None, False, "Ankara", "devlet"),
+            (2, 1, "Tıp", "SAY", None, 100, None, False, "Ankara", "devlet"),
+            (3, 1, "Tıp", "SAY", 0.0, 100, None, False, "Ankara", "devlet"),
+            (4, 1, "Tıp", " ", 450.0, 100, None, False, "Ankara", "devlet"),
+            (5, 9, "Tıp", "SAY", 450.0, None, None, False, None, None),
+        ])
+        assert eligible_mask(arrays, "SAY").tolist() == [True, False, False, False, True]
+
+    def test_city_priority_is_case_insensitive(self):
+        arrays = DepartmentArrays.from_rows([
+            (1, 1, "Tıp", "SAY", 500.0, 100, None, False, "Ankara ", "devlet"),
+            (2, 2, "Tıp", "SAY", 500.0, 100, None, False, "Bursa", "devlet"),
+            (3, 3, "Tıp", "SAY", 500.0, 100, None, False, None, None),
+        ])
+        preferred = parse_preferred_cities('["ANKARA"]')
+        assert city_priority_mask(arrays, preferred).tolist() == [True, False, False]
+
+    def test_select_top_k_matches_stable_sort(self):
+        rng = np.random.default_rng(0)
+        final = rng.choice([50.0, 60.5, 72.0, 88.0], size=500)
+        tie_order = rng.permutation(500)
+        expected = sorted(range(500), key=lambda i: (-final[i], tie_order[i]))[:37]
+        assert select_top_k(final, 37, tie_order).tolist() == expected
+        assert select_top_k(final, 1000, tie_order).tolist() == sorted(
+            range(500), key=lambda i: (-final[i], tie_order[i])
+        )
+        assert select_top_k(final, 0).tolist() == []
+
+    def test_generate_recommendations_matches_rule_based_order(self, db, build_catalogue, make_student):
+        build_catalogue(db)
+        student = make_student()
+        db.add(student)
+        db.commit()
+        engine = RecommendationEngine(db)
+
+        # Referans: eski döngüdeki sıralama (şehir önceliği + kararlı sıralama)
+        departments = db.query(Department).filter(Department.field_type == "SAY").order_by(Department.id).all()
+        universities = {u.id: u for u in db.query(University).all()}
+        preferred = [city.lower().strip() for city in json.loads(student.preferred_cities)]
+        prioritized = [d for d in departments if universities[d.university_id].city.lower().strip() in preferred]
+        others = [d for d in departments if d not in prioritized]
+        expected = []
+        for department in prioritized + others:
+            if department.min_score is None or department.min_score <= 0:
+                continue
+            final = (
+                engine._calculate_compatibility_score(student, department) * 0.4 +
+                engine._calculate_success_probability(student, department) * 0.4 +
+                engine._calculate_preference_score(student, department) * 0.2
+            )
+            expected.append((department.id, final))
+        expected.sort(key=lambda x: x[1], reverse=True)
+
+        result = engine.generate_recommendations(student.id, limit=25)
+
+        assert [r.department_id for r in result] == [d for d, _ in expected[:25]]
+        assert [r.final_score for r in result] == [f for _, f in expected[:25]]
+        # Skorlanan tüm bölümler kaydedilir
+        assert db.query(Recommendation).filter(Recommendation.student_id == student.id).count() == len(expected)
@@ -0,0 +1,327 @@
+"""
+✅ Ham Yerleştirme Dosyaları İçin Kolonsal Önbellek (Arrow/Parquet)
+
+ÖSYM .xlsx/.xls dosyalarını `pd.read_excel` ile ayrıştırmak import ve inceleme
+script'lerinin en yavaş adımıdır. Bu modül her dosyayı bir kez ayrıştırır ve
+sonucu kaynak dosyanın SHA-256 hash'i ile anahtarlanmış kolonsal bir dosyaya yazar:
+
+- pyarrow kuruluysa Arrow IPC (Feather v2, sıkıştırmasız) -> sonraki okumalar memory-map
+- pyarrow yoksa pandas pickle (aynı anahtar ve metadata ile)
+
+Header satırı tespiti ve kolon eşleştirmesi önbellek dosyasının yanındaki JSON
+metadata'da saklanır; sonraki çalıştırmalar Excel'i hiç açmaz.
+
+KULLANIM:
+    from utils.raw_data_cache import load_raw_table, read_excel_cached
+
+    table = load_raw_table(path, header='auto', default_header=2, column_mapping=COLUMN_MAPPING)
+    df = table.frame
+
+    df = read_excel_cached(path, header=None, dtype=str)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow opsiyonel
+    pa = None
+    feather = None
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = '.parsed_cache'
+
+# Header tespiti için taranan ilk satır sayısı
+HEADER_SCAN_ROWS = 15
+
+HeaderOption = Union[int, None, str]
+
+
+class RawTable(NamedTuple):
+    """Önbellekten veya Excel'den okunan tablo ve metadata'sı"""
+    frame: pd.DataFrame
+    header_row: Optional[int]
+    column_mapping: Dict[str, str]
+    source_hash: str
+    from_cache: bool
+
+
+def cache_enabled() -> bool:
+    """RAW_DATA_CACHE=0 ile önbellek devre dışı bırakılabilir"""
+    return os.getenv('RAW_DATA_CACHE', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+def cache_dir_for(file_path: Path) -> Path:
+    """Önbellek klasörü: RAW_DATA_CACHE_DIR veya kaynak dosyanın yanındaki .parsed_cache/"""
+    configured = os.getenv('RAW_DATA_CACHE_DIR')
+    return Path(configured) if configured else file_path.parent / CACHE_DIRNAME
+
+
+def file_sha256(file_path: Path, chunk_size: int = 1 << 20) -> str:
+    """Kaynak dosyanın içerik hash'i (dosya adı/mtime değil, içerik anahtar olur)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _is_number(text: str) -> bool:
+    try:
+        float(text.replace(',', '.'))
+        return True
+    except ValueError:
+        return False
+
+
+def detect_header_row(preview: pd.DataFrame, expected_columns: Optional[Iterable[str]] = None,
+                      default: Optional[int] = 0) -> Optional[int]:
+    """
+    Header satırını tespit et
+
+    Beklenen kolon adları verildiyse en çok eşleşen satır seçilir (en az 2 eşleşme).
+    Verilmediyse en çok sayıda metin (sayı olmayan) hücre içeren satır seçilir;
+    ÖSYM dosyalarında başlık satırları tek hücreli olduğu için bu kolon satırıdır.
+    """
+    expected = {str(column).strip() for column in expected_columns} if expected_columns else None
+    best_row, best_score = None, 0
+    for row_index, row in enumerate(preview.itertuples(index=False, name=None)):
+        cells = [str(value).strip() for value in row if not pd.isna(value) and str(value).strip()]
+        if expected is not None:
+            score = sum(1 for cell in cells if cell in expected)
+        else:
+            score = sum(1 for cell in cells if not _is_number(cell))
+        if score > best_score:
+            best_row, best_score = row_index, score
+    if best_row is None or best_score < 2:
+        return default
+    return best_row
+
+
+def _options_key(options: Dict[str, Any]) -> str:
+    payload = json.dumps(options, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:12]
+
+
+def _label_to_json(label: Any) -> Any:
+    if isinstance(label, (str, int, float)) or label is None:
+        return label
+    if hasattr(label, 'item'):
+        return label.item()
+    return str(label)
+
+
+# Karışık tipli object kolonlarında hücre tipi etiketleri
+_MISSING, _STR, _INT, _FLOAT, _BOOL = 0, 1, 2, 3, 4
+_TAGS = {str: _STR, int: _INT, float: _FLOAT, bool: _BOOL}
+_CASTS = {_STR: str, _INT: int, _FLOAT: float, _BOOL: lambda value: value == 'True'}
+
+
+def _cell_tag(value: Any) -> int:
+    if value is None or (isinstance(value, float) and value != value):
+        return _MISSING
+    return _TAGS.get(type(value), _STR)
+
+
+def encode_for_arrow(frame: pd.DataFrame) -> tuple:
+    """
+    DataFrame'i Arrow'a yazılabilir hale getir
+
+    Arrow kolon adları string olmalı ve bir kolon tek tip içermeli: kolonlar
+    konumsal adlarla (c0, c1...) yazılır, orijinal etiketler metadata'ya girer.
+    Sayı + metin karışık object kolonları (ör. 450.2 ve "--") string olarak,
+    yanında hücre tipi etiketiyle (t0, t1...) yazılır; okurken aynı Python
+    tipleri geri kurulur.
+
+    Returns:
+        (arrow'a yazılacak DataFrame, orijinal kolon etiketleri, karışık kolon indeksleri)
+    """
+    encoded = {}
+    mixed_columns = []
+    for index in range(frame.shape[1]):
+        series = frame.iloc[:, index].reset_index(drop=True)
+        if series.dtype == object:
+            tags = np.fromiter((_cell_tag(value) for value in series), dtype=np.int8, count=len(series))
+            present = set(np.unique(tags).tolist()) - {_MISSING}
+            if present - {_STR}:
+                mixed_columns.append(index)
+                encoded[f't{index}'] = tags
+                series = pd.Series(
+                    [None if tag == _MISSING else str(value) for value, tag in zip(series, tags)], dtype=object
+                )
+        encoded[f'c{index}'] = series
+    labels = [_label_to_json(column) for column in frame.columns]
+    return pd.DataFrame(encoded), labels, mixed_columns
+
+
+def decode_from_arrow(encoded: pd.DataFrame, labels: List[Any], mixed_columns: List[int]) -> pd.DataFrame:
+    """encode_for_arrow'un tersi: orijinal etiketler ve karışık kolon değerleri"""
+    mixed = set(mixed_columns)
+    columns = {}
+    for index in range(len(labels)):
+        series = encoded[f'c{index}']
+        if series.dtype == object:
+            values = series.to_numpy(dtype=object)
+            restored = np.full(len(values), np.nan, dtype=object)
+            if index in mixed:
+                tags = encoded[f't{index}'].to_numpy()
+                for tag, cast in _CASTS.items():
+                    selected = tags == tag
+                    if selected.any():
+                        restored[selected] = [cast(value) for value in values[selected]]
+            else:
+                present = series.notna().to_numpy()
+                restored[present] = values[present]
+            series = pd.Series(restored, dtype=object)
+        columns[index] = series
+    frame = pd.DataFrame(columns)
+    frame.columns = labels
+    return frame
+
+
+class _CacheEntry:
+    """Önbellek dosyası + JSON metadata çifti"""
+
+    def __init__(self, directory: Path, stem: str, key: str):
+        self.directory = directory
+        self.base = f"{stem}.{key}"
+        self.meta_path = directory / f"{self.base}.json"
+
+    def data_path(self, fmt: str) -> Path:
+        return self.directory / f"{self.base}.{'arrow' if fmt == 'arrow' else 'pkl'}"
+
+    def read(self) -> Optional[tuple]:
+        try:
+            with open(self.meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != CACHE_VERSION:
+                return None
+            data_path = self.data_path(meta['format'])
+            if meta['format'] == 'arrow':
+                if feather is None:
+                    return None
+                # ✅ Memory-map: sayfa önbelleğindeki dosya doğrudan eşlenir
+                table = feather.read_table(data_path, memory_map=True)
+                frame = decode_from_arrow(table.to_pandas(), meta['columns'], meta['mixed_columns'])
+            else:
+                frame = pd.read_pickle(data_path)
+            return frame, meta
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def write(self, frame: pd.DataFrame, meta: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fmt = 'arrow' if feather is not None else 'pickle'
+        data_path = self.data_path(fmt)
+        meta = {**meta, 'version': CACHE_VERSION, 'format': fmt}
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        os.close(fd)
+        try:
+            if fmt == 'arrow':
+                encoded, labels, mixed_columns = encode_for_arrow(frame)
+                feather.write_feather(pa.Table.from_pandas(encoded, preserve_index=False), tmp_name,
+                                      compression='uncompressed')
+                meta.update(columns=labels, mixed_columns=mixed_columns)
+            else:
+                frame.to_pickle(tmp_name)
+            os.replace(tmp_name, data_path)
+        finally:
+            if os.path.exists(tmp_name):
+                os.remove(tmp_name)
+
+        # Metadata en son yazılır: yarım kalan yazma önbellek isabeti üretmez
+        fd, tmp_name = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_name, self.meta_path)
+
+
+def _parse_excel(file_path: Path, header: HeaderOption, default_header: Optional[int],
+                 expected_columns: Optional[List[str]], dtype, engine) -> tuple:
+    """Excel'i ayrıştır; header='auto' ise önce ilk satırlardan header'ı tespit et"""
+    if header == 'auto':
+        preview = pd.read_excel(file_path, sheet_name=0, header=None, nrows=HEADER_SCAN_ROWS, engine=engine)
+        header = detect_header_row(preview, expected_columns, default=default_header)
+    try:
+        frame = pd.read_excel(file_path, sheet_name=0, header=header, dtype=dtype, engine=engine)
+    except Exception as e:
+        if header in (None, 0):
+            raise
+        # Eski davranış: belirtilen header ile okunamazsa header=0 dene
+        print(f"   ⚠️  Excel okuma hatası (header={header}): {e}")
+        header = 0
+        frame = pd.read_excel(file_path, sheet_name=0, header=header, dtype=dtype, engine=engine)
+    return frame, header
+
+
+def load_raw_table(file_path: Union[str, Path], header: HeaderOption = 0, default_header: Optional[int] = 0,
+                   column_mapping: Optional[Dict[str, str]] = None, dtype=None,
+                   engine: Optional[str] = None) -> RawTable:
+    """
+    ✅ Excel dosyasını önbellekten oku; yoksa bir kez ayrıştırıp önbelleğe yaz
+
+    Args:
+        file_path: .xlsx / .xls dosyası
+        header: Header satırı (int), None (header yok) veya 'auto' (tespit et)
+        default_header: 'auto' tespitinde eşleşme bulunamazsa kullanılacak satır
+        column_mapping: Kaynak kolon adı -> model alanı (header tespiti ve metadata için)
+        dtype: pd.read_excel dtype parametresi (ör. str)
+        engine: pd.read_excel engine parametresi (önbellek anahtarına girmez)
+    """
+    file_path = Path(file_path)
+    source_hash = file_sha256(file_path)
+    options = {
+        'header': header,
+        'default_header': default_header if header == 'auto' else None,
+        'columns': sorted(column_mapping) if column_mapping and header == 'auto' else None,
+        'dtype': getattr(dtype, '__name__', dtype),
+    }
+    entry = _CacheEntry(cache_dir_for(file_path), file_path.stem, f"{source_hash[:16]}-{_options_key(options)}")
+
+    if cache_enabled():
+        cached = entry.read()
+        if cached is not None:
+            frame, meta = cached
+            return RawTable(frame, meta['header_row'], meta['column_mapping'], source_hash, True)
+
+    frame, header_row = _parse_excel(
+        file_path, header, default_header, list(column_mapping) if column_mapping else None, dtype, engine
+    )
+    applied_mapping = {
+        str(column): column_mapping[column] for column in frame.columns if column_mapping and column in column_mapping
+    }
+
+    if cache_enabled():
+        try:
+            entry.write(frame, {
+                'source': file_path.name,
+                'source_sha256': source_hash,
+                'source_size': file_path.stat().st_size,
+                'options': options,
+                'header_row': header_row,
+                'column_mapping': applied_mapping,
+                'rows': len(frame),
+                'created_at': datetime.now().isoformat(),
+            })
+        except (OSError, ValueError, TypeError) as e:
+            # Önbellek yazılamazsa (salt okunur dizin, desteklenmeyen tip) okuma yine başarılı
+            print(f"   ⚠️  Önbellek yazılamadı ({file_path.name}): {e}")
+
+    return RawTable(frame, header_row, applied_mapping, source_hash, False)
+
+
+def read_excel_cached(file_path: Union[str, Path], header: HeaderOption = 0, dtype=None,
+                      engine: Optional[str] = None) -> pd.DataFrame:
+    """`pd.read_excel(file_path, sheet_name=0, ...)` yerine geçen önbellekli okuma"""
+    return load_raw_table(file_path, header=header, dtype=dtype, engine=engine).frame